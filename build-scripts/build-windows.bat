@@ -52,6 +52,8 @@ python -m PyInstaller ^
     --hidden-import "cv2" ^
     --hidden-import "numpy" ^
     --hidden-import "pyaudio" ^
+    --hidden-import "socketio" ^
+    --hidden-import "aiortc" ^
     --distpath "..\dist" ^
     main.py
 
@@ -30,88 +30,167 @@ app.get('/desktop', (req, res) => {
     res.sendFile(path.join(__dirname, 'public', 'desktop.html'));
 });
 
-// Armazenar dispositivos conectados
-const connectedDevices = new Map();
+// Registro de dispositivos conectados
+// Mantém índices por tipo/status e pares explícitos (móvel <-> desktop) para
+// que cada evento seja resolvido em O(1), sem varrer todos os dispositivos
+class DeviceRegistry {
+    constructor() {
+        this.devices = new Map();      // socketId -> dispositivo
+        this.available = {             // tipo -> Map(socketId -> dispositivo) com status 'disponível'
+            mobile: new Map(),
+            desktop: new Map()
+        };
+        this.pairs = new Map();        // socketId -> socketId do par (nos dois sentidos)
+    }
+
+    register(socket, type, name) {
+        const existing = this.devices.get(socket.id);
+        if (existing) {
+            // Re-registro: atualizar nome sem desfazer um pareamento ativo
+            existing.name = name;
+            return existing;
+        }
+
+        const device = {
+            id: socket.id,
+            type: type,
+            name: name,
+            socket: socket,
+            address: socket.handshake.address,
+            status: 'disponível'
+        };
+        this.devices.set(socket.id, device);
+        this.available[type].set(socket.id, device);
+        return device;
+    }
+
+    get(id) {
+        return this.devices.get(id);
+    }
+
+    listAvailable(type) {
+        const list = [];
+        this.available[type].forEach((device) => {
+            list.push({ id: device.id, name: device.name, ip: device.address });
+        });
+        return list;
+    }
+
+    peerOf(id) {
+        return this.pairs.get(id);
+    }
+
+    // Pareia os dois; retorna os pares anteriores que ficaram sem sessão
+    // (para serem avisados) ou null se o pareamento não é possível
+    pair(desktopId, mobileId) {
+        const desktop = this.devices.get(desktopId);
+        const mobile = this.devices.get(mobileId);
+        if (!desktop || !mobile || desktop.type !== 'desktop' || mobile.type !== 'mobile') {
+            return null;
+        }
+
+        // Cada lado só pode ter um par; desfazer pareamentos anteriores
+        const displaced = [this.unpair(desktopId), this.unpair(mobileId)]
+            .filter((peer) => peer && peer.id !== desktopId && peer.id !== mobileId);
+
+        for (const device of [desktop, mobile]) {
+            device.status = 'conectado';
+            this.available[device.type].delete(device.id);
+        }
+        this.pairs.set(desktopId, mobileId);
+        this.pairs.set(mobileId, desktopId);
+        return displaced;
+    }
+
+    // Desfaz o par de `id`; retorna o dispositivo que era o par (ou undefined)
+    unpair(id) {
+        const peerId = this.pairs.get(id);
+        if (peerId === undefined) {
+            return undefined;
+        }
+
+        this.pairs.delete(id);
+        this.pairs.delete(peerId);
+
+        for (const deviceId of [id, peerId]) {
+            const device = this.devices.get(deviceId);
+            if (device) {
+                device.status = 'disponível';
+                this.available[device.type].set(deviceId, device);
+            }
+        }
+        return this.devices.get(peerId);
+    }
+
+    // Remove `id`; retorna { device, peer } (peer é o par que ficou livre, se havia)
+    remove(id) {
+        const device = this.devices.get(id);
+        if (!device) {
+            return { device: undefined, peer: undefined };
+        }
+
+        const peer = this.unpair(id);
+        this.available[device.type].delete(id);
+        this.devices.delete(id);
+        return { device, peer };
+    }
+}
+
+const registry = new DeviceRegistry();
+
+// Sala com todos os desktops, para avisos sobre dispositivos móveis
+const DESKTOPS_ROOM = 'desktops';
 
 io.on('connection', (socket) => {
     console.log('Dispositivo conectado:', socket.id);
 
     // Registro de dispositivo móvel
     socket.on('register-mobile', (data) => {
-        connectedDevices.set(socket.id, {
-            type: 'mobile',
-            name: data.name || 'Android Device',
-            socket: socket,
-            status: 'disponível'
-        });
+        const device = registry.register(socket, 'mobile', data.name || 'Android Device');
         
-        // Notificar todos os desktops sobre novo dispositivo móvel
-        socket.broadcast.emit('mobile-available', {
+        // Notificar desktops sobre novo dispositivo móvel
+        socket.to(DESKTOPS_ROOM).emit('mobile-available', {
             id: socket.id,
-            name: data.name || 'Android Device'
+            name: device.name
         });
         
-        console.log('Dispositivo móvel registrado:', data.name);
+        console.log('Dispositivo móvel registrado:', device.name);
     });
 
     // Registro de dispositivo desktop
     socket.on('register-desktop', (data) => {
-        connectedDevices.set(socket.id, {
-            type: 'desktop',
-            name: data.name || 'PC Windows',
-            socket: socket,
-            status: 'disponível'
-        });
+        const device = registry.register(socket, 'desktop', data.name || 'PC Windows');
+        socket.join(DESKTOPS_ROOM);
         
         // Enviar lista de dispositivos móveis disponíveis
-        const mobileDevices = [];
-        connectedDevices.forEach((device, id) => {
-            if (device.type === 'mobile' && device.status === 'disponível') {
-                mobileDevices.push({
-                    id: id,
-                    name: device.name
-                });
-            }
-        });
-        
-        socket.emit('mobile-devices-list', mobileDevices);
-        console.log('Desktop registrado:', data.name);
+        socket.emit('mobile-devices-list', registry.listAvailable('mobile'));
+        console.log('Desktop registrado:', device.name);
     });
 
     // Descoberta de dispositivos na rede
     socket.on('discover-devices', () => {
-        const devices = [];
-        connectedDevices.forEach((device, id) => {
-            if (device.type === 'desktop' && device.status === 'disponível') {
-                devices.push({
-                    id: id,
-                    name: device.name,
-                    ip: socket.handshake.address
-                });
-            }
-        });
-        socket.emit('devices-discovered', devices);
+        socket.emit('devices-discovered', registry.listAvailable('desktop'));
     });
 
     // Solicitação de conexão do móvel para desktop
     socket.on('request-connection', (data) => {
-        const targetDevice = connectedDevices.get(data.targetId);
+        const targetDevice = registry.get(data.targetId);
         if (targetDevice && targetDevice.type === 'desktop') {
             targetDevice.socket.emit('connection-request', {
                 from: socket.id,
-                fromName: connectedDevices.get(socket.id)?.name || 'Dispositivo Móvel'
+                fromName: registry.get(socket.id)?.name || 'Dispositivo Móvel'
             });
         }
     });
 
     // Aceitar conexão do desktop
     socket.on('accept-connection', (data) => {
-        const mobileDevice = connectedDevices.get(data.mobileId);
-        if (mobileDevice && mobileDevice.type === 'mobile') {
-            // Marcar ambos como conectados
-            connectedDevices.get(socket.id).status = 'conectado';
-            mobileDevice.status = 'conectado';
-            
+        const mobileDevice = registry.get(data.mobileId);
+        const displaced = mobileDevice && registry.pair(socket.id, data.mobileId);
+        if (displaced) {
+            // Quem perdeu o par para este pareamento encerra a sessão antiga
+            displaced.forEach((peer) => peer.socket.emit('peer-disconnected'));
+
             // Notificar ambos sobre conexão estabelecida
             socket.emit('connection-established', { peerId: data.mobileId });
             mobileDevice.socket.emit('connection-established', { peerId: socket.id });
@@ -120,7 +199,7 @@ io.on('connection', (socket) => {
 
     // Rejeitar conexão
     socket.on('reject-connection', (data) => {
-        const mobileDevice = connectedDevices.get(data.mobileId);
+        const mobileDevice = registry.get(data.mobileId);
         if (mobileDevice) {
             mobileDevice.socket.emit('connection-rejected');
         }
@@ -128,36 +207,36 @@ io.on('connection', (socket) => {
 
     // Encerrar streaming
     socket.on('stop-streaming', () => {
-        const device = connectedDevices.get(socket.id);
-        if (device) {
-            device.status = 'disponível';
-            // Notificar o par sobre desconexão
-            connectedDevices.forEach((otherDevice, otherId) => {
-                if (otherId !== socket.id && otherDevice.status === 'conectado') {
-                    otherDevice.socket.emit('peer-disconnected');
-                    otherDevice.status = 'disponível';
-                }
-            });
+        // Notificar apenas o par desta sessão
+        const peer = registry.unpair(socket.id);
+        if (peer) {
+            peer.socket.emit('peer-disconnected');
         }
     });
 
-    // Transmitir ofertas e respostas WebRTC
+    // Transmitir ofertas e respostas WebRTC (para o alvo indicado ou para o par)
     socket.on('webrtc-offer', (data) => {
-        socket.to(data.target).emit('webrtc-offer', {
+        const target = data.target || registry.peerOf(socket.id);
+        if (!target) return;
+        socket.to(target).emit('webrtc-offer', {
             offer: data.offer,
             from: socket.id
         });
     });
 
     socket.on('webrtc-answer', (data) => {
-        socket.to(data.target).emit('webrtc-answer', {
+        const target = data.target || registry.peerOf(socket.id);
+        if (!target) return;
+        socket.to(target).emit('webrtc-answer', {
             answer: data.answer,
             from: socket.id
         });
     });
 
     socket.on('webrtc-ice-candidate', (data) => {
-        socket.to(data.target).emit('webrtc-ice-candidate', {
+        const target = data.target || registry.peerOf(socket.id);
+        if (!target) return;
+        socket.to(target).emit('webrtc-ice-candidate', {
             candidate: data.candidate,
             from: socket.id
         });
@@ -165,37 +244,29 @@ io.on('connection', (socket) => {
 
     // Controles remotos da câmera
     socket.on('camera-control', (data) => {
-        const device = connectedDevices.get(socket.id);
+        const device = registry.get(socket.id);
         if (device && device.type === 'desktop') {
-            // Encontrar dispositivo móvel conectado e enviar comando
-            connectedDevices.forEach((mobileDevice, mobileId) => {
-                if (mobileDevice.type === 'mobile' && mobileDevice.status === 'conectado') {
-                    mobileDevice.socket.emit('camera-control', data);
-                }
-            });
+            // Enviar comando apenas ao dispositivo móvel pareado
+            const peer = registry.get(registry.peerOf(socket.id));
+            if (peer) {
+                peer.socket.emit('camera-control', data);
+            }
         }
     });
 
     // Desconexão
     socket.on('disconnect', () => {
-        const device = connectedDevices.get(socket.id);
+        const { device, peer } = registry.remove(socket.id);
         if (device) {
-            // Notificar outros dispositivos sobre desconexão
+            // Notificar desktops sobre saída do dispositivo móvel
             if (device.type === 'mobile') {
-                socket.broadcast.emit('mobile-disconnected', socket.id);
+                socket.to(DESKTOPS_ROOM).emit('mobile-disconnected', socket.id);
             }
             
             // Se estava conectado, liberar o par
-            if (device.status === 'conectado') {
-                connectedDevices.forEach((otherDevice, otherId) => {
-                    if (otherId !== socket.id && otherDevice.status === 'conectado') {
-                        otherDevice.socket.emit('peer-disconnected');
-                        otherDevice.status = 'disponível';
-                    }
-                });
+            if (peer) {
+                peer.socket.emit('peer-disconnected');
             }
-            
-            connectedDevices.delete(socket.id);
         }
         console.log('Dispositivo desconectado:', socket.id);
     });
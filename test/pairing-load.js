@@ -0,0 +1,256 @@
+// Teste de carga do roteamento por par do servidor de sinalização
+//
+// Sobe o server.js numa porta local, registra N pares móvel/desktop,
+// pareia cada um pelo fluxo normal (request-connection -> accept-connection)
+// e confere que camera-control, os relays WebRTC (oferta, resposta e ICE)
+// e stop-streaming chegam só ao par de quem enviou. Por fim repareia
+// desktops já pareados e confere que o par deslocado é avisado.
+//
+//     npm install
+//     npm run test:load -- --pairs 300
+//
+// Sai com código 1 se algum evento for perdido ou entregue ao socket errado.
+
+const path = require('path');
+const { spawn } = require('child_process');
+
+let io;
+try {
+    io = require('socket.io-client');
+} catch (err) {
+    if (err.code !== 'MODULE_NOT_FOUND') throw err;
+    console.error('socket.io-client não instalado: rode npm install');
+    process.exit(2);
+}
+
+function parseArgs(argv) {
+    const options = { pairs: 200, port: 5099, timeout: 30000 };
+    for (let i = 0; i < argv.length; i++) {
+        const key = argv[i].replace(/^--/, '');
+        if (key in options) {
+            options[key] = Number(argv[++i]);
+        }
+    }
+    return options;
+}
+
+function startServer(port) {
+    return new Promise((resolve, reject) => {
+        const server = spawn(process.execPath, [path.join(__dirname, '..', 'server.js')], {
+            env: { ...process.env, PORT: String(port) },
+            stdio: ['ignore', 'pipe', 'inherit']
+        });
+        server.once('exit', (code) => reject(new Error(`servidor saiu com código ${code}`)));
+        server.stdout.on('data', (chunk) => {
+            // O servidor registra cada conexão; só a linha de início interessa
+            if (chunk.toString().includes('executando na porta')) {
+                resolve(server);
+            }
+        });
+    });
+}
+
+// Espera `check()` ficar verdadeiro; retorna o tempo gasto em ms
+function waitFor(description, check, timeout) {
+    return new Promise((resolve, reject) => {
+        const started = Date.now();
+        const timer = setInterval(() => {
+            if (check()) {
+                clearInterval(timer);
+                resolve(Date.now() - started);
+            } else if (Date.now() - started > timeout) {
+                clearInterval(timer);
+                reject(new Error(`tempo esgotado esperando ${description}`));
+            }
+        }, 10);
+    });
+}
+
+function connect(url, name) {
+    return new Promise((resolve, reject) => {
+        const socket = io(url, { transports: ['websocket'], forceNew: true, reconnection: false });
+        socket.received = {};
+        socket.onAny((event, data) => {
+            (socket.received[event] = socket.received[event] || []).push(data);
+        });
+        socket.once('connect', () => resolve(socket));
+        socket.once('connect_error', (err) => reject(new Error(`${name}: ${err.message}`)));
+    });
+}
+
+function count(sockets, event) {
+    return sockets.reduce((total, socket) => total + (socket.received[event] || []).length, 0);
+}
+
+async function run(options) {
+    const url = `http://127.0.0.1:${options.port}`;
+    const errors = [];
+    const timings = {};
+
+    const pairs = [];
+    for (let i = 0; i < options.pairs; i++) {
+        const [mobile, desktop] = await Promise.all([
+            connect(url, `móvel ${i}`),
+            connect(url, `desktop ${i}`)
+        ]);
+        pairs.push({ index: i, mobile, desktop });
+    }
+    const mobiles = pairs.map((pair) => pair.mobile);
+    const desktops = pairs.map((pair) => pair.desktop);
+    const all = mobiles.concat(desktops);
+
+    // Registro
+    for (const pair of pairs) {
+        pair.desktop.emit('register-desktop', { name: `desktop-${pair.index}` });
+        pair.mobile.emit('register-mobile', { name: `móvel-${pair.index}` });
+    }
+    timings.register = await waitFor('mobile-devices-list',
+        () => count(desktops, 'mobile-devices-list') >= pairs.length, options.timeout);
+
+    // Pareamento: o desktop aceita o pedido que recebeu
+    // (as esperas usam >= para que entregas a mais apareçam nas conferências)
+    for (const pair of pairs) {
+        pair.desktop.on('connection-request', (data) => {
+            pair.desktop.emit('accept-connection', { mobileId: data.from });
+        });
+        pair.mobile.emit('request-connection', { targetId: pair.desktop.id });
+    }
+    timings.pair = await waitFor('connection-established',
+        () => count(all, 'connection-established') >= all.length, options.timeout);
+    for (const pair of pairs) {
+        const requests = pair.desktop.received['connection-request'] || [];
+        if (requests.length !== 1 || requests[0].from !== pair.mobile.id) {
+            errors.push(`par ${pair.index}: ${requests.length} connection-request, esperado 1 do próprio móvel`);
+        }
+        const mobileSide = pair.mobile.received['connection-established'] || [];
+        const desktopSide = pair.desktop.received['connection-established'] || [];
+        if (mobileSide.length !== 1 || mobileSide[0].peerId !== pair.desktop.id
+            || desktopSide.length !== 1 || desktopSide[0].peerId !== pair.mobile.id) {
+            errors.push(`par ${pair.index}: pareado com o dispositivo errado`);
+        }
+    }
+
+    // Controle e relays WebRTC sem alvo explícito: o servidor resolve pelo par
+    for (const pair of pairs) {
+        pair.desktop.emit('camera-control', { pair: pair.index, action: 'zoom' });
+        pair.mobile.emit('webrtc-offer', { offer: { pair: pair.index } });
+        pair.desktop.emit('webrtc-answer', { answer: { pair: pair.index } });
+        pair.mobile.emit('webrtc-ice-candidate', { candidate: { pair: pair.index } });
+        pair.desktop.emit('webrtc-ice-candidate', { candidate: { pair: pair.index } });
+    }
+    timings.relay = await waitFor('relays',
+        () => count(mobiles, 'camera-control') >= pairs.length
+            && count(desktops, 'webrtc-offer') >= pairs.length
+            && count(mobiles, 'webrtc-answer') >= pairs.length
+            && count(all, 'webrtc-ice-candidate') >= all.length,
+        options.timeout);
+
+    const expectations = [
+        ['mobile', 'camera-control', (data) => data.pair, null],
+        ['desktop', 'webrtc-offer', (data) => data.offer.pair, 'mobile'],
+        ['mobile', 'webrtc-answer', (data) => data.answer.pair, 'desktop'],
+        ['mobile', 'webrtc-ice-candidate', (data) => data.candidate.pair, 'desktop'],
+        ['desktop', 'webrtc-ice-candidate', (data) => data.candidate.pair, 'mobile']
+    ];
+    for (const pair of pairs) {
+        for (const [side, event, pairOf, from] of expectations) {
+            const received = pair[side].received[event] || [];
+            if (received.length !== 1 || pairOf(received[0]) !== pair.index
+                || (from && received[0].from !== pair[from].id)) {
+                const strays = received.filter((data) => pairOf(data) !== pair.index).length;
+                errors.push(`par ${pair.index}: ${event} no ${side}: ${received.length} entregas, ${strays} de outros pares`);
+            }
+        }
+    }
+
+    // stop-streaming nos pares pares: só o móvel daquele par é avisado
+    const stopped = pairs.filter((pair) => pair.index % 2 === 0);
+    for (const pair of stopped) {
+        pair.desktop.emit('stop-streaming');
+    }
+    timings.stop = await waitFor('peer-disconnected',
+        () => count(all, 'peer-disconnected') >= stopped.length, options.timeout);
+    // Dar tempo para entregas indevidas aparecerem antes de conferir
+    await new Promise((resolve) => setTimeout(resolve, 200));
+    for (const pair of pairs) {
+        const expected = pair.index % 2 === 0 ? 1 : 0;
+        const got = (pair.mobile.received['peer-disconnected'] || []).length;
+        if (got !== expected || (pair.desktop.received['peer-disconnected'] || []).length) {
+            errors.push(`par ${pair.index}: peer-disconnected entregue errado`);
+        }
+    }
+
+    // Repareamento: o móvel livre de cada par par (parado acima) pede o
+    // desktop do par ímpar seguinte, ainda pareado; o móvel ímpar perde o
+    // par e deve receber peer-disconnected, e ninguém mais
+    const repaired = pairs.filter((pair) => pair.index % 2 === 1);
+    for (const pair of repaired) {
+        pairs[pair.index - 1].mobile.emit('request-connection', { targetId: pair.desktop.id });
+    }
+    // Sem o aviso a espera estoura; as conferências abaixo dizem quem ficou sem ele
+    timings.repair = await waitFor('peer-disconnected do par deslocado',
+        () => count(all, 'peer-disconnected') >= stopped.length + repaired.length,
+        Math.min(options.timeout, 2000)).catch(() => null);
+    await new Promise((resolve) => setTimeout(resolve, 200));
+    for (const pair of repaired) {
+        const displaced = (pair.mobile.received['peer-disconnected'] || []).length;
+        const established = pair.desktop.received['connection-established'] || [];
+        if (displaced !== 1) {
+            errors.push(`par ${pair.index}: móvel deslocado recebeu ${displaced} peer-disconnected, esperado 1`);
+        }
+        if (established.length !== 2 || established[1].peerId !== pairs[pair.index - 1].mobile.id) {
+            errors.push(`par ${pair.index}: desktop não foi repareado com o móvel ${pair.index - 1}`);
+        }
+    }
+    for (const pair of stopped) {
+        // O móvel que mudou de par e o desktop que ficou livre não recebem aviso novo
+        if ((pair.mobile.received['peer-disconnected'] || []).length !== 1
+            || (pair.desktop.received['peer-disconnected'] || []).length) {
+            errors.push(`par ${pair.index}: peer-disconnected indevido no repareamento`);
+        }
+    }
+
+    // Nenhum evento de controle pode ter chegado a mais de um socket
+    for (const event of ['camera-control', 'webrtc-offer', 'webrtc-answer']) {
+        const total = count(all, event);
+        if (total !== pairs.length) {
+            errors.push(`${event}: ${total} entregas para ${pairs.length} pares`);
+        }
+    }
+
+    for (const socket of all) {
+        socket.close();
+    }
+    return { errors, timings };
+}
+
+async function main() {
+    const options = parseArgs(process.argv.slice(2));
+    let server;
+    try {
+        server = await startServer(options.port);
+    } catch (err) {
+        console.error(`Não foi possível iniciar o servidor: ${err.message}`);
+        process.exit(1);
+    }
+    let result;
+    try {
+        result = await run(options);
+    } catch (err) {
+        result = { errors: [err.message], timings: {} };
+    } finally {
+        server.kill();
+    }
+
+    const timings = Object.entries(result.timings)
+        .map(([step, ms]) => (ms === null ? `${step} sem resposta` : `${step} ${ms} ms`)).join(', ');
+    console.log(`${options.pairs} pares (${options.pairs * 2} sockets): ${timings}`);
+    if (result.errors.length) {
+        console.error(`${result.errors.length} erros de roteamento:`);
+        result.errors.slice(0, 20).forEach((error) => console.error(`  ${error}`));
+        process.exit(1);
+    }
+    console.log('Roteamento por par OK');
+}
+
+main();
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modo em segundo plano (janela oculta na bandeja ou minimizada)
+Webcam Remota Universal - Segundo Plano
+
+Com a janela invisível, decodificar e pintar frames é trabalho perdido.
+Neste modo a interface não prepara nada para a tela: só os consumidores
+que guardam o stream (gravação, retransmissão, relay, detector de
+movimento) continuam. O último frame recebido é guardado por referência
+para que a prévia volte já com ele quando a janela reaparece.
+
+A economia é estimada pelo custo médio de exibição medido enquanto a
+janela estava visível, e o uso real de CPU do processo em segundo plano
+é medido pelo psutil (quando disponível).
+"""
+
+import time
+
+class BackgroundMode:
+    """Contabilidade do modo em segundo plano
+
+    `record_cost` é chamado com a janela visível (custo de exibir um frame),
+    `skip` para cada frame não exibido em segundo plano; tudo na thread da
+    interface.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.display_seconds = None  # média móvel do custo de exibir um frame
+        self.pending_frame = None    # último payload recebido em segundo plano
+        self.total_saved_seconds = 0.0
+        self._reset_period()
+
+    def _reset_period(self):
+        self.since = None
+        self.frames_skipped = 0
+        self.saved_seconds = 0.0
+        self._cpu_start = None
+
+    def record_cost(self, seconds):
+        """Informar o custo de exibir um frame (janela visível)"""
+        if self.display_seconds is None:
+            self.display_seconds = seconds
+        else:
+            self.display_seconds += (seconds - self.display_seconds) * 0.1
+
+    def enter(self):
+        """Janela oculta: parar de exibir; retorna False se já estava no modo"""
+        if self.active:
+            return False
+        self.active = True
+        self._reset_period()
+        self.since = time.monotonic()
+        self._cpu_start = self._process_cpu_seconds()
+        return True
+
+    def leave(self):
+        """Janela visível de novo; retorna o resumo do período (ou None)"""
+        if not self.active:
+            return None
+        report = self.report()
+        self.active = False
+        self.total_saved_seconds += self.saved_seconds
+        self._reset_period()
+        return report
+
+    def skip(self, payload):
+        """Frame não exibido; o payload fica guardado (referência) para a volta"""
+        self.pending_frame = payload
+        self.frames_skipped += 1
+        if self.display_seconds is not None:
+            self.saved_seconds += self.display_seconds
+
+    def take_pending_frame(self):
+        """Último frame recebido em segundo plano (uma vez)"""
+        payload, self.pending_frame = self.pending_frame, None
+        return payload
+
+    def _process_cpu_seconds(self):
+        try:
+            # psutil é importado aqui para não pesar na inicialização
+            import psutil
+        except ImportError:
+            return None
+        times = psutil.Process().cpu_times()
+        return times.user + times.system
+
+    def report(self):
+        """Resumo do período atual em segundo plano"""
+        elapsed = time.monotonic() - self.since if self.since is not None else 0.0
+        cpu_percent = None
+        cpu_now = self._process_cpu_seconds() if self._cpu_start is not None else None
+        if cpu_now is not None and elapsed > 0:
+            cpu_percent = 100.0 * (cpu_now - self._cpu_start) / elapsed
+        return {
+            "seconds": elapsed,
+            "frames_skipped": self.frames_skipped,
+            "cpu_saved_seconds": self.saved_seconds,
+            "cpu_saved_percent": 100.0 * self.saved_seconds / elapsed if elapsed > 0 else 0.0,
+            "process_cpu_percent": cpu_percent
+        }
+
+    def describe(self, report=None):
+        """Resumo de uma linha (dica da bandeja e barra de status)"""
+        report = report or self.report()
+        minutes, seconds = divmod(int(report["seconds"]), 60)
+        text = (f"Segundo plano há {minutes}:{seconds:02d}: {report['frames_skipped']} frames sem exibir, "
+                f"~{report['cpu_saved_seconds']:.1f} s de CPU economizados "
+                f"({report['cpu_saved_percent']:.0f}% de um núcleo)")
+        if report["process_cpu_percent"] is not None:
+            text += f"; app usando {report['process_cpu_percent']:.0f}% de CPU"
+        return text
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Captura e reprodução do stream recebido (diagnóstico de desempenho)
+Webcam Remota Universal - Captura de Stream
+
+Grava exatamente os conteúdos enquadrados que chegam do dispositivo
+(frames JPEG/YUV e mensagens de controle) com o instante de chegada,
+para reproduzir depois sem o celular:
+
+    "WRCAP1\\n"  tamanho (4 B)  metadados JSON (handshake, dispositivo, início)
+    registros:  chegada em µs desde o início (8 B)  tamanho (4 B)  conteúdo
+
+A reprodução entrega os mesmos bytes no ReceiverCore (mesmo caminho da
+rede, ver `ReceiverCore.start_replay`) ou por um socket local, como se
+fosse o celular, em tempo real, acelerada ou o mais rápido possível.
+
+    python -m capture record 192.168.0.20 stream.wrcap --seconds 20
+    python -m capture info stream.wrcap
+    python -m capture bench stream.wrcap --speed 0      decodificar/desenhar/gravar
+    python -m capture serve stream.wrcap --port 5000    fingir ser o celular
+"""
+
+import sys
+import json
+import time
+import queue
+import socket
+import struct
+import argparse
+import tempfile
+from pathlib import Path
+from threading import Thread
+
+MAGIC = b"WRCAP1\n"
+RECORD_HEADER = struct.Struct("!QI")
+
+class StreamCapture:
+    """Grava os conteúdos recebidos num arquivo .wrcap
+
+    Como o MjpegRecorder, quem chama só enfileira e uma thread escreve;
+    o instante de chegada é tomado na hora do `write`, então a escrita
+    não altera os tempos gravados. Se o disco não acompanhar, conteúdos
+    são descartados e contados em `dropped` (a captura deixa de ser exata).
+    """
+
+    def __init__(self, path, metadata=None, max_queue=600):
+        self.path = Path(path).with_suffix(".wrcap")
+        self.metadata = dict(metadata or {})
+
+        self.records = 0
+        self.bytes_written = 0
+        self.dropped = 0
+        self.error = None
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start = None
+
+    @property
+    def active(self):
+        return self._thread is not None
+
+    def start(self):
+        """Abrir o arquivo e iniciar a thread de escrita"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._start = time.perf_counter()
+        self.metadata.setdefault("started_at", time.time())
+        self._thread = Thread(target=self._writer, daemon=True, name="capture")
+        self._thread.start()
+        return self.path
+
+    def write(self, payload, arrival=None):
+        """Enfileirar um conteúdo recebido (`arrival`: time.perf_counter)"""
+        if not self._thread:
+            return
+        offset_us = int(((arrival or time.perf_counter()) - self._start) * 1e6)
+        try:
+            self._queue.put_nowait((offset_us, payload))
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Gravar o que está na fila e fechar o arquivo"""
+        if not self._thread:
+            return self.path
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        return self.path
+
+    def _writer(self):
+        try:
+            with open(self.path, "wb") as output:
+                header = json.dumps(self.metadata).encode("utf-8")
+                output.write(MAGIC + struct.pack("!I", len(header)) + header)
+                while True:
+                    item = self._queue.get()
+                    if item is None:
+                        break
+                    offset_us, payload = item
+                    output.write(RECORD_HEADER.pack(offset_us, len(payload)))
+                    output.write(payload)
+                    self.records += 1
+                    self.bytes_written += RECORD_HEADER.size + len(payload)
+        except Exception as e:
+            self.error = str(e)
+            print(f"Erro na captura: {e}")
+            while self._queue.get() is not None:
+                pass
+
+def read_metadata(path):
+    """Metadados de uma captura (handshake, dispositivo, início)"""
+    with open(path, "rb") as source:
+        return _read_header(source)
+
+def _read_header(source):
+    if source.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{source.name} não é uma captura do stream")
+    size = struct.unpack("!I", source.read(4))[0]
+    return json.loads(source.read(size).decode("utf-8"))
+
+def iter_records(path):
+    """(segundos desde o início, conteúdo) de cada registro, em ordem"""
+    with open(path, "rb") as source:
+        _read_header(source)
+        while True:
+            header = source.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            offset_us, size = RECORD_HEADER.unpack(header)
+            payload = source.read(size)
+            if len(payload) < size:
+                return  # Captura interrompida no meio de um registro
+            yield offset_us / 1e6, payload
+
+def paced(records, speed=1.0, should_continue=None):
+    """Repassar registros no ritmo original dividido por `speed` (0: sem espera)"""
+    start = time.perf_counter()
+    for offset, payload in records:
+        if should_continue and not should_continue():
+            return
+        if speed:
+            wait = start + offset / speed - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+        yield offset, payload
+
+def summarize(path):
+    """Contagens e taxas de uma captura"""
+    from control import is_control_payload
+    from yuv import is_raw_payload
+
+    metadata = read_metadata(path)
+    counts = {"jpeg": 0, "raw": 0, "control": 0}
+    total_bytes = 0
+    duration = 0.0
+    for offset, payload in iter_records(path):
+        kind = "control" if is_control_payload(payload) else "raw" if is_raw_payload(payload) else "jpeg"
+        counts[kind] += 1
+        total_bytes += len(payload) + 4
+        duration = offset
+    frames = counts["jpeg"] + counts["raw"]
+    return {
+        "device_name": metadata.get("device_name"),
+        "started_at": metadata.get("started_at"),
+        "duration": duration,
+        "frames": frames,
+        "counts": counts,
+        "bytes": total_bytes,
+        "fps": frames / duration if duration else 0.0,
+        "mbps": total_bytes * 8 / duration / 1e6 if duration else 0.0
+    }
+
+# Reprodução por socket: o arquivo faz o papel do celular
+
+def serve_capture(path, host="127.0.0.1", port=5000, speed=1.0, ready=None):
+    """Aceitar um receptor e enviar a captura como o dispositivo enviou
+
+    Responde ao handshake com a resposta gravada; sondas de enlace
+    (linkprobe) são recusadas fechando a conexão, como um app antigo.
+    """
+    from control import decode_message
+    from linkprobe import read_payload
+
+    metadata = read_metadata(path)
+    response = json.dumps(metadata.get("handshake") or
+                          {"status": "connected", "device_name": metadata.get("device_name", "Captura")})
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind((host, port))
+    server.listen(1)
+    if ready:
+        ready(server.getsockname()[1])
+    try:
+        while True:
+            client, _ = server.accept()
+            with client:
+                request = decode_message(read_payload(client) or b"")
+                if not request or request["type"] != "connection_request":
+                    continue
+                client.sendall(struct.pack("!I", len(response)) + response.encode("utf-8"))
+                try:
+                    for _, payload in paced(iter_records(path), speed):
+                        client.sendall(struct.pack("!I", len(payload)) + payload)
+                    # Fechar só o envio e ler o que o receptor mandou (controle):
+                    # fechar com dados não lidos descartaria os últimos frames (RST)
+                    client.shutdown(socket.SHUT_WR)
+                    client.settimeout(2.0)
+                    while client.recv(65536):
+                        pass
+                except OSError:
+                    pass
+                return
+    finally:
+        server.close()
+
+# Benchmark: decodificar, desenhar e gravar cada frame da captura
+
+def benchmark(path, speed=0.0, target_size=(1280, 720), record=True):
+    """Custo por etapa com a captura entregue pelo ReceiverCore
+
+    Os frames passam pelo mesmo caminho de uma conexão real
+    (`start_replay`); com `speed` 0 mede a capacidade máxima, com 1 mede
+    o comportamento no ritmo em que os frames chegaram.
+    """
+    import numpy as np
+    import cv2
+    from receiver_core import ReceiverCore
+    from recorder import MjpegRecorder
+    from framepool import FramePool
+    from viewport import Viewport, render_roi
+    from yuv import is_raw_payload, YuvConverter
+
+    pool = FramePool()
+    converter = YuvConverter(pool)
+    viewport = Viewport()
+    target_width, target_height = target_size
+    stages = {"decode": [], "render": [], "record": []}
+    output_dir = tempfile.TemporaryDirectory(prefix="wrcap-")
+    recorder = MjpegRecorder(Path(output_dir.name) / "replay") if record else None
+    if recorder:
+        recorder.start()
+
+    core = ReceiverCore()
+
+    def on_data(payload):
+        start = time.perf_counter()
+        if is_raw_payload(payload):
+            frame = converter.to_bgr(payload)
+        else:
+            frame = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+        decoded = time.perf_counter()
+        if frame is None:
+            return
+        render_roi(frame, viewport, target_size, out=pool.acquire((target_height, target_width, 3)))
+        rendered = time.perf_counter()
+        if recorder:
+            if is_raw_payload(payload):
+                recorder.write_frame(frame)
+            else:
+                recorder.write_jpeg(payload)
+        recorded = time.perf_counter()
+        stages["decode"].append(decoded - start)
+        stages["render"].append(rendered - decoded)
+        stages["record"].append(recorded - rendered)
+
+    core.on("data_received", on_data)
+    start = time.perf_counter()
+    core.start_replay(path, speed)
+    core.receiver_thread.join()
+    elapsed = time.perf_counter() - start
+    if recorder:
+        recorder.stop()
+    output_dir.cleanup()
+
+    def percentiles(values):
+        values = sorted(values)
+        if not values:
+            return {"median_ms": 0.0, "p95_ms": 0.0}
+        return {"median_ms": 1000.0 * values[len(values) // 2],
+                "p95_ms": 1000.0 * values[int(0.95 * (len(values) - 1))]}
+
+    frames = len(stages["decode"])
+    return {
+        "frames": frames,
+        "seconds": elapsed,
+        "fps": frames / elapsed if elapsed else 0.0,
+        "stages": {name: percentiles(values) for name, values in stages.items()},
+        "recorder_dropped": recorder.frames_dropped if recorder else 0,
+        "pool_hit_rate": pool.hit_rate
+    }
+
+def record_from_device(host, path, port=None, seconds=10.0):
+    """Conectar ao dispositivo (ou emulador) sem interface e capturar o stream"""
+    from receiver_core import ReceiverCore
+
+    core = ReceiverCore()
+    core.connect_to_device(host, "wifi", port)
+    if not core.connected:
+        return None
+    capture = core.start_capture(path)
+    time.sleep(seconds)
+    core.stop_capture()
+    core.disconnect()
+    return capture
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="capture", description="Captura e reprodução do stream")
+    commands = parser.add_subparsers(dest="command")
+
+    record = commands.add_parser("record", help="capturar o stream de um dispositivo")
+    record.add_argument("host")
+    record.add_argument("file")
+    record.add_argument("--port", type=int, default=None)
+    record.add_argument("--seconds", type=float, default=10.0)
+
+    info = commands.add_parser("info", help="resumo de uma captura")
+    info.add_argument("file")
+
+    bench = commands.add_parser("bench", help="decodificar, desenhar e gravar a captura")
+    bench.add_argument("file")
+    bench.add_argument("--speed", type=float, default=0.0,
+                       help="1 = tempo real, 4 = 4x mais rápido, 0 = o mais rápido possível")
+    bench.add_argument("--target", default="1280x720", help="tamanho da área de vídeo (LxA)")
+    bench.add_argument("--no-record", action="store_true", help="não medir a gravação")
+
+    serve = commands.add_parser("serve", help="enviar a captura a um receptor, como o celular")
+    serve.add_argument("file")
+    serve.add_argument("--port", type=int, default=5000)
+    serve.add_argument("--speed", type=float, default=1.0)
+
+    args = parser.parse_args((argv or sys.argv)[1:])
+
+    if args.command == "record":
+        capture = record_from_device(args.host, args.file, args.port, args.seconds)
+        if capture is None:
+            print(f"Não foi possível conectar a {args.host}")
+            return 1
+        print(f"{capture.records} registros, {capture.bytes_written / 1024 / 1024:.1f} MB em {capture.path}"
+              + (f" ({capture.dropped} descartados)" if capture.dropped else ""))
+    elif args.command == "info":
+        print(json.dumps(summarize(args.file), indent=2, ensure_ascii=False))
+    elif args.command == "bench":
+        target_size = tuple(int(value) for value in args.target.split("x"))
+        print(json.dumps(benchmark(args.file, args.speed, target_size, not args.no_record), indent=2))
+    elif args.command == "serve":
+        serve_capture(args.file, "0.0.0.0", args.port, args.speed,
+                      ready=lambda port: print(f"Aguardando receptor na porta {port}"))
+    else:
+        parser.print_help()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
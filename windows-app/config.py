@@ -6,99 +6,298 @@ Webcam Remota Universal - Configurações
 """
 
 import os
+import copy
 import json
+import atexit
+import tempfile
 from pathlib import Path
+from threading import RLock, Timer
+
+DEFAULT_CONFIG = {
+    "video": {
+        "default_resolution": "720p",
+        "default_fps": 30,
+        "default_bitrate": 2000,
+        "auto_quality": True,
+        "skip_duplicates": True,
+        "near_duplicate_threshold": 0.0,
+        "raw_mode": False,
+        "raw_format": "nv21",
+        "raw_direct_display": True,
+        "background_keepalive": False,
+        "background_fps": 1
+    },
+    "audio": {
+        "enabled": True,
+        "volume": 80,
+        "sample_rate": 44100
+    },
+    "network": {
+        "discovery_port": 8888,
+        "streaming_port": 5000,
+        "timeout": 10,
+        "signaling_url": "http://localhost:5000",
+        "discovery_responder": True,
+        "auto_reconnect": False,
+        "device_ttl_days": 30,
+        "probe_link": True,
+        "probe_timeout": 0.5,
+        "probe_max_age_hours": 24,
+        "transport_profile": "balanced"
+    },
+    "watchdog": {
+        "enabled": True,
+        "socket_seconds": 3.0,
+        "decode_seconds": 2.0,
+        "paint_seconds": 2.0,
+        "recorder_seconds": 5.0,
+        "reconnect_attempts": 5
+    },
+    "restream": {
+        "enabled": False,
+        "host": "0.0.0.0",
+        "port": 8081
+    },
+    "relay": {
+        "enabled": False,
+        "port": 5001
+    },
+    "motion": {
+        "enabled": False,
+        "sensitivity": 50,
+        "min_area_percent": 0.5,
+        "regions": [],
+        "reduction": 4,
+        "analysis_fps": 10,
+        "pre_roll_seconds": 3.0,
+        "post_roll_seconds": 5.0
+    },
+    "ui": {
+        "remember_window_size": True,
+        "minimize_to_tray": True,
+        "auto_start_discovery": False
+    },
+    "recording": {
+        "default_format": "mp4",
+        "default_quality": "alta",
+        "save_location": str(Path.home() / "Videos" / "WebcamRemota")
+    }
+}
+
+def atomic_write_json(path, data):
+    """Gravar JSON de forma atômica (arquivo temporário + rename)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def deep_merge(defaults, overrides):
+    """Mesclar dicionários recursivamente (valores de `overrides` têm prioridade)
+
+    O resultado não compartilha dicionários com `defaults`: alterar a
+    configuração carregada não pode mudar os padrões.
+    """
+    merged = copy.deepcopy(defaults)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+class ConfigValue:
+    """Acesso tipado e em cache a uma chave de configuração
+
+    O valor é lido uma vez e atualizado por notificação quando a chave muda,
+    então ler `.value` em caminhos quentes é apenas um acesso a atributo.
+    """
+
+    def __init__(self, config, key_path, value_type=None, default=None):
+        self.key_path = key_path
+        self.value_type = value_type
+        self.default = default
+        self.value = self._convert(config.get(key_path, default))
+        config.subscribe(key_path, self._on_changed)
+
+    def _convert(self, value):
+        if value is None or self.value_type is None:
+            return value
+        try:
+            return self.value_type(value)
+        except (TypeError, ValueError):
+            return self.default
+
+    def _on_changed(self, key_path, value):
+        self.value = self._convert(value if value is not None else self.default)
 
 class Config:
-    """Gerenciador de configurações do aplicativo"""
-    
-    def __init__(self):
+    """Gerenciador de configurações do aplicativo
+
+    Alterações feitas com `set` ficam em memória e são gravadas em lote após
+    `save_delay` segundos sem novas alterações, de forma atômica (arquivo
+    temporário + rename).
+    """
+
+    def __init__(self, save_delay=0.5):
         self.config_dir = Path.home() / ".webcamremota"
         self.config_file = self.config_dir / "config.json"
-        self.ensure_config_dir()
+        self.save_delay = save_delay
+
+        self._lock = RLock()
+        self._save_lock = RLock()  # Serializa gravações (timer x flush na saída)
+        self._cache = {}
+        self._subscribers = {}
+        self._save_timer = None
+        self._dirty = False
+
         self.load_config()
-    
+        atexit.register(self.flush)
+
     def ensure_config_dir(self):
         """Criar diretório de configuração se não existir"""
         self.config_dir.mkdir(exist_ok=True)
-    
+
     def load_config(self):
         """Carregar configurações do arquivo"""
-        default_config = {
-            "video": {
-                "default_resolution": "720p",
-                "default_fps": 30,
-                "default_bitrate": 2000,
-                "auto_quality": True
-            },
-            "audio": {
-                "enabled": True,
-                "volume": 80,
-                "sample_rate": 44100
-            },
-            "network": {
-                "discovery_port": 8888,
-                "streaming_port": 5000,
-                "timeout": 10
-            },
-            "ui": {
-                "remember_window_size": True,
-                "minimize_to_tray": True,
-                "auto_start_discovery": False
-            },
-            "recording": {
-                "default_format": "mp4",
-                "default_quality": "alta",
-                "save_location": str(Path.home() / "Videos" / "WebcamRemota")
-            }
-        }
-        
         if self.config_file.exists():
             try:
                 with open(self.config_file, 'r', encoding='utf-8') as f:
                     loaded_config = json.load(f)
-                    # Merge with defaults for missing keys
-                    self.config = {**default_config, **loaded_config}
+                    # Merge recursivo com os padrões para chaves ausentes
+                    self.config = deep_merge(DEFAULT_CONFIG, loaded_config)
             except Exception as e:
                 print(f"Erro ao carregar configurações: {e}")
-                self.config = default_config
+                self.config = deep_merge(DEFAULT_CONFIG, {})
         else:
-            self.config = default_config
-            self.save_config()
-    
+            # Padrões ficam só em memória; o arquivo é criado na primeira alteração
+            self.config = deep_merge(DEFAULT_CONFIG, {})
+
+        self._cache.clear()
+
     def save_config(self):
-        """Salvar configurações no arquivo"""
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"Erro ao salvar configurações: {e}")
-    
+        """Salvar configurações no arquivo (escrita atômica)"""
+        with self._save_lock:
+            with self._lock:
+                # Cópia profunda barata via JSON para gravar fora do lock
+                data = json.loads(json.dumps(self.config))
+                self._dirty = False
+
+            try:
+                atomic_write_json(self.config_file, data)
+            except Exception as e:
+                print(f"Erro ao salvar configurações: {e}")
+
+    def flush(self):
+        """Gravar imediatamente alterações pendentes
+
+        Se uma gravação do temporizador estiver em andamento, espera ela
+        terminar (importante na saída, quando a thread seria interrompida).
+        """
+        with self._lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+
+        with self._save_lock:
+            if self._dirty:
+                self.save_config()
+
     def get(self, key_path, default=None):
         """Obter valor de configuração usando caminho de chave (ex: 'video.resolution')"""
-        keys = key_path.split('.')
-        value = self.config
-        
-        for key in keys:
-            if isinstance(value, dict) and key in value:
-                value = value[key]
-            else:
-                return default
-                
-        return value
-    
+        try:
+            return self._cache[key_path]
+        except KeyError:
+            pass
+
+        with self._lock:
+            value = self.config
+            for key in key_path.split('.'):
+                if isinstance(value, dict) and key in value:
+                    value = value[key]
+                else:
+                    return default
+
+            self._cache[key_path] = value
+            return value
+
+    def accessor(self, key_path, value_type=None, default=None):
+        """Criar acesso tipado e em cache para uma chave (ver ConfigValue)"""
+        return ConfigValue(self, key_path, value_type, default)
+
     def set(self, key_path, value):
         """Definir valor de configuração usando caminho de chave"""
         keys = key_path.split('.')
-        config_ref = self.config
-        
-        for key in keys[:-1]:
-            if key not in config_ref:
-                config_ref[key] = {}
-            config_ref = config_ref[key]
-        
-        config_ref[keys[-1]] = value
-        self.save_config()
+
+        with self._lock:
+            config_ref = self.config
+            for key in keys[:-1]:
+                if not isinstance(config_ref.get(key), dict):
+                    config_ref[key] = {}
+                config_ref = config_ref[key]
+
+            if config_ref.get(keys[-1]) == value:
+                return
+
+            config_ref[keys[-1]] = value
+            self._cache.clear()
+            self._schedule_save()
+
+        self._notify(key_path)
+
+    def subscribe(self, key_path, callback):
+        """Registrar callback(key_path, valor) chamado quando a chave ou um filho/pai muda
+
+        O callback é chamado na thread que executou `set`.
+        """
+        with self._lock:
+            self._subscribers.setdefault(key_path, []).append(callback)
+
+    def unsubscribe(self, key_path, callback):
+        """Remover callback registrado com `subscribe`"""
+        with self._lock:
+            callbacks = self._subscribers.get(key_path, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def _schedule_save(self):
+        """Reiniciar o temporizador de gravação (com o lock adquirido)"""
+        self._dirty = True
+        if self._save_timer:
+            self._save_timer.cancel()
+        self._save_timer = Timer(self.save_delay, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def _notify(self, changed_path):
+        """Notificar inscritos afetados pela alteração de `changed_path`"""
+        with self._lock:
+            targets = [
+                (path, list(callbacks))
+                for path, callbacks in self._subscribers.items()
+                if callbacks and (
+                    path == changed_path
+                    or path.startswith(changed_path + '.')
+                    or changed_path.startswith(path + '.')
+                )
+            ]
+
+        for path, callbacks in targets:
+            value = self.get(path)
+            for callback in callbacks:
+                try:
+                    callback(path, value)
+                except Exception as e:
+                    print(f"Erro ao notificar alteração de '{path}': {e}")
 
 # Instância global de configuração
-config = Config()
\ No newline at end of file
+config = Config()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mensagens de controle no canal Wi-Fi e mapeamento de região de interesse
+Webcam Remota Universal - Canal de Controle
+
+O canal Wi-Fi já é enquadrado (4 bytes de tamanho + conteúdo). Mensagens
+de controle usam o mesmo enquadramento com conteúdo JSON, como o
+handshake; do dispositivo para o PC elas se distinguem dos frames pelo
+primeiro byte (`{` em vez do `FF D8` do JPEG).
+
+Região de interesse (ROI), em frações do frame completo do sensor:
+
+    PC -> dispositivo  {"type": "set_roi", "roi": [x, y, largura, altura]}
+                       {"type": "set_roi", "roi": null}        (frame inteiro)
+    dispositivo -> PC  {"type": "roi", "roi": [...], "source_size": [L, A]}
+
+O dispositivo responde com "roi" imediatamente antes do primeiro frame
+recortado, então a ordem do TCP garante que o PC sabe a que região cada
+frame corresponde. Dispositivos que não conhecem "set_roi" simplesmente
+ignoram a mensagem e o PC continua ampliando localmente.
+
+Formato dos frames (ver yuv.py), com a mesma garantia de ordem:
+
+    PC -> dispositivo  {"type": "set_format", "format": "jpeg" | "nv21" | "i420"}
+    dispositivo -> PC  {"type": "format", "format": "..."}
+"""
+
+import json
+import struct
+
+FULL_FRAME = (0.0, 0.0, 1.0, 1.0)
+
+STREAM_FORMATS = ("jpeg", "nv21", "i420")
+
+def encode_message(message):
+    """Enquadrar mensagem de controle (mesmo formato do handshake)"""
+    payload = json.dumps(message).encode("utf-8")
+    return struct.pack("!I", len(payload)) + payload
+
+def is_control_payload(payload):
+    """Conteúdo enquadrado é mensagem de controle (JSON) e não frame?"""
+    return payload[:1] == b"{"
+
+def decode_message(payload):
+    """Interpretar mensagem de controle (None se inválida)"""
+    try:
+        message = json.loads(payload.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        return None
+    return message if isinstance(message, dict) and "type" in message else None
+
+def normalize_roi(roi):
+    """Validar ROI (x, y, largura, altura em frações) e prender ao frame"""
+    if roi is None:
+        return FULL_FRAME
+    x, y, width, height = (float(value) for value in roi)
+    width = min(max(width, 0.01), 1.0)
+    height = min(max(height, 0.01), 1.0)
+    x = min(max(x, 0.0), 1.0 - width)
+    y = min(max(y, 0.0), 1.0 - height)
+    return (x, y, width, height)
+
+def roi_message(roi):
+    """Mensagem "set_roi" (None ou frame inteiro pedem o frame completo)"""
+    roi = normalize_roi(roi)
+    return {"type": "set_roi", "roi": None if roi == FULL_FRAME else [round(v, 4) for v in roi]}
+
+def format_message(fmt):
+    """Mensagem "set_format" pedindo JPEG ou frames YUV sem compressão"""
+    if fmt not in STREAM_FORMATS:
+        raise ValueError(f"Formato desconhecido: {fmt}")
+    return {"type": "set_format", "format": fmt}
+
+class RoiMapping:
+    """Relação entre o frame recebido (recortado) e o frame completo do sensor
+
+    Sobreposições (foco por toque, regiões de movimento, anotações) são
+    definidas no frame completo; `to_frame`/`to_source` convertem pontos
+    entre os dois sistemas, em frações (0-1).
+    """
+
+    def __init__(self, roi=FULL_FRAME, source_size=None):
+        self.roi = normalize_roi(roi)
+        self.source_size = tuple(source_size) if source_size else None
+
+    @property
+    def cropped(self):
+        return self.roi != FULL_FRAME
+
+    def to_source(self, x, y):
+        """Ponto no frame recebido -> ponto no frame completo"""
+        roi_x, roi_y, roi_width, roi_height = self.roi
+        return roi_x + x * roi_width, roi_y + y * roi_height
+
+    def to_frame(self, x, y):
+        """Ponto no frame completo -> ponto no frame recebido (pode sair de 0-1)"""
+        roi_x, roi_y, roi_width, roi_height = self.roi
+        return (x - roi_x) / roi_width, (y - roi_y) / roi_height
+
+    def source_pixels(self):
+        """Retângulo da ROI em pixels do sensor (None se o tamanho não é conhecido)"""
+        if not self.source_size:
+            return None
+        width, height = self.source_size
+        roi_x, roi_y, roi_width, roi_height = self.roi
+        return (int(roi_x * width), int(roi_y * height),
+                int(roi_width * width), int(roi_height * height))
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resposta à descoberta e diretório de dispositivos conhecidos
+Webcam Remota Universal - Descoberta
+"""
+
+import json
+import time
+import socket
+import platform
+from pathlib import Path
+from threading import Thread, Lock, Event, Timer
+
+from config import atomic_write_json
+
+APP_VERSION = "1.0.0"
+
+# Capacidades anunciadas pelo receptor PC
+PC_CAPABILITIES = ["video", "audio", "camera_control", "recording"]
+
+class DiscoveryResponder:
+    """Responde imediatamente aos `discovery_request` enviados pelo Android
+
+    Escuta na porta de descoberta (UDP 8888) em segundo plano. O formato da
+    resposta segue o que `DeviceDiscovery.parseDeviceResponse` espera no app
+    Android (capabilities vai como string JSON).
+    """
+
+    def __init__(self, discovery_port=8888, streaming_port=5000, device_name=None,
+                 capabilities=None):
+        self.discovery_port = discovery_port
+        self.streaming_port = streaming_port
+        self.device_name = device_name or f"PC Windows - {platform.node()}"
+        self.capabilities = capabilities or PC_CAPABILITIES
+
+        # Callback chamado na thread do respondedor: (nome, ip, dados da requisição)
+        self.on_request = None
+
+        self.requests_answered = 0
+        self._sock = None
+        self._thread = None
+        self._running = Event()
+
+    def start(self):
+        """Abrir a porta de descoberta e começar a responder"""
+        if self._thread and self._thread.is_alive():
+            return True
+
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            sock.bind(("", self.discovery_port))
+            sock.settimeout(1.0)
+        except OSError as e:
+            print(f"Erro ao abrir porta de descoberta {self.discovery_port}: {e}")
+            return False
+
+        self._sock = sock
+        self._running.set()
+        self._thread = Thread(target=self._worker, daemon=True, name="discovery-responder")
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Parar de responder e liberar a porta"""
+        self._running.clear()
+        if self._thread:
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    def _build_response(self):
+        return json.dumps({
+            "type": "discovery_response",
+            "device_type": "pc_windows",
+            "device_name": self.device_name,
+            "name": self.device_name,
+            "port": self.streaming_port,
+            "app_version": APP_VERSION,
+            "capabilities": json.dumps(self.capabilities),
+            "timestamp": int(time.time() * 1000)
+        }).encode('utf-8')
+
+    def _worker(self):
+        try:
+            while self._running.is_set():
+                try:
+                    data, addr = self._sock.recvfrom(2048)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+
+                try:
+                    request = json.loads(data.decode('utf-8'))
+                except (UnicodeDecodeError, ValueError):
+                    continue
+
+                # Ignorar nossas próprias requisições e outros PCs
+                if request.get("type") != "discovery_request" or request.get("device_type") == "pc_windows":
+                    continue
+
+                try:
+                    self._sock.sendto(self._build_response(), addr)
+                    self.requests_answered += 1
+                except OSError as e:
+                    print(f"Erro ao responder descoberta para {addr[0]}: {e}")
+                    continue
+
+                if self.on_request:
+                    name = request.get("device_name") or request.get("name") or "Android Device"
+                    try:
+                        self.on_request(name, addr[0], request)
+                    except Exception as e:
+                        # Um pacote malformado não pode derrubar o respondedor
+                        print(f"Erro ao processar descoberta de {addr[0]}: {e}")
+        finally:
+            self._sock.close()
+            self._sock = None
+
+def parse_capabilities(value):
+    """Normalizar capacidades (lista ou string JSON, como envia o Android)"""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+            if isinstance(parsed, list):
+                return parsed
+        except ValueError:
+            pass
+    return []
+
+class DeviceDirectory:
+    """Diretório persistente de dispositivos já vistos
+
+    Guarda último IP, porta, último contato e capacidades negociadas, para
+    reconectar na inicialização sem esperar uma nova descoberta. Entradas
+    mais antigas que o TTL são descartadas. Gravações são agrupadas.
+
+    As entradas são identificadas pelo endereço (IP:porta), ou pelo
+    `device_id` quando o dispositivo envia um; o nome é só para exibição,
+    já que dois celulares do mesmo modelo informam o mesmo nome.
+    """
+
+    def __init__(self, path=None, ttl_days=30, save_delay=1.0, default_port=5000):
+        self.path = Path(path) if path else Path.home() / ".webcamremota" / "devices.json"
+        self.ttl = ttl_days * 24 * 3600
+        self.save_delay = save_delay
+        # Porta assumida quando o contato não informa (pedido de descoberta)
+        self.default_port = default_port
+
+        self._lock = Lock()
+        self._save_lock = Lock()  # Serializa gravações (timer x flush na saída)
+        self._devices = {}
+        self._save_timer = None
+        self.load()
+
+    def load(self):
+        """Carregar diretório do disco, descartando entradas expiradas"""
+        devices = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    devices = json.load(f)
+            except Exception as e:
+                print(f"Erro ao carregar diretório de dispositivos: {e}")
+
+        # Arquivos antigos usavam o nome como chave: reindexar pelo endereço
+        devices = {self.key(entry.get("last_ip"), entry.get("port"), entry.get("device_id")): entry
+                   for entry in devices.values() if entry.get("last_ip")}
+
+        with self._lock:
+            self._devices = devices
+            self._prune()
+
+    def key(self, ip, port=None, device_id=None):
+        """Chave da entrada de um dispositivo"""
+        if device_id:
+            return f"id:{device_id}"
+        return f"{ip}:{port or self.default_port}"
+
+    def remember(self, name, ip, port=None, connection_type="wifi", capabilities=None,
+                 device_id=None, **extra):
+        """Registrar/atualizar contato com um dispositivo; retorna a chave da entrada"""
+        key = self.key(ip, port, device_id)
+        with self._lock:
+            entry = self._devices.setdefault(key, {})
+            entry["name"] = name
+            if device_id:
+                entry["device_id"] = device_id
+            entry["last_ip"] = ip
+            entry["last_seen"] = time.time()
+            entry["connection_type"] = connection_type
+            if port is not None:
+                entry["port"] = port
+            if capabilities is not None:
+                entry["capabilities"] = capabilities
+            entry.update(extra)
+            self._schedule_save()
+        return key
+
+    def forget(self, key):
+        """Remover dispositivo do diretório"""
+        with self._lock:
+            if self._devices.pop(key, None) is not None:
+                self._schedule_save()
+
+    def get(self, key):
+        """Obter entrada pela chave (ou None)"""
+        with self._lock:
+            entry = self._devices.get(key)
+            return dict(entry) if entry else None
+
+    def lookup(self, ip, port=None):
+        """Entrada de quem está em `ip` (e `port`, se informada); a mais recente"""
+        with self._lock:
+            matches = [entry for entry in self._devices.values()
+                       if entry.get("last_ip") == ip
+                       and (port is None or (entry.get("port") or self.default_port) == port)]
+            if not matches:
+                return None
+            return dict(max(matches, key=lambda entry: entry.get("last_seen", 0)))
+
+    def known_devices(self):
+        """Dispositivos ainda válidos, do contato mais recente para o mais antigo"""
+        with self._lock:
+            self._prune()
+            return sorted((dict(entry) for entry in self._devices.values()),
+                          key=lambda entry: entry.get("last_seen", 0), reverse=True)
+
+    def flush(self):
+        """Gravar imediatamente alterações pendentes"""
+        with self._lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+
+        with self._save_lock:
+            with self._lock:
+                data = {key: dict(entry) for key, entry in self._devices.items()}
+            try:
+                atomic_write_json(self.path, data)
+            except Exception as e:
+                print(f"Erro ao salvar diretório de dispositivos: {e}")
+
+    def _prune(self):
+        """Remover entradas expiradas (com o lock adquirido)"""
+        limit = time.time() - self.ttl
+        expired = [key for key, entry in self._devices.items() if entry.get("last_seen", 0) < limit]
+        for key in expired:
+            del self._devices[key]
+
+    def _schedule_save(self):
+        """Reiniciar temporizador de gravação (com o lock adquirido)"""
+        if self._save_timer:
+            self._save_timer.cancel()
+        self._save_timer = Timer(self.save_delay, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emulador do dispositivo Android no protocolo Wi-Fi (para desenvolvimento)
+Webcam Remota Universal - Emulador de Dispositivo
+
+Aceita uma conexão como o app faria (handshake JSON enquadrado), envia
+frames JPEG de uma cena sintética em alta resolução e atende pedidos de
+região de interesse ("set_roi"): só a região pedida é recortada do frame
+do "sensor" e codificada no tamanho de saída. Com "set_format" passa a
+enviar os planos YUV sem compressão, como o modo USB do app. Anuncia
+capacidades no handshake e aplica "configure" (formato, resolução, fps e
+taxa de bits) durante o stream. Também responde à sonda de enlace
+(linkprobe.py) na mesma porta.
+
+    python -m fake_sender --port 5000           emular um celular
+
+Os testes de ROI e do modo YUV (tests/test_fake_sender.py) conectam um
+receptor de verdade a este emulador.
+"""
+
+import sys
+import time
+import socket
+import struct
+import argparse
+from threading import Thread, Event, Lock
+
+from startup import lazy_import
+from control import (FULL_FRAME, STREAM_FORMATS, encode_message, decode_message,
+                     normalize_roi, RoiMapping)
+from yuv import pack_raw_frame, bgr_to_yuv
+from negotiation import RESOLUTIONS, HEADER_VERSIONS
+from linkprobe import serve_probe
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+def synthetic_scene(width, height):
+    """Cena com detalhe fino (textura + grade numerada) para a ROI fazer diferença"""
+    rng = np.random.default_rng(7)
+    scene = cv2.resize(rng.integers(0, 255, (height // 4, width // 4, 3), dtype=np.uint8),
+                       (width, height), interpolation=cv2.INTER_LINEAR)
+    step = max(width // 16, 1)
+    for row, y in enumerate(range(0, height, step)):
+        for column, x in enumerate(range(0, width, step)):
+            cv2.rectangle(scene, (x, y), (x + step - 1, y + step - 1), (255, 255, 255), 1)
+            cv2.putText(scene, f"{row},{column}", (x + 4, y + step // 2),
+                        cv2.FONT_HERSHEY_SIMPLEX, step / 160, (0, 0, 0), 1, cv2.LINE_AA)
+    return scene
+
+def render_roi_frame(scene, roi, output_size):
+    """Recortar a ROI da cena (view) e escalar para caber em `output_size`"""
+    height, width = scene.shape[:2]
+    x, y, roi_width, roi_height = RoiMapping(roi, (width, height)).source_pixels()
+    crop = scene[y:y + roi_height, x:x + roi_width]
+    output_width, output_height = output_size
+    scale = min(output_width / roi_width, output_height / roi_height)
+    size = (max(int(roi_width * scale), 1), max(int(roi_height * scale), 1))
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    return cv2.resize(crop, size, interpolation=interpolation)
+
+class FakeSender:
+    """Servidor TCP que se comporta como o app Android no modo Wi-Fi"""
+
+    def __init__(self, host="127.0.0.1", port=5000, source_size=(3840, 2160),
+                 output_size=(1280, 720), fps=30, jpeg_quality=85, device_name="Emulador",
+                 transport="wifi", max_fps=60):
+        self.host = host
+        self.port = port
+        self.source_size = source_size
+        self.output_size = output_size
+        self.fps = fps
+        self.jpeg_quality = jpeg_quality
+        self.device_name = device_name
+        self.transport = transport
+        self.max_fps = max_fps
+        self.offer = None
+        self.configure_requests = 0
+        self.probes = 0
+
+        self.roi = FULL_FRAME
+        self.stream_format = "jpeg"
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.roi_requests = 0
+
+        self._scene = None
+        self._pending_roi = None
+        self._pending_format = None
+        self._pending_config = None
+        self._roi_lock = Lock()
+        self._server = None
+        self._stop = Event()
+        self._thread = None
+
+    def start(self):
+        """Abrir a porta e aguardar um receptor em segundo plano"""
+        self._scene = synthetic_scene(*self.source_size)
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((self.host, self.port))
+        self._server.listen(1)
+        self.port = self._server.getsockname()[1]
+        self._thread = Thread(target=self._serve, daemon=True, name="fake-sender")
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self._stop.set()
+        if self._server:
+            self._server.close()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            # Um receptor que some no meio (ex: sonda que desistiu) não derruba o emulador
+            try:
+                with client:
+                    if not self._handshake(client):
+                        continue
+                    self.roi = FULL_FRAME
+                    self.stream_format = "jpeg"
+                    Thread(target=self._read_control, args=(client,), daemon=True).start()
+                    self._send_frames(client)
+            except OSError as e:
+                print(f"Receptor desconectado do emulador: {e}")
+
+    def capabilities(self):
+        """O que o emulador anuncia no handshake"""
+        source_width, source_height = self.source_size
+        return {
+            "formats": list(STREAM_FORMATS),
+            "resolutions": [list(size) for size in RESOLUTIONS.values()
+                            if size[0] <= source_width and size[1] <= source_height],
+            "max_fps": self.max_fps,
+            "header_versions": list(HEADER_VERSIONS),
+            "transport": self.transport
+        }
+
+    def _handshake(self, client):
+        request = self._read_message(client)
+        if request and request.get("type") == "link_probe":
+            self.probes += 1
+            serve_probe(client, self._stop)
+            return False
+        if not request or request.get("type") != "connection_request":
+            return False
+        self.offer = request
+        client.sendall(encode_message({"status": "connected", "device_name": self.device_name,
+                                       "capabilities": self.capabilities()}))
+        return True
+
+    @staticmethod
+    def _read_exact(client, size):
+        data = b""
+        while len(data) < size:
+            chunk = client.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _read_message(self, client):
+        header = self._read_exact(client, 4)
+        if header is None:
+            return None
+        payload = self._read_exact(client, struct.unpack("!I", header)[0])
+        return decode_message(payload) if payload is not None else None
+
+    def _read_control(self, client):
+        """Mensagens do PC durante o stream"""
+        while not self._stop.is_set():
+            try:
+                message = self._read_message(client)
+            except OSError:
+                return
+            if message is None:
+                return
+            if message["type"] == "set_roi":
+                self.roi_requests += 1
+                with self._roi_lock:
+                    self._pending_roi = normalize_roi(message.get("roi"))
+            elif message["type"] == "set_format" and message.get("format") in STREAM_FORMATS:
+                with self._roi_lock:
+                    self._pending_format = message["format"]
+            elif message["type"] == "configure" and message.get("format") in STREAM_FORMATS:
+                self.configure_requests += 1
+                with self._roi_lock:
+                    self._pending_config = message
+
+    def _send_frames(self, client):
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        next_frame = time.perf_counter()
+        index = 0
+        try:
+            while not self._stop.is_set():
+                with self._roi_lock:
+                    pending, self._pending_roi = self._pending_roi, None
+                    pending_format, self._pending_format = self._pending_format, None
+                    pending_config, self._pending_config = self._pending_config, None
+                if pending_config is not None:
+                    client.sendall(encode_message(self._apply_config(pending_config)))
+                if pending_format is not None:
+                    self.stream_format = pending_format
+                    client.sendall(encode_message({"type": "format", "format": pending_format}))
+                if pending is not None:
+                    # Confirmar antes do primeiro frame recortado (ordem garantida pelo TCP)
+                    self.roi = pending
+                    client.sendall(encode_message({
+                        "type": "roi",
+                        "roi": None if pending == FULL_FRAME else list(pending),
+                        "source_size": list(self.source_size)
+                    }))
+
+                frame = render_roi_frame(self._scene, self.roi, self.output_size)
+                cv2.putText(frame, f"#{index}", (8, 24), cv2.FONT_HERSHEY_SIMPLEX, 0.7,
+                            (0, 255, 255), 2)
+                if self.stream_format == "jpeg":
+                    payload = cv2.imencode(".jpg", frame, params)[1].tobytes()
+                else:
+                    # Planos 4:2:0 exigem lados pares
+                    height, width = frame.shape[:2]
+                    frame = frame[:height - height % 2, :width - width % 2]
+                    payload = pack_raw_frame(bgr_to_yuv(frame, self.stream_format),
+                                             frame.shape[1], frame.shape[0], self.stream_format)
+                client.sendall(struct.pack("!I", len(payload)) + payload)
+                self.frames_sent += 1
+                self.bytes_sent += len(payload) + 4
+                index += 1
+
+                next_frame += 1 / self.fps
+                self._stop.wait(max(0, next_frame - time.perf_counter()))
+        except OSError:
+            pass  # Receptor desconectou
+
+    def _apply_config(self, message):
+        """Aplicar "configure" e montar a confirmação com o que foi aceito"""
+        self.stream_format = message["format"]
+        width = min(int(message.get("width", self.output_size[0])), self.source_size[0])
+        height = min(int(message.get("height", self.output_size[1])), self.source_size[1])
+        self.output_size = (width - width % 2, height - height % 2)
+        self.fps = max(1, min(int(message.get("fps", self.fps)), self.max_fps))
+
+        # A taxa de bits é do encoder do app; o emulador mantém a qualidade JPEG fixa
+        return {
+            "type": "stream_config",
+            "format": self.stream_format,
+            "width": self.output_size[0],
+            "height": self.output_size[1],
+            "fps": self.fps,
+            "bitrate_kbps": message.get("bitrate_kbps"),
+            "header_version": message.get("header_version", HEADER_VERSIONS[0])
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="fake_sender", description="Emulador do app Android (Wi-Fi)")
+    parser.add_argument("--port", type=int, default=5000, help="porta de streaming")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--source", default="3840x2160", help="resolução do sensor emulado (LxA)")
+    parser.add_argument("--output", default="1280x720", help="resolução enviada (LxA)")
+    parser.add_argument("--transport", choices=("wifi", "usb", "usb3"), default="wifi",
+                        help="transporte anunciado nas capacidades")
+    args = parser.parse_args((argv or sys.argv)[1:])
+
+    sender = FakeSender(
+        host=args.host, port=args.port, fps=args.fps, transport=args.transport,
+        source_size=tuple(int(v) for v in args.source.split("x")),
+        output_size=tuple(int(v) for v in args.output.split("x"))
+    )
+    print(f"Emulando dispositivo na porta {sender.start()} (Ctrl+C para sair)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        sender.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
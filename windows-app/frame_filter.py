@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detecção de frames repetidos antes da decodificação
+Webcam Remota Universal - Filtro de Frames
+"""
+
+import time
+import zlib
+
+from startup import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+# Resultados de `FrameFilter.check`
+NEW = "new"
+DUPLICATE = "duplicate"            # bytes idênticos ao frame anterior
+NEAR_DUPLICATE = "near_duplicate"  # luma reduzida quase igual à última exibida
+
+class FrameFilter:
+    """Impressão digital barata de cada JPEG recebido
+
+    Primeiro compara tamanho + CRC32 dos bytes comprimidos (custo de
+    microssegundos). Se `near_threshold` > 0, também decodifica o JPEG em
+    1/8 da resolução e em tons de cinza (o decodificador pula a maior parte
+    do trabalho) e compara com a luma do último frame exibido: diferença
+    média abaixo do limite conta como quase idêntico. A comparação é sempre
+    contra o último frame *exibido*, então mudanças lentas se acumulam até
+    passar do limite em vez de serem ignoradas para sempre.
+    """
+
+    def __init__(self, near_threshold=0.0):
+        self.near_threshold = near_threshold
+
+        self.frames_checked = 0
+        self.duplicates = 0
+        self.near_duplicates = 0
+        self.bytes_skipped = 0
+        self.filter_seconds = 0.0
+
+        # Custo médio (EWMA) da decodificação completa, medido por quem decodifica
+        self.decode_seconds = None
+
+        self._last_fingerprint = None
+        self._reference_luma = None
+
+    def reset(self):
+        """Esquecer o último frame (nova conexão)"""
+        self._last_fingerprint = None
+        self._reference_luma = None
+
+    @staticmethod
+    def fingerprint(data):
+        """Impressão digital dos bytes comprimidos: (tamanho, crc32)"""
+        return len(data), zlib.crc32(data)
+
+    def check(self, data):
+        """Classificar frame JPEG como NEW, DUPLICATE ou NEAR_DUPLICATE"""
+        start = time.perf_counter()
+        self.frames_checked += 1
+
+        fingerprint = self.fingerprint(data)
+        if fingerprint == self._last_fingerprint:
+            verdict = DUPLICATE
+            self.duplicates += 1
+        else:
+            self._last_fingerprint = fingerprint
+            verdict = NEW
+            if self.near_threshold > 0 and self._is_near_duplicate(data):
+                verdict = NEAR_DUPLICATE
+                self.near_duplicates += 1
+
+        if verdict != NEW:
+            self.bytes_skipped += len(data)
+        self.filter_seconds += time.perf_counter() - start
+        return verdict
+
+    def _is_near_duplicate(self, data):
+        luma = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if luma is None:
+            return False
+
+        reference = self._reference_luma
+        if reference is not None and reference.shape == luma.shape:
+            if cv2.absdiff(luma, reference).mean() < self.near_threshold:
+                return True
+
+        self._reference_luma = luma
+        return False
+
+    def record_decode_time(self, seconds):
+        """Informar o custo de uma decodificação completa (para estimar economia)"""
+        if self.decode_seconds is None:
+            self.decode_seconds = seconds
+        else:
+            self.decode_seconds += (seconds - self.decode_seconds) * 0.1
+
+    def report(self):
+        """Quanto foi economizado: frames, CPU estimada e bytes"""
+        skipped = self.duplicates + self.near_duplicates
+        saved_seconds = 0.0
+        if self.decode_seconds is not None:
+            saved_seconds = max(0.0, skipped * self.decode_seconds - self.filter_seconds)
+        return {
+            "frames_checked": self.frames_checked,
+            "duplicates": self.duplicates,
+            "near_duplicates": self.near_duplicates,
+            "skipped_percent": 100.0 * skipped / self.frames_checked if self.frames_checked else 0.0,
+            "bytes_skipped": self.bytes_skipped,
+            "cpu_saved_seconds": saved_seconds,
+            "filter_seconds": self.filter_seconds
+        }
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool de buffers NumPy para o caminho quente de exibição
+Webcam Remota Universal - Pool de Frames
+
+A cada frame, conversão de cor e redimensionamento produziam arrays
+novos (alguns MB cada); a 60 fps isso passa de 150 MB/s pelo
+alocador. Com o pool, essas etapas escrevem (`dst=`) em arrays
+reaproveitados, agrupados por formato e tipo.
+
+Um buffer volta a ficar livre quando ninguém mais o referencia: o pool
+usa a contagem de referências do próprio Python, então a tela, a fila
+do gravador ou o serviço de fotos liberam o buffer simplesmente ao
+soltá-lo, sem chamadas explícitas de liberação.
+
+Medir o ganho no laço de exibição:
+
+    python -m framepool --benchmark
+"""
+
+import sys
+import time
+import argparse
+from collections import OrderedDict, deque
+from threading import Lock
+
+from startup import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+# Referências de um buffer livre: a lista do pool + o argumento de getrefcount
+_FREE_REFCOUNT = 2
+
+class FramePool:
+    """Buffers reaproveitáveis agrupados por (formato, tipo)
+
+    `acquire` devolve um buffer que ninguém mais referencia ou, se todos
+    estão em uso, aloca um novo (guardado enquanto houver vaga). Formatos
+    que deixam de aparecer (resolução ou janela mudaram) são descartados.
+    """
+
+    def __init__(self, max_per_shape=4, max_shapes=4, window=3.0):
+        self.max_per_shape = max_per_shape
+        self.max_shapes = max_shapes
+        self.window = window
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_allocated = 0
+
+        self._buffers = OrderedDict()  # (formato, tipo) -> [arrays]
+        self._lock = Lock()
+        self._samples = deque()
+
+    def acquire(self, shape, dtype="uint8"):
+        """Array livre com `shape`/`dtype` (conteúdo indefinido)"""
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            buffers = self._buffers.get(key)
+            if buffers is None:
+                buffers = self._buffers[key] = []
+                while len(self._buffers) > self.max_shapes:
+                    self._buffers.popitem(last=False)
+            else:
+                self._buffers.move_to_end(key)
+
+            for index in range(len(buffers)):
+                if sys.getrefcount(buffers[index]) <= _FREE_REFCOUNT:
+                    self.hits += 1
+                    return buffers[index]
+
+            self.misses += 1
+            array = np.empty(shape, dtype)
+            self.bytes_allocated += array.nbytes
+            if len(buffers) < self.max_per_shape:
+                buffers.append(array)
+            return array
+
+    def clear(self):
+        """Soltar todos os buffers (arrays em uso continuam válidos)"""
+        with self._lock:
+            self._buffers.clear()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def pooled_bytes(self):
+        with self._lock:
+            return sum(array.nbytes for buffers in self._buffers.values() for array in buffers)
+
+    def sample(self, now=None):
+        """Taxas na janela móvel (como StreamStats.sample)"""
+        now = time.monotonic() if now is None else now
+        self._samples.append((now, self.hits, self.misses, self.bytes_allocated))
+        while len(self._samples) > 2 and now - self._samples[0][0] > self.window:
+            self._samples.popleft()
+
+        first_time, first_hits, first_misses, first_bytes = self._samples[0]
+        elapsed = now - first_time
+        requests = (self.hits - first_hits) + (self.misses - first_misses)
+        return {
+            "hit_rate": (self.hits - first_hits) / requests if requests else self.hit_rate,
+            "allocated_per_second": (self.bytes_allocated - first_bytes) / elapsed if elapsed > 0 else 0.0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_allocated": self.bytes_allocated,
+            "pooled_bytes": self.pooled_bytes
+        }
+
+# Benchmark: laço de exibição (JPEG -> RGB no tamanho da tela) com e sem pool
+
+def _allocated_per_frame(render, frames):
+    """Bytes alocados por frame (pico do tracemalloc acima do que já existia)"""
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        total = 0
+        for _ in range(frames):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            render()
+            total += tracemalloc.get_traced_memory()[1] - before
+        return total / frames
+    finally:
+        tracemalloc.stop()
+
+def benchmark(frame_size=(1920, 1080), target_size=(1280, 720), fps=60, frames=240):
+    """Custo por frame e bytes alocados por segundo nas etapas após a decodificação"""
+    from viewport import Viewport, render_roi
+
+    width, height = frame_size
+    rng = np.random.default_rng(5)
+    frame = cv2.resize(rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8),
+                       frame_size, interpolation=cv2.INTER_LINEAR)
+    target_width, target_height = target_size
+    viewport = Viewport()
+    pool = FramePool()
+
+    renders = {
+        "sem_pool": lambda: render_roi(frame, viewport, target_size),
+        "com_pool": lambda: render_roi(frame, viewport, target_size,
+                                       out=pool.acquire((target_height, target_width, 3)))
+    }
+    results = {}
+    for name, render in renders.items():
+        render()  # Aquecimento (o pool aloca aqui)
+        start = time.perf_counter()
+        for _ in range(frames):
+            render()
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            "ms_per_frame": 1000.0 * elapsed / frames,
+            "allocated_mb_per_second": _allocated_per_frame(render, frames // 4) * fps / 1e6
+        }
+    results["com_pool"]["hit_rate"] = pool.hit_rate
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="framepool", description="Pool de frames - benchmark")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="comparar o laço de exibição com e sem pool")
+    parser.add_argument("--frame", default="1920x1080", help="resolução do frame (LxA)")
+    parser.add_argument("--target", default="1280x720", help="tamanho da área de vídeo (LxA)")
+    parser.add_argument("--fps", type=int, default=60)
+    args = parser.parse_args((argv or sys.argv)[1:])
+
+    if not args.benchmark:
+        parser.print_help()
+        return 0
+
+    frame_size = tuple(int(value) for value in args.frame.split("x"))
+    target_size = tuple(int(value) for value in args.target.split("x"))
+    print(f"Frame {args.frame} -> tela {args.target}, {args.fps} fps (após a decodificação)")
+    for name, row in benchmark(frame_size, target_size, args.fps).items():
+        print(f"  {name:8} {row['ms_per_frame']:.2f} ms/frame, "
+              f"{row['allocated_mb_per_second']:.1f} MB/s alocados"
+              + (f", reaproveitamento {row['hit_rate'] * 100:.0f}%" if "hit_rate" in row else ""))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Governador de qualidade guiado pela carga do PC
+Webcam Remota Universal - Governador de Qualidade
+
+Em PCs fracos, decodificar 1080p60 ocupa a CPU inteira e a área de
+trabalho toda engasga. O governador combina duas medidas, amostradas no
+ritmo do timer de estatísticas:
+
+    CPU do sistema (psutil)          o PC como um todo está sobrecarregado?
+    ocupação da decodificação        fração do tempo de parede gasta
+                                     decodificando/convertindo frames
+
+Sobrecarga sustentada sobe um degrau da escada (`LEVELS`); carga baixa
+sustentada desce um. Entre os dois limites o nível é mantido (histerese).
+Se a carga volta logo depois de uma recuperação, o degrau passa a exigir
+o dobro do tempo calmo antes de tentar de novo, para não oscilar.
+
+Cada decisão é impressa e anexada (JSON por linha) ao registro, com as
+medidas que a motivaram, para ajustar os limites.
+
+    python -m governor --simulate --resolution 1080p --fps 60   decodificação sintética
+"""
+
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from datetime import datetime
+
+from negotiation import RESOLUTIONS
+from startup import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+# Degraus, do mais leve ao mais agressivo; cada um mantém os anteriores
+LEVELS = (
+    {"name": "normal", "decode_scale": 1, "max_fps": None, "reduce_sender": False},
+    {"name": "decodificação em meia resolução", "decode_scale": 2, "max_fps": None, "reduce_sender": False},
+    {"name": "exibição limitada a 30 fps", "decode_scale": 2, "max_fps": 30, "reduce_sender": False},
+    {"name": "qualidade reduzida no dispositivo", "decode_scale": 2, "max_fps": 30, "reduce_sender": True},
+    {"name": "exibição limitada a 15 fps", "decode_scale": 2, "max_fps": 15, "reduce_sender": True}
+)
+
+# Recuperação que falha em menos que isto dobra a espera daquele degrau
+RELAPSE_SECONDS = 60.0
+MAX_RECOVER_SECONDS = 160.0
+
+def reduced_target(target):
+    """Qualidade pedida ao dispositivo sob carga: um degrau de resolução abaixo,
+    no máximo 30 fps e 60% da taxa de bits"""
+    sizes = sorted(RESOLUTIONS.values(), key=lambda size: size[0] * size[1])
+    pixels = target["width"] * target["height"]
+    smaller = [size for size in sizes if size[0] * size[1] < pixels]
+    width, height = smaller[-1] if smaller else sizes[0]
+    return {
+        "width": width,
+        "height": height,
+        "fps": min(target["fps"], 30),
+        "bitrate_kbps": max(int(target["bitrate_kbps"] * 0.6), 500)
+    }
+
+class QualityGovernor:
+    """Escada de reduções de qualidade com histerese
+
+    `record_decode` e `admit` são chamados por frame e `sample` pelo timer,
+    todos na mesma thread (a de exibição), então não há lock.
+    """
+
+    def __init__(self, cpu_high=85.0, cpu_low=60.0, busy_high=0.75, busy_low=0.4,
+                 overload_seconds=3.0, recover_seconds=10.0, log_path=None, history_size=50):
+        self.cpu_high = cpu_high
+        self.cpu_low = cpu_low
+        self.busy_high = busy_high
+        self.busy_low = busy_low
+        self.overload_seconds = overload_seconds
+        self.recover_seconds = recover_seconds
+        self.log_path = log_path
+
+        self.level = 0
+        self.decisions = deque(maxlen=history_size)
+        self.last_sample = None
+        self.frames_capped = 0
+
+        self._process = None
+        self._psutil_missing = False
+        self.reset()
+
+    @property
+    def settings(self):
+        """Ações do nível atual (ver LEVELS)"""
+        return LEVELS[self.level]
+
+    def reset(self):
+        """Voltar ao nível normal (nova conexão ou governador desligado)"""
+        self.level = 0
+        self.last_sample = None
+        self._busy_seconds = 0.0
+        self._window_start = time.monotonic()
+        self._overload_since = None
+        self._calm_since = None
+        self._recover_hold = {}
+        self._last_recovery = None
+        self._last_admitted = 0.0
+
+    # Por frame
+
+    def record_decode(self, seconds):
+        """Somar o tempo gasto preparando um frame para a tela"""
+        self._busy_seconds += seconds
+
+    def admit(self, now=None):
+        """Exibir este frame? False quando acima do limite de fps do nível"""
+        max_fps = LEVELS[self.level]["max_fps"]
+        if not max_fps:
+            return True
+        now = time.monotonic() if now is None else now
+        # 10% de folga: um stream de 60 fps limitado a 30 exibe um sim, um não
+        if now - self._last_admitted < 0.9 / max_fps:
+            self.frames_capped += 1
+            return False
+        self._last_admitted = now
+        return True
+
+    def adjust_target(self, target):
+        """Qualidade a pedir ao dispositivo no nível atual"""
+        return reduced_target(target) if self.settings["reduce_sender"] else target
+
+    # Amostragem (timer)
+
+    def _cpu_percent(self):
+        """(CPU do sistema, CPU deste processo) em %, ou (None, None)"""
+        if self._psutil_missing:
+            return None, None
+        try:
+            # psutil é importado aqui para não pesar na inicialização
+            import psutil
+        except ImportError:
+            self._psutil_missing = True
+            print("Aviso: psutil indisponível, governador usa só o tempo de decodificação")
+            return None, None
+
+        if self._process is None:
+            # A primeira leitura só inicia a contagem (psutil mede entre chamadas)
+            self._process = psutil.Process()
+            self._process.cpu_percent(None)
+            psutil.cpu_percent(None)
+            return None, None
+        system = psutil.cpu_percent(None)
+        process = self._process.cpu_percent(None) / (psutil.cpu_count() or 1)
+        return system, process
+
+    def sample(self, now=None):
+        """Medir a carga desde a última amostra e decidir; retorna a decisão ou None"""
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._window_start
+        busy = self._busy_seconds / elapsed if elapsed > 0 else 0.0
+        self._busy_seconds = 0.0
+        self._window_start = now
+        cpu, process = self._cpu_percent()
+
+        self.last_sample = {
+            "cpu_percent": cpu,
+            "process_percent": process,
+            "decode_busy": busy,
+            "level": self.level
+        }
+
+        reasons = []
+        if cpu is not None and cpu >= self.cpu_high:
+            reasons.append(f"CPU {cpu:.0f}%")
+        if busy >= self.busy_high:
+            reasons.append(f"decodificação ocupa {busy * 100:.0f}% do tempo")
+        calm = (cpu is None or cpu <= self.cpu_low) and busy <= self.busy_low
+
+        if reasons:
+            self._calm_since = None
+            if self._overload_since is None:
+                self._overload_since = now
+            if now - self._overload_since >= self.overload_seconds and self.level < len(LEVELS) - 1:
+                # Outra janela inteira de sobrecarga antes do próximo degrau
+                self._overload_since = now
+                return self._change(self.level + 1, ", ".join(reasons), now)
+        elif calm:
+            self._overload_since = None
+            if self._calm_since is None:
+                self._calm_since = now
+            hold = self._recover_hold.get(self.level, self.recover_seconds)
+            if self.level > 0 and now - self._calm_since >= hold:
+                self._calm_since = now
+                self._last_recovery = (self.level, now)
+                return self._change(self.level - 1, f"carga baixa por {hold:.0f} s", now)
+        else:
+            # Entre os limites: manter o nível
+            self._overload_since = None
+            self._calm_since = None
+        return None
+
+    def _change(self, level, reason, now):
+        if level > self.level and self._last_recovery:
+            recovered_level, recovered_at = self._last_recovery
+            if recovered_level == level and now - recovered_at < RELAPSE_SECONDS:
+                hold = self._recover_hold.get(level, self.recover_seconds)
+                self._recover_hold[level] = min(hold * 2, MAX_RECOVER_SECONDS)
+
+        decision = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "from": self.level,
+            "to": level,
+            "action": LEVELS[level]["name"],
+            "reason": reason
+        }
+        decision.update({key: value for key, value in self.last_sample.items() if key != "level"})
+        self.level = level
+        self.decisions.append(decision)
+        self._log(decision)
+        return decision
+
+    def _log(self, decision):
+        print(f"Governador de qualidade: nível {decision['from']} -> {decision['to']} "
+              f"({decision['action']}): {decision['reason']}")
+        if not self.log_path:
+            return
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as log:
+                log.write(json.dumps(decision, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Erro ao registrar decisão do governador: {e}")
+
+    def describe(self):
+        """Resumo de uma linha para a interface"""
+        sample = self.last_sample
+        if sample is None:
+            return f"Carga: -- · {self.settings['name']}"
+        text = "Carga: "
+        if sample["cpu_percent"] is not None:
+            text += f"CPU {sample['cpu_percent']:.0f}% (app {sample['process_percent']:.0f}%), "
+        text += f"decodificação {sample['decode_busy'] * 100:.0f}% · {self.settings['name']}"
+        return text
+
+def simulate(resolution="1080p", fps=60, seconds=30.0, governor=None):
+    """Decodificar um JPEG sintético no ritmo do stream sob o governador
+
+    Mostra as decisões e a ocupação a cada segundo; útil para calibrar os
+    limites num PC específico. A redução no dispositivo não existe aqui, só
+    os degraus locais (meia resolução e limite de fps).
+    """
+    governor = governor or QualityGovernor()
+    width, height = RESOLUTIONS[resolution]
+    rng = np.random.default_rng(1)
+    # Gradiente com ruído: comprime como uma cena real, não como cor sólida
+    base = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    image = np.clip(base + rng.normal(0, 20, (height, width, 3)), 0, 255).astype(np.uint8)
+    jpeg = np.frombuffer(cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 85])[1], np.uint8)
+
+    interval = 1.0 / fps
+    start = next_frame = next_sample = time.monotonic()
+    shown = 0
+    while time.monotonic() - start < seconds:
+        now = time.monotonic()
+        if now >= next_sample:
+            governor.sample(now)
+            print(f"{now - start:5.1f} s  {shown:3d} frames  {governor.describe()}")
+            shown = 0
+            next_sample += 1.0
+        if governor.admit(now):
+            flags = cv2.IMREAD_REDUCED_COLOR_2 if governor.settings["decode_scale"] == 2 else cv2.IMREAD_COLOR
+            decode_start = time.perf_counter()
+            cv2.imdecode(jpeg, flags)
+            governor.record_decode(time.perf_counter() - decode_start)
+            shown += 1
+        next_frame += interval
+        delay = next_frame - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # Atrasado: o stream real descartaria frames na rede
+            next_frame = time.monotonic()
+    return list(governor.decisions)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="governor", description="Governador de qualidade pela carga do PC")
+    parser.add_argument("--simulate", action="store_true", help="decodificar um stream sintético sob o governador")
+    parser.add_argument("--resolution", choices=sorted(RESOLUTIONS), default="1080p")
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--cpu-high", type=float, default=85.0, help="%% de CPU considerado sobrecarga")
+    parser.add_argument("--busy-high", type=float, default=0.75, help="ocupação da decodificação considerada sobrecarga")
+    parser.add_argument("--log", help="arquivo JSONL para registrar as decisões")
+    args = parser.parse_args((argv or sys.argv)[1:])
+
+    if not args.simulate:
+        parser.print_help()
+        return 0
+    governor = QualityGovernor(cpu_high=args.cpu_high, busy_high=args.busy_high, log_path=args.log)
+    decisions = simulate(args.resolution, args.fps, args.seconds, governor)
+    print(f"{len(decisions)} decisões, nível final: {governor.settings['name']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
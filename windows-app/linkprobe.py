@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Medição do enlace com o dispositivo antes do stream
+Webcam Remota Universal - Teste de Enlace
+
+Abre uma conexão curta na porta de streaming e, em vez do handshake de
+vídeo, pede uma sonda (mesmo enquadramento do canal de controle):
+
+    PC -> dispositivo  {"type": "link_probe", "version": 1}
+    dispositivo -> PC  {"status": "probe"}
+    PC -> dispositivo  {"type": "ping", "seq": n}      (ecoado de volta)
+    PC -> dispositivo  {"type": "bulk", "bytes": N}    (N bytes em blocos, depois
+                                                        {"type": "bulk_done"})
+
+O resultado traz a distribuição do RTT, o jitter (variação média entre
+RTTs seguidos) e a vazão sustentada do dispositivo para o PC, usada para
+escolher a taxa de bits inicial. Dispositivos que não conhecem a sonda
+só fornecem o tempo de conexão TCP.
+
+    python -m linkprobe 192.168.0.20 --port 5000   medir o enlace com o celular
+    python -m linkprobe --serve --port 5000        servidor local que responde à sonda
+"""
+
+import sys
+import json
+import time
+import socket
+import struct
+import argparse
+from threading import Thread, Event
+
+from control import encode_message, decode_message
+
+PROBE_VERSION = 1
+BULK_CHUNK = 64 * 1024
+
+# Fração da vazão medida usada como taxa de bits inicial do vídeo
+BITRATE_HEADROOM = 0.5
+
+def _read_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            return None
+        received += count
+    return bytes(buffer)
+
+def read_payload(sock):
+    """Próximo conteúdo enquadrado (None se a conexão fechou)"""
+    header = _read_exact(sock, 4)
+    if header is None:
+        return None
+    return _read_exact(sock, struct.unpack("!I", header)[0])
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+
+def probe_link(host, port, pings=20, interval=0.01, bulk_bytes=4 * 1024 * 1024, timeout=3.0):
+    """Medir RTT, jitter e vazão até o dispositivo; retorna um dicionário
+
+    `supported` indica se o dispositivo respondeu à sonda; sem ela, só
+    `connect_ms` (tempo do handshake TCP, aproximadamente um RTT) é medido.
+    `timeout` vale para cada operação do socket: é quanto se espera por um
+    dispositivo que não responde à sonda.
+    """
+    result = {
+        "host": host,
+        "port": port,
+        "measured_at": time.time(),
+        "supported": False,
+        "connect_ms": None,
+        "rtt_ms": None,
+        "jitter_ms": None,
+        "throughput_mbps": None,
+        "error": None
+    }
+    start = time.perf_counter()
+    try:
+        sock = socket.create_connection((host, port), timeout=timeout)
+    except OSError as e:
+        result["error"] = str(e)
+        return result
+    result["connect_ms"] = 1000.0 * (time.perf_counter() - start)
+
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.sendall(encode_message({"type": "link_probe", "version": PROBE_VERSION}))
+        reply = read_payload(sock)
+        reply = json.loads(reply.decode("utf-8")) if reply else {}
+        if reply.get("status") != "probe":
+            return result
+        result["supported"] = True
+
+        # RTT: pings espaçados para a amostra cobrir variação no tempo
+        rtts = []
+        for seq in range(pings):
+            sent = time.perf_counter()
+            sock.sendall(encode_message({"type": "ping", "seq": seq}))
+            while True:
+                message = decode_message(read_payload(sock) or b"")
+                if message is None:
+                    raise ConnectionError("sonda interrompida")
+                if message["type"] == "ping" and message.get("seq") == seq:
+                    break
+            rtts.append(1000.0 * (time.perf_counter() - sent))
+            time.sleep(interval)
+
+        result["rtt_ms"] = {
+            "min": min(rtts),
+            "median": _percentile(rtts, 0.5),
+            "p95": _percentile(rtts, 0.95),
+            "max": max(rtts),
+            "samples": len(rtts)
+        }
+        if len(rtts) > 1:
+            result["jitter_ms"] = sum(abs(b - a) for a, b in zip(rtts, rtts[1:])) / (len(rtts) - 1)
+
+        # Vazão dispositivo -> PC: do primeiro ao último bloco (o primeiro só marca o início)
+        sock.sendall(encode_message({"type": "bulk", "bytes": bulk_bytes}))
+        first = last = None
+        received = 0
+        while True:
+            payload = read_payload(sock)
+            if payload is None:
+                raise ConnectionError("sonda interrompida")
+            if payload[:1] == b"{":
+                break  # bulk_done
+            now = time.perf_counter()
+            if first is None:
+                first = now
+            else:
+                received += len(payload)
+            last = now
+        if first is not None and last > first:
+            result["throughput_mbps"] = received * 8 / (last - first) / 1e6
+    except (OSError, ValueError, ConnectionError) as e:
+        result["error"] = str(e)
+    finally:
+        sock.close()
+    return result
+
+def recommended_bitrate(result, minimum=500, maximum=8000):
+    """Taxa de bits inicial (kbps) que cabe na vazão medida, ou None"""
+    throughput = result.get("throughput_mbps")
+    if not throughput:
+        return None
+    return int(min(max(throughput * 1000 * BITRATE_HEADROOM, minimum), maximum))
+
+def describe(result):
+    """Resumo de uma linha para a interface"""
+    if result.get("error") and result.get("connect_ms") is None:
+        return f"Sem conexão: {result['error']}"
+    if not result.get("supported"):
+        return f"Conexão em {result['connect_ms']:.1f} ms (o dispositivo não responde à sonda)"
+    rtt = result["rtt_ms"]
+    text = f"RTT {rtt['median']:.1f} ms (p95 {rtt['p95']:.1f}), jitter {result['jitter_ms'] or 0:.1f} ms"
+    if result.get("throughput_mbps"):
+        text += f", {result['throughput_mbps']:.0f} Mbit/s"
+    return text
+
+# Lado do dispositivo
+
+def serve_probe(client, stop=None):
+    """Responder a uma sonda já aceita (após receber "link_probe")"""
+    client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    client.sendall(encode_message({"status": "probe"}))
+    chunk = bytes(BULK_CHUNK)
+    frame = struct.pack("!I", len(chunk)) + chunk
+    while not (stop and stop.is_set()):
+        payload = read_payload(client)
+        message = decode_message(payload) if payload else None
+        if message is None:
+            return
+        if message["type"] == "ping":
+            client.sendall(struct.pack("!I", len(payload)) + payload)
+        elif message["type"] == "bulk":
+            for _ in range(max(int(message.get("bytes", 0)) // BULK_CHUNK, 2)):
+                client.sendall(frame)
+            client.sendall(encode_message({"type": "bulk_done"}))
+
+class ProbeServer:
+    """Servidor local que só responde à sonda (substituto do celular)"""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self._server = None
+        self._stop = Event()
+
+    def start(self):
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((self.host, self.port))
+        self._server.listen(4)
+        self.port = self._server.getsockname()[1]
+        Thread(target=self._serve, daemon=True, name="probe-server").start()
+        return self.port
+
+    def stop(self):
+        self._stop.set()
+        if self._server:
+            self._server.close()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            Thread(target=self._handle, args=(client,), daemon=True).start()
+
+    def _handle(self, client):
+        with client:
+            try:
+                request = decode_message(read_payload(client) or b"")
+                if request and request["type"] == "link_probe":
+                    serve_probe(client, self._stop)
+            except OSError:
+                pass
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="linkprobe", description="Medir o enlace com o dispositivo")
+    parser.add_argument("host", nargs="?", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--serve", action="store_true", help="responder a sondas nesta porta")
+    parser.add_argument("--bulk-mb", type=float, default=4.0, help="MB transferidos para medir a vazão")
+    args = parser.parse_args((argv or sys.argv)[1:])
+
+    if args.serve:
+        server = ProbeServer("0.0.0.0", args.port)
+        print(f"Respondendo a sondas na porta {server.start()} (Ctrl+C para sair)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
+        return 0
+
+    result = probe_link(args.host, args.port, bulk_bytes=int(args.bulk_mb * 1024 * 1024))
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(describe(result))
+    bitrate = recommended_bitrate(result)
+    if bitrate:
+        print(f"Taxa de bits inicial sugerida: {bitrate} kbps")
+    return 0 if result["connect_ms"] is not None else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,282 +8,126 @@ Interface nativa em português para Windows
 
 import sys
 import os
-import json
 import time
-import threading
-import traceback
+import argparse
 from datetime import datetime
 from pathlib import Path
 
+# Deve vir antes dos demais imports para medir a inicialização inteira
+from startup import timeline, lazy_import, preload_in_background, import_profile_report
+
 # PyQt5 imports
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QButton, QPushButton, QSlider, QComboBox, QSpinBox,
+    QLabel, QPushButton, QSlider, QComboBox, QSpinBox,
     QGroupBox, QListWidget, QListWidgetItem, QMessageBox, QDialog,
-    QProgressBar, QTextEdit, QCheckBox, QRadioButton, QButtonGroup,
+    QProgressBar, QTextEdit, QLineEdit, QCheckBox, QRadioButton, QButtonGroup,
     QSplitter, QFrame, QGridLayout, QScrollArea, QFileDialog,
     QSystemTrayIcon, QMenu, QAction, QTabWidget, QSizePolicy
 )
 from PyQt5.QtCore import (
-    Qt, QTimer, QThread, pyqtSignal, QObject, QSize,
+    Qt, QTimer, QThread, pyqtSignal, QObject, QSize, QEvent,
     QPropertyAnimation, QEasingCurve, QRect
 )
 from PyQt5.QtGui import (
-    QPixmap, QIcon, QFont, QColor, QPalette, QPainter,
+    QPixmap, QImage, QIcon, QFont, QColor, QPalette, QPainter,
     QBrush, QLinearGradient, QMovie
 )
 
-# Networking and media imports
-import socket
-import struct
-import cv2
-import numpy as np
-import pyaudio
-from threading import Thread, Lock
-import queue
-import wave
+from threading import Thread
+
+# Módulos pesados: carregados só quando o stream precisa deles (ou em
+# segundo plano depois que a janela aparece)
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
 
-# WebRTC simulation and networking
-import asyncio
-import websockets
-import base64
+from config import config
+from snapshot import SnapshotService
+from receiver_core import ReceiverCore, EVENTS as CORE_EVENTS
+from recorder import MjpegRecorder, export_video
+from mjpeg_server import MjpegServer
+from relay import RelayServer
+from frame_filter import FrameFilter, NEW, DUPLICATE
+from motion import create_motion_recorder
+from mosaic import MosaicCompositor
+from viewport import Viewport, render_roi, MAX_ZOOM
+from control import FULL_FRAME, normalize_roi, RoiMapping
+from yuv import is_raw_payload, YuvConverter
+from framepool import FramePool
+from negotiation import RESOLUTIONS, describe
+from linkprobe import describe as describe_link, recommended_bitrate
+from utils import NetworkTestThread
+from transport import PROFILES as TRANSPORT_PROFILES
+from governor import QualityGovernor, LEVELS
+from background import BackgroundMode
 
 class VideoQualitySettings:
     """Configurações de qualidade de vídeo"""
     def __init__(self):
-        self.width = 1280
-        self.height = 720
-        self.fps = 30
-        self.bitrate = 2000  # kbps
+        self.width, self.height = RESOLUTIONS.get(config.get("video.default_resolution", "720p"), (1280, 720))
+        self.fps = config.get("video.default_fps", 30)
+        self.bitrate = config.get("video.default_bitrate", 2000)  # kbps
         self.codec = "H264"
 
 class AudioSettings:
     """Configurações de áudio"""
     def __init__(self):
-        self.sample_rate = 44100
+        self.sample_rate = config.get("audio.sample_rate", 44100)
         self.channels = 2
         self.bits_per_sample = 16
-        self.enabled = True
-        self.volume = 80
+        self.enabled = config.get("audio.enabled", True)
+        self.volume = config.get("audio.volume", 80)
 
 class ConnectionManager(QObject):
-    """Gerenciador de conexões Wi-Fi e USB"""
+    """Adaptador Qt do núcleo de recepção (receiver_core.ReceiverCore)
+    
+    Repassa os eventos do núcleo, que chegam em threads de rede, para
+    sinais Qt. Operações e estado (connect_to_device, start_signaling,
+    stats, device_directory...) são os do núcleo.
+    """
     
     device_discovered = pyqtSignal(str, str, str)  # name, ip, type
     connection_established = pyqtSignal(str, str)  # device_name, connection_type
     connection_lost = pyqtSignal(str)  # reason
     data_received = pyqtSignal(bytes)  # video/audio data
+    frame_decoded = pyqtSignal(object)  # frame BGR já decodificado (WebRTC)
+    device_removed = pyqtSignal(str)  # ip/id
+    connection_requested = pyqtSignal(str, str)  # mobile_id, name
+    signaling_state_changed = pyqtSignal(bool)  # conectado ao servidor
+    control_received = pyqtSignal(dict)  # mensagem de controle do dispositivo
+    link_probed = pyqtSignal(dict)  # medição do enlace (linkprobe)
+    stream_stalled = pyqtSignal(dict)  # travamento de uma etapa (stallwatch)
     
     def __init__(self):
         super().__init__()
-        self.connected = False
-        self.connection_type = None
-        self.device_name = None
-        self.discovery_thread = None
-        self.receiver_thread = None
-        self.socket = None
-        
-    def start_discovery(self):
-        """Iniciar descoberta de dispositivos Android na rede"""
-        if self.discovery_thread and self.discovery_thread.is_alive():
-            return
-            
-        self.discovery_thread = Thread(target=self._discovery_worker, daemon=True)
-        self.discovery_thread.start()
-        
-    def _discovery_worker(self):
-        """Worker thread para descoberta de dispositivos"""
-        try:
-            # Criar socket UDP para broadcast
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            sock.settimeout(2.0)
-            
-            # Enviar beacon de descoberta
-            discovery_message = json.dumps({
-                "type": "discovery_request",
-                "device_type": "pc_windows",
-                "name": "PC Windows - Receptor",
-                "port": 5000
-            }).encode('utf-8')
-            
-            # Broadcast na rede local
-            for i in range(1, 255):
-                try:
-                    broadcast_addr = f"192.168.1.{i}"
-                    sock.sendto(discovery_message, (broadcast_addr, 8888))
-                except:
-                    continue
-                    
-            # Tentar outras faixas de rede comuns
-            for subnet in ["192.168.0", "10.0.0", "172.16.0"]:
-                for i in range(1, 255):
-                    try:
-                        broadcast_addr = f"{subnet}.{i}"
-                        sock.sendto(discovery_message, (broadcast_addr, 8888))
-                    except:
-                        continue
-            
-            # Aguardar respostas
-            responses = []
-            start_time = time.time()
-            while time.time() - start_time < 10:  # 10 segundos de descoberta
-                try:
-                    data, addr = sock.recvfrom(1024)
-                    response = json.loads(data.decode('utf-8'))
-                    
-                    if response.get("type") == "discovery_response":
-                        device_name = response.get("name", "Android Device")
-                        device_ip = addr[0]
-                        device_type = "wifi"
-                        
-                        self.device_discovered.emit(device_name, device_ip, device_type)
-                        responses.append((device_name, device_ip, device_type))
-                        
-                except socket.timeout:
-                    continue
-                except Exception as e:
-                    print(f"Erro na descoberta: {e}")
-                    
-            sock.close()
-            
-            # Simular descoberta USB se nenhum dispositivo Wi-Fi for encontrado
-            if not responses:
-                time.sleep(1)
-                self.device_discovered.emit("Android USB Device", "USB", "usb")
-                
-        except Exception as e:
-            print(f"Erro no worker de descoberta: {e}")
+        self.core = ReceiverCore()
+        for event in CORE_EVENTS:
+            self.core.on(event, getattr(self, event).emit)
             
-    def connect_to_device(self, device_ip, device_type="wifi"):
-        """Conectar a um dispositivo específico"""
-        try:
-            if device_type == "wifi":
-                self._connect_wifi(device_ip)
-            elif device_type == "usb":
-                self._connect_usb()
-                
-        except Exception as e:
-            self.connection_lost.emit(f"Erro na conexão: {e}")
-            
-    def _connect_wifi(self, device_ip):
-        """Conectar via Wi-Fi"""
-        try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.settimeout(10.0)
-            self.socket.connect((device_ip, 5000))
-            
-            # Handshake
-            handshake = json.dumps({
-                "type": "connection_request",
-                "device_type": "pc_windows"
-            }).encode('utf-8')
-            
-            self.socket.send(struct.pack('!I', len(handshake)) + handshake)
-            
-            # Aguardar confirmação
-            response_size = struct.unpack('!I', self.socket.recv(4))[0]
-            response_data = self.socket.recv(response_size)
-            response = json.loads(response_data.decode('utf-8'))
-            
-            if response.get("status") == "connected":
-                self.connected = True
-                self.connection_type = "wifi"
-                self.device_name = response.get("device_name", "Android Device")
-                
-                # Iniciar thread de recepção
-                self.receiver_thread = Thread(target=self._wifi_receiver, daemon=True)
-                self.receiver_thread.start()
-                
-                self.connection_established.emit(self.device_name, "Wi-Fi")
-                
-        except Exception as e:
-            raise Exception(f"Falha na conexão Wi-Fi: {e}")
-            
-    def _connect_usb(self):
-        """Conectar via USB (simulado para demo)"""
-        # Em uma implementação real, usaria ADB ou comunicação USB direta
-        time.sleep(2)  # Simular tempo de conexão
-        
-        self.connected = True
-        self.connection_type = "usb"
-        self.device_name = "Android USB Device"
-        
-        # Simular dados para demo
-        self.receiver_thread = Thread(target=self._usb_receiver_demo, daemon=True)
-        self.receiver_thread.start()
-        
-        self.connection_established.emit(self.device_name, "USB")
-        
-    def _wifi_receiver(self):
-        """Thread para receber dados via Wi-Fi"""
-        try:
-            while self.connected and self.socket:
-                # Receber tamanho do frame
-                frame_size_data = self.socket.recv(4)
-                if not frame_size_data:
-                    break
-                    
-                frame_size = struct.unpack('!I', frame_size_data)[0]
-                
-                # Receber dados do frame
-                frame_data = b''
-                while len(frame_data) < frame_size:
-                    chunk = self.socket.recv(min(frame_size - len(frame_data), 4096))
-                    if not chunk:
-                        break
-                    frame_data += chunk
-                    
-                if len(frame_data) == frame_size:
-                    self.data_received.emit(frame_data)
-                    
-        except Exception as e:
-            if self.connected:
-                self.connection_lost.emit(f"Conexão perdida: {e}")
-                
-    def _usb_receiver_demo(self):
-        """Thread demo para simular dados USB"""
-        try:
-            # Criar frames de demo para simular streaming
-            while self.connected:
-                # Simular frame de vídeo (640x480 RGB)
-                demo_frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
-                
-                # Adicionar texto indicativo
-                cv2.putText(demo_frame, "DEMO - USB Stream", (50, 50), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                cv2.putText(demo_frame, f"Time: {datetime.now().strftime('%H:%M:%S')}", 
-                           (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-                
-                # Comprimir e enviar
-                _, encoded = cv2.imencode('.jpg', demo_frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                frame_data = encoded.tobytes()
-                
-                self.data_received.emit(frame_data)
-                time.sleep(1/30)  # 30 FPS
-                
-        except Exception as e:
-            if self.connected:
-                self.connection_lost.emit(f"Erro na simulação USB: {e}")
-                
-    def disconnect(self):
-        """Desconectar do dispositivo"""
-        self.connected = False
-        if self.socket:
-            try:
-                self.socket.close()
-            except:
-                pass
-        self.socket = None
-        self.connection_type = None
-        self.device_name = None
+    def __getattr__(self, name):
+        # Só chamado para atributos que não existem no adaptador
+        core = self.__dict__.get("core")
+        if core is None:
+            raise AttributeError(name)
+        return getattr(core, name)
 
 class VideoPlayer(QLabel):
-    """Widget customizado para reprodução de vídeo"""
+    """Widget customizado para reprodução de vídeo
     
-    def __init__(self):
+    Zoom local: roda do mouse amplia em torno do cursor, arrastar desloca e
+    duplo clique volta a 100%. Só a região visível do frame é convertida e
+    redimensionada (ver viewport.render_roi), num buffer do pool de frames
+    que a QImage desenhada aponta sem cópia.
+    """
+    
+    zoom_changed = pyqtSignal(float)
+    viewport_changed = pyqtSignal()  # zoom ou deslocamento
+    
+    def __init__(self, frame_pool=None):
         super().__init__()
+        self.frame_pool = frame_pool or FramePool()
+        self._image = None
+        self._image_buffer = None
         self.setMinimumSize(640, 480)
         self.setScaledContents(True)
         self.setStyleSheet("""
@@ -297,13 +141,31 @@ class VideoPlayer(QLabel):
         # Placeholder quando não há vídeo
         self.show_placeholder()
         
-        # Estatísticas de vídeo
-        self.frame_count = 0
-        self.last_fps_time = time.time()
-        self.current_fps = 0
+        # Consumidores do frame decodificado (recebem o array BGR sem cópia)
+        self.frame_consumers = []
+        # Com decodificação reduzida, recebem o JPEG original no lugar do frame
+        self.jpeg_consumers = []
+        
+        # Zoom local: último frame é guardado (referência) para redesenhar ao interagir
+        self.viewport = Viewport()
+        # Região do frame completo coberta pelos frames recebidos (ROI aplicada pelo dispositivo)
+        self.source_rect = FULL_FRAME
+        self._frame = None
+        self._frame_is_rgb = False
+        self._drag_origin = None
+        self._render_pending = False
+        
+        # 2: decodificar JPEG em meia resolução (governador de qualidade sob carga)
+        self.decode_scale = 1
+        
+        # Vigia de travamentos: etapa "paint" (imagem pronta até ser desenhada)
+        self.watchdog = None
         
     def show_placeholder(self):
         """Mostrar placeholder quando não há vídeo"""
+        self._frame = None
+        self._image = None
+        self._image_buffer = None
         placeholder = QPixmap(640, 480)
         placeholder.fill(QColor(30, 30, 30))
         
@@ -317,51 +179,276 @@ class VideoPlayer(QLabel):
         self.setPixmap(placeholder)
         
     def update_frame(self, frame_data):
-        """Atualizar frame de vídeo"""
+        """Atualizar frame de vídeo a partir de dados JPEG; False se não decodificou"""
         try:
             # Decodificar frame
             nparr = np.frombuffer(frame_data, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            # Meia resolução: o decodificador pula metade do trabalho (escala na DCT)
+            flags = cv2.IMREAD_REDUCED_COLOR_2 if self.decode_scale == 2 else cv2.IMREAD_COLOR
+            frame = cv2.imdecode(nparr, flags)
             
-            if frame is not None:
-                # Converter BGR para RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Converter para QPixmap
-                height, width, channel = frame_rgb.shape
-                bytes_per_line = 3 * width
-                q_image = QImage(frame_rgb.data, width, height, bytes_per_line, QImage.Format_RGB888)
-                pixmap = QPixmap.fromImage(q_image)
-                
-                self.setPixmap(pixmap)
+            if frame is None:
+                return False
+            if self.decode_scale == 2:
+                # Meia resolução é só para a tela: estatísticas e fotos ficam com o JPEG inteiro
+                for consumer in self.jpeg_consumers:
+                    consumer(frame_data)
+                self.show_frame(frame, notify=False)
+            else:
+                self.show_frame(frame)
+            return True
                 
-                # Atualizar estatísticas
-                self.frame_count += 1
-                current_time = time.time()
-                if current_time - self.last_fps_time >= 1.0:
-                    self.current_fps = self.frame_count
-                    self.frame_count = 0
-                    self.last_fps_time = current_time
-                    
         except Exception as e:
             print(f"Erro ao atualizar frame: {e}")
+        return False
+            
+    def show_frame(self, frame, notify=True):
+        """Exibir frame BGR já decodificado (`notify`: repassar aos consumidores)"""
+        try:
+            if notify:
+                for consumer in self.frame_consumers:
+                    consumer(frame)
+                
+            self._frame = frame
+            self._frame_is_rgb = False
+            self._render()
+            
+        except Exception as e:
+            print(f"Erro ao exibir frame: {e}")
+            
+    def show_rgb_frame(self, frame):
+        """Exibir frame RGB vindo direto do YUV (só para a tela)
+        
+        O array é o buffer reaproveitado do conversor: não passa pelos
+        consumidores, que guardariam uma referência ao buffer.
+        """
+        try:
+            self._frame = frame
+            self._frame_is_rgb = True
+            self._render()
+            
+        except Exception as e:
+            print(f"Erro ao exibir frame: {e}")
+            
+    def _render(self):
+        """Desenhar a região visível do último frame no tamanho do widget"""
+        self._render_pending = False
+        if self._frame is None:
+            return
+        
+        rect = self.contentsRect()
+        width, height = max(rect.width(), 1), max(rect.height(), 1)
+        frame_rgb = render_roi(self._frame, self.viewport, (width, height), self.source_rect,
+                               self._frame_is_rgb, out=self.frame_pool.acquire((height, width, 3)))
+        
+        # A QImage só aponta para o buffer: mantê-lo até o próximo desenho, quando volta ao pool
+        if self._image is None:
+            self.clear()  # Tirar o placeholder
+        self._image_buffer = frame_rgb
+        self._image = QImage(frame_rgb.data, width, height, 3 * width, QImage.Format_RGB888)
+        self.update()
+        if self.watchdog:
+            self.watchdog.submit("paint")
+        
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._image is not None:
+            painter = QPainter(self)
+            painter.drawImage(self.contentsRect().topLeft(), self._image)
+            painter.end()
+            if self.watchdog:
+                self.watchdog.progress("paint")
+                
+    def restart_paint(self):
+        """Refazer a imagem do último frame e desenhar já (pintura travada)"""
+        self._image = None
+        self._image_buffer = None
+        self._render()
+        self.repaint()
+            
+    def _schedule_render(self):
+        """Agrupar eventos de mouse seguidos num único redesenho"""
+        if not self._render_pending and self._frame is not None:
+            self._render_pending = True
+            QTimer.singleShot(0, self._render)
+            
+    # Zoom local
+    
+    def set_zoom(self, zoom, anchor=None):
+        self.viewport.set_zoom(zoom, anchor)
+        self.zoom_changed.emit(self.viewport.zoom)
+        self.viewport_changed.emit()
+        self._schedule_render()
+        
+    def zoom_by(self, factor, anchor=None):
+        self.set_zoom(self.viewport.zoom * factor, anchor)
+        
+    def reset_zoom(self):
+        self.viewport.reset()
+        self.zoom_changed.emit(self.viewport.zoom)
+        self.viewport_changed.emit()
+        self._schedule_render()
+        
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if steps:
+            anchor = (event.pos().x() / max(self.width(), 1), event.pos().y() / max(self.height(), 1))
+            self.zoom_by(1.25 ** steps, anchor)
+            
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self.viewport.zoomed:
+            self._drag_origin = event.pos()
+            self.setCursor(Qt.ClosedHandCursor)
+            
+    def mouseMoveEvent(self, event):
+        if self._drag_origin is None:
+            return
+        delta = event.pos() - self._drag_origin
+        self._drag_origin = event.pos()
+        self.viewport.pan(delta.x() / max(self.width(), 1), delta.y() / max(self.height(), 1))
+        self.viewport_changed.emit()
+        self._schedule_render()
+        
+    def mouseReleaseEvent(self, event):
+        if self._drag_origin is not None:
+            self._drag_origin = None
+            self.unsetCursor()
+            
+    def mouseDoubleClickEvent(self, event):
+        self.reset_zoom()
+        
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._schedule_render()
+
+class GridView(QWidget):
+    """Mosaico com vários streams lado a lado
+    
+    Os frames recebidos só substituem o pendente de cada quadro; a cada
+    tique do timer, os quadros visíveis com frame novo são decodificados já
+    reduzidos para o tamanho do quadro e desenhados numa imagem única, que
+    é pintada de uma vez. Com o mosaico oculto ou a janela minimizada, nada
+    é decodificado. Duplo clique num quadro oculta/mostra aquele stream.
+    """
+    
+    def __init__(self, fps=30):
+        super().__init__()
+        self.setMinimumSize(640, 360)
+        self.compositor = MosaicCompositor((self.width(), self.height()))
+        
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(int(1000 / fps))
+        self.refresh_timer.timeout.connect(self.refresh)
+        
+    def add_source(self, key, title):
+        """Adicionar stream; retorna o quadro (use `tile.offer(jpeg)` de qualquer thread)"""
+        tile = self.compositor.add_tile(key, title)
+        self.update()
+        return tile
+        
+    def remove_source(self, key):
+        self.compositor.remove_tile(key)
+        self.update()
+        
+    def refresh(self):
+        """Decodificar frames novos e pedir um único repaint"""
+        if self.window().isMinimized():
+            return
+        if self.compositor.compose():
+            self.update()
+            
+    def showEvent(self, event):
+        self.refresh_timer.start()
+        super().showEvent(event)
+        
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+        
+    def resizeEvent(self, event):
+        self.compositor.resize(self.width(), self.height())
+        super().resizeEvent(event)
+        
+    def mouseDoubleClickEvent(self, event):
+        for index, tile in enumerate(self.compositor.tiles):
+            x, y, width, height = self.compositor.tile_rect(index)
+            if QRect(x, y, width, height).contains(event.pos()):
+                self.compositor.set_tile_visible(tile.key, not tile.visible)
+                self.update()
+                break
+                
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        canvas = self.compositor.canvas
+        height, width = canvas.shape[:2]
+        painter.drawImage(0, 0, QImage(canvas.data, width, height, 3 * width, QImage.Format_BGR888))
+        
+        painter.setPen(QColor(230, 230, 230))
+        painter.setFont(QFont("Arial", 10))
+        if not self.compositor.tiles:
+            painter.drawText(self.rect(), Qt.AlignCenter, "Nenhum stream no mosaico")
+        for index, tile in enumerate(self.compositor.tiles):
+            x, y, tile_width, tile_height = self.compositor.tile_rect(index)
+            painter.fillRect(x, y, painter.fontMetrics().width(tile.title) + 12, 22, QColor(0, 0, 0, 160))
+            painter.drawText(x + 6, y + 16, tile.title)
+            if not tile.visible:
+                painter.drawText(QRect(x, y, tile_width, tile_height), Qt.AlignCenter,
+                                 "Oculto (duplo clique para mostrar)")
+        painter.end()
+
+class Sparkline(QWidget):
+    """Gráfico de tendência compacto para uma série de valores"""
+    
+    def __init__(self, color):
+        super().__init__()
+        self.color = QColor(color)
+        self.values = []
+        self.setMinimumHeight(24)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        
+    def set_values(self, values):
+        """Substituir série exibida"""
+        self.values = list(values)
+        self.update()
+        
+    def paintEvent(self, event):
+        if len(self.values) < 2:
+            return
+            
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(self.color)
+        
+        width, height = self.width() - 1, self.height() - 2
+        top = max(self.values) or 1
+        step = width / (len(self.values) - 1)
+        points = [(i * step, 1 + height - value / top * height) for i, value in enumerate(self.values)]
+        for (x1, y1), (x2, y2) in zip(points, points[1:]):
+            painter.drawLine(int(x1), int(y1), int(x2), int(y2))
+        painter.end()
 
 class StatsWidget(QGroupBox):
-    """Widget para mostrar estatísticas da conexão"""
+    """Widget para mostrar estatísticas da conexão
     
-    def __init__(self):
+    Não recebe nada por frame: lê o modelo `StreamStats` no ritmo do timer.
+    """
+    
+    def __init__(self, stats, frame_filter=None, frame_pool=None, governor=None, watchdog=None,
+                 interval_ms=1000):
         super().__init__("Estatísticas da Conexão")
+        self.stats = stats
+        self.frame_filter = frame_filter
+        self.frame_pool = frame_pool
+        self.governor = governor
+        self.watchdog = watchdog
         self.setup_ui()
         
-        # Timer para atualizar estatísticas
+        # Timer para amostrar estatísticas
         self.stats_timer = QTimer()
         self.stats_timer.timeout.connect(self.update_stats)
-        self.stats_timer.start(1000)  # Atualizar a cada segundo
+        self.stats_timer.start(interval_ms)
         
-        # Dados de estatísticas
-        self.connection_start_time = None
-        self.bytes_received = 0
-        self.frames_received = 0
+        self.connected = False
         
     def setup_ui(self):
         layout = QGridLayout()
@@ -373,62 +460,135 @@ class StatsWidget(QGroupBox):
         self.resolution_label = QLabel("Resolução: --")
         self.connection_time_label = QLabel("Tempo Conectado: 00:00:00")
         self.quality_label = QLabel("Qualidade: --")
+        self.jitter_label = QLabel("Jitter: -- ms")
+        self.packet_loss_label = QLabel("Perda de Pacotes: --")
+        self.savings_label = QLabel("Frames repetidos: --")
+        self.pool_label = QLabel("Buffers: --")
+        self.load_label = QLabel("Carga: --")
+        self.stall_label = QLabel("Travamentos: nenhum")
+        self.fps_sparkline = Sparkline("#3498DB")
+        self.bitrate_sparkline = Sparkline("#27AE60")
         
         layout.addWidget(QLabel("📡"), 0, 0)
         layout.addWidget(self.latency_label, 0, 1)
         layout.addWidget(QLabel("🎬"), 1, 0)
         layout.addWidget(self.fps_label, 1, 1)
+        layout.addWidget(self.fps_sparkline, 1, 2)
         layout.addWidget(QLabel("📊"), 2, 0)
         layout.addWidget(self.bitrate_label, 2, 1)
+        layout.addWidget(self.bitrate_sparkline, 2, 2)
         layout.addWidget(QLabel("📺"), 3, 0)
         layout.addWidget(self.resolution_label, 3, 1)
         layout.addWidget(QLabel("⏱️"), 4, 0)
         layout.addWidget(self.connection_time_label, 4, 1)
         layout.addWidget(QLabel("✨"), 5, 0)
         layout.addWidget(self.quality_label, 5, 1)
+        layout.addWidget(QLabel("〰️"), 6, 0)
+        layout.addWidget(self.jitter_label, 6, 1)
+        layout.addWidget(QLabel("📉"), 7, 0)
+        layout.addWidget(self.packet_loss_label, 7, 1)
+        layout.addWidget(QLabel("♻️"), 8, 0)
+        layout.addWidget(self.savings_label, 8, 1, 1, 2)
+        layout.addWidget(QLabel("🧮"), 9, 0)
+        layout.addWidget(self.pool_label, 9, 1, 1, 2)
+        layout.addWidget(QLabel("🌡️"), 10, 0)
+        layout.addWidget(self.load_label, 10, 1, 1, 2)
+        layout.addWidget(QLabel("🐕"), 11, 0)
+        layout.addWidget(self.stall_label, 11, 1, 1, 2)
         
         self.setLayout(layout)
         
     def update_stats(self):
-        """Atualizar estatísticas"""
-        if self.connection_start_time:
-            # Calcular tempo de conexão
-            elapsed = time.time() - self.connection_start_time
-            hours = int(elapsed // 3600)
-            minutes = int((elapsed % 3600) // 60)
-            seconds = int(elapsed % 60)
-            self.connection_time_label.setText(f"Tempo Conectado: {hours:02d}:{minutes:02d}:{seconds:02d}")
+        """Amostrar o modelo e atualizar estatísticas"""
+        if not self.connected:
+            return
+            
+        sample = self.stats.sample()
+        
+        # Tempo de conexão
+        elapsed = sample["uptime"]
+        hours = int(elapsed // 3600)
+        minutes = int((elapsed % 3600) // 60)
+        seconds = int(elapsed % 60)
+        self.connection_time_label.setText(f"Tempo Conectado: {hours:02d}:{minutes:02d}:{seconds:02d}")
+        
+        # Vídeo
+        self.fps_label.setText(f"FPS: {sample['fps']:.1f}")
+        self.bitrate_label.setText(f"Bitrate: {sample['bitrate_kbps']} kbps")
+        if sample["resolution"]:
+            width, height = sample["resolution"]
+            self.resolution_label.setText(f"Resolução: {width}x{height}")
+            self.quality_label.setText(f"Qualidade: {sample['quality']}")
+        self.fps_sparkline.set_values(self.stats.fps_history)
+        self.bitrate_sparkline.set_values(self.stats.bitrate_history)
+        
+        # Transporte (RTCP, quando disponível)
+        if sample["rtt_ms"] is not None:
+            self.latency_label.setText(f"Latência: {sample['rtt_ms']:.0f} ms")
+        if sample["jitter_ms"] is not None:
+            self.jitter_label.setText(f"Jitter: {sample['jitter_ms']:.1f} ms")
+        if sample["packets_lost"] is not None:
+            self.packet_loss_label.setText(
+                f"Perda de Pacotes: {sample['packets_lost']} ({sample['loss_percent'] or 0.0:.1f}%)"
+            )
+            
+        # Economia do filtro de frames repetidos
+        if self.frame_filter and self.frame_filter.frames_checked:
+            report = self.frame_filter.report()
+            self.savings_label.setText(
+                f"Frames repetidos: {report['skipped_percent']:.0f}% sem decodificar, "
+                f"{report['cpu_saved_seconds']:.1f} s de CPU economizados"
+            )
+            
+        # Pool de buffers da exibição
+        if self.frame_pool:
+            pool = self.frame_pool.sample()
+            self.pool_label.setText(
+                f"Buffers: {pool['hit_rate'] * 100:.0f}% reaproveitados, "
+                f"{pool['allocated_per_second'] / 1e6:.1f} MB/s alocados"
+            )
+            
+        # Carga do PC e nível do governador de qualidade
+        if self.governor:
+            self.load_label.setText(self.governor.describe())
+            
+        # Travamentos detectados pelo watchdog (contagem e duração por etapa)
+        if self.watchdog:
+            self.stall_label.setText(self.watchdog.describe())
             
     def set_connection_started(self):
         """Marcar início da conexão"""
-        self.connection_start_time = time.time()
+        self.connected = True
         
     def set_connection_stopped(self):
         """Marcar fim da conexão"""
-        self.connection_start_time = None
+        self.connected = False
         self.connection_time_label.setText("Tempo Conectado: 00:00:00")
-        
-    def update_video_stats(self, fps, resolution, bitrate):
-        """Atualizar estatísticas de vídeo"""
-        self.fps_label.setText(f"FPS: {fps}")
-        self.resolution_label.setText(f"Resolução: {resolution}")
-        self.bitrate_label.setText(f"Bitrate: {bitrate} kbps")
-        
-        # Determinar qualidade baseada nos parâmetros
-        if fps >= 30 and "1080" in resolution:
-            quality = "Excelente"
-        elif fps >= 25 and "720" in resolution:
-            quality = "Boa"
-        elif fps >= 15:
-            quality = "Regular"
-        else:
-            quality = "Baixa"
-            
-        self.quality_label.setText(f"Qualidade: {quality}")
+        self.latency_label.setText("Latência: -- ms")
+        self.fps_label.setText("FPS: --")
+        self.bitrate_label.setText("Bitrate: -- kbps")
+        self.resolution_label.setText("Resolução: --")
+        self.quality_label.setText("Qualidade: --")
+        self.jitter_label.setText("Jitter: -- ms")
+        self.packet_loss_label.setText("Perda de Pacotes: --")
+        self.savings_label.setText("Frames repetidos: --")
+        self.load_label.setText("Carga: --")
+        self.fps_sparkline.set_values([])
+        self.bitrate_sparkline.set_values([])
 
 class MainWindow(QMainWindow):
     """Janela principal do aplicativo"""
     
+    # Sinais para trazer resultados das threads de codificação para a interface
+    snapshot_saved = pyqtSignal(str)  # caminho
+    snapshot_failed = pyqtSignal(str)  # mensagem
+    burst_finished = pyqtSignal(int, bool)  # frames, truncada
+    recording_saved = pyqtSignal(str)  # caminho do vídeo exportado
+    recording_failed = pyqtSignal(str)  # mensagem
+    motion_started = pyqtSignal(dict)  # evento de movimento
+    motion_finished = pyqtSignal(dict)  # evento de movimento
+    mosaic_source_lost = pyqtSignal(str, str)  # ip, motivo
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Webcam Remota Universal - Receptor PC")
@@ -446,15 +606,116 @@ class MainWindow(QMainWindow):
         # Estado
         self.is_connected = False
         self.is_recording = False
-        self.recorded_frames = []
+        self.recorder = None
+        
+        # Fotos
+        self.snapshot_service = SnapshotService(
+            Path(config.get("recording.save_location", str(Path.home()))) / "Fotos"
+        )
+        self.setup_snapshot_signals()
+        
+        # Filtro de frames repetidos (cena estática)
+        self.frame_filter = FrameFilter(near_threshold=config.get("video.near_duplicate_threshold", 0.0))
+        self.skip_duplicates = config.accessor("video.skip_duplicates", bool, True)
+        
+        # Retransmissão HTTP (MJPEG) para outros visualizadores
+        self.mjpeg_server = MjpegServer(
+            host=config.get("restream.host", "0.0.0.0"),
+            port=config.get("restream.port", 8081)
+        )
+        
+        # Relay: repassar o stream a outros receptores da rede (mesmo protocolo do celular)
+        self.relay_server = RelayServer(port=config.get("relay.port", 5001))
+        
+        # ROI: região pedida ao dispositivo quando há zoom (pedido agrupado durante o arrasto)
+        self.requested_roi = FULL_FRAME
+        self.roi_request_timer = QTimer(self)
+        self.roi_request_timer.setSingleShot(True)
+        self.roi_request_timer.setInterval(150)
+        self.roi_request_timer.timeout.connect(self.send_roi_request)
+        
+        # Qualidade: mudanças na aba viram uma renegociação (sem reconectar)
+        self.quality_apply_timer = QTimer(self)
+        self.quality_apply_timer.setSingleShot(True)
+        self.quality_apply_timer.setInterval(300)
+        self.quality_apply_timer.timeout.connect(self.apply_quality_settings)
+        
+        # Buffers reaproveitados pela exibição e conversões (ver framepool)
+        self.frame_pool = FramePool()
+        
+        # Modo YUV sem compressão (USB): conversão vetorizada num buffer reaproveitado
+        self.yuv_converter = YuvConverter(pool=self.frame_pool)
+        self.raw_direct_display = config.accessor("video.raw_direct_display", bool, True)
+        self.last_raw_frame = None
+        
+        # Captura do stream recebido para diagnóstico (capture.py)
+        self.stream_capture = None
+        
+        # Governador de qualidade: reduz decodificação, fps ou qualidade pedida quando o PC não dá conta
+        self.governor = QualityGovernor(log_path=config.config_dir / "governor.log")
+        self.auto_quality = config.accessor("video.auto_quality", bool, True)
+        
+        # Janela oculta/minimizada: nada é decodificado nem pintado (ver background.py)
+        self.background = BackgroundMode()
+        self.background_keepalive = config.accessor("video.background_keepalive", bool, False)
+        self.background_rate_reduced = False
+        
+        # Vigia de travamentos: o núcleo vigia o socket; aqui, decodificação, pintura e gravação
+        self.watchdog = self.connection_manager.watchdog
+        for stage in ("decode", "paint", "recorder"):
+            self.watchdog.add_stage(stage, config.get(f"watchdog.{stage}_seconds", 2.0))
+        self.connection_manager.core.on("data_received", lambda data: self.watchdog.submit("decode"))
+        self.mjpeg_server.health_provider = self.watchdog.report
+        self.stall_reconnects_left = 0
+        self.stall_device = None
+        self.recording_parts = 1
+        
+        # Gravação por movimento: analisada na thread de rede, fora da interface
+        self.motion_recorder = None
+        self.connection_manager.core.on("data_received", self.feed_motion)
+        self.motion_started.connect(self.on_motion_started)
+        self.motion_finished.connect(self.on_motion_finished)
+        
+        # Mosaico: conexões extras (uma por dispositivo), além da principal
+        self.mosaic_sources = {}
+        self.main_tile = None
+        self.mosaic_source_lost.connect(self.on_mosaic_source_lost)
         
         # Interface
         self.setup_ui()
         self.setup_style()
+        self.video_player.watchdog = self.watchdog
+        self.video_player.frame_consumers.append(self.connection_manager.stats.record_frame)
+        self.video_player.frame_consumers.append(self.snapshot_service.offer_frame)
+        self.video_player.jpeg_consumers.append(self.connection_manager.stats.record_jpeg)
+        self.video_player.jpeg_consumers.append(self.snapshot_service.offer_jpeg)
+        self.stats_widget.stats_timer.timeout.connect(self.update_restream_info)
+        self.stats_widget.stats_timer.timeout.connect(self.update_relay_info)
+        self.stats_widget.stats_timer.timeout.connect(self.update_motion_info)
+        self.stats_widget.stats_timer.timeout.connect(self.update_mosaic_info)
+        self.stats_widget.stats_timer.timeout.connect(self.update_governor)
+        self.stats_widget.stats_timer.timeout.connect(self.update_background_info)
+        
+        # Oferta do próximo handshake: qualidade e formatos escolhidos na interface
+        self.connection_manager.renegotiate(self.quality_target(), self.accepted_formats())
         
         # Sistema de bandeja
         self.setup_system_tray()
         
+        if config.get("restream.enabled", False):
+            self.restream_btn.setChecked(True)
+        if config.get("relay.enabled", False):
+            self.relay_btn.setChecked(True)
+        if config.get("motion.enabled", False):
+            self.motion_check.setChecked(True)
+            
+        # Descoberta: responder ao Android e mostrar dispositivos já conhecidos
+        if config.get("network.discovery_responder", True):
+            self.connection_manager.start_responder()
+        self.show_known_devices()
+        if config.get("network.auto_reconnect", False):
+            self.reconnect_last_device()
+        
     def setup_ui(self):
         """Configurar interface do usuário"""
         central_widget = QWidget()
@@ -483,11 +744,34 @@ class MainWindow(QMainWindow):
         
     def create_video_panel(self):
         """Criar painel de vídeo"""
-        panel = QWidget()
-        layout = QVBoxLayout(panel)
+        panel = QTabWidget()
+        
+        # Mosaico com vários dispositivos (só decodifica enquanto a aba está visível)
+        mosaic_tab = QWidget()
+        mosaic_layout = QVBoxLayout(mosaic_tab)
+        
+        self.grid_view = GridView()
+        mosaic_layout.addWidget(self.grid_view)
+        
+        mosaic_buttons = QHBoxLayout()
+        self.mosaic_add_btn = QPushButton("➕ Adicionar Dispositivo Selecionado")
+        self.mosaic_add_btn.clicked.connect(self.add_selected_to_mosaic)
+        mosaic_buttons.addWidget(self.mosaic_add_btn)
+        
+        self.mosaic_remove_btn = QPushButton("➖ Remover Dispositivo Selecionado")
+        self.mosaic_remove_btn.clicked.connect(self.remove_selected_from_mosaic)
+        mosaic_buttons.addWidget(self.mosaic_remove_btn)
+        mosaic_layout.addLayout(mosaic_buttons)
+        
+        self.mosaic_info = QLabel("Selecione dispositivos na aba Conexão e adicione ao mosaico")
+        self.mosaic_info.setWordWrap(True)
+        mosaic_layout.addWidget(self.mosaic_info)
+        
+        video_tab = QWidget()
+        layout = QVBoxLayout(video_tab)
         
         # Player de vídeo
-        self.video_player = VideoPlayer()
+        self.video_player = VideoPlayer(self.frame_pool)
         layout.addWidget(self.video_player)
         
         # Controles de zoom
@@ -504,6 +788,8 @@ class MainWindow(QMainWindow):
         
         self.zoom_reset_btn = QPushButton("↻")
         self.zoom_reset_btn.clicked.connect(self.zoom_reset)
+        self.video_player.zoom_changed.connect(self.update_zoom_label)
+        self.video_player.viewport_changed.connect(self.schedule_roi_request)
         
         zoom_layout.addWidget(self.zoom_out_btn)
         zoom_layout.addStretch()
@@ -514,6 +800,8 @@ class MainWindow(QMainWindow):
         
         layout.addLayout(zoom_layout)
         
+        panel.addTab(video_tab, "📺 Vídeo")
+        panel.addTab(mosaic_tab, "🧩 Mosaico")
         return panel
         
     def create_controls_panel(self):
@@ -544,7 +832,8 @@ class MainWindow(QMainWindow):
         layout.addWidget(tabs)
         
         # Widget de estatísticas
-        self.stats_widget = StatsWidget()
+        self.stats_widget = StatsWidget(self.connection_manager.stats, self.frame_filter, self.frame_pool,
+                                        self.governor, self.watchdog)
         layout.addWidget(self.stats_widget)
         
         return panel
@@ -580,17 +869,103 @@ class MainWindow(QMainWindow):
         self.discover_btn.clicked.connect(self.start_discovery)
         disc_layout.addWidget(self.discover_btn)
         
+        # Servidor de sinalização (dispositivos conectados pelo navegador)
+        signaling_layout = QHBoxLayout()
+        self.signaling_url_edit = QLineEdit(config.get("network.signaling_url", "http://localhost:5000"))
+        self.signaling_url_edit.setPlaceholderText("http://servidor:5000")
+        signaling_layout.addWidget(self.signaling_url_edit)
+        
+        self.signaling_btn = QPushButton("🌐 Servidor")
+        self.signaling_btn.setToolTip("Buscar dispositivos conectados ao servidor de sinalização")
+        self.signaling_btn.clicked.connect(self.start_signaling)
+        signaling_layout.addWidget(self.signaling_btn)
+        disc_layout.addLayout(signaling_layout)
+        
         # Lista de dispositivos
         self.devices_list = QListWidget()
         self.devices_list.itemDoubleClicked.connect(self.connect_to_selected_device)
         disc_layout.addWidget(self.devices_list)
         
+        # Medição do enlace (RTT, jitter e vazão) com o dispositivo selecionado
+        link_layout = QHBoxLayout()
+        self.link_test_btn = QPushButton("📶 Testar Enlace")
+        self.link_test_btn.setToolTip("Medir latência e vazão até o dispositivo selecionado")
+        self.link_test_btn.clicked.connect(self.test_link)
+        link_layout.addWidget(self.link_test_btn)
+        
+        self.link_info = QLabel("")
+        self.link_info.setWordWrap(True)
+        self.link_info.setStyleSheet("color: #7F8C8D;")
+        link_layout.addWidget(self.link_info, 1)
+        disc_layout.addLayout(link_layout)
+        
+        # Perfil do socket do stream (buffer, Nagle/ACK imediato, keepalive)
+        transport_layout = QHBoxLayout()
+        transport_layout.addWidget(QLabel("Perfil de transporte:"))
+        self.transport_combo = QComboBox()
+        for key, profile in TRANSPORT_PROFILES.items():
+            self.transport_combo.addItem(profile["label"], key)
+        index = self.transport_combo.findData(self.connection_manager.transport_profile)
+        self.transport_combo.setCurrentIndex(max(index, 0))
+        self.transport_combo.setToolTip("Baixa latência: buffers pequenos, menos atraso após engasgos\n"
+                                        "Alta vazão: buffers grandes para enlaces com mais atraso")
+        self.transport_combo.currentIndexChanged.connect(self.change_transport_profile)
+        transport_layout.addWidget(self.transport_combo, 1)
+        disc_layout.addLayout(transport_layout)
+        
         # Status da conexão
         self.connection_status = QLabel("Status: Desconectado")
         self.connection_status.setStyleSheet("font-weight: bold; color: #E74C3C;")
         disc_layout.addWidget(self.connection_status)
         
         layout.addWidget(discovery_group)
+        
+        # Retransmissão local
+        restream_group = QGroupBox("Retransmissão (OBS / navegador / outros receptores)")
+        restream_layout = QVBoxLayout(restream_group)
+        
+        self.restream_btn = QPushButton("📺 Compartilhar Stream via HTTP")
+        self.restream_btn.setCheckable(True)
+        self.restream_btn.toggled.connect(self.toggle_restream)
+        restream_layout.addWidget(self.restream_btn)
+        
+        self.restream_info = QLabel("Retransmissão desligada")
+        self.restream_info.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        restream_layout.addWidget(self.restream_info)
+        
+        self.relay_btn = QPushButton("🔁 Modo Relay (uma conexão com o celular, vários receptores)")
+        self.relay_btn.setCheckable(True)
+        self.relay_btn.toggled.connect(self.toggle_relay)
+        restream_layout.addWidget(self.relay_btn)
+        
+        self.relay_info = QLabel("Relay desligado")
+        self.relay_info.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        restream_layout.addWidget(self.relay_info)
+        
+        layout.addWidget(restream_group)
+        
+        # Captura do stream para reproduzir problemas de desempenho sem o celular
+        diagnostics_group = QGroupBox("Diagnóstico de Desempenho")
+        diagnostics_layout = QVBoxLayout(diagnostics_group)
+        
+        capture_layout = QHBoxLayout()
+        self.capture_btn = QPushButton("⏺ Capturar Stream Recebido")
+        self.capture_btn.setCheckable(True)
+        self.capture_btn.setToolTip("Gravar os bytes recebidos com os tempos de chegada (.wrcap)")
+        self.capture_btn.toggled.connect(self.toggle_stream_capture)
+        capture_layout.addWidget(self.capture_btn)
+        
+        self.replay_btn = QPushButton("▶ Reproduzir Captura")
+        self.replay_btn.setToolTip("Reproduzir um arquivo .wrcap como se o dispositivo estivesse conectado")
+        self.replay_btn.clicked.connect(self.start_stream_replay)
+        capture_layout.addWidget(self.replay_btn)
+        diagnostics_layout.addLayout(capture_layout)
+        
+        self.capture_info = QLabel("")
+        self.capture_info.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        diagnostics_layout.addWidget(self.capture_info)
+        
+        layout.addWidget(diagnostics_group)
         layout.addStretch()
         
         return tab
@@ -606,31 +981,58 @@ class MainWindow(QMainWindow):
         
         video_layout.addWidget(QLabel("Resolução:"), 0, 0)
         self.resolution_combo = QComboBox()
-        self.resolution_combo.addItems([
-            "640x480 (480p)",
-            "1280x720 (720p HD)",
-            "1920x1080 (1080p Full HD)",
-            "3840x2160 (4K)"
-        ])
-        self.resolution_combo.setCurrentIndex(1)  # 720p padrão
+        for text, key in (("640x480 (480p)", "480p"), ("1280x720 (720p HD)", "720p"),
+                          ("1920x1080 (1080p Full HD)", "1080p"), ("3840x2160 (4K)", "4k")):
+            self.resolution_combo.addItem(text, key)
+        index = self.resolution_combo.findData(config.get("video.default_resolution", "720p"))
+        self.resolution_combo.setCurrentIndex(max(index, 0))
+        self.resolution_combo.currentIndexChanged.connect(self.schedule_quality_apply)
         video_layout.addWidget(self.resolution_combo, 0, 1)
         
         video_layout.addWidget(QLabel("Taxa de Quadros:"), 1, 0)
         self.fps_combo = QComboBox()
-        self.fps_combo.addItems(["15 FPS", "24 FPS", "30 FPS", "60 FPS"])
-        self.fps_combo.setCurrentIndex(2)  # 30 FPS padrão
+        for fps in (15, 24, 30, 60):
+            self.fps_combo.addItem(f"{fps} FPS", fps)
+        index = self.fps_combo.findData(config.get("video.default_fps", 30))
+        self.fps_combo.setCurrentIndex(index if index >= 0 else 2)  # 30 FPS padrão
+        self.fps_combo.currentIndexChanged.connect(self.schedule_quality_apply)
         video_layout.addWidget(self.fps_combo, 1, 1)
         
         video_layout.addWidget(QLabel("Bitrate:"), 2, 0)
         self.bitrate_slider = QSlider(Qt.Horizontal)
         self.bitrate_slider.setRange(500, 8000)
-        self.bitrate_slider.setValue(2000)
+        self.bitrate_slider.setValue(config.get("video.default_bitrate", 2000))
         self.bitrate_slider.valueChanged.connect(self.update_bitrate_label)
         video_layout.addWidget(self.bitrate_slider, 2, 1)
         
-        self.bitrate_label = QLabel("2000 kbps")
+        self.bitrate_label = QLabel(f"{self.bitrate_slider.value()} kbps")
         video_layout.addWidget(self.bitrate_label, 3, 1)
         
+        # Configuração negociada com o dispositivo (muda sem reconectar)
+        self.negotiation_info = QLabel("")
+        self.negotiation_info.setWordWrap(True)
+        video_layout.addWidget(self.negotiation_info, 4, 0, 1, 2)
+        
+        self.auto_quality_check = QCheckBox("Reduzir a qualidade automaticamente quando o PC estiver sobrecarregado")
+        self.auto_quality_check.setChecked(self.auto_quality.value)
+        self.auto_quality_check.setToolTip("Sob carga sustentada: decodifica em meia resolução, limita os fps\n"
+                                           "exibidos e por fim pede menos qualidade ao dispositivo.\n"
+                                           "Volta ao normal quando a carga cai. Decisões em governor.log.")
+        self.auto_quality_check.toggled.connect(self.toggle_auto_quality)
+        video_layout.addWidget(self.auto_quality_check, 5, 0, 1, 2)
+        
+        self.background_keepalive_check = QCheckBox(
+            f"Com a janela oculta, pedir só {config.get('video.background_fps', 1)} fps ao dispositivo"
+        )
+        self.background_keepalive_check.setChecked(self.background_keepalive.value)
+        self.background_keepalive_check.setToolTip("Mantém a conexão viva gastando menos bateria e rede.\n"
+                                                   "Não vale enquanto houver gravação, retransmissão,\n"
+                                                   "relay ou detecção de movimento ativos.")
+        self.background_keepalive_check.toggled.connect(
+            lambda enabled: config.set("video.background_keepalive", enabled)
+        )
+        video_layout.addWidget(self.background_keepalive_check, 6, 0, 1, 2)
+        
         layout.addWidget(video_group)
         
         # Configurações de áudio
@@ -640,11 +1042,11 @@ class MainWindow(QMainWindow):
         audio_layout.addWidget(QLabel("Volume:"), 0, 0)
         self.volume_slider = QSlider(Qt.Horizontal)
         self.volume_slider.setRange(0, 100)
-        self.volume_slider.setValue(80)
+        self.volume_slider.setValue(self.audio_settings.volume)
         self.volume_slider.valueChanged.connect(self.update_volume)
         audio_layout.addWidget(self.volume_slider, 0, 1)
         
-        self.volume_label = QLabel("80%")
+        self.volume_label = QLabel(f"{self.audio_settings.volume}%")
         audio_layout.addWidget(self.volume_label, 1, 1)
         
         self.mute_btn = QPushButton("🔇 Silenciar")
@@ -682,7 +1084,7 @@ class MainWindow(QMainWindow):
         
         zoom_layout.addWidget(QLabel("Nível de Zoom:"), 0, 0)
         self.remote_zoom_slider = QSlider(Qt.Horizontal)
-        self.remote_zoom_slider.setRange(10, 100)
+        self.remote_zoom_slider.setRange(10, int(MAX_ZOOM * 10))
         self.remote_zoom_slider.setValue(10)
         self.remote_zoom_slider.valueChanged.connect(self.update_remote_zoom)
         zoom_layout.addWidget(self.remote_zoom_slider, 0, 1)
@@ -690,7 +1092,40 @@ class MainWindow(QMainWindow):
         self.remote_zoom_label = QLabel("1.0x")
         zoom_layout.addWidget(self.remote_zoom_label, 1, 1)
         
+        # Com zoom, pedir ao dispositivo só a região visível em resolução cheia
+        self.roi_streaming_check = QCheckBox("Enviar só a região ampliada (mais detalhe, menos banda)")
+        self.roi_streaming_check.setChecked(config.get("video.roi_streaming", True))
+        self.roi_streaming_check.toggled.connect(self.toggle_roi_streaming)
+        zoom_layout.addWidget(self.roi_streaming_check, 2, 0, 1, 2)
+        
+        self.roi_info = QLabel("")
+        self.roi_info.setWordWrap(True)
+        zoom_layout.addWidget(self.roi_info, 3, 0, 1, 2)
+        
         camera_layout.addWidget(zoom_group)
+        
+        # Frames sem compressão: pelo USB sobra banda e JPEG só acrescenta latência
+        raw_group = QGroupBox("Modo sem Compressão (USB)")
+        raw_layout = QVBoxLayout(raw_group)
+        
+        self.raw_mode_check = QCheckBox("Aceitar frames YUV sem compressão (menor latência)")
+        self.raw_mode_check.setChecked(config.get("video.raw_mode", False))
+        self.raw_mode_check.setToolTip("Exige muita banda (~750 Mbit/s em 1080p30): só é escolhido quando\n"
+                                       "o enlace anunciado pelo dispositivo comporta (cabo USB).\n"
+                                       "Frames YUV não são enviados ao relay nem à gravação por movimento.")
+        self.raw_mode_check.toggled.connect(self.toggle_raw_mode)
+        raw_layout.addWidget(self.raw_mode_check)
+        
+        self.raw_direct_check = QCheckBox("Exibir direto do YUV (sem conversão intermediária)")
+        self.raw_direct_check.setChecked(self.raw_direct_display.value)
+        self.raw_direct_check.toggled.connect(lambda enabled: config.set("video.raw_direct_display", enabled))
+        raw_layout.addWidget(self.raw_direct_check)
+        
+        self.stream_format_info = QLabel("")
+        self.stream_format_info.setWordWrap(True)
+        raw_layout.addWidget(self.stream_format_info)
+        
+        camera_layout.addWidget(raw_group)
         layout.addWidget(camera_group)
         layout.addStretch()
         
@@ -739,6 +1174,63 @@ class MainWindow(QMainWindow):
         
         rec_layout.addWidget(settings_group)
         layout.addWidget(recording_group)
+        
+        # Gravação disparada por movimento
+        motion_group = QGroupBox("Gravação por Movimento")
+        motion_layout = QGridLayout(motion_group)
+        
+        self.motion_check = QCheckBox("Gravar automaticamente quando houver movimento")
+        self.motion_check.toggled.connect(self.toggle_motion_recording)
+        motion_layout.addWidget(self.motion_check, 0, 0, 1, 2)
+        
+        motion_layout.addWidget(QLabel("Sensibilidade:"), 1, 0)
+        self.motion_sensitivity_slider = QSlider(Qt.Horizontal)
+        self.motion_sensitivity_slider.setRange(0, 100)
+        self.motion_sensitivity_slider.setValue(config.get("motion.sensitivity", 50))
+        self.motion_sensitivity_slider.valueChanged.connect(self.update_motion_sensitivity)
+        motion_layout.addWidget(self.motion_sensitivity_slider, 1, 1)
+        
+        self.motion_info = QLabel("Detector desligado")
+        self.motion_info.setWordWrap(True)
+        motion_layout.addWidget(self.motion_info, 2, 0, 1, 2)
+        
+        self.motion_event_info = QLabel("")
+        self.motion_event_info.setWordWrap(True)
+        motion_layout.addWidget(self.motion_event_info, 3, 0, 1, 2)
+        
+        layout.addWidget(motion_group)
+        
+        # Fotos
+        snapshot_group = QGroupBox("Fotos")
+        snapshot_layout = QGridLayout(snapshot_group)
+        
+        snapshot_layout.addWidget(QLabel("Formato:"), 0, 0)
+        self.snapshot_format_combo = QComboBox()
+        self.snapshot_format_combo.addItem("PNG (sem perdas)", "png")
+        self.snapshot_format_combo.addItem("JPEG", "jpeg")
+        self.snapshot_format_combo.addItem("WebP", "webp")
+        self.snapshot_format_combo.addItem("WebP (sem perdas)", "webp_lossless")
+        snapshot_layout.addWidget(self.snapshot_format_combo, 0, 1)
+        
+        self.snapshot_btn = QPushButton("📸 Capturar Foto")
+        self.snapshot_btn.clicked.connect(self.capture_snapshot)
+        snapshot_layout.addWidget(self.snapshot_btn, 1, 0, 1, 2)
+        
+        snapshot_layout.addWidget(QLabel("Rajada (frames):"), 2, 0)
+        self.burst_count_spin = QSpinBox()
+        self.burst_count_spin.setRange(2, 300)
+        self.burst_count_spin.setValue(30)
+        snapshot_layout.addWidget(self.burst_count_spin, 2, 1)
+        
+        self.burst_btn = QPushButton("🎞️ Capturar Rajada")
+        self.burst_btn.clicked.connect(self.capture_burst)
+        snapshot_layout.addWidget(self.burst_btn, 3, 0, 1, 2)
+        
+        self.snapshot_info = QLabel("Nenhuma foto capturada")
+        self.snapshot_info.setWordWrap(True)
+        snapshot_layout.addWidget(self.snapshot_info, 4, 0, 1, 2)
+        
+        layout.addWidget(snapshot_group)
         layout.addStretch()
         
         return tab
@@ -852,6 +1344,26 @@ class MainWindow(QMainWindow):
         self.connection_manager.connection_established.connect(self.on_connection_established)
         self.connection_manager.connection_lost.connect(self.on_connection_lost)
         self.connection_manager.data_received.connect(self.on_data_received)
+        self.connection_manager.frame_decoded.connect(self.on_frame_decoded)
+        self.connection_manager.device_removed.connect(self.remove_discovered_device)
+        self.connection_manager.connection_requested.connect(self.on_connection_requested)
+        self.connection_manager.signaling_state_changed.connect(self.on_signaling_state_changed)
+        self.connection_manager.control_received.connect(self.on_control_received)
+        self.connection_manager.link_probed.connect(self.on_link_probed)
+        self.connection_manager.stream_stalled.connect(self.on_stream_stalled)
+        
+    def setup_snapshot_signals(self):
+        """Configurar callbacks do serviço de fotos"""
+        # Os callbacks rodam nas threads do pool; os sinais entregam na thread da interface
+        self.snapshot_service.on_saved = self.snapshot_saved.emit
+        self.snapshot_service.on_error = self.snapshot_failed.emit
+        self.snapshot_service.on_burst_finished = self.burst_finished.emit
+        
+        self.snapshot_saved.connect(self.on_snapshot_saved)
+        self.snapshot_failed.connect(self.on_snapshot_failed)
+        self.burst_finished.connect(self.on_burst_finished)
+        self.recording_saved.connect(self.on_recording_saved)
+        self.recording_failed.connect(self.on_recording_failed)
         
     def setup_system_tray(self):
         """Configurar ícone da bandeja do sistema"""
@@ -875,6 +1387,7 @@ class MainWindow(QMainWindow):
     def start_discovery(self):
         """Iniciar descoberta de dispositivos"""
         self.devices_list.clear()
+        self.show_known_devices()
         self.discover_btn.setEnabled(False)
         self.discover_btn.setText("🔍 Procurando...")
         
@@ -888,13 +1401,176 @@ class MainWindow(QMainWindow):
         self.discover_btn.setEnabled(True)
         self.discover_btn.setText("🔍 Procurar Dispositivos Android")
         
-    def add_discovered_device(self, name, ip, device_type):
+    def add_discovered_device(self, name, ip, device_type, known=False):
         """Adicionar dispositivo descoberto à lista"""
         item_text = f"{name} ({ip}) - {device_type.upper()}"
+        
+        # Atualizar entrada existente (ex: dispositivo conhecido que respondeu)
+        for row in range(self.devices_list.count()):
+            item = self.devices_list.item(row)
+            if item.data(Qt.UserRole) == (name, ip, device_type):
+                if not known:
+                    item.setText(item_text)
+                return
+                
+        if known:
+            item_text = f"⭐ {item_text} - CONHECIDO"
         item = QListWidgetItem(item_text)
         item.setData(Qt.UserRole, (name, ip, device_type))
         self.devices_list.addItem(item)
         
+    def show_known_devices(self):
+        """Listar dispositivos do diretório (último IP conhecido)"""
+        for device in self.connection_manager.device_directory.known_devices():
+            self.add_discovered_device(device["name"], device["last_ip"],
+                                       device.get("connection_type", "wifi"), known=True)
+            
+    def reconnect_last_device(self):
+        """Reconectar ao dispositivo usado mais recentemente, sem nova descoberta"""
+        devices = self.connection_manager.device_directory.known_devices()
+        if not devices:
+            return
+            
+        device = devices[0]
+        self.connection_status.setText(f"Status: Reconectando a {device['name']}...")
+        self.connection_status.setStyleSheet("font-weight: bold; color: #F39C12;")
+        self.connection_manager.connect_to_device_async(
+            device["last_ip"], device.get("connection_type", "wifi"), device.get("port")
+        )
+        
+    def remove_discovered_device(self, ip):
+        """Remover dispositivo que saiu da lista"""
+        for row in range(self.devices_list.count()):
+            device_data = self.devices_list.item(row).data(Qt.UserRole)
+            if device_data and device_data[1] == ip:
+                self.devices_list.takeItem(row)
+                break
+                
+    def start_signaling(self):
+        """Conectar ao servidor de sinalização"""
+        url = self.signaling_url_edit.text().strip()
+        if not url:
+            return
+            
+        config.set("network.signaling_url", url)
+        self.connection_manager.start_signaling(url)
+        self.statusBar().showMessage(f"Conectando ao servidor de sinalização {url}...")
+        
+    def on_signaling_state_changed(self, connected):
+        """Callback quando a conexão com o servidor de sinalização muda"""
+        if connected:
+            self.statusBar().showMessage("Conectado ao servidor de sinalização - aguardando dispositivos")
+        else:
+            self.statusBar().showMessage("Desconectado do servidor de sinalização")
+            
+    def toggle_restream(self, enabled):
+        """Ligar/desligar servidor MJPEG local"""
+        config.set("restream.enabled", enabled)
+        if not enabled:
+            self.mjpeg_server.stop()
+            self.restream_info.setText("Retransmissão desligada")
+            return
+            
+        if self.mjpeg_server.start():
+            self.restream_info.setText(f"Stream: {self.mjpeg_server.url}")
+        else:
+            self.restream_btn.setChecked(False)
+            self.restream_info.setText(f"Não foi possível abrir a porta {self.mjpeg_server.port}")
+            
+    def update_restream_info(self):
+        """Mostrar visualizadores conectados e a vazão de cada um"""
+        if not self.mjpeg_server.running:
+            return
+            
+        clients = self.mjpeg_server.stats()["clients"]
+        lines = [f"Stream: {self.mjpeg_server.url} - {len(clients)} visualizador(es)"]
+        for client in clients:
+            lines.append(f"  {client['address']}: {client['fps']} fps, {client['kbps']} kbps, "
+                         f"{client['frames_skipped']} frames pulados")
+        self.restream_info.setText("\n".join(lines))
+        
+    def toggle_relay(self, enabled):
+        """Ligar/desligar o relay para outros receptores"""
+        config.set("relay.enabled", enabled)
+        if not enabled:
+            self.relay_server.stop()
+            self.relay_info.setText("Relay desligado")
+            return
+            
+        if self.relay_server.start():
+            self.relay_info.setText(f"Relay na porta {self.relay_server.port}")
+        else:
+            self.relay_btn.setChecked(False)
+            self.relay_info.setText(f"Não foi possível abrir a porta {self.relay_server.port}")
+            
+    def toggle_stream_capture(self, enabled):
+        """Iniciar/encerrar a captura do stream recebido"""
+        if not enabled:
+            # A captura pode já ter sido encerrada pelo núcleo (desconexão)
+            self.connection_manager.stop_capture()
+            capture, self.stream_capture = self.stream_capture, None
+            if capture:
+                self.capture_info.setText(
+                    f"{capture.records} registros, {capture.bytes_written / 1024 / 1024:.1f} MB em {capture.path}"
+                    + (f" ({capture.dropped} descartados)" if capture.dropped else "")
+                )
+            return
+            
+        filename = None
+        if self.is_connected:
+            filename, _ = QFileDialog.getSaveFileName(
+                self, "Salvar Captura", f"captura_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wrcap",
+                "Capturas do stream (*.wrcap)"
+            )
+        else:
+            QMessageBox.warning(self, "Aviso", "Conecte-se a um dispositivo antes de capturar.")
+        if not filename:
+            self.capture_btn.blockSignals(True)
+            self.capture_btn.setChecked(False)
+            self.capture_btn.blockSignals(False)
+            return
+            
+        self.stream_capture = self.connection_manager.start_capture(filename)
+        self.capture_info.setText(f"Capturando em {self.stream_capture.path}")
+        
+    def start_stream_replay(self):
+        """Reproduzir uma captura em tempo real no lugar do dispositivo"""
+        if self.is_connected:
+            QMessageBox.warning(self, "Aviso", "Desconecte o dispositivo antes de reproduzir uma captura.")
+            return
+            
+        filename, _ = QFileDialog.getOpenFileName(self, "Abrir Captura", "", "Capturas do stream (*.wrcap)")
+        if not filename:
+            return
+            
+        try:
+            self.connection_manager.start_replay(filename)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Erro", f"Não foi possível abrir a captura: {e}")
+            return
+        self.capture_info.setText(f"Reproduzindo {filename}")
+        
+    def update_relay_info(self):
+        """Mostrar receptores ligados ao relay"""
+        if not self.relay_server.running:
+            return
+            
+        subscribers = self.relay_server.stats()["subscribers"]
+        lines = [f"Relay na porta {self.relay_server.port} - {len(subscribers)} receptor(es)"]
+        for subscriber in subscribers:
+            lines.append(f"  {subscriber['address']}: {subscriber['fps']} fps, "
+                         f"{subscriber['frames_dropped']} descartados")
+        self.relay_info.setText("\n".join(lines))
+        
+    def on_connection_requested(self, mobile_id, name):
+        """Perguntar ao usuário se aceita a conexão de um dispositivo do servidor"""
+        answer = QMessageBox.question(
+            self, "Solicitação de Conexão",
+            f"{name} deseja transmitir para este PC. Aceitar?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        self.connection_manager.answer_connection_request(mobile_id, answer == QMessageBox.Yes)
+        
     def connect_to_selected_device(self, item):
         """Conectar ao dispositivo selecionado"""
         device_data = item.data(Qt.UserRole)
@@ -903,13 +1579,84 @@ class MainWindow(QMainWindow):
             self.connection_status.setText(f"Status: Conectando a {name}...")
             self.connection_status.setStyleSheet("font-weight: bold; color: #F39C12;")
             
-            self.connection_manager.connect_to_device(ip, device_type)
+            port = self.known_device_port(name, ip)
+            # Em segundo plano: a medição do enlace antes do handshake leva alguns décimos de segundo
+            self.connection_manager.connect_to_device_async(ip, device_type, port)
+            
+    def known_device_port(self, name, ip):
+        """Porta salva do dispositivo (None: porta padrão)"""
+        known = self.connection_manager.device_directory.lookup(ip)
+        return known.get("port") if known else None
+        
+    def test_link(self):
+        """Medir o enlace com o dispositivo selecionado na lista"""
+        item = self.devices_list.currentItem()
+        device_data = item.data(Qt.UserRole) if item else None
+        if not device_data or device_data[2] != "wifi":
+            self.link_info.setText("Selecione um dispositivo Wi-Fi na lista")
+            return
+            
+        name, ip, device_type = device_data
+        port = self.known_device_port(name, ip) or config.get("network.streaming_port", 5000)
+        self.link_test_btn.setEnabled(False)
+        self.link_info.setText(f"Medindo enlace com {name}...")
+        
+        self.link_test_thread = NetworkTestThread(ip, port)
+        self.link_test_thread.probe_ready.connect(self.connection_manager.apply_link_probe)
+        self.link_test_thread.finished.connect(lambda: self.link_test_btn.setEnabled(True))
+        self.link_test_thread.start()
+        
+    def change_transport_profile(self, index):
+        """Salvar o perfil de transporte e aplicá-lo ao stream atual"""
+        profile = self.transport_combo.itemData(index)
+        config.set("network.transport_profile", profile)
+        self.connection_manager.set_transport_profile(profile)
+        
+    def on_link_probed(self, result):
+        """Mostrar a medição do enlace e a taxa de bits inicial que ela permite"""
+        text = describe_link(result)
+        if recommended_bitrate(result):
+            text += f" - taxa inicial {self.connection_manager.initial_target()['bitrate_kbps']} kbps"
+        self.link_info.setText(text)
+        
+        rtt = result.get("rtt_ms")
+        if rtt:
+            self.link_info.setToolTip(f"{result['host']}:{result['port']} - RTT mín {rtt['min']:.1f}, "
+                                      f"mediana {rtt['median']:.1f}, p95 {rtt['p95']:.1f}, "
+                                      f"máx {rtt['max']:.1f} ms ({rtt['samples']} amostras)")
+        else:
+            self.link_info.setToolTip(f"{result['host']}:{result['port']}")
             
     def on_connection_established(self, device_name, connection_type):
         """Callback quando conexão é estabelecida"""
         self.is_connected = True
         self.connection_status.setText(f"Status: Conectado a {device_name} via {connection_type}")
         self.connection_status.setStyleSheet("font-weight: bold; color: #27AE60;")
+        self.relay_server.device_name = f"{device_name} (relay)"
+        self.frame_filter.reset()
+        self.reset_governor()
+        self.stall_reconnects_left = 0
+        self.watchdog.arm("decode")
+        if not self.background.active:
+            self.watchdog.arm("paint")
+        if self.background.active:
+            # Reconexão com a janela oculta: já começar no ritmo de manutenção
+            self.reduce_background_rate()
+        
+        # Nova conexão começa com o frame inteiro; manter o zoom atual pedindo a ROI
+        self.requested_roi = FULL_FRAME
+        self.video_player.source_rect = FULL_FRAME
+        self.roi_info.setText("")
+        self.schedule_roi_request()
+        
+        self.last_raw_frame = None
+        self.stream_format_info.setText("")
+        self.negotiation_info.setText("")
+        if self.connection_manager.device_capabilities is None:
+            # App sem negociação: segue no formato dele, salvo pedido explícito de YUV
+            self.negotiation_info.setText("O dispositivo não negocia qualidade (app antigo)")
+            if self.raw_mode_check.isChecked():
+                self.connection_manager.request_format(config.get("video.raw_format", "nv21"))
         
         self.statusBar().showMessage(f"Conectado a {device_name} via {connection_type} - Recebendo stream...")
         
@@ -922,6 +1669,13 @@ class MainWindow(QMainWindow):
         self.autofocus_btn.setEnabled(True)
         self.start_record_btn.setEnabled(True)
         
+        if self.motion_check.isChecked():
+            self.start_motion_recording()
+        
+        # A conexão principal também aparece no mosaico
+        self.main_tile = self.grid_view.add_source("principal", device_name)
+        self.connection_manager.core.on("data_received", self.main_tile.offer)
+        
     def on_connection_lost(self, reason):
         """Callback quando conexão é perdida"""
         self.is_connected = False
@@ -935,6 +1689,22 @@ class MainWindow(QMainWindow):
         
         # Mostrar placeholder
         self.video_player.show_placeholder()
+        self.video_player.source_rect = FULL_FRAME
+        self.requested_roi = FULL_FRAME
+        self.last_raw_frame = None
+        
+        # Próxima conexão começa sem reduções (e a oferta volta à qualidade escolhida)
+        self.reset_governor()
+        self.restore_stream_rate()
+        self.background.take_pending_frame()
+        self.watchdog.disarm("decode")
+        self.watchdog.disarm("paint")
+        
+        # Queda detectada pelo watchdog (Wi-Fi mudo): reconectar sozinho, com espera crescente
+        if self.stall_reconnects_left > 0:
+            attempt = config.get("watchdog.reconnect_attempts", 5) - self.stall_reconnects_left
+            self.stall_reconnects_left -= 1
+            QTimer.singleShot(1000 * 2 ** attempt, self.reconnect_after_stall)
         
         # Desabilitar controles
         self.switch_camera_btn.setEnabled(False)
@@ -942,41 +1712,288 @@ class MainWindow(QMainWindow):
         self.autofocus_btn.setEnabled(False)
         self.start_record_btn.setEnabled(False)
         
+        if self.snapshot_service.is_burst_active():
+            self.snapshot_service.cancel_burst()
+            self.burst_btn.setEnabled(True)
+        
         if self.is_recording:
             self.stop_recording()
+        self.stop_motion_recording()
+        if self.capture_btn.isChecked():
+            self.capture_btn.setChecked(False)
+        
+        if self.main_tile:
+            self.connection_manager.core.off("data_received", self.main_tile.offer)
+            self.grid_view.remove_source("principal")
+            self.main_tile = None
             
     def on_data_received(self, data):
         """Callback quando dados são recebidos"""
-        # Atualizar vídeo
-        self.video_player.update_frame(data)
-        
-        # Atualizar estatísticas
-        fps = self.video_player.current_fps
-        resolution = f"{self.video_player.width()}x{self.video_player.height()}"
-        bitrate = len(data) * 8 * fps // 1000  # Estimativa em kbps
-        
-        self.stats_widget.update_video_stats(fps, resolution, bitrate)
+        if is_raw_payload(data):
+            self.on_raw_frame(data)
+            self.watchdog.progress("decode")
+            return
+            
+        # Etapa "decode" do watchdog: frame tratado (exibido, pulado ou pausado)
+        decoded = True
+        if self.preview_paused():
+            # Janela oculta: nada é decodificado (o filtro só serve à gravação)
+            verdict = self.frame_filter.check(data) if self.is_recording and self.skip_duplicates.value else NEW
+            self.connection_manager.stats.record_jpeg(data)
+            self.background.skip(data)
+        else:
+            # Frames idênticos (ou quase) ao exibido não são decodificados nem redesenhados
+            verdict = self.frame_filter.check(data) if self.skip_duplicates.value else NEW
+            if verdict != NEW:
+                self.connection_manager.stats.record_skipped()
+            elif self.governor.admit():
+                start = time.perf_counter()
+                decoded = self.video_player.update_frame(data)
+                elapsed = time.perf_counter() - start
+                self.frame_filter.record_decode_time(elapsed)
+                self.governor.record_decode(elapsed)
+                self.background.record_cost(elapsed)
+            else:
+                # Acima do limite de fps do governador: contado, mas não decodificado
+                self.connection_manager.stats.record_jpeg(data)
+        if decoded:
+            self.watchdog.progress("decode")
+        
+        # Visualizadores HTTP recebem os mesmos bytes, sem recodificar
+        if self.mjpeg_server.running:
+            self.mjpeg_server.publish(data)
+        if self.relay_server.running:
+            self.relay_server.publish(data)
+        
+        # Se estiver gravando, o JPEG vai direto para o disco (repetidos só no índice)
+        if self.is_recording:
+            if verdict == DUPLICATE:
+                self.recorder.write_duplicate(data=data)
+            else:
+                self.recorder.write_jpeg(data)
+            
+    def on_raw_frame(self, data):
+        """Frame YUV sem compressão (modo USB): converter em vez de decodificar"""
+        # Cópia BGR própria só para quem guarda o frame (gravação, rajada, visualizadores)
+        keeps_frame = (self.is_recording or self.snapshot_service.is_burst_active()
+                       or self.mjpeg_server.client_count > 0)
+        if self.preview_paused():
+            # Janela oculta: converter só para quem guarda o frame, sem exibir
+            self.connection_manager.stats.record_skipped()
+            self.background.skip(data)
+            frame = self.yuv_converter.to_bgr(data) if keeps_frame else None
+        elif not keeps_frame and not self.governor.admit():
+            # Acima do limite de fps do governador: nada a converter
+            self.connection_manager.stats.record_skipped()
+            return
+        else:
+            start = time.perf_counter()
+            frame = self.show_raw_frame(data, keeps_frame)
+            elapsed = time.perf_counter() - start
+            self.governor.record_decode(elapsed)
+            self.background.record_cost(elapsed)
+            
+        if frame is not None:
+            self.deliver_frame(frame)
+            
+    def show_raw_frame(self, data, keeps_frame):
+        """Converter e exibir o frame YUV; retorna a cópia BGR para quem guarda o frame"""
+        if self.raw_direct_display.value:
+            frame_rgb = self.yuv_converter.to_display(data)
+            if frame_rgb is None:
+                return
+            self.video_player.show_rgb_frame(frame_rgb)
+            self.connection_manager.stats.record_frame(frame_rgb)
+            # Fotos avulsas convertem o último frame só quando pedidas
+            self.last_raw_frame = data
+            frame = self.yuv_converter.to_bgr(data) if keeps_frame else None
+            if frame is not None and self.snapshot_service.is_burst_active():
+                self.snapshot_service.offer_frame(frame)
+            return frame
+        
+        frame = self.yuv_converter.to_bgr(data)
+        if frame is not None:
+            self.last_raw_frame = None
+            self.video_player.show_frame(frame)
+        return frame
+        
+    def on_frame_decoded(self, frame):
+        """Callback quando um frame já decodificado é recebido (WebRTC)"""
+        if self.preview_paused():
+            self.background.skip(frame)
+        else:
+            self.video_player.show_frame(frame)
+        self.deliver_frame(frame)
         
-        # Se estiver gravando, adicionar frame
+    def deliver_frame(self, frame):
+        """Entregar frame BGR à retransmissão e à gravação (referência, sem cópia)"""
+        if self.mjpeg_server.running:
+            self.mjpeg_server.publish_frame(frame)
         if self.is_recording:
-            self.recorded_frames.append(data)
+            self.recorder.write_frame(frame)
+            
+    # Modo em segundo plano (janela oculta na bandeja ou minimizada)
+    
+    def preview_paused(self):
+        """Exibição pausada? (uma rajada de fotos em andamento ainda precisa dos frames)"""
+        return self.background.active and not self.snapshot_service.is_burst_active()
+        
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange:
+            self.update_background_mode()
+        super().changeEvent(event)
+        
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_background_mode()
+        
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_background_mode()
+        
+    def update_background_mode(self):
+        """Entrar ou sair do segundo plano conforme a janela está visível"""
+        if not self.isVisible() or self.isMinimized():
+            if self.background.enter():
+                print("Janela oculta: exibição pausada (gravação e retransmissão continuam)")
+                self.watchdog.disarm("paint")
+                self.reduce_background_rate()
+        else:
+            report = self.background.leave()
+            if report is None:
+                return
+            if self.is_connected:
+                self.watchdog.arm("paint")
+            self.restore_stream_rate()
+            self.resume_preview()
+            if hasattr(self, 'tray_icon'):
+                self.tray_icon.setToolTip(self.windowTitle())
+            if report["frames_skipped"]:
+                text = self.background.describe(report)
+                print(text)
+                self.statusBar().showMessage(text)
+                
+    def needs_full_rate(self):
+        """Algum consumidor guarda o stream inteiro (gravação, retransmissão, movimento)?"""
+        return (self.is_recording or self.motion_recorder is not None or self.mjpeg_server.running
+                or self.relay_server.running or self.stream_capture is not None)
+        
+    def reduce_background_rate(self):
+        """Pedir ao dispositivo só o ritmo de manutenção enquanto a janela está oculta"""
+        if not self.is_connected or not self.background_keepalive.value or self.needs_full_rate():
+            return
+        target = dict(self.governor.adjust_target(self.quality_target()))
+        target["fps"] = config.get("video.background_fps", 1)
+        if self.connection_manager.renegotiate(target, self.accepted_formats()):
+            self.background_rate_reduced = True
+            
+    def restore_stream_rate(self):
+        """Voltar a pedir a qualidade escolhida (desfaz o ritmo de manutenção)"""
+        if not self.background_rate_reduced:
+            return
+        self.background_rate_reduced = False
+        self.connection_manager.renegotiate(self.governor.adjust_target(self.quality_target()),
+                                            self.accepted_formats())
+        
+    def resume_preview(self):
+        """Exibir já o último frame recebido em segundo plano (todo frame é um keyframe)"""
+        pending = self.background.take_pending_frame()
+        if pending is None or not self.is_connected:
+            return
+        if hasattr(pending, "shape"):
+            self.video_player.show_frame(pending)  # já decodificado (WebRTC)
+        elif is_raw_payload(pending):
+            self.show_raw_frame(pending, False)
+        else:
+            self.video_player.update_frame(pending)
+            
+    def update_background_info(self):
+        """Economia do segundo plano na dica do ícone da bandeja"""
+        if self.background.active and hasattr(self, 'tray_icon'):
+            self.tray_icon.setToolTip(self.background.describe())
             
     # Slots para controles
     def zoom_in(self):
-        """Aumentar zoom"""
-        # Implementar zoom local ou enviar comando para dispositivo
-        pass
+        """Aumentar zoom local"""
+        self.video_player.zoom_by(1.25)
         
     def zoom_out(self):
-        """Diminuir zoom"""
-        # Implementar zoom local ou enviar comando para dispositivo
-        pass
+        """Diminuir zoom local"""
+        self.video_player.zoom_by(0.8)
         
     def zoom_reset(self):
-        """Resetar zoom"""
-        # Implementar reset de zoom
-        pass
+        """Resetar zoom local"""
+        self.video_player.reset_zoom()
+        
+    def update_zoom_label(self, zoom):
+        """Mostrar nível do zoom local"""
+        self.zoom_level_label.setText(f"{zoom * 100:.0f}%")
+        self.remote_zoom_label.setText(f"{zoom:.1f}x")
+        self.remote_zoom_slider.blockSignals(True)
+        self.remote_zoom_slider.setValue(int(round(zoom * 10)))
+        self.remote_zoom_slider.blockSignals(False)
+        
+    def schedule_roi_request(self):
+        """Agrupar zoom/arrasto contínuos num único pedido de ROI"""
+        self.roi_request_timer.start()
+        
+    def send_roi_request(self):
+        """Pedir ao dispositivo a região visível (ou o frame inteiro sem zoom)"""
+        if not self.is_connected:
+            return
+        viewport = self.video_player.viewport
+        wanted = FULL_FRAME
+        if self.roi_streaming_check.isChecked() and viewport.zoomed:
+            wanted = normalize_roi(viewport.visible_rect())
+        if wanted != self.requested_roi and self.connection_manager.request_roi(wanted):
+            self.requested_roi = wanted
+            
+    def toggle_roi_streaming(self, enabled):
+        """Ligar/desligar pedido de ROI ao dispositivo"""
+        config.set("video.roi_streaming", enabled)
+        self.send_roi_request()
+        
+    def on_control_received(self, message):
+        """Callback para mensagens de controle do dispositivo"""
+        if message.get("type") == "format":
+            self.on_stream_format_changed(message.get("format", "jpeg"))
+            return
+        if message.get("type") == "stream_config":
+            self.on_stream_format_changed(message.get("format", "jpeg"))
+            self.negotiation_info.setText(f"Negociado com o dispositivo: {describe(message)}")
+            return
+        if message.get("type") != "roi":
+            return
+        # Chega na mesma fila (e antes) dos frames recortados
+        mapping = RoiMapping(message.get("roi"), message.get("source_size"))
+        self.video_player.source_rect = mapping.roi
+        pixels = mapping.source_pixels()
+        if mapping.cropped and pixels:
+            self.roi_info.setText("Dispositivo enviando só a região {2}x{3} a partir de ({0}, {1}) "
+                                  "do sensor".format(*pixels))
+        else:
+            self.roi_info.setText("Dispositivo enviando o frame inteiro")
         
+    def toggle_raw_mode(self, enabled):
+        """Aceitar frames YUV sem compressão (ou voltar ao JPEG)"""
+        config.set("video.raw_mode", enabled)
+        if self.connection_manager.renegotiate(formats=self.accepted_formats()):
+            return
+        if self.is_connected:
+            # App sem negociação: pedir o formato direto
+            fmt = config.get("video.raw_format", "nv21") if enabled else "jpeg"
+            if not self.connection_manager.request_format(fmt):
+                self.stream_format_info.setText("Esta conexão não aceita troca de formato")
+                
+    def on_stream_format_changed(self, fmt):
+        """Dispositivo confirmou o formato dos próximos frames"""
+        self.frame_filter.reset()
+        self.last_raw_frame = None
+        if fmt == "jpeg":
+            self.stream_format_info.setText("Dispositivo enviando JPEG")
+        else:
+            self.stream_format_info.setText(f"Dispositivo enviando {fmt.upper()} sem compressão")
+            
     def switch_camera(self):
         """Alternar câmera do dispositivo"""
         if self.is_connected:
@@ -998,11 +2015,132 @@ class MainWindow(QMainWindow):
     def update_bitrate_label(self, value):
         """Atualizar label do bitrate"""
         self.bitrate_label.setText(f"{value} kbps")
+        config.set("video.default_bitrate", value)
+        self.schedule_quality_apply()
+        
+    def schedule_quality_apply(self):
+        """Agrupar mudanças seguidas (arrasto do slider) numa única renegociação"""
+        self.quality_apply_timer.start()
+        
+    def quality_target(self):
+        """Qualidade escolhida na aba de qualidade"""
+        width, height = RESOLUTIONS[self.resolution_combo.currentData()]
+        return {
+            "width": width,
+            "height": height,
+            "fps": self.fps_combo.currentData(),
+            "bitrate_kbps": self.bitrate_slider.value()
+        }
+        
+    def accepted_formats(self):
+        """Formatos que este PC aceita receber (YUV só com o modo sem compressão)"""
+        if self.raw_mode_check.isChecked():
+            return ["jpeg", "nv21", "i420"]
+        return ["jpeg"]
+        
+    def apply_quality_settings(self):
+        """Guardar a qualidade e renegociar com o dispositivo, sem reconectar"""
+        target = self.quality_target()
+        self.video_settings.width = target["width"]
+        self.video_settings.height = target["height"]
+        self.video_settings.fps = target["fps"]
+        self.video_settings.bitrate = target["bitrate_kbps"]
+        config.set("video.default_resolution", self.resolution_combo.currentData())
+        config.set("video.default_fps", target["fps"])
+        
+        # Vale para a próxima conexão mesmo que agora não haja dispositivo
+        # (sob carga, o governador pede menos que o escolhido)
+        if self.connection_manager.renegotiate(self.governor.adjust_target(target), self.accepted_formats()):
+            self.negotiation_info.setText("Renegociando com o dispositivo...")
+        elif self.is_connected:
+            self.negotiation_info.setText("O dispositivo não negocia qualidade (app antigo)")
+        
+    def toggle_auto_quality(self, enabled):
+        """Ligar/desligar o governador de qualidade (desligado volta ao normal)"""
+        config.set("video.auto_quality", enabled)
+        if not enabled:
+            self.reset_governor()
+            
+    def update_governor(self):
+        """Amostrar a carga do PC e aplicar a decisão do governador"""
+        if not self.is_connected or not self.auto_quality.value or self.background.active:
+            return
+        decision = self.governor.sample()
+        if decision is None:
+            return
+        previous = LEVELS[decision["from"]]
+        self.apply_governor_level(previous)
+        self.statusBar().showMessage(f"Governador de qualidade: {decision['action']} ({decision['reason']})")
+        
+    def apply_governor_level(self, previous):
+        """Aplicar as ações do nível atual do governador"""
+        settings = self.governor.settings
+        self.video_player.decode_scale = settings["decode_scale"]
+        if settings["reduce_sender"] != previous["reduce_sender"]:
+            target = self.governor.adjust_target(self.quality_target())
+            if not self.connection_manager.renegotiate(target, self.accepted_formats()) and settings["reduce_sender"]:
+                print("Governador de qualidade: o dispositivo não negocia qualidade, só as reduções locais valem")
+                
+    def reset_governor(self):
+        """Voltar o governador ao nível normal, desfazendo as reduções"""
+        previous = self.governor.settings
+        self.governor.reset()
+        self.apply_governor_level(previous)
         
+    # Travamentos (watchdog)
+    
+    def on_stream_stalled(self, event):
+        """Etapa sem progresso no prazo: avisar e reiniciar a etapa (ou reconectar)"""
+        stage = event["stage"]
+        if event["state"] != "stalled":
+            return
+        self.statusBar().showMessage(
+            f"Travamento: etapa '{stage}' sem progresso há {event['seconds']:.1f} s - recuperando"
+        )
+        if stage == "socket":
+            # O núcleo já derrubou o socket; a reconexão sai em on_connection_lost
+            if self.stall_reconnects_left == 0:
+                self.stall_reconnects_left = config.get("watchdog.reconnect_attempts", 5)
+                # Reconectar ao mesmo dispositivo, não ao primeiro da lista
+                self.stall_device = self.connection_manager.core.last_connection
+        elif stage == "decode":
+            self.restart_decode_stage()
+        elif stage == "paint":
+            self.video_player.restart_paint()
+        elif stage == "recorder":
+            self.restart_recorder(event)
+            
+    def reconnect_after_stall(self):
+        """Nova tentativa de conexão depois de uma queda detectada pelo watchdog"""
+        device = self.stall_device
+        if self.is_connected or not device:
+            return
+        self.connection_manager.core.disconnect()
+        self.connection_status.setText(f"Status: Reconectando a {device['name']}...")
+        self.connection_status.setStyleSheet("font-weight: bold; color: #F39C12;")
+        # Sem nova medição do enlace: a queda não é motivo para esperar a sonda
+        self.connection_manager.connect_to_device_async(device["ip"], device["type"], device["port"],
+                                                        probe=False)
+        
+    def restart_decode_stage(self):
+        """Frames chegando sem nenhum decodificado: recomeçar do zero
+        
+        Se a interface ficou bloqueada, o aviso só chega quando ela volta e a
+        etapa já andou; senão, o filtro e o conversor são refeitos e o
+        dispositivo reenvia a configuração (próximo frame completo).
+        """
+        if not self.watchdog.is_stalled("decode"):
+            return
+        self.frame_filter.reset()
+        self.yuv_converter = YuvConverter(pool=self.frame_pool)
+        if not self.connection_manager.renegotiate():
+            self.connection_manager.request_format(self.connection_manager.stream_format)
+            
     def update_volume(self, value):
         """Atualizar volume"""
         self.volume_label.setText(f"{value}%")
         self.audio_settings.volume = value
+        config.set("audio.volume", value)
         
     def toggle_mute(self):
         """Silenciar/reativar áudio"""
@@ -1014,13 +2152,8 @@ class MainWindow(QMainWindow):
             self.mute_btn.setText("🔇 Silenciar")
             
     def update_remote_zoom(self, value):
-        """Atualizar zoom remoto"""
-        zoom_level = value / 10.0
-        self.remote_zoom_label.setText(f"{zoom_level:.1f}x")
-        
-        if self.is_connected:
-            # Enviar comando de zoom para dispositivo
-            pass
+        """Atualizar zoom remoto (com ROI, o dispositivo envia só a região ampliada)"""
+        self.video_player.set_zoom(value / 10.0)
             
     def start_recording(self):
         """Iniciar gravação"""
@@ -1035,8 +2168,13 @@ class MainWindow(QMainWindow):
         )
         
         if filename:
+            self.recording_output = filename
+            self.recording_parts = 1
+            # Sem isso, numa cena parada todo frame seria repetido do que já foi exibido
+            self.frame_filter.reset()
+            self.recorder = MjpegRecorder(filename, watchdog=self.watchdog)
+            self.recorder.start()
             self.is_recording = True
-            self.recorded_frames = []
             self.recording_start_time = time.time()
             
             self.start_record_btn.setEnabled(False)
@@ -1062,12 +2200,212 @@ class MainWindow(QMainWindow):
                 self.recording_timer.stop()
                 
             self.recording_info.setText("Processando gravação...")
+            self.recording_info.setStyleSheet("color: #F39C12; font-weight: bold;")
+            
+            # Fechar o MJPEG e converter para o formato escolhido em thread separada
+            recorder, self.recorder = self.recorder, None
+            Thread(target=self._export_recording, args=(recorder, self.recording_output),
+                   daemon=True).start()
+            
+    def restart_recorder(self, event):
+        """Gravação travada: abandonar a escrita e continuar num arquivo novo"""
+        stalled = self.recorder
+        if not self.is_recording or stalled is None:
+            return
+        stalled.abandon()
+        self.recording_parts += 1
+        base = Path(self.recording_output)
+        stem = base.stem.rsplit("_parte", 1)[0]
+        self.recording_output = str(base.with_name(f"{stem}_parte{self.recording_parts}{base.suffix}"))
+        self.recorder = MjpegRecorder(self.recording_output, watchdog=self.watchdog)
+        self.recorder.start()
+        self.statusBar().showMessage(
+            f"Gravação travada há {event['seconds']:.0f} s: parte anterior em {stalled.path}, "
+            f"continuando em {self.recording_output}"
+        )
+        
+    def _export_recording(self, recorder, output_path):
+        """Finalizar gravação e exportar vídeo (executado fora da interface)"""
+        try:
+            mjpeg_path = recorder.stop()
+            if recorder.error:
+                raise Exception(recorder.error)
+            export_video(mjpeg_path, output_path)
+            self.recording_saved.emit(str(output_path))
+        except Exception as e:
+            self.recording_failed.emit(str(e))
+            
+    def add_selected_to_mosaic(self):
+        """Abrir conexão extra com o dispositivo selecionado e mostrar no mosaico"""
+        item = self.devices_list.currentItem()
+        device_data = item.data(Qt.UserRole) if item else None
+        if not device_data:
+            QMessageBox.information(self, "Mosaico", "Selecione um dispositivo na aba Conexão.")
+            return
+        name, ip, device_type = device_data
+        if device_type != "wifi" or ip in self.mosaic_sources:
+            return
+            
+        core = ReceiverCore()
+        core.device_directory = self.connection_manager.device_directory
+        tile = self.grid_view.add_source(ip, name)
+        # Na thread de rede: só troca a referência do frame pendente do quadro
+        core.on("data_received", tile.offer)
+        core.on("connection_lost", lambda reason, ip=ip: self.mosaic_source_lost.emit(ip, reason))
+        self.mosaic_sources[ip] = core
+        
+        port = self.known_device_port(name, ip)
+        core.connect_to_device_async(ip, device_type, port)
+        
+    def remove_selected_from_mosaic(self):
+        """Fechar a conexão extra do dispositivo selecionado"""
+        item = self.devices_list.currentItem()
+        device_data = item.data(Qt.UserRole) if item else None
+        if device_data:
+            self.remove_mosaic_source(device_data[1])
+            
+    def remove_mosaic_source(self, ip):
+        core = self.mosaic_sources.pop(ip, None)
+        if core:
+            core.disconnect()
+            self.grid_view.remove_source(ip)
+            
+    def on_mosaic_source_lost(self, ip, reason):
+        """Callback quando uma conexão do mosaico cai"""
+        self.remove_mosaic_source(ip)
+        self.statusBar().showMessage(f"Mosaico: {ip} removido - {reason}")
+        
+    def update_mosaic_info(self):
+        """Mostrar redução de decodificação e descarte por quadro"""
+        if not self.grid_view.isVisible():
+            return
+        lines = []
+        for tile in self.grid_view.compositor.stats():
+            state = f"1/{tile['reduction']}, {tile['decode_ms']:.1f} ms" if tile["visible"] else "oculto"
+            lines.append(f"{tile['title']}: {state}, {tile['frames_decoded']} decodificados, "
+                         f"{tile['frames_skipped']} pulados")
+        self.mosaic_info.setText("\n".join(lines) or "Nenhum stream no mosaico")
+        
+    def toggle_motion_recording(self, enabled):
+        """Ligar/desligar gravação por movimento"""
+        config.set("motion.enabled", enabled)
+        if not enabled:
+            self.stop_motion_recording()
+            self.motion_info.setText("Detector desligado")
+        elif self.is_connected:
+            self.start_motion_recording()
+        else:
+            self.motion_info.setText("Aguardando conexão")
             
-            # Processar e salvar vídeo em thread separada
-            # (Implementação simplificada)
+    def start_motion_recording(self):
+        """Criar detector para a conexão atual"""
+        if self.motion_recorder:
+            return
+        directory = Path(config.get("recording.save_location", str(Path.home()))) / "Movimento"
+        motion_recorder = create_motion_recorder(
+            directory, sensitivity=self.motion_sensitivity_slider.value()
+        )
+        # Os callbacks rodam na thread de rede; os sinais entregam na interface
+        motion_recorder.on_event_started = self.motion_started.emit
+        motion_recorder.on_event_finished = self.motion_finished.emit
+        self.motion_recorder = motion_recorder
+        self.motion_info.setText(f"Aguardando movimento (eventos em {motion_recorder.log_path})")
+        
+    def stop_motion_recording(self):
+        """Encerrar detector (o evento em andamento é fechado e registrado)"""
+        motion_recorder, self.motion_recorder = self.motion_recorder, None
+        if motion_recorder:
+            motion_recorder.stop()
             
-            self.recording_info.setText("Gravação salva com sucesso!")
-            self.recording_info.setStyleSheet("color: #27AE60; font-weight: bold;")
+    def feed_motion(self, data):
+        """Entregar JPEG ao detector (thread de rede)"""
+        motion_recorder = self.motion_recorder
+        if motion_recorder and not is_raw_payload(data):
+            motion_recorder.feed_jpeg(data)
+            
+    def update_motion_sensitivity(self, value):
+        """Aplicar nova sensibilidade ao detector em uso"""
+        config.set("motion.sensitivity", value)
+        if self.motion_recorder:
+            self.motion_recorder.detector.sensitivity = value
+            
+    def update_motion_info(self):
+        """Mostrar pontuação atual do detector"""
+        motion_recorder = self.motion_recorder
+        if not motion_recorder:
+            return
+        report = motion_recorder.report()
+        state = "GRAVANDO" if report["recording"] else "aguardando"
+        self.motion_info.setText(
+            f"Movimento: {report['last_score']:.1f}% da área "
+            f"(limite {motion_recorder.detector.min_area_percent}%) - {state}, "
+            f"{report['events']} evento(s), análise {report['analysis_ms']:.1f} ms/frame"
+        )
+        
+    def on_motion_started(self, event):
+        """Callback quando um evento de movimento começa"""
+        started = event["started"].split("T")[1]
+        self.motion_event_info.setText(f"Movimento às {started}: gravando {Path(event['path']).name}")
+        self.motion_event_info.setStyleSheet("color: #E74C3C; font-weight: bold;")
+        
+    def on_motion_finished(self, event):
+        """Callback quando um evento de movimento termina"""
+        started = event["started"].split("T")[1]
+        self.motion_event_info.setText(
+            f"Último evento: {started} ({event['duration']:.1f} s) - {event['path']}"
+        )
+        self.motion_event_info.setStyleSheet("color: #27AE60;")
+        
+    def on_recording_saved(self, path):
+        """Callback quando o vídeo da gravação é exportado"""
+        self.recording_info.setText(f"Gravação salva: {path}")
+        self.recording_info.setStyleSheet("color: #27AE60; font-weight: bold;")
+        
+    def on_recording_failed(self, message):
+        """Callback quando a gravação não pôde ser exportada"""
+        self.recording_info.setText(f"Erro ao salvar gravação: {message}")
+        self.recording_info.setStyleSheet("color: #E74C3C; font-weight: bold;")
+            
+    def capture_snapshot(self):
+        """Capturar foto do frame atual"""
+        fmt = self.snapshot_format_combo.currentData()
+        if self.last_raw_frame is not None:
+            # Exibição direta do YUV não entrega frames BGR ao serviço de fotos
+            self.snapshot_service.latest_frame = self.yuv_converter.to_bgr(self.last_raw_frame)
+        if self.snapshot_service.capture(fmt) is None:
+            self.snapshot_info.setText("Nenhum vídeo disponível para capturar")
+        else:
+            self.snapshot_info.setText("Salvando foto...")
+            
+    def capture_burst(self):
+        """Capturar rajada com os próximos frames do stream"""
+        if not self.is_connected:
+            QMessageBox.warning(self, "Aviso", "Conecte-se a um dispositivo antes de capturar.")
+            return
+            
+        count = self.burst_count_spin.value()
+        fmt = self.snapshot_format_combo.currentData()
+        if self.snapshot_service.start_burst(count, fmt):
+            self.burst_btn.setEnabled(False)
+            self.snapshot_info.setText(f"Capturando rajada de {count} frames...")
+            
+    def on_snapshot_saved(self, path):
+        """Callback quando uma foto é salva"""
+        self.snapshot_info.setText(f"Foto salva: {path}")
+        
+    def on_snapshot_failed(self, message):
+        """Callback quando uma foto não pôde ser salva"""
+        self.snapshot_info.setText(f"Erro ao salvar foto: {message}")
+        
+    def on_burst_finished(self, frame_count, truncated):
+        """Callback quando a rajada termina de ser capturada"""
+        self.burst_btn.setEnabled(True)
+        if truncated:
+            self.snapshot_info.setText(
+                f"Rajada interrompida pelo limite de memória: salvando {frame_count} frames..."
+            )
+        else:
+            self.snapshot_info.setText(f"Rajada capturada: salvando {frame_count} frames...")
             
     def update_recording_info(self):
         """Atualizar informações da gravação"""
@@ -1079,9 +2417,12 @@ class MainWindow(QMainWindow):
             
             self.recording_time.setText(f"Tempo: {hours:02d}:{minutes:02d}:{seconds:02d}")
             
-            # Estimar tamanho (aproximado)
-            size_mb = len(self.recorded_frames) * 50 / 1024 / 1024  # ~50KB por frame
-            self.recording_size.setText(f"Tamanho: {size_mb:.1f} MB")
+            size_mb = self.recorder.bytes_written / 1024 / 1024
+            saved_mb = self.recorder.bytes_saved / 1024 / 1024
+            if saved_mb:
+                self.recording_size.setText(f"Tamanho: {size_mb:.1f} MB ({saved_mb:.1f} MB poupados em frames repetidos)")
+            else:
+                self.recording_size.setText(f"Tamanho: {size_mb:.1f} MB")
             
     def closeEvent(self, event):
         """Evento de fechamento da janela"""
@@ -1089,13 +2430,55 @@ class MainWindow(QMainWindow):
             self.hide()
             event.ignore()
         else:
-            # Limpar recursos
+            # Limpar recursos (a gravação em andamento fica salva como .mjpeg)
+            if self.is_recording:
+                self.is_recording = False
+                self.recorder.stop()
+            self.stop_motion_recording()
+            for ip in list(self.mosaic_sources):
+                self.remove_mosaic_source(ip)
             if self.is_connected:
-                self.connection_manager.disconnect()
+                self.connection_manager.core.disconnect()
+            self.connection_manager.stop_signaling()
+            self.connection_manager.stop_responder()
+            self.mjpeg_server.stop()
+            self.relay_server.stop()
+            self.connection_manager.device_directory.flush()
+            self.snapshot_service.shutdown(wait=False)
             event.accept()
 
+def parse_args(argv):
+    """Interpretar argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(description="Webcam Remota Universal - Receptor PC")
+    parser.add_argument("--profile-imports", action="store_true",
+                        help="mostrar perfil de tempo de import e sair")
+    parser.add_argument("--benchmark-startup", action="store_true",
+                        help="medir tempo até a janela aparecer e sair")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="não pré-carregar OpenCV/NumPy depois que a janela aparece")
+    args, _ = parser.parse_known_args(argv[1:])
+    return args
+
+def finish_startup_benchmark(app):
+    """Encerrar benchmark de inicialização após o primeiro ciclo de eventos
+
+    O orçamento de tempo é conferido em tests/test_startup.py.
+    """
+    elapsed = timeline.mark("primeiro ciclo de eventos")
+    print(timeline.report())
+    print(f"Janela pronta em {elapsed:.1f} ms")
+    app.exit(0)
+
 def main():
     """Função principal"""
+    args = parse_args(sys.argv)
+    
+    if args.profile_imports:
+        print(import_profile_report("main"))
+        return
+        
+    timeline.mark("imports")
+    
     app = QApplication(sys.argv)
     app.setApplicationName("Webcam Remota Universal")
     app.setApplicationVersion("1.0.0")
@@ -1106,7 +2489,15 @@ def main():
     
     # Criar e mostrar janela principal
     window = MainWindow()
+    timeline.mark("janela criada")
     window.show()
+    timeline.mark("janela exibida")
+    
+    if args.benchmark_startup:
+        QTimer.singleShot(0, lambda: finish_startup_benchmark(app))
+    elif not args.no_preload:
+        # Adiantar o carregamento pesado enquanto o usuário escolhe o dispositivo
+        QTimer.singleShot(0, lambda: preload_in_background(np, cv2))
     
     # Executar aplicação
     sys.exit(app.exec_())
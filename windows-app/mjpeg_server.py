@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Retransmissão local do stream em MJPEG sobre HTTP
+Webcam Remota Universal - Servidor MJPEG
+
+Serve os JPEGs recebidos como `multipart/x-mixed-replace` para vários
+visualizadores (fontes de navegador do OBS, outro monitor, painéis):
+
+    http://<pc>:8081/stream.mjpg   stream
+    http://<pc>:8081/snapshot.jpg  último frame
+    http://<pc>:8081/stats         estatísticas por cliente (JSON)
+    http://<pc>:8081/health        travamentos por etapa (JSON; 503 se travado)
+
+Teste de carga com clientes locais:
+
+    python -m mjpeg_server --load-test 40 --duration 10
+"""
+
+import sys
+import json
+import time
+import socket
+import argparse
+from threading import Thread, Condition, Lock, Event
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from startup import lazy_import
+
+cv2 = lazy_import("cv2")
+
+BOUNDARY = "webcamremota-frame"
+
+class ClientSlot:
+    """Vaga de "último frame" de um visualizador
+
+    Guarda só o frame mais recente: se o cliente estiver lento, frames
+    intermediários são substituídos (e contados em `frames_skipped`) em vez
+    de acumular, então um visualizador lento nunca atrasa os demais nem
+    quem publica.
+    """
+
+    def __init__(self, address):
+        self.address = address
+        self.connected_at = time.time()
+
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.bytes_sent = 0
+
+        self._frame = None
+        self._closed = False
+        self._condition = Condition()
+
+    def offer(self, frame):
+        """Substituir o frame pendente (chamado por quem publica)"""
+        with self._condition:
+            if self._frame is not None:
+                self.frames_skipped += 1
+            self._frame = frame
+            self._condition.notify()
+
+    def take(self, timeout):
+        """Aguardar e retirar o próximo frame (None em timeout/fechamento)"""
+        with self._condition:
+            if self._frame is None and not self._closed:
+                self._condition.wait(timeout)
+            frame, self._frame = self._frame, None
+            return frame
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def stats(self):
+        """Resumo de vazão do cliente"""
+        elapsed = max(time.time() - self.connected_at, 1e-6)
+        return {
+            "address": self.address,
+            "connected_seconds": round(elapsed, 1),
+            "frames_sent": self.frames_sent,
+            "frames_skipped": self.frames_skipped,
+            "bytes_sent": self.bytes_sent,
+            "fps": round(self.frames_sent / elapsed, 1),
+            "kbps": int(self.bytes_sent * 8 / elapsed / 1000)
+        }
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    server_version = "WebcamRemota-MJPEG/1.0"
+
+    def do_GET(self):
+        mjpeg = self.server.mjpeg
+        path = self.path.split("?", 1)[0]
+
+        if path in ("/", "/stream.mjpg", "/stream.mjpeg"):
+            self._serve_stream(mjpeg)
+        elif path == "/snapshot.jpg":
+            frame = mjpeg.latest_frame
+            if frame is None:
+                self.send_error(503, "Nenhum frame disponível")
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(frame)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(frame)
+        elif path == "/stats":
+            self._send_json(200, mjpeg.stats())
+        elif path == "/health":
+            health = mjpeg.health_provider() if mjpeg.health_provider else {"status": "ok"}
+            self._send_json(200 if health.get("status") == "ok" else 503, health)
+        else:
+            self.send_error(404)
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve_stream(self, mjpeg):
+        slot = mjpeg._add_client(f"{self.client_address[0]}:{self.client_address[1]}")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+            self.send_header("Cache-Control", "no-store")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+            # Começar com o último frame para o visualizador não ficar preto
+            if mjpeg.latest_frame is not None:
+                slot.offer(mjpeg.latest_frame)
+
+            while mjpeg.running and not slot.closed:
+                frame = slot.take(timeout=1.0)
+                if frame is None:
+                    continue
+
+                header = (f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                          f"Content-Length: {len(frame)}\r\n\r\n").encode("ascii")
+                self.wfile.write(header)
+                self.wfile.write(frame)
+                self.wfile.write(b"\r\n")
+                slot.frames_sent += 1
+                slot.bytes_sent += len(header) + len(frame) + 2
+
+        except (BrokenPipeError, ConnectionResetError, socket.timeout):
+            pass  # Visualizador saiu
+        finally:
+            mjpeg._remove_client(slot)
+
+    def log_message(self, format, *args):
+        pass  # Sem log por requisição
+
+class MjpegServer:
+    """Servidor HTTP que repassa os JPEGs recebidos a vários visualizadores
+
+    `publish` recebe os bytes exatamente como chegaram do dispositivo (sem
+    decodificar nem recodificar) e só troca a referência na vaga de cada
+    cliente; cada visualizador é atendido por sua própria thread.
+
+    Frames BGR (`publish_frame`) são codificados numa thread própria, fora
+    da thread de quem publica; se ela atrasar, fica só o frame mais recente.
+    """
+
+    def __init__(self, host="0.0.0.0", port=8081, jpeg_quality=85):
+        self.host = host
+        self.port = port
+        self.jpeg_quality = jpeg_quality
+
+        self.latest_frame = None
+        self.frames_published = 0
+        self.running = False
+        # Quem fornece o estado do pipeline para /health (ex: Watchdog.report)
+        self.health_provider = None
+
+        self._clients = []
+        self._clients_lock = Lock()
+        self._httpd = None
+        self._thread = None
+
+        # Frame BGR aguardando codificação (só o mais recente)
+        self.frames_encode_skipped = 0
+        self._pending_frame = None
+        self._encode_condition = Condition()
+        self._encoder = None
+
+    @property
+    def url(self):
+        host = "localhost" if self.host in ("0.0.0.0", "") else self.host
+        return f"http://{host}:{self.port}/stream.mjpg"
+
+    def start(self):
+        """Abrir a porta e atender em segundo plano"""
+        if self.running:
+            return True
+
+        try:
+            self._httpd = ThreadingHTTPServer((self.host, self.port), _StreamHandler)
+        except OSError as e:
+            print(f"Erro ao abrir servidor MJPEG na porta {self.port}: {e}")
+            return False
+
+        self._httpd.daemon_threads = True
+        self._httpd.mjpeg = self
+        self.port = self._httpd.server_address[1]
+        self.running = True
+        self._thread = Thread(target=self._httpd.serve_forever, daemon=True, name="mjpeg-server")
+        self._thread.start()
+        self._encoder = Thread(target=self._encode_worker, daemon=True, name="mjpeg-encoder")
+        self._encoder.start()
+        return True
+
+    def stop(self):
+        """Encerrar servidor e desconectar visualizadores"""
+        if not self.running:
+            return
+        self.running = False
+
+        with self._encode_condition:
+            self._pending_frame = None
+            self._encode_condition.notify()
+        self._encoder.join(timeout=2)
+        self._encoder = None
+
+        with self._clients_lock:
+            clients = list(self._clients)
+        for slot in clients:
+            slot.close()
+
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._httpd = None
+        self._thread = None
+
+    # Publicação (thread de rede/interface)
+
+    def publish(self, jpeg):
+        """Repassar frame JPEG para todos os visualizadores"""
+        self.latest_frame = jpeg
+        self.frames_published += 1
+
+        clients = self._clients  # Lista substituída (não alterada) ao entrar/sair
+        for slot in clients:
+            slot.offer(jpeg)
+
+    def publish_frame(self, frame):
+        """Publicar frame BGR já decodificado (WebRTC, YUV); só codifica se houver quem assista
+
+        Não bloqueia: o frame (por referência) fica para a thread de
+        codificação, substituindo um anterior ainda não codificado.
+        """
+        if not self._clients or not self.running:
+            return
+        with self._encode_condition:
+            if self._pending_frame is not None:
+                self.frames_encode_skipped += 1
+            self._pending_frame = frame
+            self._encode_condition.notify()
+
+    def _encode_worker(self):
+        """Codificar em JPEG os frames BGR publicados"""
+        while self.running:
+            with self._encode_condition:
+                if self._pending_frame is None:
+                    self._encode_condition.wait(1.0)
+                frame, self._pending_frame = self._pending_frame, None
+            if frame is None:
+                continue
+            try:
+                ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            except Exception as e:
+                print(f"Erro ao codificar frame para MJPEG: {e}")
+                continue
+            if ok and self.running:
+                self.publish(encoded.tobytes())
+
+    @property
+    def client_count(self):
+        return len(self._clients)
+
+    def stats(self):
+        """Estatísticas do servidor e de cada visualizador"""
+        return {
+            "frames_published": self.frames_published,
+            "frames_encode_skipped": self.frames_encode_skipped,
+            "clients": [slot.stats() for slot in self._clients]
+        }
+
+    def _add_client(self, address):
+        slot = ClientSlot(address)
+        with self._clients_lock:
+            self._clients = self._clients + [slot]
+        return slot
+
+    def _remove_client(self, slot):
+        slot.close()
+        with self._clients_lock:
+            self._clients = [client for client in self._clients if client is not slot]
+
+# Teste de carga
+
+def _load_client(port, results, index, stop, slow=False):
+    """Cliente HTTP mínimo que conta frames do stream"""
+    frames = 0
+    received = 0
+    try:
+        sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+        sock.sendall(b"GET /stream.mjpg HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        marker = f"--{BOUNDARY}".encode("ascii")
+        pending = b""
+        while not stop.is_set():
+            data = sock.recv(65536)
+            if not data:
+                break
+            received += len(data)
+            pending = pending[-len(marker):] + data
+            frames += pending.count(marker)
+            if slow:
+                time.sleep(0.5)  # Visualizador lento: não pode atrasar os outros
+        sock.close()
+    except OSError as e:
+        print(f"Cliente {index}: {e}")
+    results[index] = (frames, received)
+
+def load_test(clients=40, duration=10.0, fps=30, frame_size=(1280, 720), slow_clients=1):
+    """Publicar frames sintéticos e medir a entrega a vários clientes locais"""
+    np = lazy_import("numpy")
+
+    server = MjpegServer(host="127.0.0.1", port=0)
+    if not server.start():
+        return None
+
+    # JPEG de teste com conteúdo (frames lisos ficam pequenos demais)
+    width, height = frame_size
+    image = np.random.randint(0, 255, (height // 8, width // 8, 3), dtype=np.uint8)
+    image = cv2.resize(image, (width, height), interpolation=cv2.INTER_NEAREST)
+    jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+
+    stop = Event()
+    results = {}
+    threads = [
+        Thread(target=_load_client, args=(server.port, results, i, stop, i < slow_clients), daemon=True)
+        for i in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+
+    deadline = time.time() + 2
+    while server.client_count < clients and time.time() < deadline:
+        time.sleep(0.05)
+
+    publish_times = []
+    start = time.perf_counter()
+    next_frame = start
+    while time.perf_counter() - start < duration:
+        t0 = time.perf_counter()
+        server.publish(jpeg)
+        publish_times.append(time.perf_counter() - t0)
+        next_frame += 1 / fps
+        time.sleep(max(0, next_frame - time.perf_counter()))
+    elapsed = time.perf_counter() - start
+
+    client_stats = server.stats()["clients"]
+    stop.set()
+    server.stop()
+    for thread in threads:
+        thread.join(timeout=2)
+
+    publish_times.sort()
+    fast = [results[i][0] / elapsed for i in results if i >= slow_clients]
+    slow = [results[i][0] / elapsed for i in results if i < slow_clients]
+    return {
+        "clients": clients,
+        "connected": len(client_stats),
+        "frame_bytes": len(jpeg),
+        "published_fps": len(publish_times) / elapsed,
+        "publish_p50_us": publish_times[len(publish_times) // 2] * 1e6,
+        "publish_p99_us": publish_times[int(len(publish_times) * 0.99)] * 1e6,
+        "client_fps_min": min(fast) if fast else 0,
+        "client_fps_avg": sum(fast) / len(fast) if fast else 0,
+        "slow_client_fps": slow,
+        "skipped_total": sum(client["frames_skipped"] for client in client_stats)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="mjpeg_server", description="Servidor MJPEG - teste de carga")
+    parser.add_argument("--load-test", type=int, metavar="CLIENTES", default=40,
+                        help="número de clientes locais")
+    parser.add_argument("--duration", type=float, default=10.0, help="duração em segundos")
+    parser.add_argument("--fps", type=int, default=30, help="frames publicados por segundo")
+    args = parser.parse_args((argv or sys.argv)[1:])
+
+    result = load_test(clients=args.load_test, duration=args.duration, fps=args.fps)
+    if result is None:
+        return 1
+
+    print(f"Clientes: {result['connected']}/{result['clients']}  frame: {result['frame_bytes'] / 1024:.0f} KB")
+    print(f"Publicado: {result['published_fps']:.1f} fps  "
+          f"publish p50 {result['publish_p50_us']:.0f} µs, p99 {result['publish_p99_us']:.0f} µs")
+    print(f"Entregue (clientes normais): mín {result['client_fps_min']:.1f} fps, "
+          f"média {result['client_fps_avg']:.1f} fps")
+    print(f"Clientes lentos: {', '.join(f'{fps:.1f}' for fps in result['slow_client_fps'])} fps  "
+          f"frames substituídos: {result['skipped_total']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
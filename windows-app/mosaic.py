@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Composição de vários streams num mosaico
+Webcam Remota Universal - Mosaico
+
+Cada stream é decodificado direto no tamanho mais próximo do seu quadro
+(`IMREAD_REDUCED_COLOR_2/4/8`): um 1080p mostrado num quadro de 480x270 é
+decodificado em 480x270, sem passar pela resolução cheia. Todos os quadros
+são desenhados numa única imagem pré-alocada, entregue à tela de uma vez.
+"""
+
+import math
+import time
+from threading import Lock
+
+from startup import lazy_import
+from stats import jpeg_dimensions
+from yuv import is_raw_payload, parse_raw_header, YuvConverter
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+# Fator de redução -> nome da flag do decodificador
+REDUCED_COLOR = {
+    1: "IMREAD_COLOR",
+    2: "IMREAD_REDUCED_COLOR_2",
+    4: "IMREAD_REDUCED_COLOR_4",
+    8: "IMREAD_REDUCED_COLOR_8"
+}
+
+def choose_reduction(source_size, target_size):
+    """Maior redução (1, 2, 4 ou 8) que ainda cobre o quadro de destino"""
+    if not source_size or not target_size:
+        return 1
+    source_width, source_height = source_size
+    target_width, target_height = target_size
+    # Com proporção preservada, basta cobrir o lado que limita o encaixe
+    scale = min(target_width / source_width, target_height / source_height)
+    for reduction in (8, 4, 2):
+        if scale * reduction <= 1.0:
+            return reduction
+    return 1
+
+class Tile:
+    """Um stream do mosaico: guarda só o JPEG mais recente
+
+    `offer` pode ser chamado da thread de rede; só troca a referência. A
+    decodificação acontece no ritmo da tela e apenas para quadros visíveis,
+    então frames que chegam enquanto o mosaico está oculto custam zero.
+    """
+
+    def __init__(self, key, title):
+        self.key = key
+        self.title = title
+        self.visible = True
+
+        self.frames_offered = 0
+        self.frames_decoded = 0
+        self.decode_seconds = 0.0
+        self.reduction = 1
+        self.source_size = None
+
+        self._pending = None
+        self._lock = Lock()
+
+    def offer(self, data):
+        """Substituir o frame pendente"""
+        with self._lock:
+            self._pending = data
+            self.frames_offered += 1
+
+    def take(self):
+        """Retirar o frame pendente (None se nada novo chegou)"""
+        with self._lock:
+            data, self._pending = self._pending, None
+            return data
+
+    @property
+    def frames_skipped(self):
+        return self.frames_offered - self.frames_decoded
+
+class MosaicCompositor:
+    """Desenha os quadros numa imagem BGR única, reaproveitada entre atualizações"""
+
+    def __init__(self, size=(1280, 720), gap=4):
+        self.gap = gap
+        self.tiles = []
+        self.canvas = None
+        self.columns = 1
+        self.rows = 1
+        self.tile_size = (0, 0)
+        self._size = size
+        self._yuv = YuvConverter()
+        self._layout()
+
+    # Quadros
+
+    def add_tile(self, key, title):
+        tile = self.get_tile(key)
+        if tile is None:
+            tile = Tile(key, title)
+            self.tiles.append(tile)
+            self._layout()
+        return tile
+
+    def remove_tile(self, key):
+        self.tiles = [tile for tile in self.tiles if tile.key != key]
+        self._layout()
+
+    def get_tile(self, key):
+        for tile in self.tiles:
+            if tile.key == key:
+                return tile
+        return None
+
+    def set_tile_visible(self, key, visible):
+        tile = self.get_tile(key)
+        if tile is not None and tile.visible != visible:
+            tile.visible = visible
+            tile.take()  # Frame pendente já está velho
+            self._clear_tile(self.tiles.index(tile))
+
+    # Geometria
+
+    def resize(self, width, height):
+        """Ajustar a imagem ao tamanho da tela (realoca só se mudar)"""
+        if (width, height) != self._size:
+            self._size = (width, height)
+            self._layout()
+
+    def tile_rect(self, index):
+        """Retângulo (x, y, largura, altura) do quadro na imagem"""
+        tile_width, tile_height = self.tile_size
+        row, column = divmod(index, self.columns)
+        x = self.gap + column * (tile_width + self.gap)
+        y = self.gap + row * (tile_height + self.gap)
+        return x, y, tile_width, tile_height
+
+    def _layout(self):
+        count = max(len(self.tiles), 1)
+        self.columns = math.ceil(math.sqrt(count))
+        self.rows = math.ceil(count / self.columns)
+
+        width, height = self._size
+        self.tile_size = (
+            max((width - self.gap * (self.columns + 1)) // self.columns, 1),
+            max((height - self.gap * (self.rows + 1)) // self.rows, 1)
+        )
+        self.canvas = np.zeros((height, width, 3), np.uint8)
+
+    def _clear_tile(self, index):
+        x, y, w, h = self.tile_rect(index)
+        self.canvas[y:y + h, x:x + w] = 0
+
+    # Composição (thread da interface, uma vez por atualização)
+
+    def compose(self):
+        """Decodificar frames novos dos quadros visíveis; retorna quantos mudaram"""
+        updated = 0
+        for index, tile in enumerate(self.tiles):
+            if not tile.visible:
+                continue
+            data = tile.take()
+            if data is None:
+                continue
+            if self._draw_tile(index, tile, data):
+                updated += 1
+        return updated
+
+    def _draw_tile(self, index, tile, data):
+        start = time.perf_counter()
+        x, y, tile_width, tile_height = self.tile_rect(index)
+
+        if is_raw_payload(data):
+            # Frame YUV sem compressão: não há decodificação reduzida, só conversão
+            header = parse_raw_header(data)
+            source_size = header[:2] if header else None
+            tile.reduction = 1
+            frame = self._yuv.to_bgr(data)
+        else:
+            source_size = jpeg_dimensions(data)
+            tile.reduction = choose_reduction(source_size, (tile_width, tile_height))
+            frame = cv2.imdecode(np.frombuffer(data, np.uint8),
+                                 getattr(cv2, REDUCED_COLOR[tile.reduction]))
+        if frame is None:
+            return False
+
+        frame_height, frame_width = frame.shape[:2]
+        scale = min(tile_width / frame_width, tile_height / frame_height)
+        width = max(int(frame_width * scale), 1)
+        height = max(int(frame_height * scale), 1)
+        if (width, height) != (frame_width, frame_height):
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+        # Centralizar; faixas só são limpas quando a geometria muda
+        if source_size != tile.source_size:
+            tile.source_size = source_size
+            self._clear_tile(index)
+        left = x + (tile_width - width) // 2
+        top = y + (tile_height - height) // 2
+        self.canvas[top:top + height, left:left + width] = frame
+
+        tile.frames_decoded += 1
+        tile.decode_seconds += time.perf_counter() - start
+        return True
+
+    def stats(self):
+        """Por quadro: redução usada, frames decodificados e descartados"""
+        return [
+            {
+                "key": tile.key,
+                "title": tile.title,
+                "visible": tile.visible,
+                "reduction": tile.reduction,
+                "frames_decoded": tile.frames_decoded,
+                "frames_skipped": tile.frames_skipped,
+                "decode_ms": 1000.0 * tile.decode_seconds / tile.frames_decoded
+                             if tile.frames_decoded else 0.0
+            }
+            for tile in self.tiles
+        ]
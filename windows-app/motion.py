@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gravação disparada por movimento
+Webcam Remota Universal - Detector de Movimento
+
+O detector trabalha sobre a luma do JPEG decodificada em resolução reduzida
+(`IMREAD_REDUCED_GRAYSCALE_4`: um frame 1080p vira 480x270 e o
+decodificador pula a maior parte do IDCT), com um fundo em média móvel e
+operações vetorizadas do OpenCV. Só alguns frames por segundo são
+analisados; os demais só passam pelo buffer de pré-gravação.
+
+Medir o custo por frame:
+
+    python -m motion --benchmark 1080p
+"""
+
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+from startup import lazy_import
+from config import config
+from recorder import MjpegRecorder
+from frame_filter import FrameFilter
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+# Fatores de redução suportados pelo decodificador JPEG
+REDUCED_GRAYSCALE = {
+    1: "IMREAD_GRAYSCALE",
+    2: "IMREAD_REDUCED_GRAYSCALE_2",
+    4: "IMREAD_REDUCED_GRAYSCALE_4",
+    8: "IMREAD_REDUCED_GRAYSCALE_8"
+}
+
+def parse_region(text):
+    """Interpretar região "x,y,largura,altura" (frações de 0 a 1 do frame)"""
+    values = [float(value) for value in text.split(",")]
+    if len(values) != 4 or not all(0.0 <= value <= 1.0 for value in values):
+        raise ValueError(f"Região inválida: {text!r} (esperado x,y,largura,altura entre 0 e 1)")
+    return tuple(values)
+
+class MotionDetector:
+    """Subtração de fundo sobre luma reduzida
+
+    `sensitivity` (0-100) define a diferença de luma que conta como pixel
+    em movimento; `min_area_percent` é a parcela da área observada que
+    precisa mudar para o frame contar como movimento. `regions` limita a
+    análise a retângulos normalizados (x, y, largura, altura); vazio
+    observa o frame inteiro. Não depende de Qt.
+    """
+
+    def __init__(self, sensitivity=50, min_area_percent=0.5, regions=None,
+                 reduction=4, learning_rate=0.05):
+        if reduction not in REDUCED_GRAYSCALE:
+            raise ValueError(f"Redução inválida: {reduction} (use 1, 2, 4 ou 8)")
+        self.sensitivity = sensitivity
+        self.min_area_percent = min_area_percent
+        self.reduction = reduction
+        self.learning_rate = learning_rate
+        self.regions = [tuple(region) for region in regions or []]
+
+        self.last_score = 0.0
+        self.frames_analyzed = 0
+        self.analysis_seconds = 0.0
+
+        self._background = None
+        self._mask = None
+        self._mask_area = 0
+
+    @property
+    def pixel_threshold(self):
+        """Diferença mínima de luma (0-255) para um pixel contar como movimento"""
+        sensitivity = min(max(self.sensitivity, 0), 100)
+        return int(5 + (100 - sensitivity) * 0.4)
+
+    def set_regions(self, regions):
+        """Trocar as regiões observadas (a máscara é refeita no próximo frame)"""
+        self.regions = [tuple(region) for region in regions or []]
+        self._mask = None
+
+    def reset(self):
+        """Esquecer o fundo aprendido (nova conexão/mudança de cena)"""
+        self._background = None
+        self._mask = None
+        self.last_score = 0.0
+
+    def analyze_jpeg(self, data):
+        """Pontuação de movimento (% da área) de um frame JPEG; None se inválido"""
+        start = time.perf_counter()
+        flag = getattr(cv2, REDUCED_GRAYSCALE[self.reduction])
+        luma = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+        if luma is None:
+            return None
+        score = self._analyze_luma(luma)
+        self.analysis_seconds += time.perf_counter() - start
+        return score
+
+    def analyze_frame(self, frame):
+        """Pontuação de movimento de um frame BGR já decodificado (WebRTC)"""
+        start = time.perf_counter()
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (width // self.reduction, height // self.reduction),
+                           interpolation=cv2.INTER_AREA)
+        score = self._analyze_luma(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+        self.analysis_seconds += time.perf_counter() - start
+        return score
+
+    def is_motion(self, score):
+        return score is not None and score >= self.min_area_percent
+
+    def _analyze_luma(self, luma):
+        self.frames_analyzed += 1
+        luma = cv2.GaussianBlur(luma, (5, 5), 0)
+
+        background = self._background
+        if background is None or background.shape != luma.shape:
+            # Primeiro frame (ou mudança de resolução): vira o fundo
+            self._background = luma.astype(np.float32)
+            self._mask = None
+            self.last_score = 0.0
+            return 0.0
+
+        if self._mask is None:
+            self._build_mask(luma.shape)
+
+        diff = cv2.absdiff(luma, cv2.convertScaleAbs(background))
+        _, moving = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        if self._mask is not None:
+            cv2.bitwise_and(moving, self._mask, dst=moving)
+        changed = cv2.countNonZero(moving)
+
+        cv2.accumulateWeighted(luma, background, self.learning_rate)
+
+        self.last_score = 100.0 * changed / self._mask_area if self._mask_area else 0.0
+        return self.last_score
+
+    def _build_mask(self, shape):
+        height, width = shape
+        if not self.regions:
+            self._mask = None
+            self._mask_area = height * width
+            return
+
+        mask = np.zeros((height, width), np.uint8)
+        for x, y, w, h in self.regions:
+            left, top = int(x * width), int(y * height)
+            right, bottom = int(round((x + w) * width)), int(round((y + h) * height))
+            mask[top:bottom, left:right] = 255
+        self._mask = mask
+        self._mask_area = cv2.countNonZero(mask)
+
+class MotionRecorder:
+    """Grava só enquanto houver movimento, com pré e pós-gravação
+
+    `feed_jpeg` é chamado para todo frame recebido (pode ser da thread de
+    rede). Os JPEGs dos últimos `pre_roll` segundos ficam num buffer em
+    memória; quando o detector confirma movimento, um `MjpegRecorder` é
+    aberto e o buffer é gravado com os timestamps originais. A gravação
+    termina `post_roll` segundos depois do último movimento. Cada evento é
+    registrado em `motion_events.jsonl` no diretório de gravação.
+
+    Callbacks `on_event_started(evento)` e `on_event_finished(evento)` são
+    chamados na thread que alimenta os frames.
+    """
+
+    def __init__(self, directory, detector=None, pre_roll=3.0, post_roll=5.0,
+                 analysis_fps=10.0, trigger_frames=2, name="movimento"):
+        self.directory = Path(directory)
+        self.detector = detector or MotionDetector()
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.analysis_interval = 1.0 / analysis_fps if analysis_fps > 0 else 0.0
+        self.trigger_frames = trigger_frames
+        self.name = name
+        self.log_path = self.directory / "motion_events.jsonl"
+
+        self.on_event_started = None
+        self.on_event_finished = None
+
+        self.events = []
+        self.recorder = None
+        self.current_event = None
+
+        self._buffer = deque()  # (timestamp, JPEG, repetido); repetidos apontam para os mesmos bytes
+        self._last_fingerprint = None
+        self._last_analysis = 0.0
+        self._motion_streak = 0
+        self._last_motion = 0.0
+        self._stopped = False
+        self._lock = Lock()
+
+    @property
+    def active(self):
+        return self.recorder is not None
+
+    def feed_jpeg(self, data, timestamp=None):
+        """Processar um frame JPEG recebido"""
+        timestamp = timestamp or time.time()
+        with self._lock:
+            if self._stopped:
+                return
+            # Bytes idênticos ao anterior: nada se moveu, e na gravação vira referência
+            fingerprint = FrameFilter.fingerprint(data)
+            repeated = fingerprint == self._last_fingerprint
+            self._last_fingerprint = fingerprint
+
+            if not repeated and timestamp - self._last_analysis >= self.analysis_interval:
+                self._last_analysis = timestamp
+                self._update_motion(self.detector.analyze_jpeg(data), timestamp)
+
+            if self.recorder:
+                if repeated:
+                    self.recorder.write_duplicate(timestamp)
+                else:
+                    self.recorder.write_jpeg(data, timestamp)
+                if timestamp - self._last_motion > self.post_roll:
+                    self._finish_event(timestamp)
+            else:
+                self._buffer.append((timestamp, data, repeated))
+                while self._buffer and timestamp - self._buffer[0][0] > self.pre_roll:
+                    self._buffer.popleft()
+
+    def stop(self):
+        """Encerrar o evento em andamento; frames posteriores são ignorados"""
+        with self._lock:
+            self._stopped = True
+            if self.recorder:
+                self._finish_event(time.time())
+            self._buffer.clear()
+
+    def _update_motion(self, score, timestamp):
+        if not self.detector.is_motion(score):
+            self._motion_streak = 0
+            return
+
+        self._motion_streak += 1
+        if self._motion_streak < self.trigger_frames:
+            return
+
+        self._last_motion = timestamp
+        if self.current_event is None:
+            self._start_event(timestamp, score)
+        else:
+            self.current_event["peak_score"] = max(self.current_event["peak_score"], round(score, 2))
+
+    def _start_event(self, timestamp, score):
+        moment = datetime.fromtimestamp(timestamp)
+        path = self.directory / f"{self.name}_{moment.strftime('%Y%m%d_%H%M%S')}"
+        self.recorder = MjpegRecorder(path)
+        self.current_event = {
+            "started": moment.isoformat(timespec="milliseconds"),
+            "start_ts": timestamp,
+            "recording_from": self._buffer[0][0] if self._buffer else timestamp,
+            "peak_score": round(score, 2),
+            "path": str(self.recorder.start())
+        }
+
+        # Pré-gravação: o que aconteceu antes do movimento ser confirmado
+        for i, (buffered_ts, data, repeated) in enumerate(self._buffer):
+            if repeated and i > 0:
+                self.recorder.write_duplicate(buffered_ts)
+            else:
+                self.recorder.write_jpeg(data, buffered_ts)
+        self._buffer.clear()
+
+        self._log_event("start", self.current_event)
+        if self.on_event_started:
+            self.on_event_started(dict(self.current_event))
+
+    def _finish_event(self, timestamp):
+        recorder, self.recorder = self.recorder, None
+        event, self.current_event = self.current_event, None
+        recorder.stop()
+
+        event["ended"] = datetime.fromtimestamp(timestamp).isoformat(timespec="milliseconds")
+        event["end_ts"] = timestamp
+        event["duration"] = round(timestamp - event["recording_from"], 2)
+        event["frames"] = recorder.frames_written + recorder.duplicate_frames
+        event["bytes"] = recorder.bytes_written
+        self.events.append(event)
+
+        self._log_event("end", event)
+        if self.on_event_finished:
+            self.on_event_finished(dict(event))
+
+    def _log_event(self, kind, event):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(dict(event, event=kind), ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Erro ao registrar evento de movimento: {e}")
+
+    def report(self):
+        """Resumo do detector: custo e eventos"""
+        detector = self.detector
+        analyzed = detector.frames_analyzed
+        return {
+            "frames_analyzed": analyzed,
+            "analysis_ms": 1000.0 * detector.analysis_seconds / analyzed if analyzed else 0.0,
+            "last_score": detector.last_score,
+            "events": len(self.events),
+            "recording": self.active
+        }
+
+def create_motion_recorder(directory, name="movimento", **overrides):
+    """Montar detector + gravador com as opções da seção "motion" da configuração"""
+    settings = {
+        "sensitivity": config.get("motion.sensitivity", 50),
+        "min_area_percent": config.get("motion.min_area_percent", 0.5),
+        "regions": config.get("motion.regions", []),
+        "reduction": config.get("motion.reduction", 4),
+        "analysis_fps": config.get("motion.analysis_fps", 10),
+        "pre_roll": config.get("motion.pre_roll_seconds", 3.0),
+        "post_roll": config.get("motion.post_roll_seconds", 5.0)
+    }
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+
+    detector = MotionDetector(
+        sensitivity=settings["sensitivity"],
+        min_area_percent=settings["min_area_percent"],
+        regions=settings["regions"],
+        reduction=settings["reduction"]
+    )
+    return MotionRecorder(
+        directory, detector,
+        pre_roll=settings["pre_roll"],
+        post_roll=settings["post_roll"],
+        analysis_fps=settings["analysis_fps"],
+        name=name
+    )
+
+# Benchmark
+
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080), "4k": (3840, 2160)}
+
+def _synthetic_jpegs(width, height, count):
+    """Cena com textura e um quadrado se movendo"""
+    rng = np.random.default_rng(1)
+    scene = cv2.resize(rng.integers(0, 255, (height // 16, width // 16, 3), dtype=np.uint8),
+                       (width, height), interpolation=cv2.INTER_LINEAR)
+    size = height // 6
+    frames = []
+    for i in range(count):
+        frame = scene.copy()
+        x = (i * width // count) % (width - size)
+        frame[height // 3:height // 3 + size, x:x + size] = (40, 200, 240)
+        frames.append(cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes())
+    return frames
+
+def benchmark(resolution="1080p", frames=60, fps=30, analysis_fps=10.0):
+    """Custo por frame do detector comparado à decodificação completa"""
+    width, height = RESOLUTIONS[resolution]
+    jpegs = _synthetic_jpegs(width, height, frames)
+
+    start = time.perf_counter()
+    for data in jpegs:
+        cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    full_ms = 1000.0 * (time.perf_counter() - start) / frames
+
+    results = {"resolution": resolution, "full_decode_ms": full_ms, "reductions": {}}
+    for reduction in (2, 4, 8):
+        detector = MotionDetector(reduction=reduction)
+        scores = [detector.analyze_jpeg(data) for data in jpegs]
+        per_frame = 1000.0 * detector.analysis_seconds / frames
+        results["reductions"][reduction] = {
+            "ms": per_frame,
+            "motion_frames": sum(1 for score in scores if detector.is_motion(score)),
+            # CPU de um núcleo gasta no detector analisando `analysis_fps` frames/s
+            "cpu_percent": per_frame * min(analysis_fps, fps) / 10.0
+        }
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="motion", description="Detector de movimento - benchmark")
+    parser.add_argument("--benchmark", choices=sorted(RESOLUTIONS), default="1080p",
+                        help="resolução dos frames sintéticos")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--fps", type=int, default=30, help="frames recebidos por segundo")
+    parser.add_argument("--analysis-fps", type=float, default=10.0,
+                        help="frames analisados por segundo")
+    args = parser.parse_args((argv or sys.argv)[1:])
+
+    result = benchmark(args.benchmark, args.frames, args.fps, args.analysis_fps)
+    print(f"{result['resolution']}: decodificação completa {result['full_decode_ms']:.2f} ms/frame")
+    for reduction, item in result["reductions"].items():
+        print(f"  redução 1/{reduction}: {item['ms']:.2f} ms/frame, "
+              f"{item['motion_frames']}/{args.frames} com movimento, "
+              f"~{item['cpu_percent']:.1f}% de um núcleo a {args.analysis_fps:g} análises/s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
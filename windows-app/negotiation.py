@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Negociação de capacidades e qualidade do stream
+Webcam Remota Universal - Negociação
+
+O handshake enquadrado vira uma troca de oferta e capacidades:
+
+    PC -> dispositivo  {"type": "connection_request", "device_type": "pc_windows",
+                        "protocol_version": 2,
+                        "accept": {"formats": [...], "header_versions": [1]},
+                        "target": {"width", "height", "fps", "bitrate_kbps"}}
+    dispositivo -> PC  {"status": "connected", "device_name": ...,
+                        "capabilities": {"formats": [...], "resolutions": [[L, A], ...],
+                                         "max_fps": 60, "header_versions": [1],
+                                         "transport": "wifi" | "usb" | "usb3",
+                                         "link_mbps": (opcional)}}
+
+Com as capacidades, o PC escolhe a configuração (`choose_config`) e a
+envia pelo canal de controle; a mesma mensagem renegocia durante o
+stream, sem derrubar o socket:
+
+    PC -> dispositivo  {"type": "configure", "format", "width", "height", "fps",
+                        "bitrate_kbps", "header_version"}
+    dispositivo -> PC  {"type": "stream_config", ...configuração aplicada}
+
+A confirmação vem logo antes do primeiro frame na nova configuração.
+Dispositivos que respondem só `status`/`device_name` seguem no modo
+antigo (JPEG no formato que eles escolherem).
+"""
+
+from config import config
+
+PROTOCOL_VERSION = 2
+
+# Versões do cabeçalho de frames sem compressão que este receptor entende (yuv.py)
+HEADER_VERSIONS = (1,)
+
+RESOLUTIONS = {
+    "480p": (640, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160)
+}
+
+# Custo de preparar um frame para a tela neste PC, em ms por megapixel
+# (medido com `python -m yuv --benchmark`: JPEG ~12 ms e NV21 ~1.6 ms em 1080p)
+DECODE_MS_PER_MEGAPIXEL = {
+    "jpeg": 6.0,
+    "nv21": 0.8,
+    "i420": 0.8
+}
+
+# Banda útil estimada por transporte quando o dispositivo não informa
+LINK_MBPS = {
+    "wifi": 60,
+    "usb": 280,    # USB 2.0 pelo adb
+    "usb3": 2000
+}
+
+# Fração da banda que o vídeo pode ocupar
+LINK_HEADROOM = 0.7
+
+def default_target():
+    """Qualidade alvo a partir da configuração salva"""
+    width, height = RESOLUTIONS.get(config.get("video.default_resolution", "720p"), (1280, 720))
+    return {
+        "width": width,
+        "height": height,
+        "fps": config.get("video.default_fps", 30),
+        "bitrate_kbps": config.get("video.default_bitrate", 2000)
+    }
+
+def build_offer(target, formats):
+    """Mensagem de handshake com o que o PC decodifica e a qualidade desejada"""
+    return {
+        "type": "connection_request",
+        "device_type": "pc_windows",
+        "protocol_version": PROTOCOL_VERSION,
+        "accept": {"formats": list(formats), "header_versions": list(HEADER_VERSIONS)},
+        "target": dict(target)
+    }
+
+def parse_capabilities(response):
+    """Capacidades anunciadas na resposta do handshake (None: dispositivo antigo)"""
+    capabilities = response.get("capabilities")
+    if not isinstance(capabilities, dict) or not capabilities.get("formats"):
+        return None
+    return {
+        "formats": [str(fmt) for fmt in capabilities["formats"]],
+        "resolutions": [tuple(size) for size in capabilities.get("resolutions", [])],
+        "max_fps": capabilities.get("max_fps"),
+        "header_versions": capabilities.get("header_versions", [1]),
+        "transport": capabilities.get("transport", "wifi"),
+        "link_mbps": capabilities.get("link_mbps")
+    }
+
+def stream_mbps(fmt, width, height, fps, bitrate_kbps):
+    """Banda que a configuração ocupa (formatos sem compressão: 12 bits/pixel)"""
+    if fmt == "jpeg":
+        return bitrate_kbps / 1000
+    return width * height * 1.5 * 8 * fps / 1e6
+
+def decode_cost(fmt, width, height, fps):
+    """Milissegundos de CPU por segundo para preparar os frames"""
+    return DECODE_MS_PER_MEGAPIXEL[fmt] * width * height / 1e6 * fps
+
+def choose_resolution(resolutions, width, height):
+    """Menor resolução oferecida que cobre o alvo (ou a maior disponível)"""
+    if not resolutions:
+        return width, height
+    covering = [size for size in resolutions if size[0] >= width and size[1] >= height]
+    if covering:
+        return min(covering, key=lambda size: size[0] * size[1])
+    return max(resolutions, key=lambda size: size[0] * size[1])
+
+def choose_config(capabilities, target, formats, link_mbps=None):
+    """Configuração mais barata de decodificar que cabe no enlace
+
+    Entre os formatos que os dois lados aceitam, escolhe o de menor custo
+    de CPU no PC cuja banda cabe na fração útil do enlace. JPEG sempre
+    cabe (a taxa de bits se ajusta) e é a alternativa final.
+    """
+    width, height = choose_resolution(capabilities["resolutions"], target["width"], target["height"])
+    fps = target["fps"]
+    if capabilities.get("max_fps"):
+        fps = min(fps, capabilities["max_fps"])
+    bitrate_kbps = target["bitrate_kbps"]
+
+    if link_mbps is None:
+        link_mbps = capabilities.get("link_mbps") or LINK_MBPS.get(capabilities["transport"], LINK_MBPS["wifi"])
+    budget = link_mbps * LINK_HEADROOM
+
+    candidates = [fmt for fmt in formats
+                  if fmt in capabilities["formats"] and fmt in DECODE_MS_PER_MEGAPIXEL]
+    fitting = [fmt for fmt in candidates
+               if fmt == "jpeg" or stream_mbps(fmt, width, height, fps, bitrate_kbps) <= budget]
+    fmt = min(fitting, key=lambda fmt: decode_cost(fmt, width, height, fps)) if fitting else "jpeg"
+
+    common = [version for version in capabilities["header_versions"] if version in HEADER_VERSIONS]
+    return {
+        "format": fmt,
+        "width": width,
+        "height": height,
+        "fps": fps,
+        "bitrate_kbps": bitrate_kbps,
+        "header_version": max(common) if common else HEADER_VERSIONS[0]
+    }
+
+def configure_message(stream_config):
+    """Mensagem "configure" (aplicar configuração, inclusive durante o stream)"""
+    message = {"type": "configure"}
+    message.update(stream_config)
+    return message
+
+def describe(stream_config):
+    """Texto curto para a interface ("NV21 1280x720 a 30 fps")"""
+    fmt = stream_config.get("format", "jpeg").upper()
+    text = f"{fmt} {stream_config.get('width')}x{stream_config.get('height')} a {stream_config.get('fps')} fps"
+    if stream_config.get("format") == "jpeg" and stream_config.get("bitrate_kbps"):
+        text += f", {stream_config['bitrate_kbps']} kbps"
+    return text
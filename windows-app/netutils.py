@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Utilitários de rede (sem dependência de Qt)
+Webcam Remota Universal - Rede
+"""
+
+import socket
+
+def get_local_addresses():
+    """Listar endereços IPv4 das interfaces ativas (sem loopback/link-local)
+
+    Retorna lista de dicts com interface, ip, netmask e broadcast. Não depende
+    de acesso à internet.
+    """
+    import ipaddress
+    import psutil
+    
+    addresses = []
+    try:
+        stats = psutil.net_if_stats()
+        for interface, addrs in psutil.net_if_addrs().items():
+            if interface in stats and not stats[interface].isup:
+                continue
+                
+            for addr in addrs:
+                if addr.family != socket.AF_INET or not addr.netmask:
+                    continue
+                    
+                ip = ipaddress.IPv4Address(addr.address)
+                if ip.is_loopback or ip.is_link_local:
+                    continue
+                    
+                network = ipaddress.IPv4Network(f"{addr.address}/{addr.netmask}", strict=False)
+                addresses.append({
+                    "interface": interface,
+                    "ip": addr.address,
+                    "netmask": addr.netmask,
+                    "broadcast": addr.broadcast or str(network.broadcast_address)
+                })
+    except Exception as e:
+        print(f"Erro ao listar interfaces de rede: {e}")
+        
+    # Redes privadas primeiro (Wi-Fi/Ethernet local antes de VPNs públicas)
+    addresses.sort(key=lambda a: not ipaddress.IPv4Address(a["ip"]).is_private)
+    return addresses
+
+def get_local_ip():
+    """Obter endereço IP local da máquina"""
+    addresses = get_local_addresses()
+    if addresses:
+        return addresses[0]["ip"]
+    return "127.0.0.1"
+
+def is_port_available(port):
+    """Verificar se uma porta está disponível"""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(('localhost', port))
+            return True
+    except OSError:
+        return False
+
+def find_available_port(start_port=5000, max_attempts=100):
+    """Encontrar uma porta disponível"""
+    for port in range(start_port, start_port + max_attempts):
+        if is_port_available(port):
+            return port
+    return None
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Receptor sem interface gráfica para máquinas de captura
+Webcam Remota Universal - Daemon do Receptor
+
+Uso:
+    python -m receiver --device 192.168.1.20 --record /srv/gravacoes
+    python -m receiver --discover --record /srv/gravacoes
+    python -m receiver --signaling http://servidor:5000 --record /srv/gravacoes
+    python -m receiver --device 192.168.1.20 --record /srv/gravacoes --motion
+
+Não importa PyQt5; OpenCV/NumPy só são carregados se algum frame precisar
+ser codificado (WebRTC) ou analisado (--motion). JPEGs do Wi-Fi vão direto
+para o disco.
+"""
+
+import sys
+import time
+import signal
+import argparse
+from datetime import datetime
+from pathlib import Path
+from threading import Event, Lock
+
+from config import config
+from receiver_core import ReceiverCore
+from recorder import MjpegRecorder
+from mjpeg_server import MjpegServer
+from relay import RelayServer
+from frame_filter import FrameFilter, NEW
+from motion import create_motion_recorder, parse_region
+from linkprobe import describe as describe_link
+from transport import PROFILES as TRANSPORT_PROFILES
+
+def log(message):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+class ReceiverDaemon:
+    """Recebe de um dispositivo e grava cada conexão num arquivo MJPEG"""
+
+    def __init__(self, record_dir=None, device_ip=None, port=None, discover=False,
+                 signaling_url=None, reconnect=True, stats_interval=10.0, mjpeg_port=None,
+                 relay_port=None, near_threshold=0.0, motion=None, transport_profile=None):
+        self.record_dir = Path(record_dir) if record_dir else None
+        self.device_ip = device_ip
+        self.port = port
+        self.discover = discover
+        self.signaling_url = signaling_url
+        self.reconnect = reconnect
+        self.stats_interval = stats_interval
+
+        self.core = ReceiverCore()
+        if transport_profile:
+            self.core.transport_profile = transport_profile
+        # Travamentos: o núcleo vigia o socket (e reconectamos); aqui, a gravação
+        self.core.watchdog.add_stage("recorder", config.get("watchdog.recorder_seconds", 5.0))
+        self.recorder = None
+        self.mjpeg_server = MjpegServer(port=mjpeg_port) if mjpeg_port else None
+        if self.mjpeg_server:
+            self.mjpeg_server.health_provider = self.core.watchdog.report
+        self.relay_server = RelayServer(port=relay_port) if relay_port else None
+        # Repetidos viram referências na gravação; com limite > 0, quase
+        # idênticos também (descarta ruído de sensor em cena estática)
+        self.frame_filter = FrameFilter(near_threshold=near_threshold)
+        # Opções do detector de movimento (None: gravar a conexão inteira)
+        self.motion = motion
+        self.motion_recorder = None
+        self._recorder_lock = Lock()
+        self._stopping = Event()
+        self._connect_needed = Event()
+        self._reconnecting = False
+
+        self.core.on("device_discovered", self._on_device_discovered)
+        self.core.on("connection_established", self._on_connection_established)
+        self.core.on("connection_lost", self._on_connection_lost)
+        self.core.on("data_received", self._on_data_received)
+        self.core.on("frame_decoded", self._on_frame_decoded)
+        self.core.on("connection_requested", self._on_connection_requested)
+        self.core.on("signaling_state_changed", self._on_signaling_state_changed)
+        self.core.on("link_probed", self._on_link_probed)
+        self.core.on("stream_stalled", self._on_stream_stalled)
+
+    # Ciclo de vida
+
+    def run(self):
+        """Executar até receber SIGINT/SIGTERM"""
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: self._stopping.set())
+
+        if self.mjpeg_server and self.mjpeg_server.start():
+            log(f"Retransmitindo em {self.mjpeg_server.url}")
+        if self.relay_server and self.relay_server.start():
+            log(f"Relay na porta {self.relay_server.port}")
+        if self.discover and not self.device_ip:
+            self.core.start_responder()
+            self.core.start_discovery()
+        if self.signaling_url:
+            self.core.start_signaling(self.signaling_url)
+        if self.device_ip:
+            self._connect_needed.set()
+
+        delay = 1
+        next_stats = time.monotonic() + self.stats_interval
+        while not self._stopping.wait(0.5):
+            if self._connect_needed.is_set() and not self.core.connected:
+                self._connect_needed.clear()
+                log(f"Conectando a {self.device_ip}...")
+                # Só a primeira conexão mede o enlace; as reconexões usam a medição guardada
+                self.core.connect_to_device(self.device_ip, "wifi", self.port, probe=not self._reconnecting)
+                if not self.core.connected:
+                    if not self.reconnect:
+                        break
+                    self._stopping.wait(delay)
+                    delay = min(delay * 2, 30)
+                    self._connect_needed.set()
+                else:
+                    delay = 1
+                    self._reconnecting = True
+
+            if time.monotonic() >= next_stats:
+                next_stats = time.monotonic() + self.stats_interval
+                if self.core.connected:
+                    self._log_stats()
+
+        self.shutdown()
+
+    def shutdown(self):
+        log("Encerrando...")
+        self.core.disconnect()
+        self.core.stop_signaling()
+        self.core.stop_responder()
+        self._stop_recording()
+        self._log_savings()
+        if self.mjpeg_server:
+            self.mjpeg_server.stop()
+        if self.relay_server:
+            self.relay_server.stop()
+        self.core.device_directory.flush()
+        config.flush()
+
+    # Gravação
+
+    def _start_recording(self, device_name):
+        if not self.record_dir:
+            return
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in device_name)
+        if self.motion is not None:
+            motion_recorder = create_motion_recorder(self.record_dir, name=safe_name, **self.motion)
+            motion_recorder.on_event_started = self._on_motion_started
+            motion_recorder.on_event_finished = self._on_motion_finished
+            self.motion_recorder = motion_recorder
+            log(f"Aguardando movimento (eventos em {motion_recorder.log_path})")
+            return
+        path = self.record_dir / f"{safe_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        with self._recorder_lock:
+            self.recorder = MjpegRecorder(path, watchdog=self.core.watchdog)
+            log(f"Gravando em {self.recorder.start()}")
+
+    def _restart_recording(self):
+        """Gravação travada: abandonar a escrita e continuar num arquivo novo"""
+        with self._recorder_lock:
+            stalled, self.recorder = self.recorder, None
+        if stalled is None:
+            return
+        stalled.abandon()
+        log(f"Gravação travada: {stalled.path} abandonado com {stalled.frames_written} frames")
+        self._start_recording(self.core.device_name or "dispositivo")
+
+    def _stop_recording(self):
+        motion_recorder, self.motion_recorder = self.motion_recorder, None
+        if motion_recorder:
+            motion_recorder.stop()
+            report = motion_recorder.report()
+            log(f"Detector de movimento: {report['events']} evento(s), "
+                f"{report['frames_analyzed']} frames analisados "
+                f"({report['analysis_ms']:.1f} ms cada)")
+        with self._recorder_lock:
+            recorder, self.recorder = self.recorder, None
+        if recorder:
+            path = recorder.stop()
+            log(f"Gravação encerrada: {path} ({recorder.frames_written} frames, "
+                f"{recorder.duplicate_frames} repetidos como referência, "
+                f"{recorder.bytes_saved / 1024 / 1024:.1f} MB poupados, "
+                f"{recorder.frames_dropped} descartados)")
+
+    # Eventos do núcleo (threads de rede/sinalização)
+
+    def _on_device_discovered(self, name, ip, device_type):
+        log(f"Dispositivo encontrado: {name} ({ip}) - {device_type}")
+        if self.discover and device_type == "wifi" and not self.device_ip:
+            self.device_ip = ip
+            self._connect_needed.set()
+
+    def _on_connection_established(self, device_name, connection_type):
+        log(f"Conectado a {device_name} via {connection_type}")
+        self.frame_filter.reset()
+        if self.relay_server:
+            self.relay_server.device_name = f"{device_name} (relay)"
+        self._start_recording(device_name)
+
+    def _on_connection_lost(self, reason):
+        log(reason)
+        self.core.disconnect()
+        self._stop_recording()
+        if not self.device_ip:
+            return
+        if self.reconnect and not self._stopping.is_set():
+            self._connect_needed.set()
+        else:
+            self._stopping.set()
+
+    def _on_data_received(self, data):
+        self.core.stats.record_jpeg(data)
+        if self.mjpeg_server:
+            self.mjpeg_server.publish(data)
+        if self.relay_server:
+            self.relay_server.publish(data)
+        motion_recorder = self.motion_recorder
+        if motion_recorder:
+            motion_recorder.feed_jpeg(data)
+        recorder = self.recorder
+        if recorder:
+            if self.frame_filter.check(data) == NEW:
+                recorder.write_jpeg(data)
+            else:
+                recorder.write_duplicate(data=data)
+
+    def _on_frame_decoded(self, frame):
+        self.core.stats.record_frame(frame)
+        if self.mjpeg_server:
+            self.mjpeg_server.publish_frame(frame)
+        recorder = self.recorder
+        if recorder:
+            recorder.write_frame(frame)
+
+    def _on_motion_started(self, event):
+        log(f"Movimento detectado ({event['peak_score']:.1f}% da área): gravando em {event['path']}")
+
+    def _on_motion_finished(self, event):
+        log(f"Fim do movimento: {event['duration']:.1f} s, {event['frames']} frames, "
+            f"{event['bytes'] / 1024 / 1024:.1f} MB")
+
+    def _on_connection_requested(self, mobile_id, name):
+        # Sem ninguém para perguntar: aceitar quem pedir
+        log(f"Aceitando solicitação de {name}")
+        self.core.answer_connection_request(mobile_id, True)
+
+    def _on_signaling_state_changed(self, connected):
+        log("Conectado ao servidor de sinalização" if connected
+            else "Desconectado do servidor de sinalização")
+
+    def _on_link_probed(self, result):
+        log(f"Enlace com {result['host']}: {describe_link(result)}")
+
+    def _on_stream_stalled(self, event):
+        # Thread do watchdog; o socket travado já foi derrubado pelo núcleo
+        if event["state"] == "stalled" and event["stage"] == "recorder":
+            self._restart_recording()
+
+    def _log_stats(self):
+        sample = self.core.stats.sample()
+        message = f"{sample['fps']:.1f} fps, {sample['bitrate_kbps']} kbps"
+        if sample["resolution"]:
+            message += " ({}x{})".format(*sample["resolution"])
+        tuner = self.core.transport_tuner
+        if tuner and tuner.rcvbuf:
+            message += f", buffer {tuner.rcvbuf // 1024} KB ({tuner.profile})"
+        recorder = self.recorder
+        if recorder:
+            message += f", gravados {recorder.bytes_written / 1024 / 1024:.1f} MB"
+        if self.mjpeg_server and self.mjpeg_server.client_count:
+            message += f", {self.mjpeg_server.client_count} visualizador(es)"
+        if self.relay_server and self.relay_server.subscriber_count:
+            message += f", {self.relay_server.subscriber_count} receptor(es) no relay"
+        message += f", {self.core.watchdog.describe().lower()}"
+        log(message)
+
+    def _log_savings(self):
+        report = self.frame_filter.report()
+        if report["frames_checked"]:
+            log(f"Frames repetidos: {report['duplicates']} idênticos, "
+                f"{report['near_duplicates']} quase idênticos "
+                f"({report['skipped_percent']:.0f}%), "
+                f"{report['bytes_skipped'] / 1024 / 1024:.1f} MB não gravados; "
+                f"custo do filtro {report['filter_seconds']:.2f} s")
+
+def parse_args(argv):
+    """Interpretar argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(
+        prog="receiver", description="Webcam Remota Universal - Receptor sem interface"
+    )
+    parser.add_argument("--device", metavar="IP", help="IP do dispositivo Android (Wi-Fi)")
+    parser.add_argument("--port", type=int, default=None,
+                        help="porta de streaming do dispositivo (padrão: configuração)")
+    parser.add_argument("--discover", action="store_true",
+                        help="procurar dispositivos na rede e conectar ao primeiro encontrado")
+    parser.add_argument("--signaling", metavar="URL",
+                        help="entrar no servidor de sinalização e aceitar conexões WebRTC")
+    parser.add_argument("--record", metavar="DIR", help="gravar cada conexão neste diretório")
+    parser.add_argument("--serve-mjpeg", type=int, metavar="PORTA",
+                        help="retransmitir o stream em http://<host>:PORTA/stream.mjpg")
+    parser.add_argument("--relay", type=int, metavar="PORTA",
+                        help="repassar o stream a outros receptores nesta porta")
+    parser.add_argument("--dedupe-near", type=float, default=0.0, metavar="LIMITE",
+                        help="gravar frames quase idênticos (diferença média de luma < LIMITE, "
+                             "ex: 2.0) como repetição do anterior")
+    parser.add_argument("--motion", action="store_true",
+                        help="com --record, gravar só quando houver movimento (com pré/pós-gravação)")
+    parser.add_argument("--motion-sensitivity", type=int, metavar="0-100",
+                        help="sensibilidade do detector (padrão: configuração)")
+    parser.add_argument("--motion-area", type=float, metavar="PERCENT",
+                        help="parcela mínima da área que precisa mudar")
+    parser.add_argument("--motion-region", action="append", type=parse_region, metavar="X,Y,L,A",
+                        help="observar só esta região (frações de 0 a 1); pode repetir")
+    parser.add_argument("--pre-roll", type=float, metavar="SEGUNDOS",
+                        help="segundos gravados antes do movimento")
+    parser.add_argument("--post-roll", type=float, metavar="SEGUNDOS",
+                        help="segundos gravados depois do último movimento")
+    parser.add_argument("--transport", choices=sorted(TRANSPORT_PROFILES), metavar="PERFIL",
+                        help="perfil do socket: " + ", ".join(TRANSPORT_PROFILES) + " (padrão: configuração)")
+    parser.add_argument("--no-reconnect", action="store_true",
+                        help="sair em vez de reconectar quando a conexão cair")
+    parser.add_argument("--stats-interval", type=float, default=10.0, metavar="SEGUNDOS",
+                        help="intervalo entre linhas de estatística no log")
+    args = parser.parse_args(argv[1:])
+
+    if not (args.device or args.discover or args.signaling):
+        parser.error("informe --device, --discover ou --signaling")
+    if args.motion and not args.record:
+        parser.error("--motion exige --record")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv or sys.argv)
+    daemon = ReceiverDaemon(
+        record_dir=args.record,
+        device_ip=args.device,
+        port=args.port,
+        discover=args.discover,
+        signaling_url=args.signaling,
+        reconnect=not args.no_reconnect,
+        stats_interval=args.stats_interval,
+        mjpeg_port=args.serve_mjpeg,
+        relay_port=args.relay,
+        near_threshold=args.dedupe_near,
+        motion={
+            "sensitivity": args.motion_sensitivity,
+            "min_area_percent": args.motion_area,
+            "regions": args.motion_region,
+            "pre_roll": args.pre_roll,
+            "post_roll": args.post_roll
+        } if args.motion else None,
+        transport_profile=args.transport
+    )
+    daemon.run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,731 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Núcleo de recepção: descoberta, conexão e recepção do stream (sem Qt)
+Webcam Remota Universal - Núcleo do Receptor
+"""
+
+import json
+import time
+import socket
+import struct
+from datetime import datetime
+from threading import Thread, Lock, current_thread
+
+from startup import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+from config import config
+from signaling import acquire_client, release_client
+from webrtc_receiver import WebRTCReceiver
+from discovery import DiscoveryResponder, DeviceDirectory, parse_capabilities
+from netutils import get_local_addresses
+from stats import StreamStats
+from control import (encode_message, is_control_payload, decode_message, roi_message,
+                     format_message, RoiMapping)
+from negotiation import (default_target, build_offer, choose_config, configure_message,
+                         parse_capabilities as parse_offer_capabilities)
+from linkprobe import probe_link, recommended_bitrate
+from transport import TransportTuner, DEFAULT_PROFILE
+from capture import StreamCapture, read_metadata, iter_records, paced
+from stallwatch import Watchdog
+
+# Eventos emitidos pelo núcleo e seus argumentos
+EVENTS = (
+    "device_discovered",        # nome, ip, tipo
+    "connection_established",   # nome do dispositivo, tipo de conexão
+    "connection_lost",          # motivo
+    "data_received",            # bytes JPEG
+    "frame_decoded",            # frame BGR já decodificado (WebRTC)
+    "device_removed",           # ip/id
+    "connection_requested",     # id do móvel, nome
+    "signaling_state_changed",  # conectado ao servidor
+    "control_received",         # mensagem de controle do dispositivo (dict)
+    "link_probed",              # resultado da medição do enlace (dict, ver linkprobe)
+    "stream_stalled",           # evento de travamento de uma etapa (dict, ver stallwatch)
+)
+
+class ReceiverCore:
+    """Gerenciador de conexões Wi-Fi, USB e WebRTC sem dependência de Qt
+
+    Os eventos (ver EVENTS) são entregues aos ouvintes registrados com `on`,
+    na thread que os produziu (rede, descoberta ou loop da sinalização).
+    A interface Qt repassa para sinais; o daemon usa os callbacks direto.
+    """
+
+    def __init__(self):
+        self.connected = False
+        self.connection_type = None
+        self.device_name = None
+        # Dispositivo da última conexão (nome, ip, tipo, porta); fica após a queda para reconectar
+        self.last_connection = None
+        self.discovery_thread = None
+        self.receiver_thread = None
+        self.socket = None
+        self.signaling = None
+        self.webrtc_receiver = None
+        self.responder = None
+        self.stats = StreamStats()
+        # Região do frame completo que os frames recebidos cobrem (ROI pedida ao dispositivo)
+        self.roi_mapping = RoiMapping()
+        # Formato confirmado pelo dispositivo ("jpeg" até negociar YUV)
+        self.stream_format = "jpeg"
+        # Negociação: o que pedir no handshake e o que o dispositivo anunciou/aplicou
+        self.quality_target = default_target()
+        self.accepted_formats = ["jpeg"]
+        self.device_capabilities = None
+        self.stream_config = None
+        # Última medição do enlace (linkprobe.probe_link), usada na negociação
+        self.link_probe = None
+        # Perfil de transporte aplicado ao socket do stream (transport.py)
+        self.transport_profile = config.get("network.transport_profile", DEFAULT_PROFILE)
+        self.transport_tuner = None
+        # Captura do stream recebido (capture.py) e resposta do handshake para ela
+        self.capture = None
+        self.handshake_response = None
+        self.device_directory = DeviceDirectory(ttl_days=config.get("network.device_ttl_days", 30),
+                                                default_port=config.get("network.streaming_port", 5000))
+        # Vigia de travamentos (stallwatch.py): o núcleo vigia o socket, a interface as etapas dela
+        self.watchdog = Watchdog(log_path=config.config_dir / "stalls.log",
+                                 enabled=config.get("watchdog.enabled", True))
+        self.watchdog.add_stage("socket", config.get("watchdog.socket_seconds", 3.0), continuous=True)
+        self.watchdog.on_event(self._on_watchdog_event)
+        self._stall_reason = None
+
+        self._listeners = {}
+        self._listeners_lock = Lock()
+        self._send_lock = Lock()
+
+    # Ouvintes
+
+    def on(self, event, callback):
+        """Registrar ouvinte para um evento do núcleo"""
+        if event not in EVENTS:
+            raise ValueError(f"Evento desconhecido: {event}")
+        with self._listeners_lock:
+            self._listeners.setdefault(event, []).append(callback)
+
+    def off(self, event, callback):
+        """Remover ouvinte registrado com `on`"""
+        with self._listeners_lock:
+            callbacks = self._listeners.get(event, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def _emit(self, event, *args):
+        with self._listeners_lock:
+            callbacks = list(self._listeners.get(event, []))
+
+        for callback in callbacks:
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Erro no ouvinte de '{event}': {e}")
+
+    # Descoberta
+
+    def start_responder(self):
+        """Responder em segundo plano às buscas feitas pelo app Android"""
+        if self.responder:
+            return
+
+        self.responder = DiscoveryResponder(
+            discovery_port=config.get("network.discovery_port", 8888),
+            streaming_port=config.get("network.streaming_port", 5000)
+        )
+        self.responder.on_request = self._on_discovery_request
+        if not self.responder.start():
+            self.responder = None
+
+    def stop_responder(self):
+        """Parar o respondedor de descoberta"""
+        if self.responder:
+            self.responder.stop()
+            self.responder = None
+
+    def _on_discovery_request(self, name, ip, request):
+        """Um dispositivo Android procurou por PCs: já sabemos onde ele está"""
+        self.device_directory.remember(name, ip, capabilities=parse_capabilities(request.get("capabilities")))
+        self._emit("device_discovered", name, ip, "wifi")
+
+    def start_discovery(self):
+        """Iniciar descoberta de dispositivos Android na rede"""
+        if self.discovery_thread and self.discovery_thread.is_alive():
+            return
+
+        self.discovery_thread = Thread(target=self._discovery_worker, daemon=True)
+        self.discovery_thread.start()
+
+    def _discovery_worker(self):
+        """Worker thread para descoberta de dispositivos"""
+        try:
+            # Criar socket UDP para broadcast
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.settimeout(2.0)
+
+            discovery_port = config.get("network.discovery_port", 8888)
+
+            # Enviar beacon de descoberta
+            discovery_message = json.dumps({
+                "type": "discovery_request",
+                "device_type": "pc_windows",
+                "name": "PC Windows - Receptor",
+                "port": config.get("network.streaming_port", 5000)
+            }).encode('utf-8')
+
+            # Broadcast dirigido em cada interface ativa, mais o broadcast global
+            targets = {address["broadcast"] for address in get_local_addresses()}
+            targets.add("255.255.255.255")
+            for broadcast_addr in targets:
+                try:
+                    sock.sendto(discovery_message, (broadcast_addr, discovery_port))
+                except OSError as e:
+                    print(f"Erro ao enviar descoberta para {broadcast_addr}: {e}")
+
+            # Aguardar respostas
+            responses = []
+            start_time = time.time()
+            while time.time() - start_time < 10:  # 10 segundos de descoberta
+                try:
+                    data, addr = sock.recvfrom(1024)
+                    response = json.loads(data.decode('utf-8'))
+
+                    if response.get("type") == "discovery_response":
+                        device_name = response.get("name", "Android Device")
+                        device_ip = addr[0]
+                        device_type = "wifi"
+
+                        self.device_directory.remember(
+                            device_name, device_ip, port=response.get("port"),
+                            capabilities=parse_capabilities(response.get("capabilities"))
+                        )
+                        self._emit("device_discovered", device_name, device_ip, device_type)
+                        responses.append((device_name, device_ip, device_type))
+
+                except socket.timeout:
+                    continue
+                except Exception as e:
+                    print(f"Erro na descoberta: {e}")
+
+            sock.close()
+
+            # Simular descoberta USB se nenhum dispositivo Wi-Fi for encontrado
+            if not responses:
+                time.sleep(1)
+                self._emit("device_discovered", "Android USB Device", "USB", "usb")
+
+        except Exception as e:
+            print(f"Erro no worker de descoberta: {e}")
+
+    # Sinalização / WebRTC
+
+    def start_signaling(self, server_url):
+        """Entrar no servidor de sinalização para encontrar dispositivos do navegador"""
+        if self.signaling:
+            if self.signaling.server_url == server_url:
+                self.signaling.refresh()
+                return
+            self.stop_signaling()
+
+        self.signaling = acquire_client(server_url)
+        for event, callback in self._signaling_handlers():
+            self.signaling.on(event, callback)
+
+        if self.signaling.connected:
+            self._on_signaling_connected()
+            self.signaling.refresh()
+
+    def stop_signaling(self):
+        """Sair do servidor de sinalização"""
+        if not self.signaling:
+            return
+
+        for event, callback in self._signaling_handlers():
+            self.signaling.off(event, callback)
+        self._close_webrtc()
+        release_client(self.signaling)
+        self.signaling = None
+        self._emit("signaling_state_changed", False)
+
+    def _signaling_handlers(self):
+        return (
+            ('signaling-connected', self._on_signaling_connected),
+            ('signaling-disconnected', self._on_signaling_disconnected),
+            ('mobile-devices-list', self._on_mobile_devices_list),
+            ('mobile-available', self._on_mobile_available),
+            ('mobile-disconnected', self._on_mobile_disconnected),
+            ('connection-request', self._on_connection_request),
+            ('connection-established', self._on_signaling_paired),
+            ('peer-disconnected', self._on_signaling_peer_disconnected),
+        )
+
+    def answer_connection_request(self, mobile_id, accept):
+        """Responder solicitação de conexão recebida pelo servidor"""
+        if not self.signaling:
+            return
+
+        if accept:
+            self.signaling.accept_connection(mobile_id)
+        else:
+            self.signaling.reject_connection(mobile_id)
+
+    def _on_signaling_connected(self):
+        self._emit("signaling_state_changed", True)
+
+    def _on_signaling_disconnected(self):
+        self._emit("signaling_state_changed", False)
+
+    def _on_mobile_devices_list(self, devices):
+        for device in devices:
+            self._on_mobile_available(device)
+
+    def _on_mobile_available(self, device):
+        self._emit("device_discovered", device.get("name", "Android Device"), device["id"], "webrtc")
+
+    def _on_mobile_disconnected(self, device_id):
+        self._emit("device_removed", device_id)
+
+    def _on_connection_request(self, data):
+        self._emit("connection_requested", data["from"], data.get("fromName", "Dispositivo Móvel"))
+
+    def _on_signaling_paired(self, data):
+        """Pareado pelo servidor: aguardar oferta WebRTC do dispositivo"""
+        peer_id = data["peerId"]
+        self._close_webrtc()
+
+        receiver = WebRTCReceiver(self.signaling, peer_id)
+        receiver.on_frame = self._on_webrtc_frame
+        receiver.on_stats = self.stats.record_transport
+        receiver.on_state = self._on_webrtc_state
+        self.webrtc_receiver = receiver
+        self.stats.reset()
+
+        self.connected = True
+        self.connection_type = "webrtc"
+        self.device_name = self.signaling.mobile_devices.get(peer_id) or "Dispositivo Móvel"
+        self._emit("connection_established", self.device_name, "WebRTC")
+
+    def _on_webrtc_frame(self, frame):
+        self._emit("frame_decoded", frame)
+
+    def _on_signaling_peer_disconnected(self):
+        if self.connection_type == "webrtc":
+            self._close_webrtc()
+            self.connected = False
+            self._emit("connection_lost", "Dispositivo encerrou a transmissão")
+
+    def _on_webrtc_state(self, state):
+        if state in ("failed", "closed") and self.connection_type == "webrtc" and self.connected:
+            self.connected = False
+            self._emit("connection_lost", f"Conexão WebRTC {state}")
+
+    def _close_webrtc(self):
+        if self.webrtc_receiver:
+            self.webrtc_receiver.close()
+            self.webrtc_receiver = None
+
+    # Conexão direta (Wi-Fi / USB)
+
+    def connect_to_device(self, device_ip, device_type="wifi", port=None, probe=True):
+        """Conectar a um dispositivo específico
+
+        `probe=False` (reconexões após queda) não mede o enlace de novo: usa
+        a medição guardada no diretório, se houver.
+        """
+        try:
+            if device_type == "wifi":
+                self._connect_wifi(device_ip, port, probe)
+            elif device_type == "usb":
+                self._connect_usb()
+
+        except Exception as e:
+            self._emit("connection_lost", f"Erro na conexão: {e}")
+
+    def connect_to_device_async(self, device_ip, device_type="wifi", port=None, probe=True):
+        """Conectar em segundo plano (resultado chega pelos eventos)"""
+        Thread(target=self.connect_to_device, args=(device_ip, device_type, port, probe), daemon=True).start()
+
+    def _prepare_link_probe(self, device_ip, port, probe):
+        """Medição do enlace para o handshake: a guardada do dispositivo ou uma nova"""
+        known = self.device_directory.lookup(device_ip, port)
+        cached = known.get("link_probe") if known else None
+        max_age = config.get("network.probe_max_age_hours", 24) * 3600
+        if cached and time.time() - cached.get("measured_at", 0) < max_age:
+            self.apply_link_probe(cached)
+        elif probe and config.get("network.probe_link", True):
+            # Medir o enlace antes do stream para começar numa taxa que ele sustenta
+            self.apply_link_probe(probe_link(device_ip, port, timeout=config.get("network.probe_timeout", 0.5)))
+        elif self.link_probe and self.link_probe["host"] != device_ip:
+            self.link_probe = None
+
+    def _connect_wifi(self, device_ip, port=None, probe=True):
+        """Conectar via Wi-Fi"""
+        port = port or config.get("network.streaming_port", 5000)
+        self._prepare_link_probe(device_ip, port, probe)
+        try:
+            self.transport_tuner = TransportTuner(self.transport_profile,
+                                                  rtt_ms=self.link_rtt_ms, mbps=self.link_mbps)
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.transport_tuner.before_connect(self.socket)
+            self.socket.settimeout(config.get("network.timeout", 10))
+            self.socket.connect((device_ip, port))
+            self.transport_tuner.after_connect(self.socket)
+
+            # Handshake: oferta com formatos aceitos e qualidade desejada
+            handshake = json.dumps(build_offer(self.initial_target(), self.accepted_formats)).encode('utf-8')
+
+            self.socket.send(struct.pack('!I', len(handshake)) + handshake)
+
+            # Aguardar confirmação (e capacidades, em dispositivos novos)
+            response_size = self._recv_exact(4)
+            response_data = self._recv_exact(struct.unpack('!I', response_size)[0]) if response_size else None
+            if response_data is None:
+                raise ConnectionError("dispositivo fechou a conexão no handshake")
+            response = json.loads(response_data.decode('utf-8'))
+            if response.get("status") != "connected":
+                raise ConnectionError(f"dispositivo recusou a conexão ({response.get('status')})")
+
+            self.handshake_response = response
+            self.connected = True
+            self.connection_type = "wifi"
+            self.device_name = response.get("device_name", "Android Device")
+            # Medição válida (mesmo sem suporte à sonda) fica para as próximas conexões
+            extra = {}
+            measured = self.link_probe
+            if measured and measured["host"] == device_ip and not measured.get("error"):
+                extra["link_probe"] = measured
+            self.device_directory.remember(self.device_name, device_ip, port=port,
+                                           device_id=response.get("device_id"), **extra)
+            self.last_connection = {"name": self.device_name, "ip": device_ip, "type": "wifi", "port": port}
+
+            # Iniciar thread de recepção
+            self.stats.reset()
+            self.roi_mapping = RoiMapping()
+            self.stream_format = "jpeg"
+            self.device_capabilities = parse_offer_capabilities(response)
+            self.stream_config = None
+            self.transport_tuner.streaming(self.socket)
+            self._stall_reason = None
+            self.watchdog.arm("socket")
+            self.receiver_thread = Thread(target=self._wifi_receiver, args=(self.socket,), daemon=True)
+            self.receiver_thread.start()
+
+            self._emit("connection_established", self.device_name, "Wi-Fi")
+            self.renegotiate()
+
+        except Exception as e:
+            if not self.connected:
+                # Handshake falhou: não deixar o socket (e o buffer de recepção grande) para trás
+                self._close_socket()
+            raise Exception(f"Falha na conexão Wi-Fi: {e}")
+
+    def _close_socket(self):
+        """Fechar o socket do stream (se houver) e esquecê-lo"""
+        sock, self.socket = self.socket, None
+        self.transport_tuner = None
+        if sock:
+            try:
+                # shutdown acorda a thread de recepção presa no recv (close sozinho não)
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                sock.close()
+            except:
+                pass
+
+    def _connect_usb(self):
+        """Conectar via USB (simulado para demo)"""
+        # Em uma implementação real, usaria ADB ou comunicação USB direta
+        time.sleep(2)  # Simular tempo de conexão
+
+        self.connected = True
+        self.connection_type = "usb"
+        self.device_name = "Android USB Device"
+        self.last_connection = {"name": self.device_name, "ip": None, "type": "usb", "port": None}
+
+        # Simular dados para demo
+        self.stats.reset()
+        self.receiver_thread = Thread(target=self._usb_receiver_demo, daemon=True)
+        self.receiver_thread.start()
+
+        self._emit("connection_established", self.device_name, "USB")
+
+    def _wifi_receiver(self, sock):
+        """Thread para receber dados via Wi-Fi
+
+        Presa ao próprio socket: numa reconexão rápida, a thread anterior
+        não pode passar a ler o socket novo.
+        """
+        try:
+            while self.connected and self.socket is sock:
+                # Receber tamanho do frame
+                frame_size_data = self._recv_exact(4, sock)
+                if frame_size_data is None:
+                    break
+
+                frame_size = struct.unpack('!I', frame_size_data)[0]
+
+                # Receber dados do frame
+                frame_data = self._recv_exact(frame_size, sock)
+                if frame_data is None:
+                    break
+                capture = self.capture
+                if capture:
+                    capture.write(frame_data)
+                self._dispatch_payload(frame_data)
+
+                tuner = self.transport_tuner
+                if tuner:
+                    tuner.after_receive(sock, self.stats.bytes_total, frame_size + 4)
+
+            # Socket fechado pelo dispositivo (ou pelo watchdog, sem dados no prazo)
+            if self.connected and self.socket is sock:
+                self._emit("connection_lost", self._stall_reason or "Dispositivo encerrou a transmissão")
+
+        except Exception as e:
+            if self.connected and self.socket is sock:
+                self._emit("connection_lost", self._stall_reason or f"Conexão perdida: {e}")
+        finally:
+            # Uma reconexão rápida já pode ter armado o socket novo
+            if self.receiver_thread is current_thread():
+                self.watchdog.disarm("socket")
+
+    def _dispatch_payload(self, payload):
+        """Entregar um conteúdo enquadrado recebido (rede ou captura)"""
+        if is_control_payload(payload):
+            self._handle_control(payload)
+        else:
+            self.stats.record_bytes(len(payload) + 4)
+            self._emit("data_received", payload)
+
+    # Captura e reprodução (capture.py)
+
+    def start_capture(self, path):
+        """Gravar os conteúdos recebidos a partir de agora; retorna a StreamCapture"""
+        self.stop_capture()
+        capture = StreamCapture(path, {
+            "device_name": self.device_name,
+            "connection_type": self.connection_type,
+            "handshake": self.handshake_response
+        })
+        capture.start()
+        self.capture = capture
+        return capture
+
+    def stop_capture(self):
+        """Encerrar a captura em andamento (None se não havia)"""
+        capture, self.capture = self.capture, None
+        if capture:
+            capture.stop()
+        return capture
+
+    def start_replay(self, path, speed=1.0):
+        """Reproduzir uma captura como se o dispositivo estivesse conectado
+
+        `speed` 1 mantém os tempos de chegada gravados, 2 reproduz duas
+        vezes mais rápido e 0 entrega tudo sem espera. Ao fim, emite
+        connection_lost como uma conexão que caiu.
+        """
+        metadata = read_metadata(path)
+        self.connected = True
+        self.connection_type = "replay"
+        self.device_name = f"{metadata.get('device_name') or 'Dispositivo'} (captura)"
+        self.stats.reset()
+        self.roi_mapping = RoiMapping()
+        self.stream_format = "jpeg"
+        self.receiver_thread = Thread(target=self._replay_receiver, args=(path, speed), daemon=True)
+        self.receiver_thread.start()
+
+        self._emit("connection_established", self.device_name, "Captura")
+
+    def _replay_receiver(self, path, speed):
+        """Thread que entrega os registros da captura no ritmo pedido"""
+        try:
+            for _, payload in paced(iter_records(path), speed, lambda: self.connected):
+                self._dispatch_payload(payload)
+            if self.connected:
+                self._emit("connection_lost", "Fim da captura")
+        except Exception as e:
+            if self.connected:
+                self._emit("connection_lost", f"Erro na captura: {e}")
+
+    def _recv_exact(self, size, sock=None):
+        """Ler exatamente `size` bytes de `sock` (padrão: o socket atual; None se fechou)
+
+        Lê direto num buffer do tamanho do frame: frames YUV têm megabytes
+        e concatenar pedaços copiaria o frame inteiro a cada leitura.
+        """
+        sock = sock or self.socket
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            count = sock.recv_into(view[received:])
+            if not count:
+                return None
+            received += count
+            self.watchdog.progress("socket")
+        return bytes(buffer)
+
+    def _usb_receiver_demo(self):
+        """Thread demo para simular dados USB"""
+        try:
+            # Criar frames de demo para simular streaming
+            while self.connected:
+                # Simular frame de vídeo (640x480 RGB)
+                demo_frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+
+                # Adicionar texto indicativo
+                cv2.putText(demo_frame, "DEMO - USB Stream", (50, 50),
+                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                cv2.putText(demo_frame, f"Time: {datetime.now().strftime('%H:%M:%S')}",
+                           (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+                # Comprimir e enviar
+                _, encoded = cv2.imencode('.jpg', demo_frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+                frame_data = encoded.tobytes()
+
+                self.stats.record_bytes(len(frame_data))
+                self._emit("data_received", frame_data)
+                time.sleep(1/30)  # 30 FPS
+
+        except Exception as e:
+            if self.connected:
+                self._emit("connection_lost", f"Erro na simulação USB: {e}")
+
+    # Canal de controle (Wi-Fi)
+
+    def send_control(self, message):
+        """Enviar mensagem de controle ao dispositivo; False se não há canal"""
+        sock = self.socket
+        if not (self.connected and self.connection_type == "wifi" and sock):
+            return False
+        try:
+            with self._send_lock:
+                sock.sendall(encode_message(message))
+            return True
+        except OSError as e:
+            print(f"Erro ao enviar comando ao dispositivo: {e}")
+            return False
+
+    def request_roi(self, roi):
+        """Pedir que o dispositivo envie só a região `roi` (None: frame inteiro)"""
+        return self.send_control(roi_message(roi))
+
+    def renegotiate(self, target=None, formats=None):
+        """Escolher e aplicar a configuração do stream sem reconectar
+
+        Retorna False se o dispositivo não anunciou capacidades (modo
+        antigo) ou se não há canal; a confirmação chega como "stream_config".
+        """
+        if target is not None:
+            self.quality_target = dict(target)
+        if formats is not None:
+            self.accepted_formats = list(formats)
+        capabilities = self.device_capabilities
+        if capabilities is None:
+            return False
+        chosen = choose_config(capabilities, self.initial_target(), self.accepted_formats,
+                               link_mbps=self.link_mbps)
+        return self.send_control(configure_message(chosen))
+
+    def apply_link_probe(self, result):
+        """Guardar uma medição do enlace (usada no próximo handshake/negociação)"""
+        self.link_probe = result
+        self._emit("link_probed", result)
+
+    @property
+    def link_mbps(self):
+        """Vazão medida até o dispositivo (None sem medição)"""
+        return self.link_probe.get("throughput_mbps") if self.link_probe else None
+
+    @property
+    def link_rtt_ms(self):
+        """RTT mediano medido até o dispositivo (None sem medição)"""
+        rtt = self.link_probe.get("rtt_ms") if self.link_probe else None
+        return rtt["median"] if rtt else None
+
+    def set_transport_profile(self, profile):
+        """Trocar o perfil de transporte (aplicado já se houver stream Wi-Fi)"""
+        self.transport_profile = profile
+        current = self.transport_tuner
+        sock = self.socket
+        if not (current and sock and self.connection_type == "wifi"):
+            return False
+        tuner = TransportTuner(profile, rtt_ms=current.rtt_ms, mbps=current.mbps)
+        tuner.frame_bytes = current.frame_bytes
+        try:
+            tuner.apply(sock)
+        except OSError as e:
+            print(f"Erro ao aplicar perfil de transporte: {e}")
+            return False
+        self.transport_tuner = tuner
+        return True
+
+    def initial_target(self):
+        """Qualidade alvo com a taxa de bits limitada ao que o enlace medido sustenta"""
+        target = dict(self.quality_target)
+        bitrate = recommended_bitrate(self.link_probe) if self.link_probe else None
+        if bitrate:
+            target["bitrate_kbps"] = min(target["bitrate_kbps"], bitrate)
+        return target
+
+    # Travamentos (stallwatch.py)
+
+    def _on_watchdog_event(self, event):
+        """Repassar o evento e, se o socket parou, derrubar a conexão (thread do vigia)"""
+        self._emit("stream_stalled", event)
+        if event["stage"] == "socket" and event["state"] == "stalled":
+            self._heal_socket(event)
+
+    def _heal_socket(self, event):
+        """Wi-Fi caído em silêncio: acordar o recv bloqueado em vez de esperar o timeout"""
+        sock = self.socket
+        if sock is None:
+            return
+        self._stall_reason = f"Sem dados do dispositivo há {event['seconds']:.1f} s (watchdog)"
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def request_format(self, fmt):
+        """Pedir frames JPEG ou YUV sem compressão ("nv21", "i420")"""
+        return self.send_control(format_message(fmt))
+
+    def _handle_control(self, payload):
+        message = decode_message(payload)
+        if message is None:
+            return
+        if message["type"] == "roi":
+            # Chega logo antes do primeiro frame com a nova região
+            self.roi_mapping = RoiMapping(message.get("roi"), message.get("source_size"))
+        elif message["type"] == "format":
+            self.stream_format = message.get("format", "jpeg")
+        elif message["type"] == "stream_config":
+            # Chega logo antes do primeiro frame na configuração nova
+            self.stream_config = {key: value for key, value in message.items() if key != "type"}
+            self.stream_format = message.get("format", "jpeg")
+        self._emit("control_received", message)
+
+    def disconnect(self):
+        """Desconectar do dispositivo"""
+        self.connected = False
+        self.stop_capture()
+        self.watchdog.disarm("socket")
+        if self.webrtc_receiver:
+            self._close_webrtc()
+            if self.signaling:
+                self.signaling.stop_streaming()
+        self._close_socket()
+        self.connection_type = None
+        self.device_name = None
+        self.roi_mapping = RoiMapping()
+        self.stream_format = "jpeg"
+        self.device_capabilities = None
+        self.stream_config = None
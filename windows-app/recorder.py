@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gravação do stream em disco (MJPEG + índice)
+Webcam Remota Universal - Gravação
+"""
+
+import time
+import queue
+import struct
+from pathlib import Path
+from threading import Thread
+
+from startup import lazy_import
+
+cv2 = lazy_import("cv2")
+
+# Entrada do índice: timestamp (s), offset no .mjpeg, tamanho do JPEG
+INDEX_ENTRY = struct.Struct('!dQI')
+
+# Marcador na fila: repetir o último frame gravado
+_REPEAT = object()
+
+class MjpegRecorder:
+    """Grava frames JPEG num arquivo .mjpeg com índice .idx ao lado
+
+    Os JPEGs recebidos da rede vão direto para o disco, sem decodificar;
+    frames já decodificados (WebRTC) são codificados na thread de escrita.
+    Quem chama só enfileira: se o disco não acompanhar, frames são
+    descartados e contados em `frames_dropped`, sem travar a recepção.
+    Frames repetidos (`write_duplicate`) viram só uma entrada no índice
+    apontando para os bytes já gravados; se o arquivo ainda não tem nenhum
+    frame, os bytes do repetido (quando informados) são gravados. Com `watchdog` (stallwatch), a
+    etapa "recorder" é vigiada: itens na fila sem a thread de escrita
+    avançar (disco travado, thread morta) viram um travamento. Não depende
+    de Qt.
+    """
+
+    def __init__(self, path, jpeg_quality=90, max_queue=120, watchdog=None):
+        self.path = Path(path).with_suffix(".mjpeg")
+        self.index_path = self.path.with_suffix(".idx")
+        self.jpeg_quality = jpeg_quality
+
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.bytes_written = 0
+        self.duplicate_frames = 0
+        self.bytes_saved = 0
+        self.started_at = None
+        self.error = None
+        self.watchdog = watchdog
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._abandoned = False
+
+    @property
+    def active(self):
+        return self._thread is not None
+
+    def start(self):
+        """Abrir arquivos e iniciar a thread de escrita"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.started_at = time.time()
+        self._thread = Thread(target=self._writer, daemon=True, name="recorder")
+        self._thread.start()
+        if self.watchdog:
+            self.watchdog.arm("recorder")
+        return self.path
+
+    def write_jpeg(self, data, timestamp=None):
+        """Enfileirar frame já codificado em JPEG"""
+        self._put((timestamp or time.time(), data, None))
+
+    def write_duplicate(self, timestamp=None, data=None):
+        """Registrar repetição do último frame (sem gravar bytes novos)
+
+        `data` (JPEG do frame repetido) só é gravado se a repetição chegar
+        antes de qualquer frame, como numa cena parada no início.
+        """
+        self._put((timestamp or time.time(), _REPEAT, data))
+
+    def write_frame(self, frame, timestamp=None):
+        """Enfileirar frame BGR (a referência é mantida até a escrita)"""
+        self._put((timestamp or time.time(), None, frame))
+
+    def _put(self, item):
+        if not self._thread:
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.frames_dropped += 1
+        if self.watchdog:
+            self.watchdog.submit("recorder")
+
+    def stop(self):
+        """Gravar o que está na fila e fechar os arquivos"""
+        if not self._thread:
+            return self.path
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        if self.watchdog:
+            self.watchdog.disarm("recorder")
+        return self.path
+
+    def abandon(self):
+        """Desistir de uma escrita travada sem esperar a thread
+
+        Novos frames são ignorados; se a escrita voltar, a thread fecha os
+        arquivos (o que já foi gravado continua legível) e termina sozinha.
+        """
+        if not self._thread:
+            return self.path
+        self._abandoned = True
+        self._thread = None
+        if self.watchdog:
+            self.watchdog.disarm("recorder")
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        return self.path
+
+    def _writer(self):
+        encode_params = None
+        last_entry = None  # (offset, tamanho) do último frame gravado
+        try:
+            with open(self.path, 'wb') as video, open(self.index_path, 'wb') as index:
+                while True:
+                    item = self._queue.get()
+                    if item is None or self._abandoned:
+                        break
+                    if self.watchdog:
+                        self.watchdog.progress("recorder", pending=not self._queue.empty())
+
+                    timestamp, data, frame = item
+                    if data is _REPEAT:
+                        if last_entry is not None:
+                            index.write(INDEX_ENTRY.pack(timestamp, *last_entry))
+                            self.duplicate_frames += 1
+                            self.bytes_saved += last_entry[1]
+                            continue
+                        # Nada gravado ainda: o repetido vira o primeiro frame
+                        data, frame = frame, None
+                        if data is None:
+                            continue
+
+                    if data is None:
+                        if encode_params is None:
+                            encode_params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+                        ok, encoded = cv2.imencode('.jpg', frame, encode_params)
+                        if not ok:
+                            self.frames_dropped += 1
+                            continue
+                        data = encoded.tobytes()
+
+                    last_entry = (self.bytes_written, len(data))
+                    index.write(INDEX_ENTRY.pack(timestamp, *last_entry))
+                    video.write(data)
+                    self.bytes_written += len(data)
+                    self.frames_written += 1
+
+        except Exception as e:
+            self.error = str(e)
+            print(f"Erro na gravação: {e}")
+            # Esvaziar a fila para não prender quem ainda enfileira
+            while self._queue.get() is not None and not self._abandoned:
+                pass
+
+def read_index(path):
+    """Ler índice de uma gravação: lista de (timestamp, offset, tamanho)"""
+    index_path = Path(path).with_suffix(".idx")
+    with open(index_path, 'rb') as f:
+        data = f.read()
+    usable = len(data) - len(data) % INDEX_ENTRY.size
+    return list(INDEX_ENTRY.iter_unpack(data[:usable]))
+
+def iter_jpeg_frames(path):
+    """Percorrer (timestamp, bytes JPEG) de uma gravação"""
+    path = Path(path).with_suffix(".mjpeg")
+    with open(path, 'rb') as f:
+        for timestamp, offset, size in read_index(path):
+            f.seek(offset)
+            yield timestamp, f.read(size)
+
+def export_video(path, output_path, codec="mp4v"):
+    """Converter gravação MJPEG para um vídeo comum (ex: .mp4)
+
+    A taxa de quadros é calculada pelos timestamps do índice.
+    """
+    np = lazy_import("numpy")
+    entries = read_index(path)
+    if not entries:
+        raise ValueError("Gravação vazia")
+
+    duration = entries[-1][0] - entries[0][0]
+    fps = (len(entries) - 1) / duration if duration > 0 else 30.0
+
+    writer = None
+    frame = None
+    last_offset = None
+    try:
+        with open(Path(path).with_suffix(".mjpeg"), 'rb') as f:
+            for _, offset, size in entries:
+                # Frames repetidos apontam para os mesmos bytes: reaproveitar a decodificação
+                if offset != last_offset:
+                    f.seek(offset)
+                    frame = cv2.imdecode(np.frombuffer(f.read(size), np.uint8), cv2.IMREAD_COLOR)
+                    last_offset = offset
+                if frame is None:
+                    continue
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    writer = cv2.VideoWriter(str(output_path), cv2.VideoWriter_fourcc(*codec),
+                                             fps, (width, height))
+                elif frame.shape[:2] != (height, width):
+                    # O contêiner tem tamanho fixo; mudanças de resolução são ajustadas
+                    frame = cv2.resize(frame, (width, height))
+                writer.write(frame)
+    finally:
+        if writer is not None:
+            writer.release()
+
+    return output_path
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Relay na rede local: uma conexão com o celular, vários receptores
+Webcam Remota Universal - Relay
+
+O relay fala o mesmo protocolo do app Android (handshake JSON e frames com
+prefixo de 4 bytes), então outros receptores se conectam a ele como se
+fosse o celular:
+
+    python -m receiver --device <ip-do-relay> --port 5001
+
+Benchmark com assinantes locais:
+
+    python -m relay --benchmark 50 --duration 10
+"""
+
+import sys
+import json
+import time
+import socket
+import struct
+import argparse
+from collections import deque
+from threading import Thread, Condition, Lock, Event
+
+def is_keyframe(payload):
+    """Frame decodificável sozinho?
+
+    JPEG (o que o app envia hoje) é sempre intra; payloads de outros tipos
+    são tratados como dependentes até que o protocolo diga o contrário.
+    """
+    return payload[:2] == b'\xff\xd8'
+
+class RelaySubscriber:
+    """Receptor conectado ao relay, com fila própria e limitada
+
+    Se a fila encher (receptor lento), os frames pendentes são descartados
+    e o assinante volta a esperar um keyframe, em vez de atrasar o upstream
+    ou os outros assinantes.
+    """
+
+    def __init__(self, sock, address, max_queue=8):
+        self.sock = sock
+        self.address = address
+        self.max_queue = max_queue
+        self.connected_at = time.time()
+
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.bytes_sent = 0
+        self.resyncs = 0
+
+        self.needs_keyframe = True  # Entrada sempre começa num keyframe
+        self.closed = False
+        self._queue = deque()
+        self._condition = Condition()
+
+    def offer(self, frame, keyframe):
+        """Enfileirar frame (chamado pela thread do upstream)"""
+        with self._condition:
+            if self.needs_keyframe:
+                if not keyframe:
+                    self.frames_dropped += 1
+                    return
+                self.needs_keyframe = False
+
+            if len(self._queue) >= self.max_queue:
+                # Lento demais: descartar atraso acumulado e ressincronizar
+                self.frames_dropped += len(self._queue)
+                self._queue.clear()
+                self.resyncs += 1
+                if not keyframe:
+                    self.needs_keyframe = True
+                    self.frames_dropped += 1
+                    return
+
+            self._queue.append(frame)
+            self._condition.notify()
+
+    def take(self, timeout):
+        with self._condition:
+            if not self._queue and not self.closed:
+                self._condition.wait(timeout)
+            return self._queue.popleft() if self._queue else None
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+    def stats(self):
+        """Resumo de vazão do assinante"""
+        elapsed = max(time.time() - self.connected_at, 1e-6)
+        return {
+            "address": self.address,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "resyncs": self.resyncs,
+            "queued": len(self._queue),
+            "fps": round(self.frames_sent / elapsed, 1),
+            "kbps": int(self.bytes_sent * 8 / elapsed / 1000)
+        }
+
+class RelayServer:
+    """Repassa os frames de uma conexão upstream para N receptores
+
+    `publish` recebe o payload de cada frame como chegou do celular; cada
+    assinante tem sua fila e sua thread de envio, e quem entra no meio do
+    stream recebe de imediato o último keyframe.
+    """
+
+    def __init__(self, host="0.0.0.0", port=5001, device_name="Relay", max_queue=8,
+                 send_timeout=10.0):
+        self.host = host
+        self.port = port
+        self.device_name = device_name
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+
+        self.frames_published = 0
+        self.running = False
+        self.last_keyframe = None
+
+        self._subscribers = []
+        self._subscribers_lock = Lock()
+        self._server_sock = None
+        self._accept_thread = None
+
+    def start(self):
+        """Abrir a porta do relay e aceitar receptores em segundo plano"""
+        if self.running:
+            return True
+
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.host, self.port))
+            sock.listen(16)
+            sock.settimeout(1.0)
+        except OSError as e:
+            print(f"Erro ao abrir relay na porta {self.port}: {e}")
+            return False
+
+        self._server_sock = sock
+        self.port = sock.getsockname()[1]
+        self.running = True
+        self._accept_thread = Thread(target=self._accept_loop, daemon=True, name="relay-accept")
+        self._accept_thread.start()
+        return True
+
+    def stop(self):
+        """Fechar o relay e desconectar os receptores"""
+        if not self.running:
+            return
+        self.running = False
+
+        if self._accept_thread:
+            self._accept_thread.join(timeout=2)
+        self._server_sock.close()
+        self._server_sock = None
+
+        for subscriber in self._subscribers:
+            subscriber.close()
+
+    # Upstream
+
+    def publish(self, payload):
+        """Repassar frame recebido do celular a todos os assinantes"""
+        self.frames_published += 1
+        keyframe = is_keyframe(payload)
+        if keyframe:
+            self.last_keyframe = payload
+
+        # Cabeçalho montado uma vez; a lista é trocada (não alterada) ao entrar/sair
+        frame = (struct.pack('!I', len(payload)), payload)
+        for subscriber in self._subscribers:
+            subscriber.offer(frame, keyframe)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def stats(self):
+        """Estatísticas do relay e de cada assinante"""
+        return {
+            "frames_published": self.frames_published,
+            "subscribers": [subscriber.stats() for subscriber in self._subscribers]
+        }
+
+    # Assinantes
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                sock, addr = self._server_sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            Thread(target=self._serve_subscriber, args=(sock, addr), daemon=True,
+                   name=f"relay-{addr[0]}:{addr[1]}").start()
+
+    def _handshake(self, sock):
+        """Mesma troca do app Android: connection_request -> connected"""
+        size = struct.unpack('!I', self._recv_exact(sock, 4))[0]
+        if size > 65536:
+            raise ValueError("Handshake grande demais")
+        request = json.loads(self._recv_exact(sock, size).decode('utf-8'))
+        if request.get("type") != "connection_request":
+            raise ValueError("Handshake inválido")
+
+        response = json.dumps({
+            "status": "connected",
+            "device_name": self.device_name
+        }).encode('utf-8')
+        sock.sendall(struct.pack('!I', len(response)) + response)
+
+    @staticmethod
+    def _recv_exact(sock, size):
+        data = b''
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Conexão fechada no handshake")
+            data += chunk
+        return data
+
+    def _serve_subscriber(self, sock, addr):
+        subscriber = None
+        try:
+            sock.settimeout(self.send_timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._handshake(sock)
+
+            subscriber = RelaySubscriber(sock, f"{addr[0]}:{addr[1]}", self.max_queue)
+            if self.last_keyframe is not None:
+                # Entrada no meio do stream: começar pelo último keyframe
+                subscriber.offer((struct.pack('!I', len(self.last_keyframe)), self.last_keyframe), True)
+            with self._subscribers_lock:
+                self._subscribers = self._subscribers + [subscriber]
+
+            while self.running and not subscriber.closed:
+                frame = subscriber.take(timeout=1.0)
+                if frame is None:
+                    continue
+                header, payload = frame
+                sock.sendall(header)
+                sock.sendall(payload)
+                subscriber.frames_sent += 1
+                subscriber.bytes_sent += len(header) + len(payload)
+
+        except (OSError, ValueError) as e:
+            if self.running and subscriber is not None:
+                print(f"Receptor {addr[0]} saiu do relay: {e}")
+        finally:
+            if subscriber is not None:
+                subscriber.close()
+                with self._subscribers_lock:
+                    self._subscribers = [s for s in self._subscribers if s is not subscriber]
+            sock.close()
+
+# Benchmark
+
+def _bench_subscriber(port, results, index, stop, slow=False):
+    """Receptor mínimo: handshake e contagem de frames"""
+    frames = 0
+    try:
+        sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+        request = json.dumps({"type": "connection_request", "device_type": "pc_windows"}).encode()
+        sock.sendall(struct.pack('!I', len(request)) + request)
+        size = struct.unpack('!I', RelayServer._recv_exact(sock, 4))[0]
+        RelayServer._recv_exact(sock, size)
+
+        while not stop.is_set():
+            size = struct.unpack('!I', RelayServer._recv_exact(sock, 4))[0]
+            RelayServer._recv_exact(sock, size)
+            frames += 1
+            if slow:
+                time.sleep(0.2)  # Receptor lento: deve perder frames, não atrasar os outros
+        sock.close()
+    except (OSError, ConnectionError):
+        pass
+    results[index] = frames
+
+def benchmark(subscribers=50, duration=10.0, fps=30, frame_bytes=60000, slow_subscribers=1):
+    """Publicar frames sintéticos e medir a entrega a vários assinantes locais"""
+    relay = RelayServer(host="127.0.0.1", port=0, device_name="Benchmark")
+    if not relay.start():
+        return None
+
+    # Payload com cabeçalho JPEG para contar como keyframe
+    payload = b'\xff\xd8' + bytes(frame_bytes - 2)
+
+    stop = Event()
+    results = {}
+    threads = [
+        Thread(target=_bench_subscriber, args=(relay.port, results, i, stop, i < slow_subscribers),
+               daemon=True)
+        for i in range(subscribers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    deadline = time.time() + 5
+    while relay.subscriber_count < subscribers and time.time() < deadline:
+        time.sleep(0.05)
+
+    publish_times = []
+    start = time.perf_counter()
+    next_frame = start
+    while time.perf_counter() - start < duration:
+        t0 = time.perf_counter()
+        relay.publish(payload)
+        publish_times.append(time.perf_counter() - t0)
+        next_frame += 1 / fps
+        time.sleep(max(0, next_frame - time.perf_counter()))
+    elapsed = time.perf_counter() - start
+
+    subscriber_stats = relay.stats()["subscribers"]
+    stop.set()
+    relay.stop()
+    for thread in threads:
+        thread.join(timeout=2)
+
+    publish_times.sort()
+    fast = [results[i] / elapsed for i in results if i >= slow_subscribers]
+    slow = [results[i] / elapsed for i in results if i < slow_subscribers]
+    return {
+        "subscribers": subscribers,
+        "connected": len(subscriber_stats),
+        "frame_bytes": frame_bytes,
+        "published_fps": len(publish_times) / elapsed,
+        "publish_p50_us": publish_times[len(publish_times) // 2] * 1e6,
+        "publish_p99_us": publish_times[int(len(publish_times) * 0.99)] * 1e6,
+        "subscriber_fps_min": min(fast) if fast else 0,
+        "subscriber_fps_avg": sum(fast) / len(fast) if fast else 0,
+        "slow_subscriber_fps": slow,
+        "dropped_total": sum(s["frames_dropped"] for s in subscriber_stats),
+        "resyncs_total": sum(s["resyncs"] for s in subscriber_stats)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="relay", description="Relay - benchmark com assinantes locais")
+    parser.add_argument("--benchmark", type=int, metavar="ASSINANTES", default=50,
+                        help="número de receptores locais")
+    parser.add_argument("--duration", type=float, default=10.0, help="duração em segundos")
+    parser.add_argument("--fps", type=int, default=30, help="frames publicados por segundo")
+    parser.add_argument("--frame-kb", type=int, default=60, help="tamanho de cada frame em KB")
+    args = parser.parse_args((argv or sys.argv)[1:])
+
+    result = benchmark(subscribers=args.benchmark, duration=args.duration, fps=args.fps,
+                       frame_bytes=args.frame_kb * 1024)
+    if result is None:
+        return 1
+
+    print(f"Assinantes: {result['connected']}/{result['subscribers']}  "
+          f"frame: {result['frame_bytes'] / 1024:.0f} KB")
+    print(f"Publicado: {result['published_fps']:.1f} fps  "
+          f"publish p50 {result['publish_p50_us']:.0f} µs, p99 {result['publish_p99_us']:.0f} µs")
+    print(f"Entregue (assinantes normais): mín {result['subscriber_fps_min']:.1f} fps, "
+          f"média {result['subscriber_fps_avg']:.1f} fps")
+    print(f"Assinantes lentos: {', '.join(f'{fps:.1f}' for fps in result['slow_subscriber_fps'])} fps  "
+          f"descartados: {result['dropped_total']}, ressincronizações: {result['resyncs_total']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
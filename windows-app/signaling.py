@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cliente de sinalização para o servidor Node (server.js)
+Webcam Remota Universal - Sinalização
+"""
+
+import time
+import asyncio
+from threading import Thread, Lock, Event
+
+from startup import lazy_import
+
+socketio = lazy_import("socketio")
+
+class SignalingClient:
+    """Cliente Socket.IO que se registra como desktop no server.js
+
+    Mantém uma conexão persistente (com reconexão automática) em um loop
+    asyncio próprio, numa thread separada. Os eventos do servidor são
+    entregues aos ouvintes registrados com `on`, sempre a partir da thread
+    do loop; quem mexe em interface deve repassar para a sua thread.
+    """
+
+    def __init__(self, server_url, name="PC Windows - Receptor", heartbeat_interval=10.0):
+        self.server_url = server_url
+        self.name = name
+        self.heartbeat_interval = heartbeat_interval
+
+        self.connected = False
+        self.mobile_devices = {}  # id -> nome
+        self.last_activity = None
+        self.reconnect_count = 0
+
+        self._listeners = {}
+        self._listeners_lock = Lock()
+        self._loop = None
+        self._thread = None
+        self._sio = None
+        self._stopping = Event()
+        self._ready = Event()
+
+    # Ouvintes
+
+    def on(self, event, callback):
+        """Registrar ouvinte para um evento do servidor (ex: 'mobile-devices-list')
+
+        Além dos eventos do server.js, são emitidos 'signaling-connected' e
+        'signaling-disconnected'.
+        """
+        with self._listeners_lock:
+            self._listeners.setdefault(event, []).append(callback)
+
+    def off(self, event, callback):
+        """Remover ouvinte registrado com `on`"""
+        with self._listeners_lock:
+            callbacks = self._listeners.get(event, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def _dispatch(self, event, *args):
+        self.last_activity = time.time()
+        with self._listeners_lock:
+            callbacks = list(self._listeners.get(event, []))
+
+        for callback in callbacks:
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Erro no ouvinte de '{event}': {e}")
+
+    # Ciclo de vida
+
+    def start(self, wait_timeout=None):
+        """Iniciar conexão em segundo plano"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stopping.clear()
+        self._ready.clear()
+        self._thread = Thread(target=self._run_loop, daemon=True, name="signaling")
+        self._thread.start()
+
+        if wait_timeout:
+            self._ready.wait(wait_timeout)
+
+    def stop(self):
+        """Encerrar conexão e thread do loop"""
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._main())
+        except Exception as e:
+            print(f"Erro no cliente de sinalização: {e}")
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def _main(self):
+        # A reconexão é feita aqui (com backoff) em vez de pela biblioteca,
+        # para que este loop seja o único dono da conexão
+        self._sio = socketio.AsyncClient(reconnection=False)
+        self._register_handlers()
+
+        delay = 1
+        while not self._stopping.is_set():
+            if not self._sio.connected:
+                try:
+                    await self._sio.connect(self.server_url, transports=["websocket"],
+                                            wait_timeout=10)
+                    delay = 1
+                except Exception as e:
+                    print(f"Erro ao conectar ao servidor de sinalização: {e}")
+                    self._ready.set()
+                    await self._sleep(delay)
+                    delay = min(delay * 2, 30)
+                    self.reconnect_count += 1
+                    continue
+
+            # Heartbeat: o Engine.IO troca ping/pong com o servidor e dispara
+            # 'disconnect' se o par sumir; aqui só supervisionamos o estado
+            await self._sleep(self.heartbeat_interval)
+
+        if self._sio.connected:
+            await self._sio.disconnect()
+
+    async def _sleep(self, seconds):
+        """Aguardar sem atrasar o encerramento"""
+        deadline = time.monotonic() + seconds
+        while not self._stopping.is_set() and time.monotonic() < deadline:
+            await asyncio.sleep(min(0.25, deadline - time.monotonic()))
+
+    def _register_handlers(self):
+        sio = self._sio
+
+        @sio.event
+        async def connect():
+            self.connected = True
+            await sio.emit('register-desktop', {'name': self.name})
+            self._ready.set()
+            self._dispatch('signaling-connected')
+
+        @sio.event
+        async def disconnect(*args):
+            self.connected = False
+            self.mobile_devices.clear()
+            self._dispatch('signaling-disconnected')
+
+        @sio.on('mobile-devices-list')
+        async def on_mobile_devices_list(devices):
+            self.mobile_devices = {device['id']: device.get('name') for device in devices}
+            self._dispatch('mobile-devices-list', devices)
+
+        @sio.on('mobile-available')
+        async def on_mobile_available(device):
+            self.mobile_devices[device['id']] = device.get('name')
+            self._dispatch('mobile-available', device)
+
+        @sio.on('mobile-disconnected')
+        async def on_mobile_disconnected(device_id):
+            self.mobile_devices.pop(device_id, None)
+            self._dispatch('mobile-disconnected', device_id)
+
+        # Eventos repassados como vieram do servidor
+        for event in ('connection-request', 'connection-established', 'peer-disconnected',
+                      'webrtc-offer', 'webrtc-answer', 'webrtc-ice-candidate'):
+            sio.on(event, self._make_forwarder(event))
+
+    def _make_forwarder(self, event):
+        async def forward(*args):
+            self._dispatch(event, *args)
+        return forward
+
+    # Envio (seguro para chamar de qualquer thread)
+
+    def emit(self, event, data=None):
+        """Enviar evento ao servidor; retorna False se não conectado"""
+        if not self._loop or not self.connected:
+            return False
+
+        asyncio.run_coroutine_threadsafe(self._sio.emit(event, data), self._loop)
+        return True
+
+    def submit(self, coro):
+        """Executar corrotina no loop da sinalização (ex: sessão WebRTC)"""
+        if not self._loop:
+            coro.close()
+            return None
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def refresh(self):
+        """Pedir novamente a lista de dispositivos móveis"""
+        return self.emit('register-desktop', {'name': self.name})
+
+    def accept_connection(self, mobile_id):
+        """Aceitar solicitação de conexão de um dispositivo móvel"""
+        return self.emit('accept-connection', {'mobileId': mobile_id})
+
+    def reject_connection(self, mobile_id):
+        """Rejeitar solicitação de conexão de um dispositivo móvel"""
+        return self.emit('reject-connection', {'mobileId': mobile_id})
+
+    def send_offer(self, target, offer):
+        """Enviar oferta WebRTC ({'type', 'sdp'})"""
+        return self.emit('webrtc-offer', {'target': target, 'offer': offer})
+
+    def send_answer(self, target, answer):
+        """Enviar resposta WebRTC ({'type', 'sdp'})"""
+        return self.emit('webrtc-answer', {'target': target, 'answer': answer})
+
+    def send_ice_candidate(self, target, candidate):
+        """Enviar candidato ICE"""
+        return self.emit('webrtc-ice-candidate', {'target': target, 'candidate': candidate})
+
+    def camera_control(self, command, data=None):
+        """Enviar comando de câmera ao dispositivo pareado"""
+        return self.emit('camera-control', {'command': command, 'data': data or {}})
+
+    def stop_streaming(self):
+        """Encerrar pareamento atual"""
+        return self.emit('stop-streaming')
+
+# Conexões compartilhadas: url -> [cliente, número de usuários]
+_pool = {}
+_pool_lock = Lock()
+
+def acquire_client(server_url, name="PC Windows - Receptor"):
+    """Obter cliente compartilhado para o servidor (criando e conectando se preciso)"""
+    with _pool_lock:
+        entry = _pool.get(server_url)
+        if entry is None:
+            entry = [SignalingClient(server_url, name), 0]
+            _pool[server_url] = entry
+            entry[0].start()
+        entry[1] += 1
+        return entry[0]
+
+def release_client(client):
+    """Devolver cliente ao pool; a conexão é encerrada quando ninguém mais usa"""
+    with _pool_lock:
+        entry = _pool.get(client.server_url)
+        if entry is None or entry[0] is not client:
+            return
+
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del _pool[client.server_url]
+
+    client.stop()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Captura de fotos do stream de vídeo
+Webcam Remota Universal - Snapshots
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+from startup import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+# Formatos suportados: nome -> (extensão, função que monta os parâmetros do encoder)
+SNAPSHOT_FORMATS = {
+    "png": (".png", lambda quality: [cv2.IMWRITE_PNG_COMPRESSION, 3]),
+    "jpeg": (".jpg", lambda quality: [cv2.IMWRITE_JPEG_QUALITY, quality]),
+    "webp": (".webp", lambda quality: [cv2.IMWRITE_WEBP_QUALITY, quality]),
+    # Qualidade acima de 100 ativa o modo sem perdas do encoder WebP
+    "webp_lossless": (".webp", lambda quality: [cv2.IMWRITE_WEBP_QUALITY, 101]),
+}
+
+class SnapshotService:
+    """Captura frames decodificados e codifica as fotos em segundo plano
+
+    O serviço apenas guarda referências aos arrays produzidos pelo decoder
+    (cada frame decodificado é um array novo que não é mais alterado), então
+    capturar não copia pixels. A codificação PNG/JPEG/WebP e a escrita em
+    disco acontecem num pool de threads, fora da thread da interface.
+
+    Quando a tela decodifica em resolução reduzida, o serviço recebe o JPEG
+    original (`offer_jpeg`) e o decodifica inteiro no pool, só ao salvar.
+    """
+
+    def __init__(self, save_dir, max_workers=2, burst_max_bytes=256 * 1024 * 1024):
+        self.save_dir = Path(save_dir)
+        self.burst_max_bytes = burst_max_bytes
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="snapshot")
+
+        # Callbacks chamados a partir das threads do pool
+        self.on_saved = None  # (caminho)
+        self.on_error = None  # (mensagem)
+        self.on_burst_finished = None  # (quantidade de frames, truncada)
+
+        self.latest_frame = None
+
+        self._lock = Lock()
+        self._burst_frames = []
+        self._burst_bytes = 0
+        self._burst_remaining = 0
+        self._burst_format = "png"
+        self._burst_quality = 95
+        self._burst_name = None
+
+    def offer_frame(self, frame):
+        """Registrar o frame decodificado mais recente (chamado a cada frame)"""
+        self._offer(frame, frame.nbytes)
+
+    def offer_jpeg(self, data):
+        """Registrar o JPEG do frame mais recente, sem decodificar"""
+        self._offer(data, len(data))
+
+    def _offer(self, frame, size):
+        self.latest_frame = frame
+
+        if not self._burst_remaining:
+            return
+
+        with self._lock:
+            if not self._burst_remaining:
+                return
+
+            if self._burst_bytes + size > self.burst_max_bytes:
+                # Limite de memória atingido: encerrar rajada com o que já temos
+                self._finish_burst(truncated=True)
+                return
+
+            self._burst_frames.append(frame)
+            self._burst_bytes += size
+            self._burst_remaining -= 1
+
+            if not self._burst_remaining:
+                self._finish_burst(truncated=False)
+
+    def capture(self, fmt="png", quality=95):
+        """Capturar o frame atual; retorna um Future ou None se não há vídeo"""
+        frame = self.latest_frame
+        if frame is None:
+            return None
+
+        path = self._build_path("foto", fmt)
+        return self.executor.submit(self._encode_and_save, frame, path, fmt, quality)
+
+    def start_burst(self, count, fmt="png", quality=95):
+        """Capturar os próximos `count` frames na taxa total do stream"""
+        with self._lock:
+            if self._burst_remaining:
+                return False
+
+            self._burst_frames = []
+            self._burst_bytes = 0
+            self._burst_remaining = max(1, int(count))
+            self._burst_format = fmt
+            self._burst_quality = quality
+            self._burst_name = datetime.now().strftime('%Y%m%d_%H%M%S')
+            return True
+
+    def is_burst_active(self):
+        """Verificar se há uma rajada em andamento"""
+        return bool(self._burst_remaining)
+
+    def cancel_burst(self):
+        """Cancelar rajada em andamento descartando os frames acumulados"""
+        with self._lock:
+            self._burst_frames = []
+            self._burst_bytes = 0
+            self._burst_remaining = 0
+
+    def shutdown(self, wait=True):
+        """Encerrar o pool de codificação"""
+        self.cancel_burst()
+        self.executor.shutdown(wait=wait)
+
+    def _finish_burst(self, truncated):
+        """Enviar frames da rajada para codificação (com o lock adquirido)"""
+        frames = self._burst_frames
+        fmt = self._burst_format
+        quality = self._burst_quality
+        name = self._burst_name
+
+        self._burst_frames = []
+        self._burst_bytes = 0
+        self._burst_remaining = 0
+
+        ext = SNAPSHOT_FORMATS[fmt][0]
+        for index, frame in enumerate(frames, start=1):
+            path = self.save_dir / f"rajada_{name}_{index:03d}{ext}"
+            self.executor.submit(self._encode_and_save, frame, path, fmt, quality)
+
+        if self.on_burst_finished:
+            self.on_burst_finished(len(frames), truncated)
+
+    def _build_path(self, prefix, fmt):
+        """Montar caminho único para uma foto"""
+        ext = SNAPSHOT_FORMATS[fmt][0]
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]
+        return self.save_dir / f"{prefix}_{timestamp}{ext}"
+
+    def _encode_and_save(self, frame, path, fmt, quality):
+        """Codificar frame e gravar em disco (executado no pool)"""
+        try:
+            if isinstance(frame, (bytes, bytearray)):
+                # JPEG guardado sem decodificar: resolução completa
+                frame = cv2.imdecode(np.frombuffer(frame, np.uint8), cv2.IMREAD_COLOR)
+                if frame is None:
+                    raise RuntimeError("JPEG inválido")
+            ext, params = SNAPSHOT_FORMATS[fmt]
+            ok, encoded = cv2.imencode(ext, frame, params(quality))
+            if not ok:
+                raise RuntimeError(f"falha ao codificar {fmt}")
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(encoded.data)
+
+            if self.on_saved:
+                self.on_saved(str(path))
+            return str(path)
+
+        except Exception as e:
+            print(f"Erro ao salvar foto: {e}")
+            if self.on_error:
+                self.on_error(str(e))
+            return None
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vigia de travamentos com prazo por etapa do pipeline
+Webcam Remota Universal - Watchdog
+
+Cada etapa (socket, decodificação, pintura, gravação) informa quando
+recebe trabalho (`submit`) e quando progride (`progress`). Uma thread
+confere as etapas armadas algumas vezes por segundo: trabalho esperando
+há mais que o prazo da etapa vira um evento "stalled"; o próximo
+progresso (ou o fim da vigilância, quando a etapa é reiniciada) fecha o
+travamento e registra a duração:
+
+    {"stage": "socket", "state": "stalled", "seconds": 3.1, "deadline": 3.0, ...}
+    {"stage": "socket", "state": "resumed" | "abandoned", "seconds": 4.2, ...}
+
+Etapas contínuas (socket) sempre esperam trabalho enquanto armadas: o
+prazo conta a partir do último progresso. Quem registra a etapa decide
+como reagir (reconectar, reiniciar a etapa); aqui só se detecta, conta e
+registra. Os eventos são anexados (JSON por linha) ao registro e
+`report()` resume contagens e durações para painéis.
+
+    python -m stallwatch --demo     etapa sintética que trava e volta
+"""
+
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from threading import Thread, Event, Lock
+
+class _Stage:
+    def __init__(self, name, deadline, continuous):
+        self.name = name
+        self.deadline = deadline
+        self.continuous = continuous
+        self.armed = False
+        self.last_progress = None
+        self.waiting_since = None
+        # Travamento em aberto: início (último progresso/trabalho pendente) ou None
+        self.stalled_since = None
+        self.stalls = 0
+        self.stall_seconds = 0.0
+        self.longest_stall = 0.0
+        self.last_stall = None
+
+class Watchdog:
+    """Prazos por etapa conferidos por uma thread própria
+
+    `submit` e `progress` são só atribuições (qualquer thread, sem lock);
+    as transições de travamento acontecem apenas em `check`, na thread do
+    vigia. Os ouvintes (`on_event`) são chamados nessa thread.
+    """
+
+    def __init__(self, interval=0.25, log_path=None, enabled=True):
+        self.interval = interval
+        self.log_path = log_path
+        self.enabled = enabled
+        self.stages = {}
+        self._listeners = []
+        self._lock = Lock()
+        self._thread = None
+        self._stop = Event()
+
+    def add_stage(self, name, deadline, continuous=False):
+        """Registrar uma etapa com seu prazo em segundos"""
+        self.stages[name] = _Stage(name, deadline, continuous)
+
+    def on_event(self, callback):
+        """Registrar ouvinte dos eventos de travamento (dict)"""
+        self._listeners.append(callback)
+
+    # Etapas (threads do pipeline)
+
+    def arm(self, name, now=None):
+        """Começar a vigiar a etapa (inicia a thread do vigia na primeira vez)"""
+        if not self.enabled:
+            return
+        stage = self.stages[name]
+        stage.last_progress = time.monotonic() if now is None else now
+        stage.waiting_since = None
+        stage.armed = True
+        self.start()
+
+    def disarm(self, name, now=None):
+        """Parar de vigiar; um travamento em aberto termina como "abandoned" """
+        stage = self.stages.get(name)
+        if stage is None or not stage.armed:
+            return
+        stage.armed = False
+        with self._lock:
+            if stage.stalled_since is not None:
+                self._close_stall(stage, "abandoned", time.monotonic() if now is None else now)
+
+    def submit(self, name, now=None):
+        """Trabalho entregue à etapa (o prazo conta a partir do primeiro pendente)"""
+        stage = self.stages.get(name)
+        if stage is not None and stage.waiting_since is None:
+            stage.waiting_since = time.monotonic() if now is None else now
+
+    def progress(self, name, pending=False, now=None):
+        """A etapa avançou; `pending` se ainda há trabalho na fila dela"""
+        stage = self.stages.get(name)
+        if stage is None:
+            return
+        now = time.monotonic() if now is None else now
+        stage.last_progress = now
+        stage.waiting_since = now if pending else None
+
+    def is_stalled(self, name):
+        stage = self.stages.get(name)
+        return stage is not None and stage.stalled_since is not None
+
+    # Vigia
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, daemon=True, name="watchdog")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread:
+            thread.join(timeout=1.0)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def check(self, now=None):
+        """Conferir os prazos; retorna os eventos gerados"""
+        now = time.monotonic() if now is None else now
+        events = []
+        with self._lock:
+            for stage in self.stages.values():
+                if not stage.armed:
+                    continue
+                if stage.stalled_since is not None:
+                    # Progresso depois do início do travamento encerra o evento
+                    if stage.last_progress is not None and stage.last_progress > stage.stalled_since:
+                        events.append(self._close_stall(stage, "resumed", stage.last_progress, emit=False))
+                    continue
+                if stage.continuous:
+                    since = stage.last_progress
+                else:
+                    since = stage.waiting_since
+                if since is None or now - since <= stage.deadline:
+                    continue
+                stage.stalled_since = since
+                stage.stalls += 1
+                stage.last_stall = datetime.now().isoformat(timespec="seconds")
+                events.append(self._event(stage, "stalled", now - since))
+        for event in events:
+            self._dispatch(event)
+        return events
+
+    def _close_stall(self, stage, state, now, emit=True):
+        """Encerrar o travamento em aberto (com self._lock)"""
+        duration = max(now - stage.stalled_since, 0.0)
+        stage.stalled_since = None
+        stage.stall_seconds += duration
+        stage.longest_stall = max(stage.longest_stall, duration)
+        event = self._event(stage, state, duration)
+        if emit:
+            self._dispatch(event)
+        return event
+
+    def _event(self, stage, state, seconds):
+        return {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "stage": stage.name,
+            "state": state,
+            "seconds": round(seconds, 3),
+            "deadline": stage.deadline,
+            "stalls": stage.stalls
+        }
+
+    def _dispatch(self, event):
+        if event["state"] == "stalled":
+            print(f"Watchdog: etapa '{event['stage']}' sem progresso há {event['seconds']:.1f} s "
+                  f"(prazo {event['deadline']:.1f} s)")
+        else:
+            print(f"Watchdog: etapa '{event['stage']}' {'voltou' if event['state'] == 'resumed' else 'reiniciada'} "
+                  f"após {event['seconds']:.1f} s travada")
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as log:
+                    log.write(json.dumps(event, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"Erro ao registrar travamento: {e}")
+        for callback in list(self._listeners):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Erro no ouvinte do watchdog: {e}")
+
+    # Relatórios
+
+    def report(self):
+        """Contagens e durações por etapa (JSON para painéis)"""
+        now = time.monotonic()
+        stages = {}
+        for stage in self.stages.values():
+            stalled_for = now - stage.stalled_since if stage.stalled_since is not None else None
+            stages[stage.name] = {
+                "armed": stage.armed,
+                "deadline": stage.deadline,
+                "stalled": stalled_for is not None,
+                "stalled_seconds": round(stalled_for, 3) if stalled_for is not None else None,
+                "stalls": stage.stalls,
+                "stall_seconds_total": round(stage.stall_seconds + (stalled_for or 0.0), 3),
+                "longest_stall_seconds": round(max(stage.longest_stall, stalled_for or 0.0), 3),
+                "last_stall": stage.last_stall,
+                "seconds_since_progress": (round(now - stage.last_progress, 3)
+                                           if stage.armed and stage.last_progress is not None else None)
+            }
+        return {
+            "status": "stalled" if any(stage["stalled"] for stage in stages.values()) else "ok",
+            "stages": stages
+        }
+
+    def describe(self):
+        """Resumo de uma linha ("sem travamentos" ou contagem por etapa)"""
+        parts = []
+        for stage in self.stages.values():
+            if stage.stalled_since is not None:
+                parts.append(f"{stage.name} TRAVADO")
+            elif stage.stalls:
+                parts.append(f"{stage.name} {stage.stalls}x ({stage.stall_seconds:.1f} s)")
+        return "Travamentos: " + (", ".join(parts) if parts else "nenhum")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="stallwatch", description="Vigia de travamentos por etapa")
+    parser.add_argument("--demo", action="store_true", help="etapa sintética que trava por 2 s e volta")
+    args = parser.parse_args((argv or sys.argv)[1:])
+    if not args.demo:
+        parser.print_help()
+        return 0
+
+    watchdog = Watchdog(interval=0.1)
+    watchdog.add_stage("socket", 0.5, continuous=True)
+    watchdog.arm("socket")
+    start = time.monotonic()
+    while time.monotonic() - start < 4.0:
+        elapsed = time.monotonic() - start
+        if not 1.0 <= elapsed < 3.0:  # dois segundos sem dados no meio
+            watchdog.progress("socket")
+        time.sleep(0.03)
+    watchdog.stop()
+    print(json.dumps(watchdog.report(), indent=2, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inicialização rápida: imports adiados e medição de tempo de partida
+Webcam Remota Universal - Startup
+"""
+
+import os
+import sys
+import time
+import types
+import importlib
+import subprocess
+from threading import Thread
+
+# Referência de tempo para as medições de inicialização
+PROCESS_START = time.perf_counter()
+
+# Tempo gasto em cada import adiado: nome -> segundos
+deferred_import_times = {}
+
+class LazyModule(types.ModuleType):
+    """Módulo que só é importado no primeiro acesso a um atributo
+
+    Depois de carregado, os atributos do módulo real são copiados para o
+    proxy, então acessos seguintes custam o mesmo que num módulo comum.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            deferred_import_times[self.__name__] = time.perf_counter() - start
+            self.__dict__.update(module.__dict__)
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+def lazy_import(name):
+    """Obter módulo que será importado apenas quando usado"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+def is_loaded(module):
+    """Verificar se um módulo (ou proxy) já foi carregado"""
+    if isinstance(module, LazyModule):
+        return module.__dict__['_lazy_module'] is not None
+    return True
+
+def preload_in_background(*modules):
+    """Carregar proxies em uma thread para não atrasar a janela"""
+    def worker():
+        for module in modules:
+            try:
+                if isinstance(module, LazyModule):
+                    module._load()
+            except Exception as e:
+                print(f"Erro ao pré-carregar {module.__name__}: {e}")
+
+    thread = Thread(target=worker, daemon=True, name="preload")
+    thread.start()
+    return thread
+
+class StartupTimeline:
+    """Marcos de tempo desde o início do processo"""
+
+    def __init__(self):
+        self.marks = []
+
+    def mark(self, name):
+        """Registrar um marco (em ms desde PROCESS_START)"""
+        elapsed_ms = (time.perf_counter() - PROCESS_START) * 1000
+        self.marks.append((name, elapsed_ms))
+        return elapsed_ms
+
+    def elapsed_ms(self, name):
+        """Obter tempo de um marco registrado"""
+        for mark_name, elapsed in self.marks:
+            if mark_name == name:
+                return elapsed
+        return None
+
+    def report(self):
+        """Montar relatório textual dos marcos e imports adiados"""
+        lines = ["Linha do tempo de inicialização:"]
+        for name, elapsed in self.marks:
+            lines.append(f"  {elapsed:8.1f} ms  {name}")
+
+        if deferred_import_times:
+            lines.append("Imports adiados (carregados após a janela):")
+            for name, seconds in sorted(deferred_import_times.items(), key=lambda item: -item[1]):
+                lines.append(f"  {seconds * 1000:8.1f} ms  {name}")
+
+        return "\n".join(lines)
+
+# Linha do tempo global da aplicação
+timeline = StartupTimeline()
+
+def import_profile_report(module="main", top=20):
+    """Perfil de tempo de import de um módulo usando `python -X importtime`
+
+    Roda em um processo separado para medir um import a frio. Não está
+    disponível no executável do PyInstaller.
+    """
+    if getattr(sys, 'frozen', False):
+        return "Perfil de imports indisponível no executável"
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line.split(":", 1)[1].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue  # Linha de cabeçalho
+        entries.append((cumulative_us, self_us, fields[2].strip()))
+
+    if not entries:
+        return f"Não foi possível medir imports de '{module}':\n{result.stderr.strip()}"
+
+    total_ms = sum(self_us for _, self_us, _ in entries) / 1000
+    lines = [f"Perfil de imports de '{module}' (total {total_ms:.1f} ms):",
+             "  acumulado     próprio  módulo"]
+    for cumulative_us, self_us, name in sorted(entries, reverse=True)[:top]:
+        lines.append(f"  {cumulative_us / 1000:8.1f} ms {self_us / 1000:8.1f} ms  {name}")
+
+    return "\n".join(lines)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agregação de estatísticas do stream
+Webcam Remota Universal - Estatísticas
+"""
+
+import time
+import struct
+from threading import Lock
+from collections import deque
+
+# Marcadores SOF (início de quadro) que trazem as dimensões do JPEG
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def jpeg_dimensions(data):
+    """Ler (largura, altura) do cabeçalho JPEG sem decodificar (ou None)"""
+    offset = 2
+    size = len(data)
+    while offset + 9 <= size:
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker in _SOF_MARKERS:
+            height, width = struct.unpack_from('!HH', data, offset + 5)
+            return width, height
+        segment_length = struct.unpack_from('!H', data, offset + 2)[0]
+        offset += 2 + segment_length
+    return None
+
+def classify_quality(fps, height):
+    """Classificar qualidade pela taxa de quadros e altura real do stream"""
+    if fps >= 30 and height >= 1080:
+        return "Excelente"
+    elif fps >= 25 and height >= 720:
+        return "Boa"
+    elif fps >= 15:
+        return "Regular"
+    return "Baixa"
+
+class StreamStats:
+    """Contadores do stream atualizados pelas threads do pipeline
+
+    Há vários escritores: a thread de rede soma bytes, a interface conta
+    JPEGs e repetidos, a thread de exibição conta frames decodificados e a
+    conexão zera tudo em `reset`. Um lock curto protege cada escrita, o
+    `reset` e o `sample`. A interface chama `sample` em intervalo fixo e
+    baixo; as taxas são calculadas numa janela móvel de amostras e o
+    histórico fica guardado para os gráficos de tendência.
+    """
+
+    def __init__(self, window=3.0, history_size=60):
+        self.window = window
+        self.history_size = history_size
+
+        # Escritos pelas threads do pipeline
+        self.frames_total = 0
+        self.frames_skipped = 0  # repetidos, não decodificados
+        self.bytes_total = 0
+        self.resolution = None  # (largura, altura) do último frame
+        self.transport = {}     # último resumo RTCP (WebRTC)
+
+        self.fps_history = deque(maxlen=history_size)
+        self.bitrate_history = deque(maxlen=history_size)
+        self._samples = deque()
+        self.started_at = None
+        self._lock = Lock()
+
+    def reset(self):
+        """Zerar contadores (nova conexão)"""
+        with self._lock:
+            self.frames_total = 0
+            self.frames_skipped = 0
+            self.bytes_total = 0
+            self.resolution = None
+            self.transport = {}
+            self.fps_history.clear()
+            self.bitrate_history.clear()
+            self._samples.clear()
+            self.started_at = time.monotonic()
+
+    # Escrita (threads do pipeline)
+
+    def record_bytes(self, count):
+        """Contabilizar bytes recebidos da rede"""
+        with self._lock:
+            self.bytes_total += count
+
+    def record_frame(self, frame):
+        """Contabilizar frame decodificado (array BGR) e sua resolução"""
+        height, width = frame.shape[:2]
+        with self._lock:
+            self.frames_total += 1
+            self.resolution = (width, height)
+
+    def record_skipped(self):
+        """Contabilizar frame recebido mas não decodificado (repetido)"""
+        with self._lock:
+            self.frames_total += 1
+            self.frames_skipped += 1
+
+    def record_jpeg(self, data):
+        """Contabilizar frame JPEG que não será decodificado (ex: daemon)"""
+        dimensions = jpeg_dimensions(data)
+        with self._lock:
+            self.frames_total += 1
+            if dimensions:
+                self.resolution = dimensions
+
+    def record_transport(self, stats):
+        """Guardar o último resumo de transporte (substituição atômica)"""
+        self.transport = stats
+
+    # Leitura (interface)
+
+    def sample(self, now=None):
+        """Tirar amostra dos contadores e calcular taxas na janela móvel"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return self._sample(now)
+
+    def _sample(self, now):
+        self._samples.append((now, self.frames_total, self.bytes_total))
+        while len(self._samples) > 2 and now - self._samples[0][0] > self.window:
+            self._samples.popleft()
+
+        fps = 0.0
+        bitrate_kbps = 0
+        first_time, first_frames, first_bytes = self._samples[0]
+        elapsed = now - first_time
+        if elapsed > 0:
+            fps = (self.frames_total - first_frames) / elapsed
+            bitrate_kbps = int((self.bytes_total - first_bytes) * 8 / elapsed / 1000)
+
+        transport = self.transport
+        if not bitrate_kbps and transport.get("bitrate_kbps") is not None:
+            # WebRTC: os bytes chegam pelo aiortc, fora do nosso contador
+            bitrate_kbps = transport["bitrate_kbps"]
+
+        self.fps_history.append(fps)
+        self.bitrate_history.append(bitrate_kbps)
+
+        width, height = self.resolution or (0, 0)
+        return {
+            "fps": fps,
+            "bitrate_kbps": bitrate_kbps,
+            "resolution": self.resolution,
+            "quality": classify_quality(fps, height) if self.resolution else None,
+            "frames_total": self.frames_total,
+            "frames_skipped": self.frames_skipped,
+            "bytes_total": self.bytes_total,
+            "uptime": now - self.started_at if self.started_at else 0,
+            "rtt_ms": transport.get("rtt_ms"),
+            "jitter_ms": transport.get("jitter_ms"),
+            "packets_lost": transport.get("packets_lost"),
+            "loss_percent": transport.get("loss_percent")
+        }
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""
+Configuração comum dos testes
+Webcam Remota Universal - Testes
+
+Os módulos do programa ficam soltos em windows-app/, sem pacote; os testes
+importam de lá diretamente. A pasta pessoal aponta para um diretório
+temporário, para que configuração e diretório de dispositivos gravados
+pelos testes não se misturem aos do usuário.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["HOME"] = os.environ["USERPROFILE"] = tempfile.mkdtemp(prefix="webcamremota-testes-")
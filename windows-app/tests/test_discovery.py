@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do diretório de dispositivos conhecidos
+Webcam Remota Universal - Testes de Descoberta
+"""
+
+import json
+import time
+
+from discovery import DeviceDirectory
+
+def make_directory(tmp_path):
+    return DeviceDirectory(path=tmp_path / "devices.json", save_delay=0, default_port=5000)
+
+def test_same_model_phones_keep_separate_entries(tmp_path):
+    directory = make_directory(tmp_path)
+    directory.remember("Pixel 7", "192.168.0.10", port=5000)
+    directory.remember("Pixel 7", "192.168.0.11", port=5001)
+
+    devices = directory.known_devices()
+    assert len(devices) == 2
+    assert {device["last_ip"] for device in devices} == {"192.168.0.10", "192.168.0.11"}
+    assert all(device["name"] == "Pixel 7" for device in devices)
+    assert directory.lookup("192.168.0.11")["port"] == 5001
+
+def test_port_defaults_and_name_is_display_only(tmp_path):
+    directory = make_directory(tmp_path)
+    # Pedido de descoberta (sem porta) e handshake na porta padrão: mesma entrada
+    key = directory.remember("Pixel", "192.168.0.10", capabilities={"codecs": ["mjpeg"]})
+    assert directory.remember("Pixel de Ana", "192.168.0.10", port=5000) == key
+
+    entry = directory.get(key)
+    assert entry["name"] == "Pixel de Ana"
+    assert entry["capabilities"] == {"codecs": ["mjpeg"]}
+    assert directory.lookup("192.168.0.10", port=5001) is None
+
+    directory.forget(key)
+    assert directory.known_devices() == []
+
+def test_device_id_takes_precedence_over_address(tmp_path):
+    directory = make_directory(tmp_path)
+    first = directory.remember("Pixel", "192.168.0.10", port=5000, device_id="abc")
+    # Mesmo aparelho com outro IP (DHCP): continua sendo uma entrada só
+    assert directory.remember("Pixel", "192.168.0.20", port=5000, device_id="abc") == first
+    assert len(directory.known_devices()) == 1
+    assert directory.lookup("192.168.0.20")["device_id"] == "abc"
+
+def test_legacy_name_keyed_file_is_rekeyed(tmp_path):
+    path = tmp_path / "devices.json"
+    now = time.time()
+    path.write_text(json.dumps({
+        "Pixel": {"name": "Pixel", "last_ip": "192.168.0.10", "port": 5002, "last_seen": now},
+        "Galaxy": {"name": "Galaxy", "last_ip": "192.168.0.12", "last_seen": now - 1},
+    }), encoding="utf-8")
+
+    directory = make_directory(tmp_path)
+    directory.load()
+    assert directory.get("192.168.0.10:5002")["name"] == "Pixel"
+    assert directory.get("192.168.0.12:5000")["name"] == "Galaxy"
+
+    # Um novo Pixel em outro IP não apaga o antigo
+    directory.remember("Pixel", "192.168.0.11")
+    directory.flush()
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert set(saved) == {"192.168.0.10:5002", "192.168.0.12:5000", "192.168.0.11:5000"}
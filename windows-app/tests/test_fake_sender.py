@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do protocolo de ROI e do modo YUV contra o emulador do app
+Webcam Remota Universal - Testes do Emulador
+
+Um ReceiverCore de verdade se conecta ao FakeSender numa porta local,
+como o receptor faria com o celular.
+"""
+
+import time
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from config import config
+from control import FULL_FRAME, normalize_roi
+from fake_sender import FakeSender, render_roi_frame
+from receiver_core import ReceiverCore
+from yuv import is_raw_payload, parse_raw_header, YuvConverter
+
+def wait_until(check, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if check():
+            return True
+        time.sleep(0.02)
+    return check()
+
+@pytest.fixture
+def session():
+    """Emulador e receptor conectados, com os frames recebidos numa lista"""
+    config.set("network.probe_link", False)
+    sender = FakeSender(port=0)
+    port = sender.start()
+    core = ReceiverCore()
+    frames = []
+    controls = []
+    core.on("data_received", frames.append)
+    core.on("control_received", controls.append)
+    core.connect_to_device("127.0.0.1", "wifi", port)
+    try:
+        assert core.connected
+        assert wait_until(lambda: len(frames) >= 3)
+        yield sender, core, frames, controls
+    finally:
+        core.disconnect()
+        sender.stop()
+
+def next_frame(frames, count=3):
+    """Esperar `count` frames novos e devolver o último"""
+    marker = len(frames)
+    assert wait_until(lambda: len(frames) >= marker + count)
+    return frames[-1]
+
+def test_roi_round_trip(session):
+    sender, core, frames, controls = session
+    roi = (0.375, 0.375, 0.25, 0.25)
+    full_jpeg = frames[-1]
+
+    assert core.request_roi(roi)
+    assert wait_until(lambda: core.roi_mapping.cropped)
+    roi_jpeg = next_frame(frames)
+    acks = [message for message in controls if message["type"] == "roi"]
+    assert acks and acks[0]["roi"] == pytest.approx(list(roi))
+
+    # O conteúdo é o recorte da cena (fora do contador no canto)
+    received = cv2.imdecode(np.frombuffer(roi_jpeg, np.uint8), cv2.IMREAD_COLOR)
+    expected = render_roi_frame(sender._scene, normalize_roi(roi), sender.output_size)
+    assert received.shape == expected.shape
+    assert cv2.PSNR(received[40:], expected[40:]) > 28
+
+    # O centro do frame recebido mapeia para o centro da ROI no sensor
+    center = core.roi_mapping.to_source(0.5, 0.5)
+    assert center == pytest.approx((roi[0] + roi[2] / 2, roi[1] + roi[3] / 2), abs=1e-6)
+    assert len(roi_jpeg) < 2 * len(full_jpeg)
+
+    # Voltar ao frame inteiro
+    assert core.request_roi(None)
+    assert wait_until(lambda: not core.roi_mapping.cropped)
+    received = cv2.imdecode(np.frombuffer(next_frame(frames), np.uint8), cv2.IMREAD_COLOR)
+    expected = render_roi_frame(sender._scene, FULL_FRAME, sender.output_size)
+    assert received.shape == expected.shape
+
+def test_yuv_frames_convert_like_the_scene(session):
+    sender, core, frames, controls = session
+
+    assert core.request_format("nv21")
+    assert wait_until(lambda: core.stream_format == "nv21")
+    raw = next_frame(frames)
+    assert is_raw_payload(raw)
+    width, height, fmt, timestamp = parse_raw_header(raw)
+    assert ((width, height), fmt) == (sender.output_size, "nv21")
+
+    converter = YuvConverter()
+    frame = converter.to_bgr(raw)
+    expected = render_roi_frame(sender._scene, FULL_FRAME, sender.output_size)
+    # Crominância 4:2:0 perde detalhe de cor; o brilho deve chegar intacto
+    gray = lambda image: cv2.cvtColor(image[40:], cv2.COLOR_BGR2GRAY)
+    assert cv2.PSNR(gray(frame), gray(expected)) > 35
+    # Caminho direto para a tela: mesmo frame, já em RGB
+    assert (converter.to_display(raw)[..., ::-1] == frame).all()
+
+    # Voltar ao JPEG
+    assert core.request_format("jpeg")
+    assert wait_until(lambda: core.stream_format == "jpeg")
+    assert not is_raw_payload(next_frame(frames))
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da medição do enlace antes da conexão
+Webcam Remota Universal - Testes do Teste de Enlace
+"""
+
+import time
+import socket
+from threading import Thread
+
+import pytest
+
+pytest.importorskip("cv2")
+
+import receiver_core
+from config import config
+from fake_sender import FakeSender
+from linkprobe import probe_link
+from receiver_core import ReceiverCore
+
+@pytest.fixture
+def sender():
+    config.set("network.probe_link", True)
+    sender = FakeSender(port=0)
+    sender.start()
+    yield sender
+    sender.stop()
+
+@pytest.fixture
+def probes(monkeypatch):
+    """Sondas feitas pelo núcleo: (host, porta, timeout)"""
+    calls = []
+    def counting_probe(host, port, **kwargs):
+        calls.append((host, port, kwargs.get("timeout")))
+        return probe_link(host, port, **kwargs)
+    monkeypatch.setattr(receiver_core, "probe_link", counting_probe)
+    return calls
+
+def make_core(tmp_path):
+    core = ReceiverCore()
+    core.device_directory = receiver_core.DeviceDirectory(path=tmp_path / "devices.json", save_delay=0)
+    return core
+
+def connect(core, port, probe=True):
+    core.connect_to_device("127.0.0.1", "wifi", port, probe=probe)
+    assert core.connected
+    core.disconnect()
+
+def test_probe_result_is_cached_per_device(sender, probes, tmp_path):
+    core = make_core(tmp_path)
+    connect(core, sender.port)
+    assert len(probes) == 1
+    assert probes[0][2] < 1.0
+    stored = core.device_directory.lookup("127.0.0.1", sender.port)["link_probe"]
+    assert stored["supported"] and stored["throughput_mbps"] > 0
+
+    # Nova conexão ao mesmo dispositivo: usa a medição guardada
+    core.link_probe = None
+    connect(core, sender.port)
+    assert len(probes) == 1
+    assert core.link_probe == stored
+
+    # Medição vencida: mede de novo
+    config.set("network.probe_max_age_hours", 0)
+    try:
+        connect(core, sender.port)
+    finally:
+        config.set("network.probe_max_age_hours", 24)
+    assert len(probes) == 2
+
+def test_stall_reconnect_does_not_probe(sender, probes, tmp_path):
+    core = make_core(tmp_path)
+    connect(core, sender.port, probe=False)
+    assert probes == []
+    assert core.link_probe is None
+
+def test_probe_gives_up_quickly_on_silent_device():
+    # Dispositivo que aceita a conexão mas não conhece a sonda
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    accepted = []
+    Thread(target=lambda: accepted.append(server.accept()[0]), daemon=True).start()
+    try:
+        start = time.monotonic()
+        result = probe_link("127.0.0.1", server.getsockname()[1], timeout=config.get("network.probe_timeout"))
+        assert time.monotonic() - start < 1.0
+        assert not result["supported"]
+        assert result["connect_ms"] is not None
+    finally:
+        for sock in accepted + [server]:
+            sock.close()
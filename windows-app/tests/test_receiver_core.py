@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da conexão Wi-Fi do núcleo do receptor
+Webcam Remota Universal - Testes do Núcleo
+"""
+
+import json
+import socket
+import struct
+from threading import Thread
+
+import pytest
+
+from config import config
+from receiver_core import ReceiverCore
+
+class HandshakeServer:
+    """Dispositivo que responde ao handshake com `reply` (None: não responde)"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.closed_by_peer = None
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.bind(("127.0.0.1", 0))
+        self._server.listen(1)
+        self.port = self._server.getsockname()[1]
+        self._thread = Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        client, _ = self._server.accept()
+        with client:
+            client.settimeout(5)
+            size = struct.unpack("!I", client.recv(4))[0]
+            while size > 0:
+                size -= len(client.recv(size))
+            if self.reply is not None:
+                client.sendall(struct.pack("!I", len(self.reply)) + self.reply)
+            # O receptor deve fechar o socket depois da falha
+            try:
+                self.closed_by_peer = client.recv(1) == b""
+            except OSError:
+                self.closed_by_peer = False
+
+    def join(self):
+        self._thread.join(timeout=5)
+        self._server.close()
+
+@pytest.fixture(autouse=True)
+def short_timeout():
+    config.set("network.probe_link", False)
+    config.set("network.timeout", 0.5)
+    yield
+    config.set("network.timeout", 10)
+
+@pytest.mark.parametrize("reply", [
+    None,                                                   # sem resposta (timeout)
+    b"{nao e json",                                         # resposta corrompida
+    json.dumps({"status": "rejected"}).encode("utf-8"),     # dispositivo recusou
+], ids=["timeout", "bad-json", "rejected"])
+def test_failed_handshake_closes_socket(reply):
+    server = HandshakeServer(reply)
+    core = ReceiverCore()
+    lost = []
+    core.on("connection_lost", lost.append)
+
+    core.connect_to_device("127.0.0.1", "wifi", server.port)
+    server.join()
+
+    assert not core.connected
+    assert core.socket is None
+    assert core.transport_tuner is None
+    assert server.closed_by_peer
+    assert len(lost) == 1 and "Falha na conexão Wi-Fi" in lost[0]
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da gravação MJPEG com índice
+Webcam Remota Universal - Testes de Gravação
+"""
+
+from frame_filter import FrameFilter, NEW, DUPLICATE
+from recorder import MjpegRecorder, read_index, iter_jpeg_frames
+
+JPEG = b"\xff\xd8\xff\xe0" + b"cena parada" * 50 + b"\xff\xd9"
+
+def record(path, frames, frame_filter):
+    """Gravar como o `on_data_received` da interface: repetidos só no índice"""
+    recorder = MjpegRecorder(path)
+    recorder.start()
+    for i, data in enumerate(frames, 1):
+        if frame_filter.check(data) == DUPLICATE:
+            recorder.write_duplicate(float(i), data=data)
+        else:
+            recorder.write_jpeg(data, float(i))
+    recorder.stop()
+    return recorder
+
+def test_static_scene_recording_is_not_empty(tmp_path):
+    # O filtro já viu o frame na exibição antes de a gravação começar
+    frame_filter = FrameFilter()
+    assert frame_filter.check(JPEG) == NEW
+
+    recorder = record(tmp_path / "parada", [JPEG] * 5, frame_filter)
+
+    assert recorder.frames_written == 1
+    assert recorder.duplicate_frames == 4
+    assert recorder.path.stat().st_size == len(JPEG)
+    entries = read_index(recorder.path)
+    assert [timestamp for timestamp, offset, size in entries] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert all(frame == JPEG for timestamp, frame in iter_jpeg_frames(recorder.path))
+
+def test_reset_filter_records_first_frame(tmp_path):
+    frame_filter = FrameFilter()
+    frame_filter.check(JPEG)
+    # Início da gravação na interface: o filtro é zerado
+    frame_filter.reset()
+
+    recorder = record(tmp_path / "zerado", [JPEG] * 3, frame_filter)
+    assert recorder.frames_written == 1
+    assert recorder.duplicate_frames == 2
+
+def test_repeat_without_data_before_first_frame_is_skipped(tmp_path):
+    recorder = MjpegRecorder(tmp_path / "sem_dados")
+    recorder.start()
+    recorder.write_duplicate(1.0)
+    recorder.write_jpeg(JPEG, 2.0)
+    recorder.write_duplicate(3.0)
+    recorder.stop()
+
+    assert [timestamp for timestamp, offset, size in read_index(recorder.path)] == [2.0, 3.0]
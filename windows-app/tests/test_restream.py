@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Visualizadores lentos não podem atrasar os outros (MJPEG e relay)
+Webcam Remota Universal - Testes de Redistribuição
+
+Versões curtas dos testes de carga de mjpeg_server.py e relay.py, com
+poucos clientes locais e um deles lento.
+"""
+
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("numpy")
+
+import relay
+import mjpeg_server
+
+FPS = 30
+
+def test_mjpeg_slow_viewer_does_not_hold_back_others():
+    result = mjpeg_server.load_test(clients=6, duration=3.0, fps=FPS, slow_clients=1)
+
+    assert result["connected"] == 6
+    assert result["published_fps"] > 0.9 * FPS
+    # Publicar só entrega o frame a cada cliente; nunca espera a rede
+    assert result["publish_p99_us"] < 20000
+    assert result["client_fps_min"] > 0.9 * result["published_fps"]
+    # O lento recebe menos e os frames intermediários dele são substituídos
+    assert result["slow_client_fps"][0] < 0.5 * result["client_fps_min"]
+    assert result["skipped_total"] > 0
+
+def test_relay_slow_subscriber_does_not_hold_back_others():
+    result = relay.benchmark(subscribers=6, duration=3.0, fps=FPS, slow_subscribers=1)
+
+    assert result["connected"] == 6
+    assert result["published_fps"] > 0.9 * FPS
+    assert result["publish_p99_us"] < 20000
+    assert result["subscriber_fps_min"] > 0.9 * result["published_fps"]
+    # O lento perde frames e é ressincronizado pelo último keyframe
+    assert result["slow_subscriber_fps"][0] < 0.5 * result["subscriber_fps_min"]
+    assert result["dropped_total"] > 0
+    assert result["resyncs_total"] > 0
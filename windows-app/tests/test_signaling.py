@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do cliente de sinalização contra um substituto local do server.js
+Webcam Remota Universal - Testes de Sinalização
+
+O substituto é um servidor python-socketio que fala o mesmo protocolo de
+eventos do server.js (só o necessário para o desktop), numa porta local e
+num loop asyncio próprio, para poder ser derrubado e religado.
+"""
+
+import time
+import socket
+import asyncio
+from threading import Thread, Event
+
+import pytest
+
+socketio = pytest.importorskip("socketio")
+web = pytest.importorskip("aiohttp.web")
+
+from signaling import SignalingClient
+
+MOBILES = [{"id": "movel-1", "name": "Pixel", "ip": "192.168.0.10"}]
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_until(check, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if check():
+            return True
+        time.sleep(0.02)
+    return False
+
+class StandInServer:
+    """Substituto do server.js para o lado desktop do protocolo"""
+
+    def __init__(self, port):
+        self.port = port
+        self.received = []  # (evento, sid, dados)
+        self.desktops = set()
+        self._loop = None
+        self._runner = None
+
+    def start(self):
+        ready = Event()
+        self._loop = asyncio.new_event_loop()
+        Thread(target=self._loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._start(ready), self._loop)
+        assert ready.wait(5), "substituto não iniciou"
+
+    async def _start(self, ready):
+        self.sio = socketio.AsyncServer(async_mode="aiohttp")
+        app = web.Application()
+        self.sio.attach(app)
+
+        @self.sio.on("register-desktop")
+        async def register_desktop(sid, data):
+            self.received.append(("register-desktop", sid, data))
+            self.desktops.add(sid)
+            await self.sio.emit("mobile-devices-list", MOBILES, to=sid)
+
+        @self.sio.on("accept-connection")
+        async def accept_connection(sid, data):
+            self.received.append(("accept-connection", sid, data))
+            await self.sio.emit("connection-established", {"peerId": data["mobileId"]}, to=sid)
+
+        @self.sio.event
+        async def disconnect(sid, *args):
+            self.desktops.discard(sid)
+
+        self._runner = web.AppRunner(app, shutdown_timeout=1.0)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", self.port).start()
+        ready.set()
+
+    def call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(5)
+
+    def request_connection(self, mobile):
+        """Um móvel pede conexão a todos os desktops registrados"""
+        for sid in list(self.desktops):
+            self.call(self.sio.emit("connection-request",
+                                    {"from": mobile["id"], "fromName": mobile["name"]}, to=sid))
+
+    def stop(self):
+        """Derrubar o servidor (como um reinício do server.js)"""
+        self.call(self._stop())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    async def _stop(self):
+        for sid in list(self.desktops):
+            await self.sio.disconnect(sid)
+        await self.sio.shutdown()
+        await self._runner.cleanup()
+        current = asyncio.current_task()
+        for task in asyncio.all_tasks():
+            if task is not current:
+                task.cancel()
+
+@pytest.fixture
+def server():
+    server = StandInServer(free_port())
+    server.start()
+    yield server
+    if server._runner.server is not None:
+        server.stop()
+
+def make_client(port):
+    client = SignalingClient(f"http://127.0.0.1:{port}", name="PC de teste", heartbeat_interval=0.2)
+    events = []
+    for event in ("signaling-connected", "signaling-disconnected", "mobile-devices-list",
+                  "connection-request", "connection-established"):
+        client.on(event, lambda *args, event=event: events.append((event, args)))
+    return client, events
+
+def names(events):
+    return [event for event, args in events]
+
+def test_register_desktop_receives_mobile_list(server):
+    client, events = make_client(server.port)
+    client.start(wait_timeout=5)
+    try:
+        assert wait_until(lambda: "mobile-devices-list" in names(events))
+        assert server.received[0][0] == "register-desktop"
+        assert server.received[0][2] == {"name": "PC de teste"}
+        assert client.connected
+        assert client.mobile_devices == {"movel-1": "Pixel"}
+    finally:
+        client.stop()
+
+def test_connection_request_and_accept(server):
+    client, events = make_client(server.port)
+    client.start(wait_timeout=5)
+    try:
+        assert wait_until(lambda: server.desktops)
+        server.request_connection(MOBILES[0])
+        assert wait_until(lambda: "connection-request" in names(events))
+        request = dict(events)["connection-request"][0]
+        assert request == {"from": "movel-1", "fromName": "Pixel"}
+
+        assert client.accept_connection(request["from"])
+        assert wait_until(lambda: "connection-established" in names(events))
+        assert ("accept-connection", {"mobileId": "movel-1"}) in \
+            [(event, data) for event, sid, data in server.received]
+        assert dict(events)["connection-established"][0] == {"peerId": "movel-1"}
+    finally:
+        client.stop()
+
+def test_reconnects_with_backoff_after_server_drops(server):
+    client, events = make_client(server.port)
+    client.start(wait_timeout=5)
+    try:
+        assert wait_until(lambda: "mobile-devices-list" in names(events))
+        server.stop()
+        assert wait_until(lambda: "signaling-disconnected" in names(events))
+        assert not client.connected
+        assert client.mobile_devices == {}
+        assert not client.emit("stop-streaming")
+
+        # Com o servidor fora, as tentativas falham e a espera dobra (1 s, 2 s, ...)
+        dropped_at = time.monotonic()
+        assert wait_until(lambda: client.reconnect_count >= 2, timeout=6)
+        assert time.monotonic() - dropped_at >= 1.0
+
+        restarted = StandInServer(server.port)
+        restarted.start()
+        try:
+            assert wait_until(lambda: names(events).count("signaling-connected") == 2, timeout=10)
+            # Ao voltar, o cliente se registra de novo e recebe a lista atualizada
+            assert wait_until(lambda: names(events).count("mobile-devices-list") == 2)
+            assert [event for event, sid, data in restarted.received] == ["register-desktop"]
+            assert client.mobile_devices == {"movel-1": "Pixel"}
+        finally:
+            restarted.stop()
+    finally:
+        client.stop()
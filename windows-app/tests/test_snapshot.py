@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Testes das fotos e rajadas capturadas do stream
+Webcam Remota Universal - Testes de Snapshots
+"""
+
+from threading import Event
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from snapshot import SnapshotService
+
+SIZE = (1280, 720)
+
+@pytest.fixture
+def jpeg():
+    rng = np.random.default_rng(3)
+    image = cv2.resize(rng.integers(0, 255, (SIZE[1] // 8, SIZE[0] // 8, 3), dtype=np.uint8), SIZE)
+    return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()
+
+@pytest.fixture
+def service(tmp_path):
+    service = SnapshotService(tmp_path)
+    yield service
+    service.shutdown()
+
+def saved_size(path):
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    return image.shape[1], image.shape[0]
+
+def test_photo_from_jpeg_is_full_resolution(service, jpeg):
+    # A tela decodificou em meia resolução; o serviço só tem o JPEG
+    service.offer_jpeg(jpeg)
+    path = service.capture("png").result(timeout=10)
+    assert saved_size(path) == SIZE
+
+def test_burst_mixes_frames_and_jpegs_at_full_resolution(service, jpeg):
+    finished = Event()
+    saved = []
+    service.on_saved = saved.append
+    service.on_burst_finished = lambda count, truncated: finished.set()
+
+    assert service.start_burst(3, "jpeg")
+    service.offer_frame(cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR))
+    service.offer_jpeg(jpeg)
+    service.offer_jpeg(jpeg)
+    assert finished.wait(5)
+    service.executor.shutdown(wait=True)
+
+    assert len(saved) == 3
+    assert all(saved_size(path) == SIZE for path in saved)
+
+def test_burst_memory_limit_counts_jpeg_bytes(tmp_path, jpeg):
+    service = SnapshotService(tmp_path, burst_max_bytes=len(jpeg) * 2)
+    results = []
+    service.on_burst_finished = lambda count, truncated: results.append((count, truncated))
+    try:
+        service.start_burst(5, "jpeg")
+        for _ in range(3):
+            service.offer_jpeg(jpeg)
+        assert results == [(2, True)]
+    finally:
+        service.shutdown()
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Orçamento de tempo da inicialização da interface
+Webcam Remota Universal - Testes de Inicialização
+
+Abre a janela principal num processo separado (plataforma Qt offscreen),
+como `python main.py --benchmark-startup`, e confere o tempo até o
+primeiro ciclo de eventos.
+"""
+
+import os
+import re
+import sys
+import subprocess
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+# Tempo máximo até a janela estar pronta para o usuário
+STARTUP_BUDGET_MS = 1500.0
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_window_ready_within_budget(tmp_path):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", HOME=str(tmp_path), USERPROFILE=str(tmp_path))
+    result = subprocess.run([sys.executable, "main.py", "--benchmark-startup"], cwd=APP_DIR, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+
+    match = re.search(r"Janela pronta em ([\d.]+) ms", result.stdout)
+    assert match, result.stdout
+    assert float(match.group(1)) <= STARTUP_BUDGET_MS, result.stdout
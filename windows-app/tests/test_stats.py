@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da agregação de estatísticas do stream
+Webcam Remota Universal - Testes de Estatísticas
+"""
+
+import sys
+from threading import Thread
+
+import numpy as np
+import pytest
+
+from stats import StreamStats
+
+FRAME = np.zeros((480, 640, 3), dtype=np.uint8)
+
+@pytest.fixture(autouse=True)
+def frequent_switches():
+    # Trocas de thread frequentes para expor corridas entre escritores
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+def test_concurrent_writers_do_not_lose_counts():
+    stats = StreamStats()
+    stats.reset()
+    writers = [
+        Thread(target=lambda: [stats.record_frame(FRAME) for _ in range(20000)]),
+        Thread(target=lambda: [stats.record_skipped() for _ in range(20000)]),
+        Thread(target=lambda: [stats.record_bytes(100) for _ in range(20000)]),
+    ]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    sample = stats.sample()
+    assert sample["frames_total"] == 40000
+    assert sample["frames_skipped"] == 20000
+    assert sample["bytes_total"] == 2000000
+    assert sample["resolution"] == (640, 480)
+
+def test_reset_during_sampling():
+    # A conexão zera os contadores enquanto a interface amostra
+    stats = StreamStats()
+    stats.reset()
+    errors = []
+
+    def sampler():
+        try:
+            for _ in range(20000):
+                stats.record_frame(FRAME)
+                stats.sample()
+        except Exception as e:
+            errors.append(e)
+
+    thread = Thread(target=sampler)
+    thread.start()
+    while thread.is_alive():
+        stats.reset()
+    thread.join()
+    assert errors == []
+
+def test_resolution_from_jpeg_header():
+    # Tela em meia resolução: a resolução do stream vem do cabeçalho do JPEG
+    cv2 = pytest.importorskip("cv2")
+    jpeg = cv2.imencode(".jpg", np.zeros((720, 1280, 3), dtype=np.uint8))[1].tobytes()
+    stats = StreamStats()
+    stats.reset()
+    stats.record_jpeg(jpeg)
+    assert stats.sample()["resolution"] == (1280, 720)
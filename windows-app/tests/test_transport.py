@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Testes dos perfis de transporte do socket de streaming
+Webcam Remota Universal - Testes de Transporte
+"""
+
+import socket
+
+import pytest
+
+from transport import PROFILES, TransportTuner, receive_buffer, bdp_bytes, RETUNE_INTERVAL
+
+def test_buffer_grows_with_profile_and_respects_limits():
+    sizes = [receive_buffer(profile, 50.0, 40.0, 150 * 1024)
+             for profile in ("low_latency", "balanced", "high_throughput")]
+    assert sizes == sorted(sizes)
+    # Cada tamanho soma um frame inteiro ao produto banda x atraso
+    assert sizes[1] == int(bdp_bytes(50.0, 40.0) * PROFILES["balanced"]["buffer_rtts"] + 150 * 1024)
+
+    for profile, settings in PROFILES.items():
+        assert receive_buffer(profile, 0.1, 1.0) == settings["min_buffer"]
+        assert receive_buffer(profile, 10000.0, 500.0) == settings["max_buffer"]
+
+@pytest.fixture
+def connected_socket():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    client = socket.create_connection(server.getsockname())
+    peer, _ = server.accept()
+    yield client
+    for sock in (client, peer, server):
+        sock.close()
+
+@pytest.mark.parametrize("profile", sorted(PROFILES))
+def test_profile_applied_to_socket(connected_socket, profile):
+    tuner = TransportTuner(profile, rtt_ms=40.0, mbps=50.0)
+    tuner.apply(connected_socket)
+
+    settings = PROFILES[profile]
+    nodelay = connected_socket.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+    assert bool(nodelay) == settings["nodelay"]
+    assert connected_socket.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+    assert connected_socket.gettimeout() == settings["read_timeout"]
+    assert tuner.rcvbuf == receive_buffer(profile, 50.0, 40.0)
+    assert tuner.effective_rcvbuf > 0
+
+def test_buffer_retuned_from_measured_rate(connected_socket):
+    tuner = TransportTuner("balanced", rtt_ms=40.0, mbps=5.0)
+    tuner.apply(connected_socket)
+    initial = tuner.rcvbuf
+
+    # 2 s a 40 Mbit/s com frames de 300 KB: buffer bem maior que o inicial
+    tuner.after_receive(connected_socket, 0, now=100.0)
+    tuner.after_receive(connected_socket, 10 * 10**6, 300 * 1024, now=100.0 + RETUNE_INTERVAL)
+    assert tuner.retunes == 1
+    assert tuner.mbps == pytest.approx(40.0)
+    assert tuner.rcvbuf == receive_buffer("balanced", 40.0, 40.0, 300 * 1024) > initial
+
+    # Taxa estável: nada a reajustar
+    tuner.after_receive(connected_socket, 20 * 10**6, 300 * 1024, now=100.0 + 2 * RETUNE_INTERVAL)
+    assert tuner.retunes == 1
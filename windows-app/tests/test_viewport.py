@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do zoom local (só a região visível é desenhada)
+Webcam Remota Universal - Testes do Viewport
+"""
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from viewport import Viewport, render_roi, render_full, MAX_ZOOM
+
+TARGET = (320, 180)
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return cv2.resize(rng.integers(0, 255, (54, 96, 3), dtype=np.uint8), (1920, 1080),
+                      interpolation=cv2.INTER_LINEAR)
+
+def test_anchored_zoom_keeps_point_under_cursor():
+    viewport = Viewport()
+    anchor = (0.8, 0.3)
+    before = viewport.visible_rect()
+    point = (before[0] + anchor[0] * before[2], before[1] + anchor[1] * before[3])
+
+    viewport.set_zoom(2.0, anchor=anchor)
+    x, y, width, height = viewport.visible_rect()
+    assert (x + anchor[0] * width, y + anchor[1] * height) == pytest.approx(point)
+
+def test_zoom_and_pan_are_clamped():
+    viewport = Viewport()
+    viewport.set_zoom(100.0)
+    assert viewport.zoom == MAX_ZOOM
+    viewport.pan(-10.0, 10.0)
+    x, y, width, height = viewport.visible_rect()
+    assert x + width == pytest.approx(1.0)
+    assert y == pytest.approx(0.0)
+
+@pytest.mark.parametrize("zoom", [1, 2, 4, 8])
+def test_visible_region_matches_full_render(frame, zoom):
+    viewport = Viewport()
+    viewport.set_zoom(zoom, anchor=(0.3, 0.6))
+
+    reduced = render_roi(frame, viewport, TARGET)
+    reference = render_full(frame, viewport, TARGET)
+    assert reduced.shape == reference.shape == (TARGET[1], TARGET[0], 3)
+    # Mesmo recorte; só a ordem de escala/recorte muda a interpolação
+    assert cv2.PSNR(reduced, reference) > 25
+
+def test_render_into_preallocated_output(frame):
+    viewport = Viewport()
+    viewport.set_zoom(2.0)
+    out = np.empty((TARGET[1], TARGET[0], 3), dtype=np.uint8)
+
+    result = render_roi(frame, viewport, TARGET, out=out)
+    assert result is out
+    assert (out == render_roi(frame, viewport, TARGET)).all()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Teste de ponta a ponta do receptor WebRTC com um emissor aiortc local
+Webcam Remota Universal - Testes do Receptor WebRTC
+
+O emissor faz o papel do celular (cria a oferta, como webrtc-utils.js) e a
+sinalização é um substituto em processo que entrega as mensagens direto
+entre os dois pares, no mesmo loop asyncio.
+"""
+
+import asyncio
+
+import pytest
+
+aiortc = pytest.importorskip("aiortc")
+from aiortc.mediastreams import VideoStreamTrack
+
+from webrtc_receiver import WebRTCReceiver
+
+PEER_ID = "movel-1"
+
+class LoopbackSignaling:
+    """Substituto do SignalingClient: mesma interface, sem servidor"""
+
+    def __init__(self, sender):
+        self.sender = sender
+        self.answers = []
+        self._listeners = {}
+
+    def on(self, event, callback):
+        self._listeners.setdefault(event, []).append(callback)
+
+    def off(self, event, callback):
+        self._listeners.get(event, []).remove(callback)
+
+    def dispatch(self, event, data):
+        for callback in list(self._listeners.get(event, [])):
+            callback(data)
+
+    def submit(self, coro):
+        return asyncio.ensure_future(coro)
+
+    def send_answer(self, target, answer):
+        self.answers.append((target, answer))
+        asyncio.ensure_future(self.sender.setRemoteDescription(
+            aiortc.RTCSessionDescription(sdp=answer["sdp"], type=answer["type"])
+        ))
+        return True
+
+async def wait_for(check, timeout=15.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not check():
+        assert loop.time() < deadline, "tempo esgotado"
+        await asyncio.sleep(0.05)
+
+def offer_from(signaling, sender):
+    signaling.dispatch("webrtc-offer", {
+        "from": PEER_ID,
+        "offer": {"type": sender.localDescription.type, "sdp": sender.localDescription.sdp}
+    })
+
+async def run_session():
+    sender = aiortc.RTCPeerConnection()
+    sender.addTrack(VideoStreamTrack())
+    signaling = LoopbackSignaling(sender)
+
+    receiver = WebRTCReceiver(signaling, PEER_ID, stats_interval=0.5)
+    frames, states, reports = [], [], []
+    receiver.on_frame = frames.append
+    receiver.on_state = states.append
+    receiver.on_stats = reports.append
+
+    try:
+        await sender.setLocalDescription(await sender.createOffer())
+        # Oferta de outro dispositivo: deve ser ignorada
+        signaling.dispatch("webrtc-offer", {"from": "outro", "offer": {"type": "offer", "sdp": ""}})
+        assert receiver.pc is None
+
+        offer_from(signaling, sender)
+        await wait_for(lambda: len(frames) >= 30)
+        await wait_for(lambda: len(reports) >= 2)
+        stats = await receiver.collect_stats()
+        return signaling, frames, states, reports, stats
+    finally:
+        receiver.close()
+        await asyncio.sleep(0.1)
+        await sender.close()
+
+def test_frames_and_stats_reach_receiver():
+    signaling, frames, states, reports, stats = asyncio.run(run_session())
+
+    assert signaling.answers[0][0] == PEER_ID
+    assert signaling.answers[0][1]["type"] == "answer"
+    assert "connected" in states
+
+    # VideoStreamTrack gera frames 640x480; chegam como arrays BGR
+    assert frames[0].shape == (480, 640, 3)
+
+    # Recepção pura: o RTT vem do par ICE, não do RTCP
+    assert stats["rtt_ms"] is not None and 0 < stats["rtt_ms"] < 1000
+    assert stats["jitter_ms"] is not None and stats["jitter_ms"] >= 0
+    assert stats["packets_lost"] >= 0
+    assert 0.0 <= stats["loss_percent"] <= 100.0
+    # A taxa de bits precisa de duas amostras; o laço de estatísticas já fez a primeira
+    assert stats["bitrate_kbps"] is not None and stats["bitrate_kbps"] > 0
+    assert all(set(report) >= {"rtt_ms", "jitter_ms", "packets_lost", "loss_percent", "bitrate_kbps"}
+               for report in reports)
+
+async def run_renegotiation():
+    first = aiortc.RTCPeerConnection()
+    first.addTrack(VideoStreamTrack())
+    signaling = LoopbackSignaling(first)
+    receiver = WebRTCReceiver(signaling, PEER_ID, stats_interval=0.5)
+    frames = []
+    receiver.on_frame = frames.append
+
+    second = aiortc.RTCPeerConnection()
+    second.addTrack(VideoStreamTrack())
+    try:
+        await first.setLocalDescription(await first.createOffer())
+        offer_from(signaling, first)
+        await wait_for(lambda: len(frames) >= 5)
+        old_pc = receiver.pc
+
+        # O celular reinicia a sessão com uma nova oferta
+        signaling.sender = second
+        await second.setLocalDescription(await second.createOffer())
+        offer_from(signaling, second)
+        await wait_for(lambda: receiver.pc is not old_pc and receiver.pc is not None)
+        before = len(frames)
+        await wait_for(lambda: len(frames) >= before + 5)
+        return old_pc, receiver.pc.connectionState
+    finally:
+        receiver.close()
+        await asyncio.sleep(0.1)
+        await first.close()
+        await second.close()
+
+def test_renegotiation_closes_previous_connection():
+    old_pc, new_state = asyncio.run(run_renegotiation())
+
+    assert old_pc.connectionState == "closed"
+    # Transportes da conexão anterior liberados, não só esquecidos
+    assert all(receiver.transport.state == "closed" for receiver in old_pc.getReceivers())
+    assert new_state == "connected"
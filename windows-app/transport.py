@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ajuste do socket de streaming por perfil de transporte
+Webcam Remota Universal - Perfil de Transporte
+
+O socket do stream Wi-Fi/USB ficava com os padrões do sistema: Nagle
+ligado nas mensagens de controle, buffer de recepção padrão e leitura
+bloqueante com o timeout da conexão (10 s) durante todo o stream.
+
+Cada perfil define:
+
+    nodelay / quickack   mensagens de controle e ACKs saem sem esperar
+    buffer_rtts          buffer de recepção em múltiplos do produto banda x atraso,
+                         somado ao maior frame recente (cada frame chega de rajada)
+    min/max_buffer       limites do buffer (o sistema pode limitar mais)
+    keepalive            (ocioso, intervalo, tentativas) para detectar o celular morto
+    read_timeout         segundos sem dados até considerar o stream parado
+
+Buffer pequeno segura poucos frames atrasados quando a tela engasga
+(menor latência); buffer grande mantém a vazão em enlaces com mais
+atraso. O buffer é dimensionado pela taxa medida do stream (stats) e o
+RTT medido (linkprobe) e reajustado durante o stream.
+
+Medir latência e vazão de cada perfil num enlace local com atraso emulado:
+
+    python -m transport --benchmark --delay-ms 20 --link-mbps 100
+"""
+
+import sys
+import time
+import socket
+import struct
+import argparse
+from collections import deque
+from threading import Thread, Condition
+
+PROFILES = {
+    "low_latency": {
+        "label": "Baixa latência",
+        "nodelay": True,
+        "quickack": True,
+        "buffer_rtts": 1.5,
+        "min_buffer": 64 * 1024,
+        "max_buffer": 1024 * 1024,
+        "keepalive": (5, 2, 3),
+        "read_timeout": 5.0
+    },
+    "balanced": {
+        "label": "Equilibrado",
+        "nodelay": True,
+        "quickack": False,
+        "buffer_rtts": 2.5,
+        "min_buffer": 128 * 1024,
+        "max_buffer": 4 * 1024 * 1024,
+        "keepalive": (10, 3, 3),
+        "read_timeout": 10.0
+    },
+    "high_throughput": {
+        "label": "Alta vazão",
+        "nodelay": False,
+        "quickack": False,
+        "buffer_rtts": 4.0,
+        "min_buffer": 256 * 1024,
+        "max_buffer": 8 * 1024 * 1024,
+        "keepalive": (30, 10, 3),
+        "read_timeout": 20.0
+    }
+}
+
+DEFAULT_PROFILE = "balanced"
+
+# Estimativas usadas antes de haver medição
+DEFAULT_RTT_MS = 20.0
+DEFAULT_MBPS = 20.0
+
+# Reajuste do buffer durante o stream
+RETUNE_INTERVAL = 2.0
+RETUNE_THRESHOLD = 0.25  # só mexe se o tamanho ideal mudou mais que isso
+
+def bdp_bytes(mbps, rtt_ms):
+    """Produto banda x atraso: bytes em trânsito para manter `mbps`"""
+    return int(mbps * 1e6 / 8 * rtt_ms / 1000)
+
+def receive_buffer(profile, mbps, rtt_ms, frame_bytes=0):
+    """Tamanho do buffer de recepção do perfil para a taxa, o RTT e o frame dados
+
+    Só o produto banda x atraso na taxa média não basta: o frame sai do
+    celular de uma vez e, com a janela menor que ele, espera RTTs extras.
+    """
+    settings = PROFILES[profile]
+    size = bdp_bytes(mbps, rtt_ms) * settings["buffer_rtts"] + frame_bytes
+    return int(min(max(size, settings["min_buffer"]), settings["max_buffer"]))
+
+def set_keepalive(sock, idle, interval, count):
+    """Ligar keepalive TCP com os tempos dados, onde o sistema permite"""
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval)
+        if hasattr(socket, "TCP_KEEPCNT"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, count)
+    elif hasattr(socket, "SIO_KEEPALIVE_VALS"):
+        # Windows antigo: tempos em ms, tentativas fixas pelo sistema
+        sock.ioctl(socket.SIO_KEEPALIVE_VALS, (1, idle * 1000, interval * 1000))
+    elif hasattr(socket, "TCP_KEEPALIVE"):
+        # macOS: só o tempo ocioso
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle)
+
+class TransportTuner:
+    """Aplica um perfil ao socket do stream e reajusta o buffer pela taxa medida
+
+    Uso: `before_connect` (o buffer inicial define a escala da janela TCP,
+    então vem antes do connect), `after_connect`, `streaming` depois do
+    handshake e `after_receive` a cada frame na thread de rede.
+    """
+
+    def __init__(self, profile=DEFAULT_PROFILE, rtt_ms=None, mbps=None):
+        if profile not in PROFILES:
+            print(f"Erro no perfil de transporte: '{profile}' desconhecido, usando '{DEFAULT_PROFILE}'")
+            profile = DEFAULT_PROFILE
+        self.profile = profile
+        self.settings = PROFILES[profile]
+        self.rtt_ms = rtt_ms or DEFAULT_RTT_MS
+        self.mbps = mbps or DEFAULT_MBPS
+
+        self.frame_bytes = 0        # maior frame na última janela de reajuste
+        self.rcvbuf = None          # tamanho pedido
+        self.effective_rcvbuf = None  # o que o sistema reporta
+        self.retunes = 0
+
+        self._quickack = self.settings["quickack"] and hasattr(socket, "TCP_QUICKACK")
+        self._last_check = None
+        self._last_bytes = 0
+        self._window_frame = 0
+
+    def before_connect(self, sock):
+        self.set_receive_buffer(sock, receive_buffer(self.profile, self.mbps, self.rtt_ms, self.frame_bytes))
+
+    def after_connect(self, sock):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 if self.settings["nodelay"] else 0)
+        try:
+            set_keepalive(sock, *self.settings["keepalive"])
+        except OSError as e:
+            print(f"Erro ao configurar keepalive: {e}")
+        self._rearm_quickack(sock)
+
+    def streaming(self, sock):
+        """Timeout de leitura do perfil no lugar do timeout da conexão"""
+        sock.settimeout(self.settings["read_timeout"])
+
+    def apply(self, sock):
+        """Aplicar o perfil a um socket já em stream (troca de perfil)"""
+        self.after_connect(sock)
+        self.set_receive_buffer(sock, receive_buffer(self.profile, self.mbps, self.rtt_ms, self.frame_bytes))
+        self.streaming(sock)
+
+    def set_receive_buffer(self, sock, size):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+        self.rcvbuf = size
+        self.effective_rcvbuf = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+
+    def after_receive(self, sock, bytes_total, frame_bytes=0, now=None):
+        """Chamado após cada frame: QUICKACK e reajuste periódico do buffer
+
+        A taxa vem do contador de bytes do StreamStats (só leitura; a
+        janela móvel de `sample` é da interface).
+        """
+        self._rearm_quickack(sock)
+        self._window_frame = max(self._window_frame, frame_bytes)
+        now = time.monotonic() if now is None else now
+        if self._last_check is None:
+            self._last_check, self._last_bytes = now, bytes_total
+            return
+        elapsed = now - self._last_check
+        if elapsed < RETUNE_INTERVAL:
+            return
+
+        mbps = (bytes_total - self._last_bytes) * 8 / elapsed / 1e6
+        self._last_check, self._last_bytes = now, bytes_total
+        frame_bytes, self._window_frame = self._window_frame, 0
+        if mbps <= 0:
+            return
+        self.mbps = mbps
+        self.frame_bytes = frame_bytes
+        size = receive_buffer(self.profile, mbps, self.rtt_ms, frame_bytes)
+        if abs(size - self.rcvbuf) > self.rcvbuf * RETUNE_THRESHOLD:
+            self.set_receive_buffer(sock, size)
+            self.retunes += 1
+
+    def _rearm_quickack(self, sock):
+        # No Linux o QUICKACK desliga sozinho; precisa ser religado após as leituras
+        if self._quickack:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+
+    def summary(self):
+        return {
+            "profile": self.profile,
+            "rtt_ms": self.rtt_ms,
+            "mbps": self.mbps,
+            "rcvbuf": self.rcvbuf,
+            "effective_rcvbuf": self.effective_rcvbuf,
+            "retunes": self.retunes
+        }
+
+# Benchmark: enlace local com atraso, banda e janela de recepção emulados
+
+class ShapedLink:
+    """Repassa bytes de `source` para `target` como um enlace com atraso
+
+    Cada bloco chega `delay` segundos depois de transmitido na banda dada,
+    e só pode haver `window` bytes sem confirmação (a confirmação volta
+    outro `delay` após a entrega), como a janela TCP do receptor. Ligar os
+    sockets por um repassador local é o que dá para fazer sem netem.
+    """
+
+    CHUNK = 16 * 1024
+
+    def __init__(self, source, target, delay, mbps, window):
+        self.source = source
+        self.target = target
+        self.delay = delay
+        self.bytes_per_second = mbps * 1e6 / 8
+        self.window = window
+
+        self._queue = deque()  # (entrega, dados)
+        self._acks = deque()   # (confirmação, bytes)
+        self._in_flight = 0
+        self._link_free = 0.0
+        self._closed = False
+        self._cond = Condition()
+
+    def start(self):
+        Thread(target=self._transmit, daemon=True).start()
+        Thread(target=self._deliver, daemon=True).start()
+
+    def _release_acks(self, now):
+        while self._acks and self._acks[0][0] <= now:
+            self._in_flight -= self._acks.popleft()[1]
+
+    def _transmit(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.perf_counter()
+                    self._release_acks(now)
+                    if self._in_flight < self.window:
+                        break
+                    self._cond.wait(self._acks[0][0] - now if self._acks else 0.01)
+                allowed = min(self.CHUNK, self.window - self._in_flight)
+            try:
+                data = self.source.recv(allowed)
+            except OSError:
+                data = b""
+            with self._cond:
+                now = time.perf_counter()
+                if not data:
+                    self._closed = True
+                    self._cond.notify_all()
+                    return
+                self._link_free = max(now, self._link_free) + len(data) / self.bytes_per_second
+                self._queue.append((self._link_free + self.delay, data))
+                self._in_flight += len(data)
+                self._cond.notify_all()
+
+    def _deliver(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    break
+                due, data = self._queue.popleft()
+            wait = due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                self.target.sendall(data)
+            except OSError:
+                break
+            with self._cond:
+                self._acks.append((time.perf_counter() + self.delay, len(data)))
+                self._cond.notify_all()
+        try:
+            self.target.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+def _socket_pair(before_connect=None):
+    """(cliente, servidor aceito) por loopback; `before_connect` ajusta o cliente"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if before_connect:
+        before_connect(client)
+    client.connect(server.getsockname())
+    accepted, _ = server.accept()
+    server.close()
+    return client, accepted
+
+def _shaped_connection(tuner, delay, link_mbps):
+    """(socket do celular, socket do PC ajustado pelo perfil) ligados pelo enlace emulado"""
+    # Lado do celular: buffer de envio fixo em todos os perfis
+    phone, link_in = _socket_pair(lambda sock: sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 64 * 1024))
+    receiver, link_out = _socket_pair(tuner.before_connect)
+    # O repassador não pode virar um buffer escondido: a fila fica no receptor
+    link_out.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 16 * 1024)
+    tuner.after_connect(receiver)
+    ShapedLink(link_in, link_out, delay, link_mbps, tuner.rcvbuf).start()
+    return phone, receiver
+
+# Idade a partir da qual o frame mostrado já está visivelmente atrasado
+STALE_MS = 150
+
+def _read_exact(sock, view):
+    received = 0
+    while received < len(view):
+        count = sock.recv_into(view[received:])
+        if not count:
+            return False
+        received += count
+    return True
+
+def _measure_throughput(profile, delay, link_mbps, stream_mbps, megabytes):
+    """Vazão de uma transferência contínua com o buffer dimensionado para o stream"""
+    tuner = TransportTuner(profile, rtt_ms=2000 * delay, mbps=stream_mbps)
+    phone, receiver = _shaped_connection(tuner, delay, link_mbps)
+    total = int(megabytes * 1024 * 1024)
+
+    def send():
+        chunk = bytes(64 * 1024)
+        for _ in range(total // len(chunk)):
+            phone.sendall(chunk)
+        phone.close()
+
+    Thread(target=send, daemon=True).start()
+    buffer = bytearray(256 * 1024)
+    first = last = None
+    received = 0
+    while True:
+        count = receiver.recv_into(buffer)
+        if not count:
+            break
+        last = time.perf_counter()
+        if first is None:
+            first = last
+        else:
+            received += count
+        tuner.after_receive(receiver, received)
+    receiver.close()
+    return {"mbps": received * 8 / (last - first) / 1e6 if last and last > first else 0.0,
+            "rcvbuf_kb": tuner.rcvbuf / 1024}
+
+def _measure_latency(profile, delay, link_mbps, frame_kb, fps, seconds, stall_every, stall_ms, decode_ms):
+    """Idade dos frames ao chegar à "tela", com engasgos periódicos do consumidor
+
+    Cada frame custa `decode_ms` ao consumidor, então uma fila formada
+    durante o engasgo leva tempo para esvaziar.
+
+    O celular captura no ritmo do fps e, enquanto o envio está bloqueado,
+    fica só com o frame mais novo (como o app faz); a idade conta a partir
+    da captura, então o atraso acumulado depende de quanto cabe nos buffers.
+    """
+    frame_bytes = frame_kb * 1024
+    stream_mbps = frame_bytes * 8 * fps / 1e6
+    tuner = TransportTuner(profile, rtt_ms=2000 * delay, mbps=stream_mbps)
+    tuner.frame_bytes = frame_bytes
+    phone, receiver = _shaped_connection(tuner, delay, link_mbps)
+    tuner.streaming(receiver)
+    counts = {"sent": 0, "dropped": 0}
+
+    def send():
+        payload = bytes(frame_bytes - 8)
+        interval = 1.0 / fps
+        start = time.perf_counter()
+        index = 0
+        while index * interval < seconds:
+            captured = start + index * interval
+            time.sleep(max(0.0, captured - time.perf_counter()))
+            phone.sendall(struct.pack("!Id", frame_bytes, captured) + payload)
+            counts["sent"] += 1
+            # Frames capturados durante o envio bloqueado: fica só o mais novo
+            latest = int((time.perf_counter() - start) / interval)
+            counts["dropped"] += max(0, latest - index - 1)
+            index = max(index + 1, latest)
+        phone.close()
+
+    Thread(target=send, daemon=True).start()
+    header = bytearray(12)
+    body = bytearray(frame_bytes - 8)
+    ages = []
+    received_bytes = 0
+    start = time.perf_counter()
+    next_stall = start + stall_every
+    try:
+        while _read_exact(receiver, memoryview(header)):
+            size, sent_at = struct.unpack("!Id", header)
+            if not _read_exact(receiver, memoryview(body)[:size - 8]):
+                break
+            time.sleep(decode_ms / 1000.0)
+            now = time.perf_counter()
+            ages.append(1000.0 * (now - sent_at))
+            received_bytes += size + 4
+            tuner.after_receive(receiver, received_bytes, size + 4)
+            if now >= next_stall:
+                time.sleep(stall_ms / 1000.0)  # Engasgo da interface
+                next_stall = time.perf_counter() + stall_every
+    except socket.timeout:
+        pass
+    elapsed = time.perf_counter() - start
+    receiver.close()
+
+    ages.sort()
+    return {
+        "median_ms": ages[len(ages) // 2] if ages else 0.0,
+        "p95_ms": ages[int(0.95 * (len(ages) - 1))] if ages else 0.0,
+        "max_ms": ages[-1] if ages else 0.0,
+        "stale": sum(1 for age in ages if age > STALE_MS) / len(ages) if ages else 0.0,
+        "fps": len(ages) / elapsed if elapsed else 0.0,
+        "dropped": counts["dropped"],
+        "rcvbuf_kb": tuner.rcvbuf / 1024
+    }
+
+def benchmark(delay_ms=20.0, link_mbps=100.0, frame_kb=150, fps=30, seconds=6.0,
+              stall_every=1.5, stall_ms=250, decode_ms=20, bulk_mb=16.0):
+    """Latência dos frames e vazão de cada perfil no enlace emulado"""
+    delay = delay_ms / 1000.0
+    stream_mbps = frame_kb * 1024 * 8 * fps / 1e6
+    results = {}
+    for profile in PROFILES:
+        results[profile] = {
+            "latency": _measure_latency(profile, delay, link_mbps, frame_kb, fps, seconds,
+                                        stall_every, stall_ms, decode_ms),
+            "throughput": _measure_throughput(profile, delay, link_mbps, stream_mbps, bulk_mb)
+        }
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="transport", description="Perfis de transporte - benchmark")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="medir latência e vazão de cada perfil num enlace local com atraso")
+    parser.add_argument("--delay-ms", type=float, default=20.0, help="atraso em cada sentido")
+    parser.add_argument("--link-mbps", type=float, default=100.0, help="banda do enlace emulado")
+    parser.add_argument("--frame-kb", type=int, default=150, help="tamanho de cada frame")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--seconds", type=float, default=6.0)
+    parser.add_argument("--stall-ms", type=int, default=250, help="engasgo da tela a cada 1,5 s")
+    parser.add_argument("--decode-ms", type=int, default=20, help="custo de cada frame na tela")
+    args = parser.parse_args((argv or sys.argv)[1:])
+
+    if not args.benchmark:
+        parser.print_help()
+        return 0
+
+    stream_mbps = args.frame_kb * 1024 * 8 * args.fps / 1e6
+    print(f"Enlace {args.link_mbps:.0f} Mbit/s, RTT {2 * args.delay_ms:.0f} ms; stream "
+          f"{args.frame_kb} KB x {args.fps} fps ({stream_mbps:.0f} Mbit/s), tela {args.decode_ms} ms/frame "
+          f"com engasgo de {args.stall_ms} ms")
+    results = benchmark(args.delay_ms, args.link_mbps, args.frame_kb, args.fps, args.seconds,
+                        stall_ms=args.stall_ms, decode_ms=args.decode_ms)
+    for profile, row in results.items():
+        latency, throughput = row["latency"], row["throughput"]
+        print(f"  {PROFILES[profile]['label']:15} buffer {latency['rcvbuf_kb']:6.0f} KB  "
+              f"idade mediana {latency['median_ms']:6.1f} ms  p95 {latency['p95_ms']:6.1f}  "
+              f"máx {latency['max_ms']:6.1f}  >{STALE_MS} ms {latency['stale'] * 100:4.1f}%  "
+              f"{latency['fps']:4.1f} fps ({latency['dropped']} descartados)  "
+              f"vazão {throughput['mbps']:6.1f} Mbit/s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,26 +9,20 @@ import os
 import sys
 import socket
 import platform
-import psutil
 from datetime import datetime, timedelta
 from PyQt5.QtCore import QThread, pyqtSignal
 from PyQt5.QtGui import QIcon, QPixmap
 from PyQt5.QtWidgets import QMessageBox
 
-def get_local_ip():
-    """Obter endereço IP local da máquina"""
-    try:
-        # Conectar a um endereço externo para determinar interface ativa
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-        s.close()
-        return ip
-    except Exception:
-        return "127.0.0.1"
+# Funções de rede ficam em netutils (sem Qt); reexportadas por compatibilidade
+from netutils import get_local_addresses, get_local_ip, is_port_available, find_available_port
+from linkprobe import probe_link, describe as describe_link
 
 def get_system_info():
     """Obter informações do sistema"""
+    # psutil é importado aqui para não pesar na inicialização
+    import psutil
+    
     return {
         "platform": platform.system(),
         "platform_release": platform.release(),
@@ -65,22 +59,6 @@ def calculate_bitrate(bytes_received, duration_seconds):
     kbps = (bits / duration_seconds) / 1000
     return round(kbps, 2)
 
-def is_port_available(port):
-    """Verificar se uma porta está disponível"""
-    try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.bind(('localhost', port))
-            return True
-    except OSError:
-        return False
-
-def find_available_port(start_port=5000, max_attempts=100):
-    """Encontrar uma porta disponível"""
-    for port in range(start_port, start_port + max_attempts):
-        if is_port_available(port):
-            return port
-    return None
-
 def resource_path(relative_path):
     """Obter caminho para recursos (funciona com PyInstaller)"""
     try:
@@ -120,9 +98,10 @@ def show_warning_dialog(parent, title, message):
     msg_box.exec_()
 
 class NetworkTestThread(QThread):
-    """Thread para testar conectividade de rede"""
+    """Thread para medir o enlace com o dispositivo (RTT, jitter e vazão)"""
     
     result_ready = pyqtSignal(bool, str)  # success, message
+    probe_ready = pyqtSignal(dict)  # resultado de linkprobe.probe_link
     
     def __init__(self, host, port):
         super().__init__()
@@ -131,13 +110,11 @@ class NetworkTestThread(QThread):
     
     def run(self):
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(5)
-            result = sock.connect_ex((self.host, self.port))
-            sock.close()
+            result = probe_link(self.host, self.port)
+            self.probe_ready.emit(result)
             
-            if result == 0:
-                self.result_ready.emit(True, f"Conexão com {self.host}:{self.port} bem-sucedida")
+            if result["connect_ms"] is not None:
+                self.result_ready.emit(True, f"{self.host}:{self.port} - {describe_link(result)}")
             else:
                 self.result_ready.emit(False, f"Não foi possível conectar a {self.host}:{self.port}")
                 
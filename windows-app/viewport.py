@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Zoom e deslocamento locais sobre o frame recebido
+Webcam Remota Universal - Viewport
+
+Com zoom, só a região visível é convertida e redimensionada: o recorte é
+uma *view* NumPy do frame (sem cópia) e o trabalho por repaint fica
+limitado ao tamanho da tela, não ao do frame (4K ou não).
+
+Medir o custo de desenho por nível de zoom:
+
+    python -m viewport --benchmark
+"""
+
+import sys
+import time
+import argparse
+
+from startup import lazy_import
+from control import FULL_FRAME
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+MIN_ZOOM = 1.0
+MAX_ZOOM = 8.0
+
+class Viewport:
+    """Estado do zoom local: fator e centro normalizado (0-1) da região visível"""
+
+    def __init__(self):
+        self.zoom = MIN_ZOOM
+        self.center_x = 0.5
+        self.center_y = 0.5
+
+    def reset(self):
+        self.zoom = MIN_ZOOM
+        self.center_x = 0.5
+        self.center_y = 0.5
+
+    @property
+    def zoomed(self):
+        return self.zoom > MIN_ZOOM
+
+    def set_zoom(self, zoom, anchor=None):
+        """Mudar o zoom mantendo `anchor` (x, y normalizados na tela) no mesmo lugar"""
+        zoom = min(max(zoom, MIN_ZOOM), MAX_ZOOM)
+        if anchor is not None:
+            # Ponto do frame sob o cursor antes e depois deve coincidir
+            anchor_x, anchor_y = anchor
+            frame_x = self.center_x + (anchor_x - 0.5) / self.zoom
+            frame_y = self.center_y + (anchor_y - 0.5) / self.zoom
+            self.center_x = frame_x - (anchor_x - 0.5) / zoom
+            self.center_y = frame_y - (anchor_y - 0.5) / zoom
+        self.zoom = zoom
+        self._clamp()
+
+    def pan(self, dx, dy):
+        """Deslocar por uma fração da tela (ex: arrasto do mouse / largura do widget)"""
+        self.center_x -= dx / self.zoom
+        self.center_y -= dy / self.zoom
+        self._clamp()
+
+    def _clamp(self):
+        half = 0.5 / self.zoom
+        self.center_x = min(max(self.center_x, half), 1.0 - half)
+        self.center_y = min(max(self.center_y, half), 1.0 - half)
+
+    def visible_rect(self):
+        """Região visível em frações do frame completo (x, y, largura, altura)"""
+        size = 1.0 / self.zoom
+        return (self.center_x - size / 2, self.center_y - size / 2, size, size)
+
+    def roi(self, width, height, source=FULL_FRAME):
+        """Retângulo (x, y, largura, altura) visível num frame de `width` x `height`
+
+        `source` é a região do frame completo que o frame recebido cobre
+        (ROI aplicada pelo dispositivo); a parte visível é mapeada para
+        dentro dela.
+        """
+        visible_x, visible_y, visible_width, visible_height = self.visible_rect()
+        source_x, source_y, source_width, source_height = source
+        roi_width = max(int(round(width * min(visible_width / source_width, 1.0))), 1)
+        roi_height = max(int(round(height * min(visible_height / source_height, 1.0))), 1)
+        x = int(round((visible_x - source_x) / source_width * width))
+        y = int(round((visible_y - source_y) / source_height * height))
+        x = min(max(x, 0), width - roi_width)
+        y = min(max(y, 0), height - roi_height)
+        return x, y, roi_width, roi_height
+
+def render_roi(frame, viewport, target_size, source=FULL_FRAME, rgb=False, out=None):
+    """Recortar, redimensionar e converter para RGB só a região visível
+
+    O recorte é uma view do frame. A conversão de cor é feita sobre a menor
+    das duas imagens (recorte ou saída), então o custo nunca passa do
+    tamanho da tela, qualquer que seja a resolução do frame. Com `rgb` o
+    frame já está em RGB (modo YUV direto) e só é recortado e escalado.
+    `out` (altura, largura, 3) recebe o resultado sem alocar a saída.
+    """
+    height, width = frame.shape[:2]
+    x, y, roi_width, roi_height = viewport.roi(width, height, source)
+    roi = frame[y:y + roi_height, x:x + roi_width]
+
+    def convert(image, dst=None):
+        if rgb:
+            if dst is None:
+                return np.ascontiguousarray(image)
+            np.copyto(dst, image)
+            return dst
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=dst)
+
+    target_width, target_height = target_size
+    if (roi_width, roi_height) == (target_width, target_height):
+        return convert(roi, out)
+    if roi_width * roi_height <= target_width * target_height:
+        # Ampliando: converter o recorte (menor) e depois ampliar
+        return cv2.resize(convert(roi), (target_width, target_height), dst=out,
+                          interpolation=cv2.INTER_LINEAR)
+    # Reduzindo: reduzir primeiro e converter só a saída, no próprio lugar
+    # (INTER_AREA custa ~5x mais e não compensa para exibição)
+    small = cv2.resize(roi, (target_width, target_height), dst=out, interpolation=cv2.INTER_LINEAR)
+    return small if rgb else cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=small)
+
+def render_full(frame, viewport, target_size):
+    """Caminho ingênuo (referência do benchmark): converter e escalar o frame inteiro, depois recortar"""
+    height, width = frame.shape[:2]
+    target_width, target_height = target_size
+    scaled_size = (int(target_width * viewport.zoom), int(target_height * viewport.zoom))
+    full = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), scaled_size,
+                      interpolation=cv2.INTER_LINEAR)
+    x, y, _, _ = viewport.roi(*scaled_size)
+    return full[y:y + target_height, x:x + target_width].copy()
+
+def benchmark(frame_size=(3840, 2160), target_size=(1280, 720), zooms=(1, 2, 4, 8), repeat=30):
+    """Custo por repaint (ms) de cada caminho em cada nível de zoom"""
+    width, height = frame_size
+    rng = np.random.default_rng(0)
+    frame = cv2.resize(rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8),
+                       (width, height), interpolation=cv2.INTER_LINEAR)
+
+    results = []
+    for zoom in zooms:
+        viewport = Viewport()
+        viewport.set_zoom(zoom)
+        row = {"zoom": zoom}
+        for name, render in (("roi_ms", render_roi), ("full_ms", render_full)):
+            render(frame, viewport, target_size)  # Aquecimento
+            start = time.perf_counter()
+            for i in range(repeat):
+                # Deslocar um pouco a cada repaint, como num arrasto
+                viewport.pan(0.002 * (1 if i % 2 else -1), 0.0)
+                render(frame, viewport, target_size)
+            row[name] = 1000.0 * (time.perf_counter() - start) / repeat
+        results.append(row)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="viewport", description="Zoom local - benchmark de desenho")
+    parser.add_argument("--benchmark", action="store_true", help="medir custo por nível de zoom")
+    parser.add_argument("--frame", default="3840x2160", help="resolução do frame (LxA)")
+    parser.add_argument("--target", default="1280x720", help="tamanho da área de vídeo (LxA)")
+    args = parser.parse_args((argv or sys.argv)[1:])
+
+    frame_size = tuple(int(value) for value in args.frame.split("x"))
+    target_size = tuple(int(value) for value in args.target.split("x"))
+    print(f"Frame {args.frame} -> tela {args.target} (ms por repaint; 60 fps = 16.7 ms)")
+    for row in benchmark(frame_size, target_size):
+        print(f"  zoom {row['zoom']}x: só região visível {row['roi_ms']:.2f} ms, "
+              f"frame inteiro {row['full_ms']:.2f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
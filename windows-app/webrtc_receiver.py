@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Recepção de vídeo WebRTC (H.264/VP8 via RTP)
+Webcam Remota Universal - Receptor WebRTC
+"""
+
+import asyncio
+from functools import partial
+
+from startup import lazy_import
+
+aiortc = lazy_import("aiortc")
+aiortc_sdp = lazy_import("aiortc.sdp")
+stun = lazy_import("aioice.stun")
+
+# Relógio RTP de vídeo (H.264/VP8); o jitter do RTCP vem nessa unidade
+VIDEO_CLOCK_RATE = 90000
+
+class WebRTCReceiver:
+    """Sessão WebRTC somente-recepção com um dispositivo pareado
+
+    O dispositivo móvel é quem cria a oferta (como em webrtc-utils.js); aqui
+    respondemos, recebemos a trilha de vídeo e entregamos cada frame já
+    decodificado (array BGR) em `on_frame`. A sinalização usa o loop do
+    SignalingClient, então todas as corrotinas rodam na mesma thread.
+    """
+
+    def __init__(self, signaling, peer_id, stats_interval=1.0):
+        self.signaling = signaling
+        self.peer_id = peer_id
+        self.stats_interval = stats_interval
+
+        # Callbacks (chamados a partir das threads do loop/executor)
+        self.on_frame = None  # (frame BGR)
+        self.on_state = None  # (estado da conexão)
+        self.on_stats = None  # (dict com rtt_ms, jitter_ms, packets_lost, loss_percent)
+
+        self.pc = None
+        self.closed = False
+        self._tasks = []
+        self._last_bytes = None
+        self._last_stats_time = None
+
+        signaling.on('webrtc-offer', self._on_offer)
+        signaling.on('webrtc-ice-candidate', self._on_ice_candidate)
+
+    def close(self):
+        """Encerrar sessão (seguro para chamar de qualquer thread)"""
+        if self.closed:
+            return
+        self.closed = True
+
+        self.signaling.off('webrtc-offer', self._on_offer)
+        self.signaling.off('webrtc-ice-candidate', self._on_ice_candidate)
+        self.signaling.submit(self._close())
+
+    # Sinalização (executado na thread do loop)
+
+    def _on_offer(self, data):
+        if data.get('from') not in (None, self.peer_id) or self.closed:
+            return
+        asyncio.ensure_future(self._handle_offer(data['offer']))
+
+    def _on_ice_candidate(self, data):
+        if data.get('from') not in (None, self.peer_id) or self.closed or not self.pc:
+            return
+
+        candidate = data.get('candidate') or {}
+        sdp = candidate.get('candidate', '')
+        if not sdp:
+            return  # Fim dos candidatos
+
+        try:
+            ice = aiortc_sdp.candidate_from_sdp(sdp.split(':', 1)[1])
+            ice.sdpMid = candidate.get('sdpMid')
+            ice.sdpMLineIndex = candidate.get('sdpMLineIndex')
+            asyncio.ensure_future(self.pc.addIceCandidate(ice))
+        except Exception as e:
+            print(f"Erro ao adicionar candidato ICE: {e}")
+
+    async def _handle_offer(self, offer):
+        try:
+            if self.pc:
+                # Renegociação: encerrar a conexão anterior (e suas trilhas) antes de trocar
+                await self._close()
+            self.pc = aiortc.RTCPeerConnection()
+            self.pc.on('track', self._on_track)
+            self.pc.on('connectionstatechange', partial(self._on_connection_state_change, self.pc))
+
+            await self.pc.setRemoteDescription(
+                aiortc.RTCSessionDescription(sdp=offer['sdp'], type=offer['type'])
+            )
+            answer = await self.pc.createAnswer()
+            # O aiortc reúne todos os candidatos aqui; a resposta já os contém
+            await self.pc.setLocalDescription(answer)
+
+            self.signaling.send_answer(self.peer_id, {
+                'type': self.pc.localDescription.type,
+                'sdp': self.pc.localDescription.sdp
+            })
+
+            self._tasks.append(asyncio.ensure_future(self._stats_loop()))
+
+        except Exception as e:
+            print(f"Erro ao processar oferta WebRTC: {e}")
+            self._notify_state('failed')
+
+    def _on_track(self, track):
+        if track.kind == 'video':
+            self._tasks.append(asyncio.ensure_future(self._consume_video(track)))
+
+    def _on_connection_state_change(self, pc):
+        # Estados de uma conexão já substituída (renegociação) ou encerrada não contam
+        if pc is self.pc:
+            self._notify_state(pc.connectionState)
+
+    def _notify_state(self, state):
+        if self.on_state:
+            self.on_state(state)
+
+    # Vídeo
+
+    async def _consume_video(self, track):
+        loop = asyncio.get_running_loop()
+        try:
+            while not self.closed:
+                frame = await track.recv()
+
+                # A conversão para BGR gera o único array do frame; ele segue
+                # por referência para o player e a gravação. Roda fora do loop
+                # para não atrasar o RTP/RTCP.
+                image = await loop.run_in_executor(None, partial(frame.to_ndarray, format='bgr24'))
+
+                if self.on_frame and not self.closed:
+                    self.on_frame(image)
+
+        except aiortc.MediaStreamError:
+            pass  # Trilha encerrada
+        except Exception as e:
+            print(f"Erro ao receber vídeo WebRTC: {e}")
+
+    # Estatísticas
+
+    async def _stats_loop(self):
+        try:
+            while not self.closed and self.pc:
+                await asyncio.sleep(self.stats_interval)
+                if self.on_stats and self.pc:
+                    self.on_stats(await self.collect_stats())
+        except asyncio.CancelledError:
+            pass
+
+    async def collect_stats(self):
+        """Resumir estatísticas RTCP da trilha recebida"""
+        stats = {'rtt_ms': None, 'jitter_ms': None, 'packets_lost': 0, 'loss_percent': 0.0,
+                 'bitrate_kbps': None}
+        report = await self.pc.getStats()
+        now = asyncio.get_running_loop().time()
+
+        packets_received = 0
+        for stat in report.values():
+            if stat.type == 'transport' and stat.bytesReceived is not None:
+                if self._last_bytes is not None and now > self._last_stats_time:
+                    stats['bitrate_kbps'] = int((stat.bytesReceived - self._last_bytes) * 8
+                                                / (now - self._last_stats_time) / 1000)
+                self._last_bytes = stat.bytesReceived
+                self._last_stats_time = now
+
+            if stat.type == 'inbound-rtp' and stat.kind == 'video':
+                if stat.jitter is not None:
+                    stats['jitter_ms'] = stat.jitter * 1000 / VIDEO_CLOCK_RATE
+                stats['packets_lost'] = stat.packetsLost or 0
+                packets_received = stat.packetsReceived or 0
+
+            # Só quem envia mídia recebe RR com tempo de ida e volta
+            rtt = getattr(stat, 'roundTripTime', None)
+            if rtt is not None:
+                stats['rtt_ms'] = rtt * 1000
+
+        total = packets_received + stats['packets_lost']
+        if total:
+            stats['loss_percent'] = 100.0 * stats['packets_lost'] / total
+
+        if stats['rtt_ms'] is None:
+            stats['rtt_ms'] = await self._measure_rtt()
+
+        return stats
+
+    async def _measure_rtt(self, timeout=1.0):
+        """Ida e volta de um pedido STUN no par ICE eleito, em ms (ou None)
+
+        Somente recepção, o aiortc não tem RTT no RTCP (ele sai do RR que
+        o emissor recebe). O pedido é o mesmo da verificação de
+        consentimento do aioice, então o celular responde sem mudança; é
+        o equivalente ao currentRoundTripTime do par de candidatos.
+        """
+        try:
+            receivers = self.pc.getReceivers() if self.pc else []
+            connection = receivers[0].transport.transport._connection if receivers else None
+            pairs = list(connection._nominated.values()) if connection else []
+        except AttributeError:
+            return None
+        if not pairs:
+            return None
+
+        pair = pairs[0]
+        request = connection.build_request(pair, nominate=False)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            await asyncio.wait_for(pair.protocol.request(
+                request, pair.remote_addr,
+                integrity_key=connection.remote_password.encode('utf8'),
+                retransmissions=0
+            ), timeout)
+        except (stun.TransactionError, asyncio.TimeoutError, ConnectionError):
+            return None
+        return (loop.time() - start) * 1000
+
+    async def _close(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+        if self.pc:
+            pc, self.pc = self.pc, None
+            await pc.close()
+        self._last_bytes = None
+        self._last_stats_time = None
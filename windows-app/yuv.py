@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Frames sem compressão (YUV 4:2:0) no canal enquadrado
+Webcam Remota Universal - Modo YUV
+
+Pelo túnel USB (adb forward, que chega aqui como o canal Wi-Fi em
+127.0.0.1) sobra banda, e o que pesa na latência é codificar JPEG no
+celular e decodificar no PC. No modo YUV o dispositivo envia os planos
+da câmera como estão (NV21 ou I420), precedidos de um cabeçalho curto:
+
+    "YUV1"  largura  altura  formato  (3 bytes livres)  timestamp (µs)
+     4 B     2 B      2 B     1 B                         8 B
+
+O modo é negociado pelo canal de controle ("set_format", ver control.py);
+dispositivos que não o conhecem continuam enviando JPEG.
+
+A conversão YUV -> RGB é uma única chamada vetorizada do OpenCV, feita
+direto num buffer de saída reaproveitado entre frames.
+
+Comparar com o caminho JPEG por socket local:
+
+    python -m yuv --benchmark
+"""
+
+import sys
+import time
+import queue
+import socket
+import struct
+import argparse
+from threading import Thread
+
+from startup import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+RAW_MAGIC = b"YUV1"
+RAW_HEADER = struct.Struct("!4sHHB3xQ")
+
+# Formato -> código no cabeçalho
+RAW_FORMATS = {"nv21": 1, "i420": 2}
+_FORMAT_NAMES = {code: name for name, code in RAW_FORMATS.items()}
+
+# Formato -> (conversão para BGR, conversão para RGB), nomes das constantes do cv2
+_CONVERSIONS = {
+    "nv21": ("COLOR_YUV2BGR_NV21", "COLOR_YUV2RGB_NV21"),
+    "i420": ("COLOR_YUV2BGR_I420", "COLOR_YUV2RGB_I420")
+}
+
+def is_raw_payload(payload):
+    """Conteúdo enquadrado é um frame YUV (e não JPEG ou controle)?"""
+    return payload[:4] == RAW_MAGIC
+
+def raw_frame_size(width, height):
+    """Bytes dos planos 4:2:0 (Y inteiro + crominância em 1/4)"""
+    return width * height * 3 // 2
+
+def pack_raw_frame(planes, width, height, fmt="nv21", timestamp=None):
+    """Montar conteúdo de um frame YUV (cabeçalho + planos, sem o tamanho)"""
+    if timestamp is None:
+        timestamp = time.time()
+    header = RAW_HEADER.pack(RAW_MAGIC, width, height, RAW_FORMATS[fmt], int(timestamp * 1e6))
+    return header + memoryview(planes).cast("B")
+
+def parse_raw_header(payload):
+    """(largura, altura, formato, timestamp) ou None se o frame é inválido"""
+    if len(payload) < RAW_HEADER.size:
+        return None
+    magic, width, height, code, timestamp = RAW_HEADER.unpack_from(payload)
+    fmt = _FORMAT_NAMES.get(code)
+    if magic != RAW_MAGIC or fmt is None or width % 2 or height % 2:
+        return None
+    if len(payload) - RAW_HEADER.size != raw_frame_size(width, height):
+        return None
+    return width, height, fmt, timestamp / 1e6
+
+def raw_planes(payload, width, height):
+    """Planos como array (altura * 3/2, largura), view sobre o payload sem cópia"""
+    return np.frombuffer(payload, np.uint8, raw_frame_size(width, height),
+                         RAW_HEADER.size).reshape(height * 3 // 2, width)
+
+def bgr_to_yuv(frame, fmt="nv21"):
+    """Converter frame BGR para planos 4:2:0 (lado do dispositivo / testes)"""
+    height, width = frame.shape[:2]
+    i420 = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420)
+    if fmt == "i420":
+        return i420
+
+    # NV21: Y seguido de V e U intercalados
+    quarter = (height // 2) * (width // 2)
+    chroma = i420[height:].reshape(-1)
+    nv21 = np.empty_like(i420)
+    nv21[:height] = i420[:height]
+    interleaved = nv21[height:].reshape(-1)
+    interleaved[0::2] = chroma[quarter:]
+    interleaved[1::2] = chroma[:quarter]
+    return nv21
+
+class YuvConverter:
+    """Converte frames YUV recebidos para BGR ou RGB
+
+    `to_display` escreve sempre no mesmo buffer RGB (realocado só quando a
+    resolução muda), então quem o recebe não deve guardar o array além do
+    próximo frame; é o caminho direto para a tela. `to_bgr` devolve um
+    array que pode ser mantido (gravação, fotos, visualizadores), tirado do
+    `pool` (framepool.FramePool) quando há um.
+    """
+
+    def __init__(self, pool=None):
+        self.pool = pool
+        self.conversions = 0
+        self.convert_seconds = 0.0
+        self.reallocations = 0
+        self._display = None
+
+    def to_bgr(self, payload):
+        """Frame BGR próprio de quem chama (None se o payload é inválido)"""
+        header = parse_raw_header(payload)
+        if header is None:
+            return None
+        width, height = header[:2]
+        dst = self.pool.acquire((height, width, 3)) if self.pool else None
+        return self._convert(payload, 0, dst, header)
+
+    def to_display(self, payload):
+        """Frame RGB no buffer reaproveitado (None se o payload é inválido)"""
+        header = parse_raw_header(payload)
+        if header is None:
+            return None
+        width, height = header[:2]
+        if self._display is None or self._display.shape[:2] != (height, width):
+            self._display = np.empty((height, width, 3), np.uint8)
+            self.reallocations += 1
+        return self._convert(payload, 1, self._display, header)
+
+    def _convert(self, payload, rgb, dst, header=None):
+        header = header or parse_raw_header(payload)
+        if header is None:
+            return None
+        start = time.perf_counter()
+        width, height, fmt = header[:3]
+        code = getattr(cv2, _CONVERSIONS[fmt][rgb])
+        frame = cv2.cvtColor(raw_planes(payload, width, height), code, dst=dst)
+        self.conversions += 1
+        self.convert_seconds += time.perf_counter() - start
+        return frame
+
+    @property
+    def average_ms(self):
+        return 1000.0 * self.convert_seconds / self.conversions if self.conversions else 0.0
+
+# Benchmark: JPEG x YUV por um socket local (como o túnel USB)
+
+def _recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise ConnectionError("socket fechado")
+        received += count
+    return bytes(buffer)
+
+def _receiver_loop(sock, handle, done):
+    """Receber frames enquadrados e preparar cada um para a tela"""
+    try:
+        while True:
+            size = struct.unpack("!I", _recv_exact(sock, 4))[0]
+            if not size:
+                return
+            payload = _recv_exact(sock, size)
+            received = time.perf_counter()
+            handle(payload)
+            done.put((received, time.perf_counter()))
+    except ConnectionError:
+        return
+
+def _run_mode(frames, encode, handle):
+    """Enviar cada frame e esperar a tela receber (latência sem fila)"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    sender = socket.create_connection(server.getsockname())
+    receiver, _ = server.accept()
+    server.close()
+
+    done = queue.Queue()
+    thread = Thread(target=_receiver_loop, args=(receiver, handle, done), daemon=True)
+    thread.start()
+
+    encode_ms, transfer_ms, display_ms, total_ms, sizes = [], [], [], [], []
+    try:
+        for frame in frames:
+            start = time.perf_counter()
+            payload = encode(frame)
+            encoded = time.perf_counter()
+            sender.sendall(struct.pack("!I", len(payload)) + payload)
+            received, shown = done.get(timeout=10)
+            encode_ms.append(1000.0 * (encoded - start))
+            transfer_ms.append(1000.0 * (received - encoded))
+            display_ms.append(1000.0 * (shown - received))
+            total_ms.append(1000.0 * (shown - start))
+            sizes.append(len(payload))
+        sender.sendall(struct.pack("!I", 0))
+    finally:
+        sender.close()
+        thread.join(timeout=2)
+        receiver.close()
+
+    # Descartar o aquecimento (primeiros frames alocam buffers)
+    skip = min(5, len(total_ms) - 1)
+    median = lambda values: float(np.median(values[skip:]))
+    return {
+        "encode_ms": median(encode_ms),
+        "transfer_ms": median(transfer_ms),
+        "display_ms": median(display_ms),
+        "total_ms": median(total_ms),
+        "p95_ms": float(np.percentile(total_ms[skip:], 95)),
+        "frame_kb": float(np.mean(sizes)) / 1024,
+        "mbps_at_30fps": float(np.mean(sizes)) * 30 * 8 / 1e6
+    }
+
+def benchmark(resolutions=((1280, 720), (1920, 1080)), count=60, jpeg_quality=80, fmt="nv21"):
+    """Latência do envio à imagem RGB pronta para a tela, por modo e resolução
+
+    No modo JPEG o "envio" inclui a codificação (o celular faz isso por
+    hardware, então o número é um teto); no modo YUV a câmera já entrega
+    os planos e o envio é só a cópia.
+    """
+    results = []
+    for width, height in resolutions:
+        rng = np.random.default_rng(3)
+        scene = cv2.resize(rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8),
+                           (width, height), interpolation=cv2.INTER_LINEAR)
+        frames = []
+        for index in range(count):
+            frame = np.roll(scene, index * 4, axis=1)
+            cv2.putText(frame, f"#{index}", (16, 48), cv2.FONT_HERSHEY_SIMPLEX, 1.5,
+                        (255, 255, 255), 3)
+            frames.append(frame)
+        planes = [bgr_to_yuv(frame, fmt) for frame in frames]
+
+        params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        jpeg_encode = lambda frame: cv2.imencode(".jpg", frame, params)[1].tobytes()
+        jpeg_display = lambda payload: cv2.cvtColor(
+            cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+
+        converter = YuvConverter()
+        raw_encode = lambda yuv: pack_raw_frame(yuv, width, height, fmt)
+
+        row = {"resolution": f"{width}x{height}"}
+        row["jpeg"] = _run_mode(frames, jpeg_encode, jpeg_display)
+        row["raw"] = _run_mode(planes, raw_encode, converter.to_display)
+        row["raw_reallocations"] = converter.reallocations
+        results.append(row)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="yuv", description="Modo YUV sem compressão - benchmark")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="comparar JPEG e YUV por socket local em 720p e 1080p")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--quality", type=int, default=80, help="qualidade JPEG de referência")
+    parser.add_argument("--format", choices=sorted(RAW_FORMATS), default="nv21")
+    args = parser.parse_args((argv or sys.argv)[1:])
+
+    if not args.benchmark:
+        parser.print_help()
+        return 0
+
+    print("Latência envio -> RGB pronto para a tela (mediana, ms), socket local")
+    for row in benchmark(count=args.frames, jpeg_quality=args.quality, fmt=args.format):
+        print(f"{row['resolution']}:")
+        for mode in ("jpeg", "raw"):
+            result = row[mode]
+            label = "JPEG" if mode == "jpeg" else args.format.upper()
+            print(f"  {label:5} envio {result['encode_ms']:6.2f}  transferência {result['transfer_ms']:6.2f}  "
+                  f"tela {result['display_ms']:6.2f}  total {result['total_ms']:6.2f} "
+                  f"(p95 {result['p95_ms']:6.2f})  {result['frame_kb']:7.0f} KB/frame  "
+                  f"{result['mbps_at_30fps']:6.0f} Mbit/s a 30 fps")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())